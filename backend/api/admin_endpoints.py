@@ -583,7 +583,7 @@ async def search_challenges_admin(
         logger.info(f"Admin {user_id} searching challenges: {search_term}")
         
         # Search in challenge service
-        all_challenges = list(challenge_service.challenges.values())
+        all_challenges = await challenge_service.get_all_challenges()
         
         matching_challenges = []
         for challenge in all_challenges:
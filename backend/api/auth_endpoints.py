@@ -214,7 +214,7 @@ async def refresh_token(request: RefreshRequest):
     """Refresh access token using refresh token"""
     try:
         # Verify refresh token
-        payload = auth_service.verify_token(request.refresh_token)
+        payload = await auth_service.verify_token_async(request.refresh_token)
         
         if payload.get("type") != "refresh":
             raise HTTPException(
@@ -323,7 +323,7 @@ async def logout(
 ):
     """Logout user and revoke token"""
     try:
-        payload = auth_service.verify_token(credentials.credentials)
+        payload = await auth_service.verify_token_async(credentials.credentials)
         user_id = payload.get("sub")
         
         # Revoke token
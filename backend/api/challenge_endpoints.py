@@ -11,11 +11,12 @@ import logging
 
 from services.auth_service import get_current_user, get_authenticated_user, get_current_user_with_permissions
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from services.challenge_service import challenge_service, ChallengeNotFoundError, ChallengeAccessDeniedError
+from services.challenge_service import challenge_service, ChallengeServiceError, ChallengeNotFoundError, ChallengeAccessDeniedError
 from services.upload_service import ChunkedUploadService
 from services.cloud_storage_service import create_cloud_storage_service, CloudStorageError
 from services.database_service import get_db_service
 from services.rate_limiter import RateLimiter
+from services.signed_url_cache import get_signed_url_cache
 
 # Database service will be accessed via get_db_service() function
 from models import (
@@ -85,26 +86,20 @@ def extract_s3_key_from_url(url: str) -> Optional[str]:
     
     return None
 
-async def get_signed_url_for_video(video_url: str, user_id: str = None) -> str:
-    """Convert media reference to accessible URL for video streaming"""
-    if not video_url:
-        return video_url
-    
-    # Check if it's already a full S3 URL (always regenerate these to ensure they're not expired)
+def _storage_key_for_video_url(video_url: str) -> Optional[str]:
+    """Storage key to presign for a media reference, or None if it is not a storage object"""
+    # Full S3 URLs are always re-signed so stale signatures are never handed out
     if video_url.startswith('https://') and 's3.amazonaws.com' in video_url:
-        # Extract S3 key from the URL and regenerate signed URL
-        s3_key = extract_s3_key_from_url(video_url)
-        if s3_key:
-            try:
-                cloud_storage = await get_cloud_storage_service()
-                if cloud_storage:
-                    signed_url = await cloud_storage.get_file_url(s3_key)
-                    logger.info(f"Regenerated S3 signed URL for key: {s3_key}")
-                    return signed_url
-            except Exception as e:
-                logger.error(f"Failed to regenerate S3 signed URL for {video_url}: {e}")
-        # If we can't regenerate, fall through to other checks
+        return extract_s3_key_from_url(video_url)
     
+    # Plain S3 key (e.g. "merged_video_12_1759007972.mp4")
+    if not video_url.startswith(('http://', 'https://', '/api/')) and '.' in video_url:
+        return video_url
+    
+    return None
+
+def _resolve_unsigned_video_url(video_url: str, user_id: str = None) -> str:
+    """Resolve a media reference that is not (or could not be) presigned from storage"""
     # Check if it's already a full URL (http/https) that's not S3
     if video_url.startswith(('http://', 'https://')):
         return video_url
@@ -113,30 +108,6 @@ async def get_signed_url_for_video(video_url: str, user_id: str = None) -> str:
     if video_url.startswith('/api/') and ('?' in video_url):
         return video_url
     
-    # Extract S3 key from S3 URL patterns
-    s3_key = extract_s3_key_from_url(video_url)
-    if s3_key:
-        try:
-            # Handle S3 storage
-            cloud_storage = await get_cloud_storage_service()
-            if cloud_storage:
-                signed_url = await cloud_storage.get_file_url(s3_key)
-                return signed_url
-        except Exception as e:
-            logger.error(f"Failed to generate S3 signed URL for {video_url}: {e}")
-    
-    # Handle plain S3 key (not a full URL) - generate signed URL directly
-    if not video_url.startswith(('http://', 'https://', '/api/')) and '.' in video_url:
-        # This looks like a plain S3 key (e.g., "merged_video_12_1759007972.mp4")
-        try:
-            cloud_storage = await get_cloud_storage_service()
-            if cloud_storage:
-                signed_url = await cloud_storage.get_file_url(video_url)
-                logger.info(f"Generated signed URL for S3 key: {video_url}")
-                return signed_url
-        except Exception as e:
-            logger.error(f"Failed to generate signed URL for S3 key {video_url}: {e}")
-    
     # Handle media ID - generate signed URL for local media access
     media_id = None
     if video_url.startswith('/api/v1/media/'):
@@ -160,6 +131,59 @@ async def get_signed_url_for_video(video_url: str, user_id: str = None) -> str:
     # Fallback: return original URL
     return video_url
 
+async def get_signed_urls_for_videos(video_urls, user_id: str = None) -> dict:
+    """
+    Convert a batch of media references to accessible URLs for video streaming
+    
+    Storage keys are served from the signed URL cache; all cache misses are
+    presigned together in one batch.
+    
+    Returns:
+        Mapping of each non-empty input reference to its accessible URL
+    """
+    references = list(dict.fromkeys(url for url in video_urls if url))
+    storage_keys = {url: _storage_key_for_video_url(url) for url in references}
+    
+    signed_by_key = {}
+    wanted_keys = [key for key in storage_keys.values() if key]
+    if wanted_keys:
+        try:
+            cloud_storage = await get_cloud_storage_service()
+            if cloud_storage:
+                signed_by_key = await get_signed_url_cache().get_urls(cloud_storage, wanted_keys)
+        except Exception as e:
+            logger.error(f"Failed to generate signed URLs for {len(wanted_keys)} storage keys: {e}")
+    
+    resolved = {}
+    for url in references:
+        key = storage_keys[url]
+        if key and key in signed_by_key:
+            resolved[url] = signed_by_key[key]
+        else:
+            resolved[url] = _resolve_unsigned_video_url(url, user_id)
+    return resolved
+
+async def get_signed_url_for_video(video_url: str, user_id: str = None) -> str:
+    """Convert media reference to accessible URL for video streaming"""
+    if not video_url:
+        return video_url
+    return (await get_signed_urls_for_videos([video_url], user_id))[video_url]
+
+def _statement_video_urls(challenge_dict: dict) -> list:
+    """streaming_url and media_url references of every statement in a challenge dict"""
+    urls = []
+    for statement in challenge_dict.get("statements") or []:
+        urls.append(statement.get("streaming_url"))
+        urls.append(statement.get("media_url"))
+    return urls
+
+def _apply_signed_statement_urls(challenge_dict: dict, signed_urls: dict) -> None:
+    for statement in challenge_dict.get("statements") or []:
+        if statement.get("streaming_url"):
+            statement["streaming_url"] = signed_urls[statement["streaming_url"]]
+        if statement.get("media_url"):
+            statement["media_url"] = signed_urls[statement["media_url"]]
+
 # Optional authentication dependency
 security = HTTPBearer(auto_error=False)
 
@@ -171,7 +195,7 @@ async def get_current_user_optional(credentials: Optional[HTTPAuthorizationCrede
         # Use the existing auth service to verify the token
         from services.auth_service import AuthService
         auth_service = AuthService()
-        payload = auth_service.verify_token(credentials.credentials)
+        payload = await auth_service.verify_token_async(credentials.credentials)
         return payload.get("sub")
     except:
         return None
@@ -313,20 +337,17 @@ async def get_challenge(
         # Transform challenge to dictionary and enrich with creator name
         challenge_dict = enrich_challenge_with_creator_name(challenge)
         
-        # Generate signed URLs for statement media
-        if challenge_dict.get("statements"):
-            for statement in challenge_dict["statements"]:
-                if statement.get("streaming_url"):
-                    statement["streaming_url"] = await get_signed_url_for_video(statement["streaming_url"], user_id)
-                if statement.get("media_url"):
-                    statement["media_url"] = await get_signed_url_for_video(statement["media_url"], user_id)
+        # Generate signed URLs for statement media and the merged video in one batch
+        merged_video_url = challenge.merged_video_url if challenge.is_merged_video else None
+        signed_urls = await get_signed_urls_for_videos(
+            _statement_video_urls(challenge_dict) + [merged_video_url], user_id
+        )
+        _apply_signed_statement_urls(challenge_dict, signed_urls)
         
         # Add merged video information if available with signed URL
-        if challenge.is_merged_video and challenge.merged_video_url:
-            # Generate signed URL for merged video
-            signed_video_url = await get_signed_url_for_video(challenge.merged_video_url, user_id)
+        if merged_video_url:
             # Update the merged_video_url field directly in the response
-            challenge_dict["merged_video_url"] = signed_video_url
+            challenge_dict["merged_video_url"] = signed_urls[merged_video_url]
         
         # Convert back to Challenge model for response
         return Challenge(**challenge_dict)
@@ -348,11 +369,13 @@ async def list_challenges_authenticated(
     page: Optional[int] = None,
     page_size: Optional[int] = None,
     include_drafts: bool = False,
+    cursor: Optional[str] = None,
     user_id: str = Depends(get_current_user)
 ) -> dict:
     """
     List challenges with merged video data (authenticated endpoint)
-    Returns challenges with complete merged video metadata including segment information
+    Returns challenges with complete merged video metadata including segment information.
+    Pass next_cursor from the previous response as cursor to page by keyset.
     """
     try:
         logger.info(f"Authenticated user {user_id} listing challenges (skip={skip}, limit={limit}, page={page}, page_size={page_size}, include_drafts={include_drafts})")
@@ -372,32 +395,26 @@ async def list_challenges_authenticated(
         status_filter = None if include_drafts else ChallengeStatus.PUBLISHED
         creator_filter = user_id if include_drafts else None
         
-        challenges, total_count = await challenge_service.list_challenges(
+        result = await challenge_service.list_challenges_page(
             page=actual_page,
             page_size=actual_page_size,
             creator_id=creator_filter,
             status=status_filter,
-            user_id=user_id
+            user_id=user_id,
+            cursor=cursor
         )
+        challenges, total_count = result.challenges, result.total_count
         
         logger.debug(f"Retrieved {len(challenges)} challenges for authenticated user")
         
         # Enhance challenges with merged video data and creator names
-        enhanced_challenges = []
+        challenge_dicts = []
+        merged_video_urls = []
         for challenge in challenges:
             challenge_dict = enrich_challenge_with_creator_name(challenge)
+            merged_video_url = None
             
-            # Generate signed URLs for statement media
-            if challenge_dict.get("statements"):
-                for statement in challenge_dict["statements"]:
-                    if statement.get("streaming_url"):
-                        statement["streaming_url"] = await get_signed_url_for_video(statement["streaming_url"], user_id)
-                    if statement.get("media_url"):
-                        statement["media_url"] = await get_signed_url_for_video(statement["media_url"], user_id)
-            
-            # Add merged video information if available
             if challenge.is_merged_video:
-                # Generate signed URL for merged video
                 merged_video_url = challenge.merged_video_url
                 
                 # If merged_video_url is null, try to extract it from statements (legacy challenges)
@@ -405,14 +422,29 @@ async def list_challenges_authenticated(
                     # Look for merged video URL in the first statement (they all point to the same merged video)
                     first_statement = challenge_dict["statements"][0]
                     if first_statement.get("media_url"):
-                        # Extract S3 key from the statement's media_url
+                        # Extract S3 key from the statement's media_url (full S3 URL or plain key)
                         legacy_url = first_statement["media_url"]
-                        s3_key = extract_s3_key_from_url(legacy_url)
+                        s3_key = extract_s3_key_from_url(legacy_url) or _storage_key_for_video_url(legacy_url)
                         if s3_key:
                             merged_video_url = s3_key  # Use the S3 key for regeneration
                             logger.info(f"Extracted merged video S3 key from statements: {s3_key}")
-                
-                signed_video_url = await get_signed_url_for_video(merged_video_url, user_id)
+            
+            challenge_dicts.append(challenge_dict)
+            merged_video_urls.append(merged_video_url)
+        
+        # Generate signed URLs for the whole page in one batch
+        page_urls = merged_video_urls[:]
+        for challenge_dict in challenge_dicts:
+            page_urls.extend(_statement_video_urls(challenge_dict))
+        signed_urls = await get_signed_urls_for_videos(page_urls, user_id)
+        
+        enhanced_challenges = []
+        for challenge, challenge_dict, merged_video_url in zip(challenges, challenge_dicts, merged_video_urls):
+            _apply_signed_statement_urls(challenge_dict, signed_urls)
+            
+            # Add merged video information if available
+            if challenge.is_merged_video:
+                signed_video_url = signed_urls.get(merged_video_url, merged_video_url)
                 
                 challenge_dict["merged_video_info"] = {
                     "has_merged_video": True,
@@ -446,18 +478,22 @@ async def list_challenges_authenticated(
             
             enhanced_challenges.append(challenge_dict)
         
-        has_next = (actual_page * actual_page_size) < total_count
-        
         return {
             "challenges": enhanced_challenges,
             "total_count": total_count,
             "page": actual_page,
             "page_size": actual_page_size,
-            "has_next": has_next,
+            "has_next": result.next_cursor is not None,
+            "next_cursor": result.next_cursor,
             "authenticated": True,
             "user_id": user_id
         }
         
+    except ChallengeServiceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Failed to list challenges for authenticated user {user_id}: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -472,10 +508,12 @@ async def list_challenges_public(
     limit: int = 20,
     page: Optional[int] = None,
     page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
     user_id: Optional[str] = Depends(get_current_user_optional)
 ) -> dict:
     """
     List public challenges (legacy endpoint for backward compatibility)
+    Pass next_cursor from the previous response as cursor to page by keyset.
     """
     try:
         logger.info(f"User {user_id or 'anonymous'} listing public challenges (skip={skip}, limit={limit}, page={page}, page_size={page_size})")
@@ -494,45 +532,49 @@ async def list_challenges_public(
         from models import ChallengeStatus
         status_filter = ChallengeStatus.PUBLISHED
         
-        challenges, total_count = await challenge_service.list_challenges(
+        result = await challenge_service.list_challenges_page(
             page=actual_page,
             page_size=actual_page_size,
             creator_id=None,
-            status=status_filter
+            status=status_filter,
+            cursor=cursor
         )
+        challenges, total_count = result.challenges, result.total_count
         
         logger.debug(f"Retrieved {len(challenges)} public challenges")
         
         # Enhance challenges with signed URLs for video access and creator names
-        enhanced_challenges = []
-        for challenge in challenges:
-            challenge_dict = enrich_challenge_with_creator_name(challenge)
-            
-            # Generate signed URLs for statement media
-            if challenge_dict.get("statements"):
-                for statement in challenge_dict["statements"]:
-                    if statement.get("streaming_url"):
-                        statement["streaming_url"] = await get_signed_url_for_video(statement["streaming_url"])
-                    if statement.get("media_url"):
-                        statement["media_url"] = await get_signed_url_for_video(statement["media_url"])
+        enhanced_challenges = [enrich_challenge_with_creator_name(challenge) for challenge in challenges]
+        
+        # Generate signed URLs for the whole page in one batch
+        page_urls = []
+        for challenge, challenge_dict in zip(challenges, enhanced_challenges):
+            page_urls.extend(_statement_video_urls(challenge_dict))
+            if challenge.is_merged_video:
+                page_urls.append(challenge.merged_video_url)
+        signed_urls = await get_signed_urls_for_videos(page_urls)
+        
+        for challenge, challenge_dict in zip(challenges, enhanced_challenges):
+            _apply_signed_statement_urls(challenge_dict, signed_urls)
             
             # Generate signed URL for merged video if available
             if challenge.is_merged_video and challenge.merged_video_url:
-                signed_video_url = await get_signed_url_for_video(challenge.merged_video_url)
-                challenge_dict["merged_video_url"] = signed_video_url
-            
-            enhanced_challenges.append(challenge_dict)
-        
-        has_next = (actual_page * actual_page_size) < total_count
+                challenge_dict["merged_video_url"] = signed_urls[challenge.merged_video_url]
         
         return {
             "challenges": enhanced_challenges,
             "total_count": total_count,
             "page": actual_page,
             "page_size": actual_page_size,
-            "has_next": has_next
+            "has_next": result.next_cursor is not None,
+            "next_cursor": result.next_cursor
         }
         
+    except ChallengeServiceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Failed to list public challenges: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -1,7 +1,7 @@
 """
 Challenge Video API Endpoints - Multi-video upload for server-side merging
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, status
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Request, status
 from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from typing import List, Optional, Dict, Any
 from pathlib import Path
@@ -11,8 +11,9 @@ import subprocess
 from datetime import datetime
 
 from services.auth_service import get_current_user
-from services.upload_service import ChunkedUploadService, UploadServiceError, UploadErrorType
+from services.upload_service import ChunkedUploadService, UploadServiceError, UploadErrorType, RequestBodyStream, stream_to_file
 from services.video_merge_service import VideoMergeService, VideoMergeError, MergeSessionStatus
+from services.request_profiler import span
 from models import UploadSession, UploadStatus
 
 logger = logging.getLogger(__name__)
@@ -23,15 +24,25 @@ upload_service = ChunkedUploadService()
 merge_service = VideoMergeService()
 
 
+def _merge_queue_full(error: VideoMergeError) -> HTTPException:
+    """503 with Retry-After for a merge rejected because the merge queue is full"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after_seconds or 60)}
+    )
+
+
 def _is_ffmpeg_available() -> bool:
     """Check if FFmpeg/FFprobe is available for video validation"""
     try:
-        result = subprocess.run(
-            ["ffprobe", "-version"], 
-            capture_output=True, 
-            text=True, 
-            timeout=5
-        )
+        with span("subprocess", command="ffprobe"):
+            result = subprocess.run(
+                ["ffprobe", "-version"], 
+                capture_output=True, 
+                text=True, 
+                timeout=5
+            )
         return result.returncode == 0
     except (FileNotFoundError, subprocess.TimeoutExpired):
         return False
@@ -44,10 +55,11 @@ def _validate_video_with_ffprobe(video_path: Path, video_index: int) -> bool:
         return True  # Skip validation if FFprobe is not available
     
     try:
-        probe_result = subprocess.run([
-            'ffprobe', '-v', 'quiet', '-print_format', 'json',
-            '-show_format', str(video_path)
-        ], capture_output=True, text=True, timeout=10)
+        with span("subprocess", command="ffprobe"):
+            probe_result = subprocess.run([
+                'ffprobe', '-v', 'quiet', '-print_format', 'json',
+                '-show_format', str(video_path)
+            ], capture_output=True, text=True, timeout=10)
         
         if probe_result.returncode != 0:
             logger.error(f"Video {video_index} failed FFprobe validation: {probe_result.stderr}")
@@ -312,8 +324,10 @@ async def initiate_multi_video_upload(
 async def upload_video_chunk_for_merge(
     session_id: str,
     chunk_number: int,
-    file: UploadFile = File(...),
+    request: Request,
+    file: Optional[UploadFile] = File(None),
     chunk_hash: Optional[str] = Form(None),
+    x_chunk_hash: Optional[str] = Header(None),
     current_user: str = Depends(get_current_user)
 ):
     """
@@ -321,7 +335,9 @@ async def upload_video_chunk_for_merge(
     
     This endpoint handles chunk uploads for videos that will be merged.
     It uses the same chunked upload mechanism as regular uploads but
-    includes merge-specific metadata tracking.
+    includes merge-specific metadata tracking. The chunk may be sent as a
+    multipart "file" field or as a raw application/octet-stream body with
+    the hash in X-Chunk-Hash; either way it is streamed to disk in blocks.
     """
     try:
         # Verify session belongs to user and is a merge session
@@ -345,15 +361,12 @@ async def upload_video_chunk_for_merge(
                 detail="This endpoint is only for merge video uploads"
             )
         
-        # Read chunk data
-        chunk_data = await file.read()
-        
-        # Upload chunk using the existing service
-        updated_session, was_uploaded = await upload_service.upload_chunk(
+        # Stream chunk data to disk using the existing service
+        updated_session, was_uploaded = await upload_service.upload_chunk_stream(
             session_id=session_id,
             chunk_number=chunk_number,
-            chunk_data=chunk_data,
-            chunk_hash=chunk_hash
+            stream=file if file is not None else RequestBodyStream(request.stream()),
+            chunk_hash=chunk_hash or x_chunk_hash
         )
         
         # Get merge session info
@@ -537,7 +550,8 @@ async def complete_merge_video_upload(
                 
         except VideoMergeError as e:
             logger.warning(f"Failed to initiate merge for session {merge_session_id}: {e}")
-            merge_status = "failed"
+            # A full merge queue is temporary; the client can retry via /trigger
+            merge_status = "queue_full" if e.error_code == "QUEUE_FULL" else "failed"
         except Exception as e:
             logger.error(f"Unexpected error checking merge readiness for session {merge_session_id}: {e}")
             merge_status = "error"
@@ -662,6 +676,7 @@ async def get_merge_session_status(
             "merge_triggered": merge_triggered,
             "merge_status": merge_status,
             "merge_progress_percent": merge_progress,
+            "merge_queue_position": merge_status_info.get("queue_position") if merge_status_info else None,
             "merged_video_url": merge_status_info.get("merged_video_url") if merge_status_info else None,
             "merged_video_metadata": merge_status_info.get("merged_video_metadata") if merge_status_info else None
         }
@@ -809,13 +824,20 @@ async def trigger_merge_manually(
                     "merged_video_url": merge_status.get("merged_video_url"),
                     "completed_at": merge_status.get("completed_at", "").isoformat() if merge_status.get("completed_at") else None
                 }
-            elif current_status == MergeSessionStatus.PROCESSING:
+            elif current_status == MergeSessionStatus.PROCESSING and merge_service.is_merge_active(merge_session_id, merge_status):
                 return {
                     "message": "Merge already in progress",
                     "merge_session_id": merge_session_id,
                     "status": current_status,
                     "progress_percent": merge_status.get("progress", 0.0)
                 }
+            elif current_status == MergeSessionStatus.PENDING and merge_service.is_merge_active(merge_session_id, merge_status):
+                return {
+                    "message": "Merge already queued",
+                    "merge_session_id": merge_session_id,
+                    "status": current_status,
+                    "queue_position": merge_status.get("queue_position")
+                }
         
         # Check readiness and initiate merge
         readiness = await merge_service.check_merge_readiness(merge_session_id, current_user)
@@ -844,12 +866,15 @@ async def trigger_merge_manually(
             "status": merge_result["status"],
             "video_count": merge_result["video_count"],
             "estimated_duration_seconds": merge_result["estimated_duration_seconds"],
+            "queue_position": merge_result.get("queue_position"),
             "initiated_at": merge_result["initiated_at"]
         }
         
     except VideoMergeError as e:
         if e.error_code == "NOT_READY":
             raise HTTPException(status_code=400, detail=str(e))
+        elif e.error_code == "QUEUE_FULL":
+            raise _merge_queue_full(e)
         elif e.error_code == "FFMPEG_NOT_FOUND":
             raise HTTPException(status_code=503, detail=str(e))
         else:
@@ -971,6 +996,8 @@ async def get_merge_result(
             return {
                 "merge_session_id": merge_session_id,
                 "status": status_value,
+                "queue_position": merge_status.get("queue_position"),
+                "estimated_start_seconds": merge_status.get("estimated_start_seconds"),
                 "created_at": merge_status.get("created_at", "").isoformat() if merge_status.get("created_at") else None
             }
         
@@ -1060,12 +1087,7 @@ async def stream_merged_video(
         import aiofiles
         
         # Find the merge session that produced this video
-        merge_session = None
-        for session_id, session in merge_service.merge_sessions.items():
-            if (session.get("merged_video_metadata", {}).get("video_file_id") == video_file_id and
-                session.get("user_id") == current_user):
-                merge_session = session
-                break
+        merge_session = await merge_service.find_merge_session_by_video_file_id(video_file_id, current_user)
         
         if not merge_session:
             raise HTTPException(
@@ -1281,7 +1303,8 @@ async def upload_videos_for_merge_direct(
                 merge_result = await merge_service._process_merge_sync(
                     merge_session_id=merge_session_id,
                     video_paths=video_paths,
-                    quality="medium"
+                    quality="medium",
+                    user_id=current_user
                 )
                 
                 if merge_result["success"]:
@@ -1308,6 +1331,8 @@ async def upload_videos_for_merge_direct(
                     )
                     
             except VideoMergeError as e:
+                if e.error_code == "QUEUE_FULL":
+                    raise _merge_queue_full(e)
                 logger.error(f"Video merge error for session {merge_session_id}: {str(e)}")
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1315,6 +1340,9 @@ async def upload_videos_for_merge_direct(
                 )
                 
         finally:
+            # The placeholder only covers the synchronous merge above
+            merge_service.merge_sessions.pop(merge_session_id, None)
+            
             # Clean up temporary directory
             try:
                 shutil.rmtree(temp_dir)
@@ -1460,7 +1488,8 @@ async def merge_videos_from_media_ids(
                 merge_result = await merge_service._process_merge_sync(
                     merge_session_id=merge_session_id,
                     video_paths=video_paths,
-                    quality="medium"
+                    quality="medium",
+                    user_id=current_user
                 )
                 
                 if merge_result and merge_result.get("success"):
@@ -1487,6 +1516,8 @@ async def merge_videos_from_media_ids(
                     )
                     
             except VideoMergeError as e:
+                if e.error_code == "QUEUE_FULL":
+                    raise _merge_queue_full(e)
                 logger.error(f"Video merge error for session {merge_session_id}: {str(e)}")
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1601,6 +1632,73 @@ async def upload_temp_video_json(
         )
 
 
+@router.post("/upload-temp-video")
+async def upload_temp_video(
+    request: Request,
+    filename: str = "video.mp4",
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Upload a single video to temporary backend storage as a raw request body.
+    
+    Same result as /upload-temp-video-json without the base64 JSON envelope:
+    send the video bytes as the body (Content-Type: application/octet-stream,
+    fixed length or chunked transfer encoding) and the filename as a query
+    parameter. The body is written to disk block by block, so memory does not
+    grow with the video size.
+    """
+    from config import settings
+    
+    max_file_size = 50 * 1024 * 1024  # 50MB, as for the JSON upload
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_file_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Video file too large: {content_length} bytes (max: {max_file_size})"
+        )
+    
+    filename = Path(filename).name or "video.mp4"
+    temp_id = str(uuid.uuid4())
+    temp_dir = Path(settings.TEMP_DIR)
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    temp_file_path = temp_dir / f"temp_video_{temp_id}_{filename}"
+    
+    try:
+        size = await stream_to_file(RequestBodyStream(request.stream()), temp_file_path, max_file_size)
+    except UploadServiceError as e:
+        if e.error_type == UploadErrorType.FILE_TOO_LARGE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Video file too large (max: {max_file_size} bytes)"
+            )
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Temporary video upload failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process temporary video upload: {str(e)}"
+        )
+    
+    if size == 0:
+        temp_file_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body is empty"
+        )
+    
+    logger.info(f"Temporary video streamed for user {current_user}: {temp_file_path} (size: {size} bytes)")
+    
+    return {
+        "success": True,
+        "temp_id": temp_id,
+        "file_info": {
+            "filename": filename,
+            "size": size,
+            "temp_path": str(temp_file_path)
+        }
+    }
+
+
 @router.post("/merge-from-temp-ids")
 async def merge_from_temp_ids(
     temp_ids: List[str],
@@ -1651,11 +1749,16 @@ async def merge_from_temp_ids(
         
         # Use video merge service to merge temp files directly
         # video_files contains string paths, which is what merge_temp_videos expects
-        result = await merge_service.merge_temp_videos(
-            temp_video_files=video_files,
-            user_id=current_user,
-            quality_preset="medium"
-        )
+        try:
+            result = await merge_service.merge_temp_videos(
+                temp_video_files=video_files,
+                user_id=current_user,
+                quality_preset="medium"
+            )
+        except VideoMergeError as e:
+            if e.error_code == "QUEUE_FULL":
+                raise _merge_queue_full(e)
+            raise
         
         if not result["success"]:
             raise HTTPException(
@@ -49,7 +49,7 @@ async def debug_revenuecat_webhook(request: Request):
                 debug_info["steps"].append("✅ Token service initialized")
                 
                 # Get current balance
-                balance = token_service.get_user_balance(str(user['id']))
+                balance = await token_service.get_user_balance(str(user['id']))
                 debug_info["balance_info"] = {
                     "current_balance": balance.balance,
                     "last_updated": balance.last_updated
@@ -59,7 +59,7 @@ async def debug_revenuecat_webhook(request: Request):
                 # Test actual token granting
                 try:
                     debug_info["steps"].append("🧪 Testing token granting...")
-                    success = token_service.add_tokens_for_purchase(
+                    success = await token_service.add_tokens_for_purchase(
                         user_id=str(user['id']),
                         product_id=payload['event']['product_id'],
                         tokens_to_add=10,
@@ -73,7 +73,7 @@ async def debug_revenuecat_webhook(request: Request):
                     if success:
                         debug_info["steps"].append("✅ Token granting test SUCCEEDED")
                         # Get new balance
-                        new_balance = token_service.get_user_balance(str(user['id']))
+                        new_balance = await token_service.get_user_balance(str(user['id']))
                         debug_info["token_grant_test"]["new_balance"] = new_balance.balance
                     else:
                         debug_info["steps"].append("❌ Token granting test FAILED")
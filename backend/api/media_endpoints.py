@@ -22,7 +22,7 @@ from services.auth_service import (
     check_download_rate_limit,
     auth_service
 )
-from services.upload_service import UploadServiceError, UploadErrorType
+from services.upload_service import UploadServiceError, UploadErrorType, RequestBodyStream
 
 router = APIRouter(prefix="/api/v1/media", tags=["media"])
 media_service = MediaUploadService()
@@ -82,26 +82,31 @@ async def initiate_video_upload(
 async def upload_video_chunk(
     session_id: str,
     chunk_number: int,
-    file: UploadFile = File(...),
+    request: Request,
+    file: Optional[UploadFile] = File(None),
     chunk_hash: Optional[str] = Form(None),
+    x_chunk_hash: Optional[str] = Header(None),
     current_user: str = Depends(require_permission("media:upload"))
 ):
-    """Upload video chunk with validation"""
+    """
+    Upload video chunk with validation
+    
+    The chunk is either a multipart "file" field or a raw
+    application/octet-stream body (hash in X-Chunk-Hash), which skips
+    multipart spooling. Both are streamed to disk in fixed-size blocks.
+    """
     try:
         # Verify session belongs to user
         session = await media_service.upload_service.get_upload_status(session_id)
         if not session or session.user_id != current_user:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        # Read chunk data
-        chunk_data = await file.read()
-        
-        # Upload chunk
-        updated_session, was_uploaded = await media_service.upload_service.upload_chunk(
+        # Stream chunk data to disk
+        updated_session, was_uploaded = await media_service.upload_service.upload_chunk_stream(
             session_id=session_id,
             chunk_number=chunk_number,
-            chunk_data=chunk_data,
-            chunk_hash=chunk_hash
+            stream=file if file is not None else RequestBodyStream(request.stream()),
+            chunk_hash=chunk_hash or x_chunk_hash
         )
         
         return UploadChunkResponse(
@@ -4,17 +4,55 @@ Provides health checks, metrics, and alerts for monitoring systems
 """
 import logging
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from datetime import datetime
 
-from services.auth_service import get_current_user
+import services.media_index_service
+import services.signed_url_cache
+
+from services.auth_service import get_current_user, auth_service, require_permission
 from services.monitoring_service import media_monitor, AlertLevel
 from services.health_check_service import health_check_service
+from services.database_service import get_db_service
+from services.media_index_service import get_media_index_service
+from services.signed_url_cache import get_signed_url_cache
+from services.session_activity import get_session_activity_writer
+from services.merge_scheduler import get_merge_scheduler
+from services.merge_session_store import get_merge_session_store
+from services.metrics_registry import MetricsRegistry, metrics_registry
+from services.request_profiler import get_request_profiler
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/monitoring", tags=["monitoring"])
 
+# Unauthenticated scrape endpoint, served at the root like /health
+metrics_router = APIRouter(tags=["monitoring"])
+
+def _cache_metrics():
+    """Hit/miss counters and hit ratios of the caches that have been created"""
+    caches = {
+        "session": auth_service.session_cache,
+        "media_index": services.media_index_service.media_index_service,
+        "signed_url": services.signed_url_cache.signed_url_cache
+    }
+    stats = {name: cache.get_stats() for name, cache in caches.items() if cache is not None}
+    return [
+        ("cache_hits_total", "counter", "Cache hits by cache",
+         [({"cache": name}, s["hits"] + s.get("negative_hits", 0)) for name, s in stats.items()]),
+        ("cache_misses_total", "counter", "Cache misses by cache",
+         [({"cache": name}, s["misses"]) for name, s in stats.items()]),
+        ("cache_hit_ratio", "gauge", "Cache hits / lookups since process start by cache",
+         [({"cache": name}, s["hit_rate"]) for name, s in stats.items()])
+    ]
+
+metrics_registry.register_collector("caches", _cache_metrics)
+
+@metrics_router.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint: request, database, S3, processing stage and cache metrics"""
+    return Response(metrics_registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
 @router.get("/health")
 async def get_system_health():
     """Get current system health status - public endpoint for load balancers"""
@@ -49,7 +87,8 @@ async def get_detailed_health(current_user: str = Depends(get_current_user)):
             **health_data,
             "processing_stats_24h": processing_stats,
             "recent_alerts": recent_alerts,
-            "monitoring_system_health": system_health
+            "monitoring_system_health": system_health,
+            "database_pool": get_db_service().get_pool_stats()
         }
     except Exception as e:
         logger.error(f"Error getting detailed health: {str(e)}")
@@ -58,11 +97,12 @@ async def get_detailed_health(current_user: str = Depends(get_current_user)):
 @router.get("/stats")
 async def get_processing_stats(
     hours: int = Query(24, ge=1, le=168, description="Hours of history to include (1-168)"),
+    include_histograms: bool = Query(True, description="Include per-stage duration histogram buckets"),
     current_user: str = Depends(get_current_user)
 ):
     """Get processing statistics for the specified time period"""
     try:
-        stats = media_monitor.get_processing_stats(hours=hours)
+        stats = media_monitor.get_processing_stats(hours=hours, include_histograms=include_histograms)
         return {
             "time_period_hours": hours,
             "generated_at": datetime.utcnow().isoformat(),
@@ -140,6 +180,113 @@ async def get_system_metrics(
         logger.error(f"Error getting system metrics: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get system metrics")
 
+@router.get("/database/pool")
+async def get_database_pool_stats(current_user: str = Depends(get_current_user)):
+    """Get database connection pool utilisation (in use, waiting, wait times)"""
+    try:
+        return {
+            "pool": get_db_service().get_pool_stats(),
+            "generated_at": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error getting database pool stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get database pool statistics")
+
+@router.get("/cache/media")
+async def get_media_cache_stats(current_user: str = Depends(get_current_user)):
+    """Get media lookup and signed URL cache statistics (hits, misses, hit rates)"""
+    try:
+        return {
+            "media_index": get_media_index_service().get_stats(),
+            "signed_urls": get_signed_url_cache().get_stats(),
+            "generated_at": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error getting media cache stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get media cache statistics")
+
+@router.get("/auth/sessions")
+async def get_auth_session_stats(current_user: str = Depends(get_current_user)):
+    """Get verified session cache and batched last_accessed writer statistics (flush latency, batch size)"""
+    try:
+        return {
+            "session_cache": auth_service.session_cache.get_stats(),
+            "session_activity": get_session_activity_writer().get_stats(),
+            "generated_at": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error getting auth session stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get auth session statistics")
+
+@router.get("/merge/queue")
+async def get_merge_queue_stats(current_user: str = Depends(get_current_user)):
+    """Get merge scheduler statistics (running, queued, rejected, average wait) and merge session store activity"""
+    try:
+        return {
+            "merge_queue": get_merge_scheduler().get_stats(),
+            "merge_sessions": get_merge_session_store().get_stats(),
+            "generated_at": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error getting merge queue stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get merge queue statistics")
+
+@router.get("/profiling")
+async def get_profiling_status(current_user: str = Depends(get_current_user)):
+    """Get request profiling settings and counts (sampling, header trigger, kept traces)"""
+    return {
+        "profiling": get_request_profiler().get_stats(),
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+@router.put("/profiling")
+async def configure_profiling(
+    enabled: Optional[bool] = Query(None, description="Turn request sampling on or off"),
+    sample_percent: Optional[float] = Query(None, ge=0, le=100, description="Percentage of requests to profile (0-100)"),
+    current_user: str = Depends(require_permission("admin"))
+):
+    """Turn request profiling on or off and set the sample rate (admin only)"""
+    profiler = get_request_profiler()
+    profiler.configure(enabled=enabled, sample_percent=sample_percent)
+    logger.info(
+        f"Request profiling set to enabled={profiler.enabled} sample_percent={profiler.sample_percent} by user {current_user}"
+    )
+    return {
+        "profiling": profiler.get_stats(),
+        "configured_by": current_user,
+        "configured_at": datetime.utcnow().isoformat()
+    }
+
+@router.get("/profiling/traces")
+async def get_profiled_traces(
+    limit: int = Query(20, ge=1, le=200, description="Maximum number of traces to return"),
+    current_user: str = Depends(require_permission("admin"))
+):
+    """Get the slowest profiled requests, slowest first (admin only; fetch one by id for its span tree)"""
+    return {
+        "traces": get_request_profiler().get_traces(limit=limit),
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+@router.get("/profiling/traces/{trace_id}")
+async def get_profiled_trace(trace_id: str, current_user: str = Depends(require_permission("admin"))):
+    """Get one kept trace with its span tree (admin only; traces carry routes and SQL shapes)"""
+    trace = get_request_profiler().get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (it may have been displaced by slower requests)")
+    return trace
+
+@router.delete("/profiling/traces")
+async def clear_profiled_traces(current_user: str = Depends(require_permission("admin"))):
+    """Clear kept traces (admin only)"""
+    cleared = get_request_profiler().clear()
+    logger.info(f"Profiled traces cleared by user {current_user} (cleared {cleared} traces)")
+    return {
+        "message": f"Cleared {cleared} traces",
+        "cleared_by": current_user,
+        "cleared_at": datetime.utcnow().isoformat()
+    }
+
 @router.get("/sessions/active")
 async def get_active_sessions(current_user: str = Depends(get_current_user)):
     """Get currently active processing sessions"""
@@ -288,15 +435,11 @@ async def cleanup_monitoring_data(current_user: str = Depends(get_current_user))
         from datetime import timedelta
         cutoff_time = datetime.utcnow() - timedelta(hours=24)
         
-        original_processing_count = len(media_monitor.processing_metrics)
         original_system_count = len(media_monitor.system_metrics)
         original_alerts_count = len(media_monitor.alerts)
         
         # Keep recent data
-        media_monitor.processing_metrics = [
-            m for m in media_monitor.processing_metrics 
-            if m.start_time >= cutoff_time
-        ]
+        cleaned_processing = media_monitor.prune_processing_metrics(cutoff_time)
         
         media_monitor.system_metrics = [
             m for m in media_monitor.system_metrics 
@@ -306,7 +449,6 @@ async def cleanup_monitoring_data(current_user: str = Depends(get_current_user))
         # Keep last 100 alerts
         media_monitor.alerts = media_monitor.alerts[-100:] if len(media_monitor.alerts) > 100 else media_monitor.alerts
         
-        cleaned_processing = original_processing_count - len(media_monitor.processing_metrics)
         cleaned_system = original_system_count - len(media_monitor.system_metrics)
         cleaned_alerts = original_alerts_count - len(media_monitor.alerts)
         
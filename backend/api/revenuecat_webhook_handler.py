@@ -111,7 +111,7 @@ async def handle_revenuecat_webhook(
                 database_user_id = str(user["id"])  # Convert to string as expected by token service
                 logger.info(f"✅ Found user: email={revenuecat_user_id}, database_id={database_user_id}")
                 
-                success = token_service.add_tokens_for_purchase(
+                success = await token_service.add_tokens_for_purchase(
                     user_id=database_user_id,
                     product_id=product_id,
                     tokens_to_add=TOKENS_TO_GRANT,
@@ -1,14 +1,16 @@
 """
 S3 Media API Endpoints - Direct AWS S3 integration for media upload, streaming, and deletion
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, status
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request, status
 from fastapi.responses import JSONResponse
 from typing import Optional
 from pydantic import BaseModel
 import logging
 import base64
+import json
 
 from services.s3_media_service import get_s3_media_service, S3MediaService
+from services.upload_service import RequestBodyStream
 from services.auth_service import get_current_user  # Using simpler auth dependency
 
 logger = logging.getLogger(__name__)
@@ -107,6 +109,77 @@ async def upload_video_base64(
             detail="Internal server error during base64 upload"
         )
 
+@router.post("/upload-stream")
+async def upload_video_stream(
+    request: Request,
+    filename: str = "video.mp4",
+    content_type: Optional[str] = None,
+    metadata: Optional[str] = None,  # JSON string with video metadata
+    current_user: str = Depends(get_current_user),
+    s3_service: S3MediaService = Depends(get_s3_media_service)
+):
+    """
+    Upload video file to S3 as a raw request body (alternative to /upload-base64)
+    
+    - **Body**: Video bytes; fixed length or chunked transfer encoding
+    - **filename**: Original filename
+    - **content_type**: MIME type; defaults to the request Content-Type when that is video/*
+    - **metadata**: Optional JSON metadata string
+    - **Returns**: Same response as /upload-base64
+    - **Authentication**: Required
+    
+    The body is forwarded to S3 part by part as it arrives, without base64
+    overhead or buffering the whole video in memory.
+    """
+    if content_type is None:
+        header_type = request.headers.get("content-type", "")
+        content_type = header_type.split(";")[0].strip() if header_type.startswith("video/") else "video/mp4"
+    
+    parsed_metadata = None
+    if metadata:
+        try:
+            parsed_metadata = json.loads(metadata)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Invalid metadata JSON: {e}")
+    
+    try:
+        media_id, file_size = await s3_service.upload_video_stream_to_s3(
+            stream=RequestBodyStream(request.stream()),
+            content_type=content_type,
+            metadata=parsed_metadata
+        )
+        storage_url = await s3_service.generate_signed_url(media_id, expires_in=3600)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected streaming upload error for user {current_user}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during streaming upload"
+        )
+    
+    logger.info(f"Streamed video uploaded successfully by user {current_user}: {media_id}")
+    
+    return JSONResponse(
+        content={
+            "success": True,
+            "media_id": media_id,
+            "storage_url": storage_url,
+            "message": "Video uploaded successfully",
+            "file_info": {
+                "original_filename": filename,
+                "content_type": content_type,
+                "file_size": file_size
+            },
+            "metadata": parsed_metadata
+        },
+        status_code=status.HTTP_201_CREATED,
+        headers={
+            "X-Media-ID": media_id,
+            "X-Storage-Provider": "AWS-S3"
+        }
+    )
+
 @router.post("/upload")
 async def upload_video_to_s3(
     file: UploadFile = File(...),
@@ -237,7 +237,7 @@ async def create_test_challenge(request: SimpleChallengeRequest):
         
         # Store in challenge service
         challenge_service.challenges[challenge_id] = challenge
-        await challenge_service._save_challenges()  # Persist to disk
+        await challenge_service._save_challenge(challenge)  # Persist to database
         
         # Create response
         response = SimpleChallengeResponse(
@@ -95,7 +95,7 @@ async def get_token_balance(
                 detail="User ID not found in token"
             )
         
-        balance_response = token_service.get_user_balance(user_id)
+        balance_response = await token_service.get_user_balance(user_id)
         
         return TokenBalanceResponse(
             balance=balance_response.balance,
@@ -133,7 +133,7 @@ async def spend_tokens(
             metadata=spend_request.metadata or {}
         )
         
-        response = token_service.spend_tokens(user_id, spend_request_model)
+        response = await token_service.spend_tokens(user_id, spend_request_model)
         
         if not response.success:
             raise HTTPException(
@@ -173,7 +173,7 @@ async def get_transaction_history(
                 detail="User ID not found in token"
             )
         
-        transactions = token_service.get_transaction_history(user_id, limit)
+        transactions = await token_service.get_transaction_history(user_id, limit)
         
         return [
             TokenTransactionResponse(
@@ -208,7 +208,7 @@ async def test_db_connection():
     try:
         token_service = get_token_service()
         # Try to get balance for user 10
-        balance_response = token_service.get_user_balance("10")
+        balance_response = await token_service.get_user_balance("10")
         return {"success": True, "balance": balance_response.balance, "user_id": "10"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -228,7 +228,7 @@ async def test_token_add():
         amount = 25
         
         # Get initial balance
-        initial_balance = token_service.get_user_balance(user_id)
+        initial_balance = await token_service.get_user_balance(user_id)
         
         # Test each step individually
         steps = {}
@@ -288,7 +288,7 @@ async def test_token_add():
             steps["upsert_balance"] = f"Error: {str(e)}"
         
         # Get final balance
-        final_balance = token_service.get_user_balance(user_id)
+        final_balance = await token_service.get_user_balance(user_id)
         
         return {
             "steps": steps,
@@ -340,7 +340,7 @@ async def add_tokens_manually(
         token_service = get_token_service()
         
         # Get current balance
-        current_balance_response = token_service.get_user_balance(str(user_id))
+        current_balance_response = await token_service.get_user_balance(str(user_id))
         current_balance = current_balance_response.balance
         new_balance = current_balance + request.amount
         
@@ -361,7 +361,7 @@ async def add_tokens_manually(
         logger.info(f"Manually added {request.amount} tokens to user {user_id}, balance: {current_balance} -> {new_balance}")
         
         # Get the updated balance with proper timestamp
-        final_balance = token_service.get_user_balance(str(user_id))
+        final_balance = await token_service.get_user_balance(str(user_id))
         return final_balance
             
     except HTTPException:
@@ -470,7 +470,7 @@ async def revenuecat_webhook(
                     return {"status": "error", "message": f"User not found for email {app_user_id}"}
             
             # Process tokens with the correct user ID
-            token_service.add_tokens_for_purchase(
+            await token_service.add_tokens_for_purchase(
                 user_id=target_user_id,
                 product_id=product_id,
                 tokens_to_add=tokens_to_add,
@@ -498,7 +498,7 @@ async def simulate_revenuecat_purchase(
         token_service = get_token_service()
         
         # Simulate the webhook processing
-        success = token_service.add_tokens_for_purchase(
+        success = await token_service.add_tokens_for_purchase(
             user_id=user_email,
             product_id=product_id,
             tokens_to_add=tokens_to_add,
@@ -507,7 +507,7 @@ async def simulate_revenuecat_purchase(
         )
         
         if success:
-            balance_response = token_service.get_user_balance(user_email)
+            balance_response = await token_service.get_user_balance(user_email)
             return {
                 "success": True,
                 "tokens_added": tokens_to_add,
@@ -545,11 +545,11 @@ async def test_webhook_debug():
         
         # Test 3: Add tokens
         try:
-            success = token_service.add_tokens_for_testing(app_user_id, tokens_to_add, "Webhook debug test")
+            success = await token_service.add_tokens_for_testing(app_user_id, tokens_to_add, "Webhook debug test")
             result["tests"]["add_tokens"] = f"OK - Success: {success}"
             
             if success:
-                balance_response = token_service.get_user_balance(app_user_id)
+                balance_response = await token_service.get_user_balance(app_user_id)
                 result["tests"]["final_balance"] = f"OK - Balance: {balance_response.balance}"
             else:
                 result["tests"]["add_tokens"] = "ERROR - Returned False"
@@ -567,11 +567,11 @@ async def debug_user_balance(user_email: str):
     """Debug endpoint to check token balance for any user (no auth required)"""
     try:
         token_service = get_token_service()
-        balance_response = token_service.get_user_balance(user_email)
+        balance_response = await token_service.get_user_balance(user_email)
         
         # Also get transaction history to see recent activity
         try:
-            transactions = token_service.get_transaction_history(user_email, limit=10)
+            transactions = await token_service.get_transaction_history(user_email, limit=10)
             recent_transactions = [
                 {
                     "type": tx["transaction_type"],
@@ -20,11 +20,15 @@ class Settings(BaseSettings):
     MAX_CHUNK_SIZE: int = 10_485_760  # 10MB
     DEFAULT_CHUNK_SIZE: int = 1_048_576  # 1MB
     UPLOAD_SESSION_TIMEOUT: int = 3600  # 1 hour in seconds
+    UPLOAD_JOURNAL_COMPACT_RECORDS: int = 5000  # Upload session journal is rewritten once it holds this many records beyond one per live session
     
     # Security settings
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 240  # 4 hours for video recording sessions
+    AUTH_SESSION_CACHE_TTL_SECONDS: int = 60  # How long a verified session lookup is reused (also bounds cross-worker revocation delay)
+    AUTH_SESSION_CACHE_SIZE: int = 50_000  # Token hashes kept in the verified session cache
+    SESSION_ACTIVITY_FLUSH_SECONDS: float = 30.0  # user_sessions.last_accessed is written in batches this often
     
     # Token management settings
     REVENUECAT_WEBHOOK_SECRET: Optional[str] = None
@@ -34,6 +38,18 @@ class Settings(BaseSettings):
     DATABASE_URL: Optional[str] = None  # Railway PostgreSQL URL
     SQLALCHEMY_DATABASE_URL: Optional[str] = None
     
+    # Database connection pool settings
+    DB_POOL_MIN_SIZE: int = 1  # Connections kept open even when idle
+    DB_POOL_MAX_SIZE: int = 10  # Hard cap on open connections per worker
+    DB_POOL_MAX_LIFETIME_SECONDS: int = 1800  # Recycle connections older than 30 minutes
+    DB_POOL_IDLE_TIMEOUT_SECONDS: int = 300  # Close idle connections above min size after 5 minutes
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS: float = 30.0  # Max wait for a free connection
+    DB_POOL_HEALTH_CHECK_INTERVAL_SECONDS: int = 30  # Ping connections idle longer than this on checkout
+    DB_ASYNC_MAX_PENDING: int = 100  # Max queued + running async DB calls before callers wait for a slot
+    DB_STREAM_BATCH_SIZE: int = 500  # Rows fetched and parsed per batch when streaming challenges and guesses
+    CHALLENGE_NEGATIVE_TTL_SECONDS: int = 30  # Remember challenge IDs missing from the database for this long
+    CHALLENGE_NEGATIVE_CACHE_SIZE: int = 10_000  # Missing challenge IDs remembered at once
+    
     @property
     def database_url(self) -> str:
         """Get the appropriate database URL based on environment"""
@@ -63,6 +79,9 @@ class Settings(BaseSettings):
     
     # Rate limiting
     UPLOAD_RATE_LIMIT: int = 5  # uploads per hour per user
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per process), redis (shared by all workers) or database (rate_limit_records table)
+    RATE_LIMIT_REDIS_URL: Optional[str] = None  # e.g. redis://localhost:6379/0, required for the redis backend
+    RATE_LIMIT_BUCKET_SECONDS: int = 60  # Counter granularity for the redis backend
     
     # Video-specific settings
     MAX_VIDEO_DURATION_SECONDS: int = 300  # 5 minutes max
@@ -76,6 +95,27 @@ class Settings(BaseSettings):
     AUDIO_BITRATE: str = "128k"  # Audio bitrate (e.g., "128k" for 128 kbps)
     AUDIO_CODEC: str = "aac"  # Audio codec
     VIDEO_CODEC: str = "libx264"  # Video codec
+    VIDEO_MERGE_MODE: str = "single_pass"  # single_pass (one encode, stream copy when inputs match) or legacy (prepare, merge, compress)
+    MERGE_FFMPEG_THREADS: int = 2  # Encoder threads per merge
+    MERGE_MAX_CONCURRENT: Optional[int] = None  # Merges running at once (default: CPU cores // MERGE_FFMPEG_THREADS)
+    MERGE_MAX_QUEUED: int = 50  # Merges waiting for a slot before new ones are rejected with Retry-After
+    MERGE_ESTIMATED_DURATION_SECONDS: int = 60  # Initial per-merge duration used for Retry-After until real timings arrive
+    MERGE_SESSION_TTL_HOURS: int = 24  # Persisted merge sessions are pruned this long after their last update
+    MERGE_SESSION_LEASE_SECONDS: int = 120  # A queued or running merge its worker has not renewed for this long is restarted by the next request
+    MERGE_SESSION_CLEANUP_INTERVAL_MINUTES: int = 60  # How often each worker prunes merge sessions past the TTL (0 = only via the admin endpoint)
+    MERGE_PROGRESS_SAVE_SECONDS: float = 2.0  # Merge progress is written to the session store at most this often per session
+    
+    # Media processing monitor
+    MONITORING_SAMPLE_INTERVAL_SECONDS: float = 5.0  # CPU, memory, disk and temp dir usage are sampled this often off the event loop
+    MONITORING_TEMP_FULL_SCAN_EVERY: int = 60  # Every Nth sample re-stats every temp file instead of only recently written ones
+    MONITORING_STATS_BUCKET_SECONDS: int = 300  # Width of the rolling per-stage stats buckets (window edges round out to this)
+    MONITORING_RECENT_METRICS: int = 1000  # Completed operations kept individually for inspection
+    METRICS_ENABLED: bool = True  # Serve /metrics (Prometheus text format) and time every request per route
+    PROFILING_ENABLED: bool = False  # Profile a sample of requests into span trees (also toggled at /api/v1/monitoring/profiling)
+    PROFILING_SAMPLE_PERCENT: float = 1.0  # Share of requests profiled while sampling is enabled
+    PROFILING_HEADER_ENABLED: bool = False  # Let any client send X-Profile-Request: 1 to profile its request; keep off outside local debugging
+    PROFILING_SLOWEST_TRACES: int = 50  # Slowest profiled requests kept for inspection
+    PROFILING_MAX_SPANS: int = 1000  # Spans recorded per request before further ones are only counted
     
     # Compression quality presets
     COMPRESSION_QUALITY_PRESETS: dict = {
@@ -112,6 +152,11 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY_ID: Optional[str] = None  # Will use IAM role if not provided
     AWS_SECRET_ACCESS_KEY: Optional[str] = None  # Will use IAM role if not provided
     AWS_S3_ENDPOINT_URL: Optional[str] = None  # For S3-compatible services
+    S3_MULTIPART_THRESHOLD: int = 16 * 1024 * 1024  # Uploads larger than this are sent to S3 in parts
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # Part size (S3 minimum is 5MB)
+    S3_MULTIPART_CONCURRENCY: int = 4  # Parts in flight per upload; buffered memory is about this x part size
+    S3_MULTIPART_MAX_ATTEMPTS: int = 3  # Tries per part before the whole upload is aborted
+    S3_MULTIPART_CHECKSUM: bool = True  # Send Content-MD5 with each part so S3 rejects corrupted ones
     
     # CDN settings (optional)
     CDN_BASE_URL: Optional[str] = None  # CloudFront or other CDN URL
@@ -120,6 +165,13 @@ class Settings(BaseSettings):
     CDN_KEY_PAIR_ID: Optional[str] = None  # CloudFront key pair ID
     SIGNED_URL_EXPIRY: int = 3600  # 1 hour for signed URLs
     CDN_SIGNED_URL_EXPIRY: int = 7200  # 2 hours for CDN signed URLs
+    SIGNED_URL_MIN_REMAINING_SECONDS: int = 900  # Cached signed URLs are handed out with at least 15 minutes left
+    SIGNED_URL_CACHE_SIZE: int = 20_000  # Signed URLs kept in the in-process cache
+    
+    # Media index settings
+    MEDIA_INDEX_CACHE_SIZE: int = 10_000  # media_id -> storage key records kept in the in-process LRU
+    MEDIA_INDEX_SCAN_ON_MISS: bool = True  # List the bucket for media IDs missing from the index (disable once backfilled)
+    MEDIA_INDEX_NEGATIVE_TTL_SECONDS: int = 30  # Remember media IDs with no index record for this long
     
     # Global delivery settings
     ENABLE_GLOBAL_CDN: bool = False  # Enable global CDN delivery
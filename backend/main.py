@@ -12,6 +12,7 @@ from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Hea
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 import aiofiles
+import asyncio
 import os
 import hashlib
 import json
@@ -35,6 +36,8 @@ from services.challenge_service import ChallengeService, ChallengeServiceError
 from services.auth_service import get_current_user
 from services.rate_limiter import RateLimiter, RateLimitExceeded
 from services.validation_service import gameplay_validator, integrity_validator
+from services.metrics_registry import MetricsMiddleware
+from services.request_profiler import ProfiledJSONResponse, ProfilingMiddleware
 from api.media_endpoints import router as media_router
 from api.auth_endpoints import router as auth_router
 from api.s3_media_endpoints import router as s3_media_router
@@ -47,7 +50,8 @@ app = FastAPI(
                 "Interactive documentation available at /docs and /redoc endpoints.",
     version="1.0.0",
     docs_url="/docs",  # Swagger UI (default, but explicit for clarity)
-    redoc_url="/redoc"  # ReDoc documentation (default, but explicit for clarity)
+    redoc_url="/redoc",  # ReDoc documentation (default, but explicit for clarity)
+    default_response_class=ProfiledJSONResponse  # JSONResponse that shows up in request profiles
 )
 
 # Include routers
@@ -58,10 +62,10 @@ app.include_router(test_router)  # Enabled for challenge creation testing
 
 # Import and include challenge endpoints
 from api.challenge_endpoints import router as challenge_router
-from api.challenge_video_endpoints import router as challenge_video_router
+from api.challenge_video_endpoints import router as challenge_video_router, merge_service
 from api.user_endpoints import router as user_router
 from api.admin_endpoints import router as admin_router
-from api.monitoring_endpoints import router as monitoring_router
+from api.monitoring_endpoints import router as monitoring_router, metrics_router
 from api.token_endpoints import router as token_router
 from api.hint_endpoints import router as hint_router
 from api.hint_endpoints_simple import router as hint_simple_router
@@ -73,6 +77,8 @@ app.include_router(challenge_video_router)
 app.include_router(user_router)
 app.include_router(admin_router)
 app.include_router(monitoring_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 app.include_router(token_router)
 app.include_router(hint_router)
 app.include_router(hint_simple_router)
@@ -88,17 +94,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (sampled or X-Profile-Request: 1), see /api/v1/monitoring/profiling
+app.add_middleware(ProfilingMiddleware)
+
+# Per-route request latency for /metrics (added last so it times the whole stack)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Initialize services
 upload_service = ChunkedUploadService()
 challenge_service = ChallengeService()
 rate_limiter = RateLimiter()
 
+merge_cleanup_task: Optional[asyncio.Task] = None
+
 @app.on_event("startup")
 async def startup_event():
     """Run startup tasks including database migrations"""
     import logging
     logger = logging.getLogger(__name__)
     
+    global merge_cleanup_task
+    if settings.MERGE_SESSION_CLEANUP_INTERVAL_MINUTES > 0:
+        merge_cleanup_task = asyncio.create_task(
+            merge_service.run_scheduled_cleanup(settings.MERGE_SESSION_CLEANUP_INTERVAL_MINUTES * 60)
+        )
+    
     try:
         # Run score migration if needed
         from services.database_service import get_db_service
@@ -129,6 +150,18 @@ async def startup_event():
         logger.error(f"❌ Startup migration failed: {e}")
         # Don't fail startup if migration fails
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop scheduled merge cleanup, write pending session activity and release pooled database connections"""
+    from services.database_service import db_service
+    from services.session_activity import session_activity_writer
+    if merge_cleanup_task is not None:
+        merge_cleanup_task.cancel()
+    if session_activity_writer is not None:
+        session_activity_writer.close()
+    if db_service is not None:
+        db_service.close_pool()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -197,14 +230,11 @@ async def upload_chunk(
         if session.user_id != current_user:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        # Read chunk data
-        chunk_data = await file.read()
-        
-        # Upload chunk
-        updated_session, was_uploaded = await upload_service.upload_chunk(
+        # Stream chunk data to disk
+        updated_session, was_uploaded = await upload_service.upload_chunk_stream(
             session_id=session_id,
             chunk_number=chunk_number,
-            chunk_data=chunk_data,
+            stream=file,
             chunk_hash=chunk_hash
         )
         
@@ -349,6 +379,12 @@ async def cleanup_expired_rate_limits():
     cleaned_count = await rate_limiter.cleanup_expired_limits()
     return {"message": f"Cleaned up rate limit data for {cleaned_count} users"}
 
+@app.post("/api/v1/admin/cleanup/merge-sessions")
+async def cleanup_expired_merge_sessions():
+    """Prune merge sessions older than MERGE_SESSION_TTL_HOURS (admin endpoint)"""
+    cleanup_stats = await merge_service.cleanup_old_sessions()
+    return {"message": f"Cleaned up {cleanup_stats['sessions_removed']} expired merge sessions"}
+
 # Validation endpoints
 @app.post("/api/v1/validation/challenge-request")
 async def validate_challenge_request(
@@ -5,17 +5,108 @@ from fastapi import HTTPException, Depends, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set
+from collections import OrderedDict
 import hashlib
 import hmac
+import threading
 import time
 import logging
 
 from config import settings
+from services.db_executor import run_db_call
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
+# Cached for tokens that have no database session (guest tokens, sessions lost on restart)
+_NO_SESSION: Dict[str, Any] = {}
+
+
+def hash_token(token: str) -> str:
+    """SHA256 of a JWT, the key sessions are stored under"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class VerifiedSessionCache:
+    """
+    Bounded TTL cache of database session lookups, keyed by token hash.
+    
+    Tokens are still decoded and checked on every request; only the
+    user_sessions lookup is cached. Entries live for ttl seconds, so a session
+    revoked on another worker is honoured here within that time. Revocations
+    made through this process evict the entry immediately.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None, clock=time.monotonic):
+        self.ttl = ttl if ttl is not None else settings.AUTH_SESSION_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.AUTH_SESSION_CACHE_SIZE
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token_hash -> (user_id, session, expires_at)
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+    
+    def get(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        """Cached session dict, _NO_SESSION, or None when the lookup must be repeated"""
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is not None and entry[2] > self._clock():
+                self._entries.move_to_end(token_hash)
+                self._hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(token_hash)
+            self._misses += 1
+            return None
+    
+    def put(self, token_hash: str, user_id: str, session: Dict[str, Any]) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._remove(token_hash)
+            self._entries[token_hash] = (user_id, session, self._clock() + self.ttl)
+            self._by_user.setdefault(user_id, set()).add(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+    
+    def _remove(self, token_hash: str) -> None:
+        entry = self._entries.pop(token_hash, None)
+        if entry is None:
+            return
+        hashes = self._by_user.get(entry[0])
+        if hashes is not None:
+            hashes.discard(token_hash)
+            if not hashes:
+                del self._by_user[entry[0]]
+    
+    def invalidate(self, token_hash: str) -> None:
+        with self._lock:
+            self._remove(token_hash)
+    
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for token_hash in list(self._by_user.get(user_id, ())):
+                self._remove(token_hash)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
 class AuthService:
     """Enhanced authentication service with database-backed session management"""
     
@@ -23,11 +114,25 @@ class AuthService:
         self.active_sessions: Dict[str, Dict[str, Any]] = {}  # Keep for backwards compatibility
         self.rate_limits: Dict[str, Dict[str, Any]] = {}
         self._db_service = None  # Will be set via dependency injection
+        self.session_cache = VerifiedSessionCache()
+        self._session_activity = None
     
     def set_database_service(self, db_service):
         """Set database service for session management (dependency injection)"""
         self._db_service = db_service
     
+    @property
+    def session_activity(self):
+        """Batched last_accessed writer (process-wide unless one was injected)"""
+        if self._session_activity is None:
+            from services.session_activity import get_session_activity_writer
+            self._session_activity = get_session_activity_writer()
+        return self._session_activity
+    
+    @session_activity.setter
+    def session_activity(self, writer):
+        self._session_activity = writer
+    
     @property  
     def db_service(self):
         """Get database service instance with lazy loading"""
@@ -116,14 +221,28 @@ class AuthService:
     
     def verify_token(self, token: str) -> dict:
         """Verify and decode JWT token with comprehensive validation"""
-        logger.info(f"=== VERIFY_TOKEN CALLED ===")
-        logger.info(f"Token received: {token[:50]}...")
-        
+        payload = self._decode_token(token)
+        self._attach_session(payload, token)
+        return payload
+    
+    async def verify_token_async(self, token: str) -> dict:
+        """Async version of verify_token; a session cache miss is looked up on the database executor"""
+        payload = self._decode_token(token)
+        token_hash = hash_token(token)
+        session = self.session_cache.get(token_hash)
+        if session is not None:
+            self._apply_session(payload, session, token_hash)
+            return payload
+        try:
+            await run_db_call(self._attach_session, payload, token)
+        except Exception as e:
+            # Executor saturated: same JWT-only fallback as an unavailable database
+            logger.error(f"Database session validation failed for user {payload.get('sub')}: {e}")
+        return payload
+    
+    def _decode_token(self, token: str) -> dict:
+        """Decode and validate the JWT itself (signature, expiry, audience, issuer, subject)"""
         try:
-            logger.info(f"Starting JWT verification for token: {token[:50]}...")
-            logger.info(f"Using SECRET_KEY: {settings.SECRET_KEY}")
-            logger.info(f"Using ALGORITHM: {settings.ALGORITHM}")
-            
             # Decode and validate JWT - specify expected audience and issuer
             payload = jwt.decode(
                 token, 
@@ -132,11 +251,7 @@ class AuthService:
                 audience="twotruthsalie-mobile",
                 issuer="twotruthsalie-api"
             )
-            
-            # Debug logging
-            logger.info(f"JWT payload decoded successfully: {payload}")
-            logger.info(f"Expected audience: 'twotruthsalie-mobile', Got: '{payload.get('aud')}'")
-            logger.info(f"Expected issuer: 'twotruthsalie-api', Got: '{payload.get('iss')}'")
+            logger.debug(f"JWT decoded for user {payload.get('sub')}")
             
             # Validate user ID is present
             user_id = payload.get("sub")
@@ -147,35 +262,6 @@ class AuthService:
                     headers={"WWW-Authenticate": "Bearer"},
                 )
             
-            # Check if token is still active in database session store
-            token_type = payload.get("type", "user")
-            token_hash = hashlib.sha256(token.encode()).hexdigest()
-            
-            try:
-                # Verify session exists and is active in database
-                session_data = self.db_service.get_session_by_token_hash(token_hash)
-                
-                if session_data:
-                    # Update last accessed timestamp
-                    self.db_service.update_session_access(token_hash)
-                    logger.debug(f"Database session validated for user {user_id}")
-                    
-                    # Add session info to payload for downstream use
-                    payload["session_id"] = session_data.get("session_id")
-                    payload["session_type"] = session_data.get("session_type")
-                    
-                elif token_type != "guest":
-                    # For non-guest tokens, require valid database session
-                    logger.warning(f"No active database session found for user {user_id}")
-                    # For now, allow the token if it's valid JWT to handle server restarts gracefully
-                    # In production, consider making this stricter
-                    logger.info(f"Allowing valid JWT without database session for user {user_id}")
-                    
-            except Exception as e:
-                logger.error(f"Database session validation failed for user {user_id}: {e}")
-                # Fall back to allowing valid JWTs if database is unavailable
-                logger.info(f"Falling back to JWT-only validation for user {user_id}")
-            
             # JWT library has already validated audience and issuer during decode
             # Return the validated payload
             return payload
@@ -188,16 +274,61 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         except JWTError as e:
-            logger.error(f"JWT ERROR: {e}")
-            logger.error(f"JWT ERROR Type: {type(e).__name__}")
-            logger.error(f"JWT ERROR Args: {e.args}")
-            logger.warning(f"JWT validation error: {e}")
+            logger.warning(f"JWT validation error ({type(e).__name__}): {e}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
     
+    def _apply_session(self, payload: dict, session: Dict[str, Any], token_hash: str) -> None:
+        """Add session info to the payload for downstream use and record the access"""
+        if session is not _NO_SESSION:
+            payload["session_id"] = session.get("session_id")
+            payload["session_type"] = session.get("session_type")
+            # last_accessed is written in batches by the session activity writer
+            self.session_activity.touch(token_hash)
+    
+    def _attach_session(self, payload: dict, token: str) -> None:
+        """Check the token's database session and add session info to the payload (blocking on a cache miss)"""
+        user_id = payload.get("sub")
+        token_hash = hash_token(token)
+        
+        session = self.session_cache.get(token_hash)
+        if session is not None:
+            self._apply_session(payload, session, token_hash)
+            return
+        
+        # Check if token is still active in database session store
+        token_type = payload.get("type", "user")
+        
+        try:
+            # Verify session exists and is active in database
+            session_data = self.db_service.get_session_by_token_hash(token_hash)
+            
+            if session_data:
+                logger.debug(f"Database session validated for user {user_id}")
+                
+                session = {
+                    "session_id": session_data.get("session_id"),
+                    "session_type": session_data.get("session_type")
+                }
+                self._apply_session(payload, session, token_hash)
+                self.session_cache.put(token_hash, user_id, session)
+                
+            else:
+                if token_type != "guest":
+                    # For non-guest tokens, require valid database session
+                    # For now, allow the token if it's valid JWT to handle server restarts gracefully
+                    # In production, consider making this stricter
+                    logger.debug(f"Allowing valid JWT without database session for user {user_id}")
+                self.session_cache.put(token_hash, user_id, _NO_SESSION)
+                
+        except Exception as e:
+            logger.error(f"Database session validation failed for user {user_id}: {e}")
+            # Fall back to allowing valid JWTs if database is unavailable
+            logger.info(f"Falling back to JWT-only validation for user {user_id}")
+    
     def check_rate_limit(self, user_id: str, action: str, limit: int = 10, window: int = 3600) -> bool:
         """Check if user has exceeded rate limit for specific action"""
         now = time.time()
@@ -242,35 +373,26 @@ class AuthService:
     def verify_signed_url(self, media_id: str, user_id: str, expires_at: str, signature: str) -> bool:
         """Verify signed URL for media access"""
         try:
-            logger.info(f"=== VERIFY_SIGNED_URL DEBUG ===")
-            logger.info(f"Media ID: {media_id}")
-            logger.info(f"User ID: {user_id}")
-            logger.info(f"Expires at: {expires_at}")
-            logger.info(f"Received signature: {signature}")
-            logger.info(f"Current time: {int(time.time())}")
-            
             # Check expiration
             expires_timestamp = int(expires_at)
             current_timestamp = int(time.time())
-            logger.info(f"Expiration check: {expires_timestamp} > {current_timestamp} = {expires_timestamp > current_timestamp}")
             
             if expires_timestamp < current_timestamp:
-                logger.error("Signed URL has expired")
+                logger.warning(f"Signed URL for media {media_id} has expired")
                 return False
             
             # Verify signature
             message = f"{media_id}:{user_id}:{expires_at}"
-            logger.info(f"Message for signing: '{message}'")
-            
             expected_signature = hmac.new(
                 settings.SECRET_KEY.encode(),
                 message.encode(),
                 hashlib.sha256
             ).hexdigest()
-            logger.info(f"Expected signature: {expected_signature}")
-            logger.info(f"Signature match: {hmac.compare_digest(signature, expected_signature)}")
             
-            return hmac.compare_digest(signature, expected_signature)
+            valid = hmac.compare_digest(signature, expected_signature)
+            if not valid:
+                logger.warning(f"Signed URL signature mismatch for media {media_id}, user {user_id}")
+            return valid
         except (ValueError, TypeError) as e:
             logger.error(f"Error in verify_signed_url: {e}")
             return False
@@ -278,7 +400,8 @@ class AuthService:
     def revoke_token(self, token: str) -> bool:
         """Revoke a specific token (invalidate session)"""
         try:
-            token_hash = hashlib.sha256(token.encode()).hexdigest()
+            token_hash = hash_token(token)
+            self.session_cache.invalidate(token_hash)
             
             # Invalidate in database
             db_success = self.db_service.invalidate_session(token_hash)
@@ -304,6 +427,8 @@ class AuthService:
     def revoke_user_sessions(self, user_id: str) -> int:
         """Revoke all sessions for a user"""
         try:
+            self.session_cache.invalidate_user(user_id)
+            
             # Invalidate all user sessions in database
             db_count = self.db_service.invalidate_user_sessions(user_id)
             
@@ -345,21 +470,25 @@ def verify_token(token: str) -> dict:
     """Verify JWT token and return payload"""
     return auth_service.verify_token(token)
 
+async def verify_token_async(token: str) -> dict:
+    """Verify JWT token without blocking the event loop on the session lookup"""
+    return await auth_service.verify_token_async(token)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Get current user from JWT token"""
-    payload = verify_token(credentials.credentials)
+    payload = await verify_token_async(credentials.credentials)
     return payload.get("sub")
 
 async def get_current_user_with_permissions(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
     """Get current user with full token payload including permissions"""
-    payload = verify_token(credentials.credentials)
+    payload = await verify_token_async(credentials.credentials)
     return payload
 
 async def get_authenticated_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Get current user from JWT token - ONLY authenticated users, rejects guests"""
-    payload = verify_token(credentials.credentials)
+    payload = await verify_token_async(credentials.credentials)
     user_type = payload.get("type", "user")
     
     if user_type == "guest":
@@ -377,7 +506,7 @@ def require_permission(permission: str):
         credentials: HTTPAuthorizationCredentials = Depends(security)
     ) -> str:
         """Check specific permission for endpoint access"""
-        payload = verify_token(credentials.credentials)
+        payload = await verify_token_async(credentials.credentials)
         
         if not auth_service.check_permission(payload, permission):
             raise HTTPException(
@@ -0,0 +1,393 @@
+"""
+Challenge catalog - In-memory challenge and guess maps with listing indexes
+"""
+import base64
+import binascii
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import AbstractSet, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from models import Challenge, ChallengeStatus, GuessSubmission
+
+# Listing order key: (created_at, challenge_id), newest last in every index
+SortKey = Tuple[datetime, str]
+
+
+class IndexEntry(NamedTuple):
+    """What a challenge was indexed under, so it can be found again when it changes"""
+    sort_key: SortKey
+    status: ChallengeStatus
+    creator_id: str
+    tags: frozenset
+
+
+class CatalogPage(NamedTuple):
+    challenges: List[Challenge]
+    total_count: int
+    next_cursor: Optional[str]
+
+
+def encode_cursor(sort_key: SortKey) -> str:
+    """Opaque keyset cursor pointing just after sort_key in newest-first order"""
+    created_at, challenge_id = sort_key
+    raw = f"{created_at.isoformat()}|{challenge_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, challenge_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), challenge_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class ChallengeCatalog(dict):
+    """
+    challenge_id -> Challenge map that keeps listing indexes up to date.
+
+    Alongside the map it maintains sort-key lists (oldest to newest) for all
+    challenges, per status and per creator, plus an inverted tag index. Writes
+    through the dict interface update the indexes; challenges mutated in place
+    (status changes, new tags) must be passed to reindex, which
+    ChallengeService does whenever it persists a challenge.
+    """
+
+    def __init__(self, challenges: Optional[Dict[str, Challenge]] = None):
+        super().__init__()
+        self._indexed: Dict[str, IndexEntry] = {}
+        self._all: List[SortKey] = []
+        self._by_status: Dict[ChallengeStatus, List[SortKey]] = {}
+        self._by_creator: Dict[str, List[SortKey]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        if challenges:
+            self._bulk_load(challenges)
+
+    @staticmethod
+    def _entry_for(challenge: Challenge) -> IndexEntry:
+        return IndexEntry(
+            sort_key=(challenge.created_at, challenge.challenge_id),
+            status=challenge.status,
+            creator_id=challenge.creator_id,
+            tags=frozenset(challenge.tags or ())
+        )
+
+    def _bulk_load(self, challenges: Dict[str, Challenge]) -> None:
+        self.add_many(challenges.values())
+
+    def add_many(self, challenges: Iterable[Challenge]) -> int:
+        """
+        Add challenges that are not in the catalog yet and return how many were added.
+
+        Challenges already present are left as they are, since the in-memory
+        copy may be newer than a row loaded from the database. Large batches
+        are appended and each touched index list is sorted once; a batch that
+        is small next to the catalog is insorted instead.
+        """
+        new = {}
+        for challenge in challenges:
+            if challenge.challenge_id not in self:
+                new[challenge.challenge_id] = challenge
+        if len(new) * 32 < len(self._all):
+            for challenge_id, challenge in new.items():
+                dict.__setitem__(self, challenge_id, challenge)
+                self._add_entry(challenge_id, self._entry_for(challenge))
+            return len(new)
+
+        statuses: Set[ChallengeStatus] = set()
+        creators: Set[str] = set()
+        for challenge_id, challenge in new.items():
+            dict.__setitem__(self, challenge_id, challenge)
+            entry = self._entry_for(challenge)
+            self._indexed[challenge_id] = entry
+            self._all.append(entry.sort_key)
+            self._by_status.setdefault(entry.status, []).append(entry.sort_key)
+            self._by_creator.setdefault(entry.creator_id, []).append(entry.sort_key)
+            statuses.add(entry.status)
+            creators.add(entry.creator_id)
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(challenge_id)
+        # Timsort merges the appended run into an already sorted list in one pass
+        self._all.sort()
+        for status in statuses:
+            self._by_status[status].sort()
+        for creator_id in creators:
+            self._by_creator[creator_id].sort()
+        return len(new)
+
+    def _add_entry(self, challenge_id: str, entry: IndexEntry) -> None:
+        self._indexed[challenge_id] = entry
+        insort(self._all, entry.sort_key)
+        insort(self._by_status.setdefault(entry.status, []), entry.sort_key)
+        insort(self._by_creator.setdefault(entry.creator_id, []), entry.sort_key)
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(challenge_id)
+
+    @staticmethod
+    def _discard_key(index: Dict, name, sort_key: SortKey) -> None:
+        keys = index.get(name)
+        if not keys:
+            return
+        position = bisect_left(keys, sort_key)
+        if position < len(keys) and keys[position] == sort_key:
+            del keys[position]
+        if not keys:
+            del index[name]
+
+    def _remove_entry(self, challenge_id: str) -> None:
+        entry = self._indexed.pop(challenge_id, None)
+        if entry is None:
+            return
+        position = bisect_left(self._all, entry.sort_key)
+        if position < len(self._all) and self._all[position] == entry.sort_key:
+            del self._all[position]
+        self._discard_key(self._by_status, entry.status, entry.sort_key)
+        self._discard_key(self._by_creator, entry.creator_id, entry.sort_key)
+        for tag in entry.tags:
+            ids = self._by_tag.get(tag)
+            if ids is not None:
+                ids.discard(challenge_id)
+                if not ids:
+                    del self._by_tag[tag]
+
+    def reindex(self, challenge_id: str) -> None:
+        """Refresh the indexes for a challenge that may have been mutated in place"""
+        challenge = self.get(challenge_id)
+        if challenge is None:
+            self._remove_entry(challenge_id)
+            return
+        entry = self._entry_for(challenge)
+        if self._indexed.get(challenge_id) != entry:
+            self._remove_entry(challenge_id)
+            self._add_entry(challenge_id, entry)
+
+    # dict interface -------------------------------------------------------
+
+    def __setitem__(self, challenge_id: str, challenge: Challenge) -> None:
+        self._remove_entry(challenge_id)
+        dict.__setitem__(self, challenge_id, challenge)
+        self._add_entry(challenge_id, self._entry_for(challenge))
+
+    def __delitem__(self, challenge_id: str) -> None:
+        dict.__delitem__(self, challenge_id)
+        self._remove_entry(challenge_id)
+
+    def pop(self, challenge_id, *default):
+        self._remove_entry(challenge_id)
+        return dict.pop(self, challenge_id, *default)
+
+    def popitem(self):
+        challenge_id, challenge = dict.popitem(self)
+        self._remove_entry(challenge_id)
+        return challenge_id, challenge
+
+    def setdefault(self, challenge_id, default=None):
+        if challenge_id not in self:
+            self[challenge_id] = default
+        return self[challenge_id]
+
+    def update(self, *args, **kwargs):
+        for challenge_id, challenge in dict(*args, **kwargs).items():
+            self[challenge_id] = challenge
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self._indexed.clear()
+        self._all.clear()
+        self._by_status.clear()
+        self._by_creator.clear()
+        self._by_tag.clear()
+
+    # queries --------------------------------------------------------------
+
+    def _matches(
+        self,
+        challenge_id: str,
+        status: Optional[ChallengeStatus],
+        creator_id: Optional[str],
+        tags: Optional[frozenset]
+    ) -> bool:
+        entry = self._indexed.get(challenge_id)
+        if entry is None:
+            return False
+        if status is not None and entry.status != status:
+            return False
+        if creator_id is not None and entry.creator_id != creator_id:
+            return False
+        if tags and entry.tags.isdisjoint(tags):
+            return False
+        return True
+
+    def _candidates(
+        self,
+        status: Optional[ChallengeStatus],
+        creator_id: Optional[str],
+        tags: Optional[frozenset]
+    ) -> Tuple[List[SortKey], bool]:
+        """
+        Smallest sorted key list that covers the filters, and whether it matches
+        them exactly (only one filter given) so counts can skip a scan.
+        """
+        options = []
+        if status is not None:
+            options.append(self._by_status.get(status, []))
+        if creator_id is not None:
+            options.append(self._by_creator.get(creator_id, []))
+        if tags:
+            tagged: Set[str] = set()
+            for tag in tags:
+                tagged |= self._by_tag.get(tag, set())
+            if not options or len(tagged) < min(len(keys) for keys in options):
+                options.append(sorted(self._indexed[challenge_id].sort_key for challenge_id in tagged))
+
+        filter_count = (status is not None) + (creator_id is not None) + bool(tags)
+        if not options:
+            return self._all, True
+        return min(options, key=len), filter_count == 1
+
+    def _walk(self, keys: List[SortKey], before: Optional[SortKey]) -> Iterator[SortKey]:
+        """Yield keys newest first, starting just after the cursor position"""
+        position = bisect_left(keys, before) if before is not None else len(keys)
+        for index in range(position - 1, -1, -1):
+            yield keys[index]
+
+    def query(
+        self,
+        status: Optional[ChallengeStatus] = None,
+        creator_id: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        exclude_ids: Optional[AbstractSet[str]] = None,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> CatalogPage:
+        """
+        One page of challenges, newest first.
+
+        With a cursor (from a previous page's next_cursor) the page starts right
+        after that challenge and costs O(limit + skipped excluded IDs). Without
+        one, offset matching challenges are skipped first.
+
+        Args:
+            status: Only challenges in this status
+            creator_id: Only challenges by this creator
+            tags: Only challenges carrying at least one of these tags
+            exclude_ids: Challenge IDs to leave out (e.g. already attempted)
+            cursor: Keyset cursor; takes precedence over offset
+            offset: Matching challenges to skip when no cursor is given
+            limit: Page size
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        tag_set = frozenset(tags) if tags else None
+        exclude_ids = exclude_ids or set()
+        before = decode_cursor(cursor) if cursor else None
+        keys, exact = self._candidates(status, creator_id, tag_set)
+
+        if exact:
+            excluded = sum(
+                1 for challenge_id in exclude_ids
+                if self._matches(challenge_id, status, creator_id, tag_set)
+            )
+            total_count = len(keys) - excluded
+        else:
+            total_count = sum(
+                1 for key in keys
+                if key[1] not in exclude_ids and self._matches(key[1], status, creator_id, tag_set)
+            )
+
+        if limit <= 0 or offset < 0:
+            return CatalogPage([], total_count, None)
+
+        page: List[Challenge] = []
+        last_key = None
+        skip = 0 if before is not None else offset
+        for key in self._walk(keys, before):
+            challenge_id = key[1]
+            if challenge_id in exclude_ids or not self._matches(challenge_id, status, creator_id, tag_set):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            if len(page) == limit:
+                # One more match exists beyond this page
+                return CatalogPage(page, total_count, encode_cursor(last_key))
+            page.append(self[challenge_id])
+            last_key = key
+
+        return CatalogPage(page, total_count, None)
+
+
+class GuessIndex(dict):
+    """
+    guess_id -> GuessSubmission map that also tracks, per user, which
+    challenges they have guessed on. Duplicate-guess checks and the attempted
+    set used to filter listings are hash lookups instead of scans.
+    """
+
+    def __init__(self, guesses: Optional[Dict[str, GuessSubmission]] = None):
+        super().__init__()
+        # user_id -> {challenge_id: number of guesses}; counts survive legacy duplicates
+        self._by_user: Dict[str, Dict[str, int]] = {}
+        if guesses:
+            self.update(guesses)
+
+    def _add(self, guess: GuessSubmission) -> None:
+        challenges = self._by_user.setdefault(guess.user_id, {})
+        challenges[guess.challenge_id] = challenges.get(guess.challenge_id, 0) + 1
+
+    def _discard(self, guess: GuessSubmission) -> None:
+        challenges = self._by_user.get(guess.user_id)
+        if not challenges or guess.challenge_id not in challenges:
+            return
+        challenges[guess.challenge_id] -= 1
+        if not challenges[guess.challenge_id]:
+            del challenges[guess.challenge_id]
+        if not challenges:
+            del self._by_user[guess.user_id]
+
+    def has_guessed(self, user_id: str, challenge_id: str) -> bool:
+        return challenge_id in self._by_user.get(user_id, ())
+
+    def attempted(self, user_id: str) -> AbstractSet[str]:
+        """Live set-like view of the challenge IDs this user has guessed on"""
+        return self._by_user.get(user_id, {}).keys()
+
+    # dict interface -------------------------------------------------------
+
+    def __setitem__(self, guess_id: str, guess: GuessSubmission) -> None:
+        previous = self.get(guess_id)
+        if previous is not None:
+            self._discard(previous)
+        dict.__setitem__(self, guess_id, guess)
+        self._add(guess)
+
+    def __delitem__(self, guess_id: str) -> None:
+        self._discard(self[guess_id])
+        dict.__delitem__(self, guess_id)
+
+    def pop(self, guess_id, *default):
+        if guess_id in self:
+            self._discard(self[guess_id])
+        return dict.pop(self, guess_id, *default)
+
+    def popitem(self):
+        guess_id, guess = dict.popitem(self)
+        self._discard(guess)
+        return guess_id, guess
+
+    def setdefault(self, guess_id, default=None):
+        if guess_id not in self:
+            self[guess_id] = default
+        return self[guess_id]
+
+    def update(self, *args, **kwargs):
+        for guess_id, guess in dict(*args, **kwargs).items():
+            self[guess_id] = guess
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self._by_user.clear()
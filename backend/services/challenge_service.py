@@ -2,9 +2,12 @@
 Challenge service for managing game challenges and guesses
 """
 import json
+import time
 import uuid
+from collections import OrderedDict
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Set, Tuple
 from datetime import datetime, timedelta
 import logging
 
@@ -13,7 +16,9 @@ from models import (
     CreateChallengeRequest, SubmitGuessRequest
 )
 from config import settings
+from services.challenge_catalog import ChallengeCatalog, CatalogPage, GuessIndex
 from services.moderation_service import ModerationService, ModerationStatus
+from services.db_executor import run_db_call
 from services.rate_limiter import RateLimiter, RateLimitExceeded
 from services.validation_service import gameplay_validator, integrity_validator
 
@@ -41,8 +46,31 @@ class ChallengeService:
         self.guesses_file = settings.TEMP_DIR / "guesses.json"
         self.moderation_service = ModerationService()
         self.rate_limiter = RateLimiter()
+        self._missing_challenges: "OrderedDict[str, float]" = OrderedDict()  # challenge_id -> expiry (monotonic)
         self._load_data()
     
+    @property
+    def challenges(self) -> ChallengeCatalog:
+        """In-memory challenges, indexed for listing"""
+        return self._challenges
+    
+    @challenges.setter
+    def challenges(self, challenges: Dict[str, Challenge]):
+        # Plain dicts (migrations, tests) are wrapped so the listing indexes are built once.
+        # An assigned map is complete; _load_data marks its published-only load as partial.
+        self._challenges = challenges if isinstance(challenges, ChallengeCatalog) else ChallengeCatalog(challenges)
+        self._challenge_scopes: Optional[Set[Tuple[str, Any]]] = None
+    
+    @property
+    def guesses(self) -> GuessIndex:
+        """In-memory guesses, indexed by user for duplicate and attempted checks"""
+        return self._guesses
+    
+    @guesses.setter
+    def guesses(self, guesses: Dict[str, GuessSubmission]):
+        self._guesses = guesses if isinstance(guesses, GuessIndex) else GuessIndex(guesses)
+        self._guess_scopes: Optional[Set[Tuple[str, str]]] = None
+    
     def _convert_segment_times_to_milliseconds(self, challenge: Challenge) -> Challenge:
         """Convert segment times from seconds to milliseconds for frontend compatibility"""
         if not challenge.merged_video_metadata or not challenge.merged_video_metadata.segments:
@@ -83,28 +111,147 @@ class ChallengeService:
         self._load_data()
     
     def _load_data(self):
-        """Load challenges and guesses from database"""
+        """
+        Load published challenges from database.
+        
+        Published challenges are what public listings and guessing need, so
+        only they are loaded up front, streamed in batches from a server-side
+        cursor so only one batch of raw rows is held at a time; the parsed
+        challenges are indexed in one pass once the stream ends. Other
+        statuses, creators' own listings and guesses are loaded the first time
+        a request needs them (see _ensure_challenges_loaded,
+        _ensure_guesses_loaded and _get_challenge).
+        """
         try:
             # Import database service
             from services.database_service import get_db_service
+            db = get_db_service()
             
-            # Load challenges from database
-            self.challenges = get_db_service().load_all_challenges()
-            logger.info(f"Loaded {len(self.challenges)} challenges from database")
+            catalog = ChallengeCatalog()
+            catalog.add_many(chain.from_iterable(db.iter_challenges(status=ChallengeStatus.PUBLISHED.value)))
+            self.challenges = catalog
+            self._challenge_scopes = {("status", ChallengeStatus.PUBLISHED)}
+            logger.info(f"Loaded {len(self.challenges)} published challenges from database")
             
-            # Load guesses from database
-            self.guesses = get_db_service().load_all_guesses()
-            logger.info(f"Loaded {len(self.guesses)} guesses from database")
+            self.guesses = GuessIndex()
+            self._guess_scopes = set()
             
             # Migration: If database is empty but JSON files exist, migrate data
             if not self.challenges and self.challenges_file.exists():
-                logger.info("Migrating challenges from JSON to database...")
-                self._migrate_from_json()
+                self._add_challenge_scope(("all", None), self._fetch_challenge_scope(("all", None)))
+                if not self.challenges:
+                    logger.info("Migrating challenges from JSON to database...")
+                    self._migrate_from_json()
                         
         except Exception as e:
             logger.error(f"Error loading challenge data from database: {e}")
-            self.challenges = {}
-            self.guesses = {}
+            self.challenges = ChallengeCatalog()
+            self.guesses = GuessIndex()
+            # Nothing was loaded; let requests retry each scope instead of treating the tables as empty
+            self._challenge_scopes = set()
+            self._guess_scopes = set()
+    
+    def _fetch_challenge_scope(self, scope: Tuple[str, Any], published_loaded: bool = True) -> List[Challenge]:
+        """
+        Challenges in a load scope, streamed and parsed in batches (blocking; run on the DB executor).
+        
+        The creator and "all" scopes skip published challenges when those are
+        already in memory, and include them when they are not (a failed startup load).
+        """
+        from services.database_service import get_db_service
+        kind, value = scope
+        unpublished = {"exclude_status": ChallengeStatus.PUBLISHED.value} if published_loaded else {}
+        filters = {
+            "status": {"status": value.value if isinstance(value, ChallengeStatus) else value},
+            "creator": {"creator_id": value, **unpublished},
+            "all": unpublished
+        }[kind]
+        return list(chain.from_iterable(get_db_service().iter_challenges(**filters)))
+    
+    def _add_challenge_scope(self, scope: Tuple[str, Any], challenges: List[Challenge]) -> None:
+        """Index a fetched scope, keeping in-memory copies of challenges already loaded"""
+        added = self.challenges.add_many(challenges)
+        if scope[0] == "all":
+            self._challenge_scopes = None
+        elif self._challenge_scopes is not None:
+            self._challenge_scopes.add(scope)
+        logger.info(f"Loaded {added} more challenges from database ({scope[0]}: {scope[1]})")
+    
+    async def _ensure_challenges_loaded(
+        self,
+        status: Optional[ChallengeStatus] = None,
+        creator_id: Optional[str] = None
+    ) -> None:
+        """
+        Make sure every challenge a listing with these filters could match is in memory.
+        
+        Without filters this loads the whole table, which only admin scans need.
+        """
+        scopes = self._challenge_scopes
+        if scopes is None or (status is not None and ("status", status) in scopes):
+            return
+        if creator_id is not None:
+            scope = ("creator", creator_id)
+        elif status is not None:
+            scope = ("status", status)
+        else:
+            scope = ("all", None)
+        if scope not in scopes:
+            published_loaded = ("status", ChallengeStatus.PUBLISHED) in scopes
+            self._add_challenge_scope(scope, await run_db_call(self._fetch_challenge_scope, scope, published_loaded))
+    
+    async def _get_challenge(self, challenge_id: str) -> Optional[Challenge]:
+        """
+        In-memory challenge, loaded from the database on a miss while only part of the table is in memory.
+        
+        IDs the database doesn't have are remembered for CHALLENGE_NEGATIVE_TTL_SECONDS,
+        so repeated requests for an unknown challenge don't each cost a query.
+        """
+        challenge = self.challenges.get(challenge_id)
+        if challenge is None and self._challenge_scopes is not None and not self._is_known_missing(challenge_id):
+            from services.database_service import get_db_service
+            loaded = await run_db_call(get_db_service().load_challenge, challenge_id)
+            if loaded is not None:
+                self.challenges.add_many([loaded])
+                challenge = self.challenges.get(challenge_id)
+            else:
+                self._remember_missing(challenge_id)
+        return challenge
+    
+    def _is_known_missing(self, challenge_id: str) -> bool:
+        expires_at = self._missing_challenges.get(challenge_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._missing_challenges[challenge_id]
+            return False
+        return True
+    
+    def _remember_missing(self, challenge_id: str) -> None:
+        if settings.CHALLENGE_NEGATIVE_TTL_SECONDS <= 0:
+            return
+        self._missing_challenges[challenge_id] = time.monotonic() + settings.CHALLENGE_NEGATIVE_TTL_SECONDS
+        self._missing_challenges.move_to_end(challenge_id)
+        while len(self._missing_challenges) > settings.CHALLENGE_NEGATIVE_CACHE_SIZE:
+            self._missing_challenges.popitem(last=False)
+    
+    async def _ensure_guesses_loaded(self, user_id: Optional[str] = None, challenge_id: Optional[str] = None) -> None:
+        """
+        Load the guesses made by a user, or on a challenge, the first time they are needed.
+        
+        A failed load raises and leaves the scope unloaded, so the next request
+        retries instead of treating the user as having no guesses.
+        """
+        scopes = self._guess_scopes
+        scope = ("user", user_id) if user_id is not None else ("challenge", challenge_id)
+        if scopes is None or scope in scopes:
+            return
+        from services.database_service import get_db_service
+        guesses = await run_db_call(get_db_service().load_guesses, user_id=user_id, challenge_id=challenge_id)
+        for guess_id, guess in guesses.items():
+            if guess_id not in self.guesses:
+                self.guesses[guess_id] = guess
+        scopes.add(scope)
     
     def _migrate_from_json(self):
         """Migrate challenges from JSON files to database (one-time migration)"""
@@ -137,15 +284,45 @@ class ChallengeService:
         except Exception as e:
             logger.error(f"Error migrating data from JSON: {e}")
     
+    async def _save_challenge(self, challenge: Challenge) -> bool:
+        """Persist a single challenge to the database (write-through)"""
+        # Status or tags may have changed in place since the challenge was indexed
+        self.challenges.reindex(challenge.challenge_id)
+        try:
+            from services.database_service import get_db_service
+            
+            saved = await run_db_call(get_db_service().save_challenge, challenge)
+            if not saved:
+                logger.error(f"Failed to save challenge {challenge.challenge_id} to database")
+            return saved
+            
+        except Exception as e:
+            logger.error(f"Error saving challenge {challenge.challenge_id}: {e}")
+            return False
+    
+    async def _save_guess(self, guess: GuessSubmission) -> bool:
+        """Persist a single guess to the database (write-through)"""
+        try:
+            from services.database_service import get_db_service
+            
+            saved = await run_db_call(get_db_service().save_guess, guess)
+            if not saved:
+                logger.error(f"Failed to save guess {guess.guess_id} to database")
+            return saved
+            
+        except Exception as e:
+            logger.error(f"Error saving guess {guess.guess_id}: {e}")
+            return False
+    
     async def _save_challenges(self):
-        """Save challenges to database"""
+        """Save all challenges to database (full rewrite, prefer _save_challenge)"""
         try:
             from services.database_service import get_db_service
             
             # Save each challenge to database
             saved_count = 0
             for challenge in self.challenges.values():
-                if get_db_service().save_challenge(challenge):
+                if await run_db_call(get_db_service().save_challenge, challenge):
                     saved_count += 1
             
             logger.info(f"Saved {saved_count}/{len(self.challenges)} challenges to database")
@@ -154,14 +331,14 @@ class ChallengeService:
             logger.error(f"Error saving challenges: {e}")
     
     async def _save_guesses(self):
-        """Save guesses to database"""
+        """Save all guesses to database (full rewrite, prefer _save_guess)"""
         try:
             from services.database_service import get_db_service
             
             # Save each guess to database
             saved_count = 0
             for guess in self.guesses.values():
-                if get_db_service().save_guess(guess):
+                if await run_db_call(get_db_service().save_guess, guess):
                     saved_count += 1
             
             logger.info(f"Saved {saved_count}/{len(self.guesses)} guesses to database")
@@ -391,7 +568,7 @@ class ChallengeService:
         
         # Store challenge
         self.challenges[challenge_id] = challenge
-        await self._save_challenges()
+        await self._save_challenge(challenge)
         
         # Record the request for rate limiting
         await self.rate_limiter.record_request(creator_id)
@@ -401,7 +578,7 @@ class ChallengeService:
     
     async def publish_challenge(self, challenge_id: str, creator_id: str) -> Challenge:
         """Publish a draft challenge after moderation"""
-        challenge = self.challenges.get(challenge_id)
+        challenge = await self._get_challenge(challenge_id)
         if not challenge:
             raise ChallengeServiceError("Challenge not found")
         
@@ -443,19 +620,19 @@ class ChallengeService:
             challenge.status = ChallengeStatus.PENDING_MODERATION
         
         challenge.updated_at = datetime.utcnow()
-        await self._save_challenges()
+        await self._save_challenge(challenge)
         
         logger.info(f"Challenge {challenge_id} moderation completed: {challenge.status.value}")
         return challenge
     
     async def get_challenge(self, challenge_id: str) -> Optional[Challenge]:
         """Get a challenge by ID"""
-        challenge = self.challenges.get(challenge_id)
+        challenge = await self._get_challenge(challenge_id)
         if challenge and challenge.status == ChallengeStatus.PUBLISHED:
             # Increment view count
             challenge.view_count += 1
             challenge.updated_at = datetime.utcnow()
-            await self._save_challenges()
+            await self._save_challenge(challenge)
             # Convert segment times to milliseconds for frontend compatibility
             return self._convert_segment_times_to_milliseconds(challenge)
         elif challenge:
@@ -465,7 +642,7 @@ class ChallengeService:
     
     async def get_challenge_segment_metadata(self, challenge_id: str) -> Optional[Dict[str, Any]]:
         """Get segment metadata for a challenge for playback purposes"""
-        challenge = self.challenges.get(challenge_id)
+        challenge = await self._get_challenge(challenge_id)
         if not challenge:
             return None
         
@@ -542,53 +719,58 @@ class ChallengeService:
         user_id: Optional[str] = None
     ) -> Tuple[List[Challenge], int]:
         """List challenges with pagination and filtering"""
+        result = await self.list_challenges_page(
+            page=page,
+            page_size=page_size,
+            creator_id=creator_id,
+            status=status,
+            tags=tags,
+            user_id=user_id
+        )
+        return result.challenges, result.total_count
+    
+    async def list_challenges_page(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        creator_id: Optional[str] = None,
+        status: Optional[ChallengeStatus] = None,
+        tags: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> CatalogPage:
+        """
+        List challenges newest first, excluding those the user already attempted.
         
-        # Get attempted challenges for the user (both correct and incorrect guesses)
-        attempted_challenge_ids = []
-        if user_id:
-            try:
-                from services.database_service import get_db_service
-                db_service = get_db_service()
-                attempted_challenge_ids = db_service.get_attempted_challenge_ids(int(user_id))
-            except Exception as e:
-                logger.error(f"Failed to get attempted challenges for user {user_id}: {e}")
-
-        # Filter challenges
-        filtered_challenges = []
-        for challenge in self.challenges.values():
-            # Exclude attempted challenges (both correct and incorrect guesses)
-            if user_id and challenge.challenge_id in attempted_challenge_ids:
-                continue
-
-            # Filter by creator
-            if creator_id and challenge.creator_id != creator_id:
-                continue
-            
-            # Filter by status (default to published for public listing)
-            if status:
-                if challenge.status != status:
-                    continue
-            elif not creator_id:  # Public listing - only show published
-                if challenge.status != ChallengeStatus.PUBLISHED:
-                    continue
-            
-            # Filter by tags
-            if tags:
-                if not any(tag in challenge.tags for tag in tags):
-                    continue
-            
-            filtered_challenges.append(challenge)
+        Pass the previous page's next_cursor as cursor to page by keyset instead
+        of by page number; page is ignored when a cursor is given.
         
-        # Sort by creation date (newest first)
-        filtered_challenges.sort(key=lambda x: x.created_at, reverse=True)
+        Raises:
+            ChallengeServiceError: If the cursor is malformed
+        """
         
-        # Paginate
-        total_count = len(filtered_challenges)
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        page_challenges = filtered_challenges[start_idx:end_idx]
+        # Exclude attempted challenges (both correct and incorrect guesses)
+        if user_id:
+            await self._ensure_guesses_loaded(user_id=user_id)
+        attempted_challenge_ids = self.guesses.attempted(user_id) if user_id else set()
         
-        return page_challenges, total_count
+        # Default to published for public listing; a creator's listing covers every status
+        if not status and not creator_id:
+            status = ChallengeStatus.PUBLISHED
+        await self._ensure_challenges_loaded(status=status, creator_id=creator_id)
+        
+        try:
+            return self.challenges.query(
+                status=status,
+                creator_id=creator_id,
+                tags=tags,
+                exclude_ids=attempted_challenge_ids,
+                cursor=cursor,
+                offset=(page - 1) * page_size,
+                limit=page_size
+            )
+        except ValueError as e:
+            raise ChallengeServiceError(str(e))
     
     async def submit_guess(
         self, 
@@ -598,7 +780,7 @@ class ChallengeService:
         """Submit a guess for a challenge"""
         
         # Get challenge
-        challenge = self.challenges.get(request.challenge_id)
+        challenge = await self._get_challenge(request.challenge_id)
         if not challenge:
             raise ChallengeServiceError("Challenge not found")
         
@@ -606,13 +788,8 @@ class ChallengeService:
             raise ChallengeServiceError("Challenge is not available for guessing")
         
         # Check if user already guessed on this challenge
-        existing_guess = None
-        for guess in self.guesses.values():
-            if guess.challenge_id == request.challenge_id and guess.user_id == user_id:
-                existing_guess = guess
-                break
-        
-        if existing_guess:
+        await self._ensure_guesses_loaded(user_id=user_id)
+        if self.guesses.has_guessed(user_id, request.challenge_id):
             raise ChallengeServiceError("User has already guessed on this challenge")
         
         # Validate guessed statement exists
@@ -628,6 +805,33 @@ class ChallengeService:
         # Check if guess is correct
         is_correct = request.guessed_lie_statement_id == challenge.lie_statement_id
         
+        # Create guess submission
+        guess_id = str(uuid.uuid4())
+        guess = GuessSubmission(
+            guess_id=guess_id,
+            challenge_id=request.challenge_id,
+            user_id=user_id,
+            guessed_lie_statement_id=request.guessed_lie_statement_id,
+            is_correct=is_correct,
+            submitted_at=datetime.utcnow(),
+            response_time_seconds=request.response_time_seconds
+        )
+        
+        # Store guess before the first await so a concurrent duplicate is rejected
+        self.guesses[guess_id] = guess
+        
+        # Persist the guess before touching counters or the score, so a failed
+        # save (including a duplicate rejected by another worker) changes nothing
+        if not await self._save_guess(guess):
+            self.guesses.pop(guess_id, None)
+            raise ChallengeServiceError("Failed to record guess")
+        
+        # Update challenge statistics
+        challenge.guess_count += 1
+        if is_correct:
+            challenge.correct_guess_count += 1
+        challenge.updated_at = datetime.utcnow()
+        
         # Calculate points and update user score if correct
         points_earned = 0
         if is_correct:
@@ -644,7 +848,7 @@ class ChallengeService:
                     # Try to convert user_id to integer for registered users
                     try:
                         user_id_int = int(user_id)
-                        db_service.increment_user_score(user_id_int, points_earned)
+                        await run_db_call(db_service.increment_user_score, user_id_int, points_earned)
                         logger.info(f"Incremented database score for user {user_id} by {points_earned} points")
                     except ValueError:
                         # User ID is not an integer (UUID or email), try to find by email/identifier
@@ -657,35 +861,12 @@ class ChallengeService:
                 logger.error(f"An unexpected error occurred while incrementing score for user {user_id}: {e}")
                 # Don't raise the exception, just log it so the guess submission continues
 
-        # Create guess submission
-        guess_id = str(uuid.uuid4())
-        guess = GuessSubmission(
-            guess_id=guess_id,
-            challenge_id=request.challenge_id,
-            user_id=user_id,
-            guessed_lie_statement_id=request.guessed_lie_statement_id,
-            is_correct=is_correct,
-            submitted_at=datetime.utcnow(),
-            response_time_seconds=request.response_time_seconds
-        )
-        
-        # Update challenge statistics
-        challenge.guess_count += 1
-        if is_correct:
-            challenge.correct_guess_count += 1
-        challenge.updated_at = datetime.utcnow()
-        
-        # Store guess and update challenge
-        self.guesses[guess_id] = guess
-        
-        # Try to save to database, but don't fail if it doesn't work
-        try:
-            await self._save_guesses()
-            await self._save_challenges()
+        # Persist the challenge whose counters changed. A failure is logged and
+        # the in-memory counters remain authoritative until the next save.
+        if await self._save_challenge(challenge):
             logger.info(f"Successfully saved guess {guess_id} to database")
-        except Exception as e:
-            logger.error(f"Failed to save guess {guess_id} to database: {e}")
-            logger.info(f"Continuing with in-memory storage for guess {guess_id}")
+        else:
+            logger.info(f"Continuing with in-memory counters for challenge {challenge.challenge_id}")
         
         # Record guess in history for challenge completion tracking
         logger.info(f"About to record guess history for user {user_id} and challenge {request.challenge_id}")
@@ -693,7 +874,8 @@ class ChallengeService:
             from services.database_service import get_db_service
             db_service = get_db_service()
             logger.info(f"Got database service, calling add_guess_history_record...")
-            db_service.add_guess_history_record(
+            await run_db_call(
+                db_service.add_guess_history_record,
                 user_id=int(user_id),
                 challenge_id=request.challenge_id,
                 was_correct=is_correct
@@ -709,6 +891,7 @@ class ChallengeService:
     
     async def get_user_guesses(self, user_id: str) -> List[GuessSubmission]:
         """Get all guesses by a user"""
+        await self._ensure_guesses_loaded(user_id=user_id)
         user_guesses = [
             guess for guess in self.guesses.values() 
             if guess.user_id == user_id
@@ -722,30 +905,24 @@ class ChallengeService:
         page_size: int = 20
     ) -> List[Challenge]:
         """Get challenges created by a specific user"""
-        user_challenges = [
-            challenge for challenge in self.challenges.values()
-            if challenge.creator_id == user_id
-        ]
-        
-        # Sort by creation date (newest first)
-        user_challenges.sort(key=lambda x: x.created_at, reverse=True)
-        
-        # Paginate
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        page_challenges = user_challenges[start_idx:end_idx]
-        
-        return page_challenges
+        await self._ensure_challenges_loaded(creator_id=user_id)
+        result = self.challenges.query(
+            creator_id=user_id,
+            offset=(page - 1) * page_size,
+            limit=page_size
+        )
+        return result.challenges
     
     async def get_challenge_guesses(self, challenge_id: str, creator_id: str) -> List[GuessSubmission]:
         """Get all guesses for a challenge (only for challenge creator)"""
-        challenge = self.challenges.get(challenge_id)
+        challenge = await self._get_challenge(challenge_id)
         if not challenge:
             raise ChallengeServiceError("Challenge not found")
         
         if challenge.creator_id != creator_id:
             raise ChallengeServiceError("Access denied")
         
+        await self._ensure_guesses_loaded(challenge_id=challenge_id)
         challenge_guesses = [
             guess for guess in self.guesses.values() 
             if guess.challenge_id == challenge_id
@@ -767,7 +944,7 @@ class ChallengeService:
             ChallengeNotFoundError: If the challenge is not found.
             ChallengeAccessDeniedError: If the user is not the creator.
         """
-        challenge = self.challenges.get(challenge_id)
+        challenge = await self._get_challenge(challenge_id)
         
         if not challenge:
             raise ChallengeNotFoundError(f"Challenge with ID {challenge_id} not found.")
@@ -779,7 +956,7 @@ class ChallengeService:
         from services.database_service import get_db_service
         db_service = get_db_service()
         
-        if db_service.delete_challenge(challenge_id):
+        if await run_db_call(db_service.delete_challenge, challenge_id):
             # If deletion from DB is successful, remove from in-memory cache
             if challenge_id in self.challenges:
                 del self.challenges[challenge_id]
@@ -797,7 +974,7 @@ class ChallengeService:
     
     async def flag_challenge(self, challenge_id: str, user_id: str, reason: str) -> bool:
         """Flag a challenge for manual review"""
-        challenge = self.challenges.get(challenge_id)
+        challenge = await self._get_challenge(challenge_id)
         if not challenge:
             raise ChallengeServiceError("Challenge not found")
         
@@ -812,7 +989,7 @@ class ChallengeService:
             # Update challenge status
             challenge.status = ChallengeStatus.FLAGGED
             challenge.updated_at = datetime.utcnow()
-            await self._save_challenges()
+            await self._save_challenge(challenge)
         
         return success
     
@@ -824,7 +1001,7 @@ class ChallengeService:
         reason: Optional[str] = None
     ) -> Challenge:
         """Manually review a flagged or pending challenge"""
-        challenge = self.challenges.get(challenge_id)
+        challenge = await self._get_challenge(challenge_id)
         if not challenge:
             raise ChallengeServiceError("Challenge not found")
         
@@ -861,7 +1038,7 @@ class ChallengeService:
             challenge.status = ChallengeStatus.FLAGGED
         
         challenge.updated_at = datetime.utcnow()
-        await self._save_challenges()
+        await self._save_challenge(challenge)
         
         logger.info(f"Challenge {challenge_id} manually reviewed by {moderator_id}: {decision}")
         return challenge
@@ -889,6 +1066,8 @@ class ChallengeService:
                 moderation_statuses = [ChallengeStatus.FLAGGED]
         
         # Filter challenges by moderation status
+        for moderation_status in moderation_statuses:
+            await self._ensure_challenges_loaded(status=moderation_status)
         filtered_challenges = [
             challenge for challenge in self.challenges.values()
             if challenge.status in moderation_statuses
@@ -907,11 +1086,12 @@ class ChallengeService:
     
     async def get_all_challenges(self) -> List[Challenge]:
         """Get all challenges for migration purposes"""
+        await self._ensure_challenges_loaded()
         return list(self.challenges.values())
     
     async def get_challenge_stats(self, challenge_id: str) -> Optional[Dict[str, Any]]:
         """Get statistics for a challenge"""
-        challenge = self.challenges.get(challenge_id)
+        challenge = await self._get_challenge(challenge_id)
         if not challenge:
             return None
         
@@ -930,14 +1110,14 @@ class ChallengeService:
     
     async def update_challenge(self, challenge_id: str, updated_challenge: Challenge) -> Challenge:
         """Update an existing challenge"""
-        if challenge_id not in self.challenges:
+        if await self._get_challenge(challenge_id) is None:
             raise ChallengeServiceError(f"Challenge {challenge_id} not found")
         
         # Update the challenge
         self.challenges[challenge_id] = updated_challenge
         
-        # Save to disk
-        await self._save_challenges()
+        # Persist only the updated challenge
+        await self._save_challenge(updated_challenge)
         
         logger.info(f"Updated challenge {challenge_id}")
         return updated_challenge
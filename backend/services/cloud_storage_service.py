@@ -3,7 +3,11 @@ Cloud Storage Service - Abstract interface for cloud storage providers
 """
 import os
 import uuid
+import base64
 import asyncio
+import hashlib
+import inspect
+import time
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any, BinaryIO, AsyncGenerator, List
 from datetime import datetime, timedelta
@@ -11,11 +15,19 @@ from pathlib import Path
 import logging
 
 import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
 from botocore.config import Config
 
+from config import settings
+from services.metrics_registry import metrics_registry
+from services.request_profiler import span
+
 logger = logging.getLogger(__name__)
 
+S3_REQUEST_SECONDS = metrics_registry.histogram(
+    "s3_request_duration_seconds", "S3 API call latency by operation and outcome", ("operation", "outcome")
+)
+
 class CloudStorageError(Exception):
     """Base exception for cloud storage operations"""
     pass
@@ -71,6 +83,194 @@ class CloudStorageService(ABC):
         """List files with optional prefix filter"""
         pass
 
+def _start_s3_timer(context, **kwargs):
+    context["metrics_started"] = time.perf_counter()
+
+def _observe_s3_call(event_name, context, http_response=None, **kwargs):
+    started = context.get("metrics_started")
+    if started is None:
+        return
+    ok = http_response is not None and http_response.status_code < 300
+    S3_REQUEST_SECONDS.observe(time.perf_counter() - started, event_name.rsplit(".", 1)[-1], "ok" if ok else "error")
+
+def instrument_s3_client(s3_client):
+    """Time every API call the client makes (retries included) into s3_request_duration_seconds"""
+    s3_client.meta.events.register("before-call.s3", _start_s3_timer)
+    s3_client.meta.events.register("after-call.s3", _observe_s3_call)
+    s3_client.meta.events.register("after-call-error.s3", _observe_s3_call)
+    return s3_client
+
+class S3MultipartUploader:
+    """
+    Concurrent multipart uploads to one S3 bucket.
+    
+    The source (a binary file object, or anything with an async read(size))
+    is read up to threshold bytes; if it ends before that it is sent with a
+    single put_object. Otherwise it goes up as a multipart upload of part_size parts
+    with up to concurrency parts in flight. A part is only read once a slot
+    is free, so buffered memory stays around concurrency x part_size
+    whatever the file size. Each part is tried up to max_attempts times
+    (with Content-MD5 when checksum is on, so S3 rejects a corrupted part);
+    any failure aborts the multipart upload so no orphaned parts are billed.
+    """
+    
+    RETRY_BACKOFF_SECONDS = 0.5
+    
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        threshold: Optional[int] = None,
+        part_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        checksum: Optional[bool] = None
+    ):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.threshold = threshold if threshold is not None else settings.S3_MULTIPART_THRESHOLD
+        self.part_size = part_size if part_size is not None else settings.S3_MULTIPART_PART_SIZE
+        self.concurrency = max(1, concurrency if concurrency is not None else settings.S3_MULTIPART_CONCURRENCY)
+        self.max_attempts = max(1, max_attempts if max_attempts is not None else settings.S3_MULTIPART_MAX_ATTEMPTS)
+        self.checksum = checksum if checksum is not None else settings.S3_MULTIPART_CHECKSUM
+        self.stats = {"uploads": 0, "multipart_uploads": 0, "parts": 0, "part_retries": 0, "aborted": 0, "bytes": 0}
+    
+    async def _read(self, source, size: int) -> bytes:
+        if inspect.iscoroutinefunction(source.read):
+            return await source.read(size)
+        return await asyncio.to_thread(source.read, size)
+    
+    async def _read_part(self, source) -> bytes:
+        """Read up to part_size bytes; shorter only at the end of the source"""
+        block = await self._read(source, self.part_size)
+        if len(block) == self.part_size or not block:
+            return block
+        part = bytearray(block)
+        while len(part) < self.part_size:
+            block = await self._read(source, self.part_size - len(part))
+            if not block:
+                break
+            part += block
+        return bytes(part)
+    
+    def _checksum_args(self, data: bytes) -> Dict[str, str]:
+        if not self.checksum:
+            return {}
+        digest = hashlib.md5(data, usedforsecurity=False).digest()
+        return {'ContentMD5': base64.b64encode(digest).decode()}
+    
+    async def upload(self, source, key: str, extra_args: Optional[Dict[str, Any]] = None) -> int:
+        """Upload source to key; returns the number of bytes uploaded"""
+        extra_args = extra_args or {}
+        
+        # Buffer up to the threshold to choose between put_object and multipart;
+        # stop as soon as it is reached so at most threshold bytes are held here
+        buffered = []
+        buffered_size = 0
+        ended = False
+        while buffered_size < self.threshold or not buffered:
+            part = await self._read_part(source)
+            if not part:
+                ended = True
+                break
+            buffered.append(part)
+            buffered_size += len(part)
+        
+        if ended:
+            body = b"".join(buffered)
+            await asyncio.to_thread(
+                lambda: self.s3_client.put_object(
+                    Bucket=self.bucket_name, Key=key, Body=body, **self._checksum_args(body), **extra_args
+                )
+            )
+            self.stats["uploads"] += 1
+            self.stats["bytes"] += len(body)
+            return len(body)
+        
+        return await self._multipart_upload(source, key, extra_args, buffered)
+    
+    async def _upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> Dict[str, Any]:
+        checksum_args = self._checksum_args(data)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await asyncio.to_thread(
+                    lambda: self.s3_client.upload_part(
+                        Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                        PartNumber=part_number, Body=data, **checksum_args
+                    )
+                )
+                return {'ETag': response['ETag'], 'PartNumber': part_number}
+            except (ClientError, BotoCoreError) as e:
+                if attempt == self.max_attempts:
+                    raise
+                self.stats["part_retries"] += 1
+                logger.warning(f"Retrying part {part_number} of {key} (attempt {attempt} failed: {e})")
+                await asyncio.sleep(self.RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    
+    async def _multipart_upload(self, source, key: str, extra_args: Dict[str, Any], buffered: List[bytes]) -> int:
+        response = await asyncio.to_thread(
+            lambda: self.s3_client.create_multipart_upload(Bucket=self.bucket_name, Key=key, **extra_args)
+        )
+        upload_id = response['UploadId']
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: List[asyncio.Task] = []
+        total = 0
+        
+        async def send(part_number: int, data: bytes) -> Dict[str, Any]:
+            try:
+                return await self._upload_part(key, upload_id, part_number, data)
+            finally:
+                slots.release()
+        
+        try:
+            while True:
+                # Wait for a free slot before reading (and buffering) another part
+                await slots.acquire()
+                failed = next((task for task in tasks if task.done() and task.exception()), None)
+                if failed is not None:
+                    slots.release()
+                    raise failed.exception()
+                data = buffered.pop(0) if buffered else await self._read_part(source)
+                if not data:
+                    slots.release()
+                    break
+                total += len(data)
+                tasks.append(asyncio.create_task(send(len(tasks) + 1, data)))
+            
+            parts = await asyncio.gather(*tasks)
+            await asyncio.to_thread(
+                lambda: self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                    MultipartUpload={'Parts': parts}
+                )
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.stats["aborted"] += 1
+            try:
+                await asyncio.to_thread(
+                    lambda: self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+                )
+            except (ClientError, BotoCoreError) as e:
+                logger.warning(f"Failed to abort multipart upload {upload_id} for {key}: {e}")
+            raise
+        
+        self.stats["uploads"] += 1
+        self.stats["multipart_uploads"] += 1
+        self.stats["parts"] += len(tasks)
+        self.stats["bytes"] += total
+        return total
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "threshold": self.threshold,
+            "part_size": self.part_size,
+            "concurrency": self.concurrency
+        }
+
 class S3CloudStorageService(CloudStorageService):
     """AWS S3 implementation of cloud storage service"""
     
@@ -98,11 +298,13 @@ class S3CloudStorageService(CloudStorageService):
             region_name=region_name
         )
         
-        self.s3_client = session.client(
+        self.s3_client = instrument_s3_client(session.client(
             's3',
             config=config,
             endpoint_url=endpoint_url
-        )
+        ))
+        
+        self.transfer = S3MultipartUploader(self.s3_client, bucket_name)
         
         # Skip bucket initialization to avoid errors during startup
         # The bucket check will happen when actually needed
@@ -209,7 +411,7 @@ class S3CloudStorageService(CloudStorageService):
         file_size: int,
         metadata: Optional[Dict[str, str]] = None
     ) -> str:
-        """Upload file stream to S3 using multipart upload for large files"""
+        """Upload file stream to S3, as a concurrent multipart upload for large files"""
         try:
             extra_args = {
                 'ContentType': content_type,
@@ -220,21 +422,7 @@ class S3CloudStorageService(CloudStorageService):
             if metadata:
                 extra_args['Metadata'] = metadata
             
-            # Use multipart upload for files larger than 100MB
-            if file_size > 100 * 1024 * 1024:
-                await self._multipart_upload(file_stream, key, extra_args)
-            else:
-                # Simple upload for smaller files
-                file_data = file_stream.read()
-                await asyncio.get_event_loop().run_in_executor(
-                    None, 
-                    lambda: self.s3_client.put_object(
-                        Bucket=self.bucket_name,
-                        Key=key,
-                        Body=file_data,
-                        **extra_args
-                    )
-                )
+            await self.transfer.upload(file_stream, key, extra_args)
             
             # Return presigned URL for secure access (expires in 24 hours)
             url = self.generate_presigned_url(key, expiration=86400)
@@ -245,75 +433,6 @@ class S3CloudStorageService(CloudStorageService):
             logger.error(f"S3 stream upload failed for {key}: {e}")
             raise CloudStorageError(f"S3 stream upload failed: {e}")
     
-    async def _multipart_upload(self, file_stream: BinaryIO, key: str, extra_args: Dict):
-        """Perform multipart upload for large files"""
-        try:
-            # Initiate multipart upload
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, 
-                lambda: self.s3_client.create_multipart_upload(
-                    Bucket=self.bucket_name,
-                    Key=key,
-                    **extra_args
-                )
-            )
-            upload_id = response['UploadId']
-            
-            parts = []
-            part_number = 1
-            chunk_size = 10 * 1024 * 1024  # 10MB chunks
-            
-            try:
-                while True:
-                    chunk = file_stream.read(chunk_size)
-                    if not chunk:
-                        break
-                    
-                    # Upload part
-                    part_response = await asyncio.get_event_loop().run_in_executor(
-                        None, 
-                        lambda: self.s3_client.upload_part(
-                            Bucket=self.bucket_name,
-                            Key=key,
-                            PartNumber=part_number,
-                            UploadId=upload_id,
-                            Body=chunk
-                        )
-                    )
-                    
-                    parts.append({
-                        'ETag': part_response['ETag'],
-                        'PartNumber': part_number
-                    })
-                    part_number += 1
-                
-                # Complete multipart upload
-                await asyncio.get_event_loop().run_in_executor(
-                    None, 
-                    lambda: self.s3_client.complete_multipart_upload(
-                        Bucket=self.bucket_name,
-                        Key=key,
-                        UploadId=upload_id,
-                        MultipartUpload={'Parts': parts}
-                    )
-                )
-                
-            except Exception as e:
-                # Abort multipart upload on error
-                await asyncio.get_event_loop().run_in_executor(
-                    None, 
-                    lambda: self.s3_client.abort_multipart_upload(
-                        Bucket=self.bucket_name,
-                        Key=key,
-                        UploadId=upload_id
-                    )
-                )
-                raise e
-                
-        except ClientError as e:
-            logger.error(f"S3 multipart upload failed for {key}: {e}")
-            raise CloudStorageError(f"S3 multipart upload failed: {e}")
-    
     async def get_file_url(self, key: str, expires_in: int = 3600) -> str:
         """Generate signed URL for S3 object"""
         try:
@@ -431,11 +550,12 @@ class S3CloudStorageService(CloudStorageService):
     def generate_presigned_url(self, key: str, expiration: int = 3600) -> str:
         """Generate a presigned URL for S3 object access"""
         try:
-            url = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': self.bucket_name, 'Key': key},
-                ExpiresIn=expiration
-            )
+            with span("signed_url.sign", keys=1):
+                url = self.s3_client.generate_presigned_url(
+                    'get_object',
+                    Params={'Bucket': self.bucket_name, 'Key': key},
+                    ExpiresIn=expiration
+                )
             logger.info(f"Generated presigned URL for {key} (expires in {expiration}s)")
             return url
         except ClientError as e:
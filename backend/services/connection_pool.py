@@ -0,0 +1,397 @@
+"""
+Thread-safe database connection pool shared by PostgreSQL and SQLite access paths
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available before the checkout timeout"""
+    pass
+
+
+class PoolClosedError(Exception):
+    """Raised when a connection is requested from a closed pool"""
+    pass
+
+
+class _PoolEntry:
+    """Bookkeeping for a single physical connection"""
+    __slots__ = ("raw", "created_at", "last_used_at")
+
+    def __init__(self, raw: Any):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used_at = now
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled DB-API connection.
+
+    Behaves like the underlying connection (attribute access, ``cursor()``,
+    ``commit()``...). Used as a context manager it commits on success and
+    rolls back on error, like sqlite3/psycopg2 connections do, and then returns
+    the connection to the pool. ``close()`` also returns it to the pool.
+    """
+    __slots__ = ("_pool", "_entry", "_released")
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_entry", entry)
+        object.__setattr__(self, "_released", False)
+
+    @property
+    def raw(self) -> Any:
+        """The underlying DB-API connection"""
+        return self._entry.raw
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._entry.raw, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._entry.raw, name, value)
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        discard = False
+        try:
+            if exc_type is None:
+                self._entry.raw.commit()
+            else:
+                self._entry.raw.rollback()
+        except Exception as e:
+            logger.warning(f"Discarding pooled connection after failed commit/rollback: {e}")
+            discard = True
+        self._release(discard=discard)
+        return False
+
+    def close(self) -> None:
+        """Return the connection to the pool instead of closing it"""
+        self._release()
+
+    def discard(self) -> None:
+        """Close the physical connection and remove it from the pool"""
+        self._release(discard=True)
+
+    def _release(self, discard: bool = False) -> None:
+        if self._released:
+            return
+        object.__setattr__(self, "_released", True)
+        self._pool.release(self._entry, discard=discard)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections.
+
+    Connections are created lazily up to ``max_size``; callers block for up to
+    ``checkout_timeout`` seconds when the pool is exhausted. Idle connections
+    beyond ``min_size`` are reaped after ``idle_timeout`` seconds, and any
+    connection older than ``max_lifetime`` seconds is recycled. On checkout a
+    cheap liveness check always runs, and a full ``ping`` runs when the
+    connection has been idle longer than ``health_check_interval``.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        name: str = "default",
+        min_size: int = 1,
+        max_size: int = 10,
+        max_lifetime: float = 1800.0,
+        idle_timeout: float = 300.0,
+        checkout_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        is_alive: Optional[Callable[[Any], bool]] = None,
+        ping: Optional[Callable[[Any], None]] = None,
+        reset: Optional[Callable[[Any], None]] = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        self._connect = connect
+        self._is_alive = is_alive
+        self._ping = ping
+        self._reset = reset
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle: Deque[_PoolEntry] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._last_reap = time.monotonic()
+        self._reap_interval = max(1.0, min(idle_timeout, 30.0))
+
+        # Counters exposed through get_stats()
+        self._checkouts = 0
+        self._created = 0
+        self._closed_count = 0
+        self._timeouts = 0
+        self._health_check_failures = 0
+        self._recycled = 0
+        self._reaped = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    # ------------------------------------------------------------------
+    # Checkout / release
+    # ------------------------------------------------------------------
+
+    def connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a connection wrapped in a PooledConnection proxy"""
+        return PooledConnection(self, self._acquire(timeout))
+
+    def _acquire(self, timeout: Optional[float] = None) -> _PoolEntry:
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            entry = None
+            create = False
+            with self._available:
+                if self._closed:
+                    raise PoolClosedError(f"Connection pool '{self.name}' is closed")
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout:.1f}s waiting for a database connection "
+                            f"from pool '{self.name}' (size={self._size}, in_use={self._in_use})"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._available.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    if self._closed:
+                        raise PoolClosedError(f"Connection pool '{self.name}' is closed")
+
+                if self._idle:
+                    # LIFO keeps the hottest connections in use and lets old ones idle out
+                    entry = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+                self._in_use += 1
+
+            if create:
+                try:
+                    entry = _PoolEntry(self._connect())
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._available.notify()
+                    raise
+                with self._lock:
+                    self._created += 1
+            elif not self._checkout_ok(entry):
+                self._close_entry(entry, in_use=True)
+                continue
+
+            waited = time.monotonic() - started
+            with self._lock:
+                self._checkouts += 1
+                self._total_wait += waited
+                if waited > self._max_wait:
+                    self._max_wait = waited
+            entry.last_used_at = time.monotonic()
+            return entry
+
+    def _checkout_ok(self, entry: _PoolEntry) -> bool:
+        """Validate an idle connection before handing it out"""
+        now = time.monotonic()
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            with self._lock:
+                self._recycled += 1
+            return False
+        try:
+            if self._is_alive is not None and not self._is_alive(entry.raw):
+                raise RuntimeError("liveness check failed")
+            if self._ping is not None and now - entry.last_used_at > self.health_check_interval:
+                self._ping(entry.raw)
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled connection failed health check in pool '{self.name}': {e}")
+            with self._lock:
+                self._health_check_failures += 1
+            return False
+
+    def release(self, entry: _PoolEntry, discard: bool = False) -> None:
+        """Return a checked-out connection to the pool"""
+        now = time.monotonic()
+        if not discard and self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            with self._lock:
+                self._recycled += 1
+            discard = True
+
+        if not discard and self._reset is not None:
+            try:
+                self._reset(entry.raw)
+            except Exception as e:
+                logger.warning(f"Discarding connection that could not be reset in pool '{self.name}': {e}")
+                discard = True
+
+        if discard:
+            self._close_entry(entry, in_use=True)
+        else:
+            entry.last_used_at = now
+            with self._available:
+                self._in_use -= 1
+                if self._closed:
+                    self._size -= 1
+                    self._closed_count += 1
+                    close_now = True
+                else:
+                    self._idle.append(entry)
+                    close_now = False
+                    self._available.notify()
+            if close_now:
+                self._close_raw(entry.raw)
+
+        if now - self._last_reap >= self._reap_interval:
+            self.reap_idle()
+
+    def _close_entry(self, entry: _PoolEntry, in_use: bool) -> None:
+        with self._available:
+            self._size -= 1
+            if in_use:
+                self._in_use -= 1
+            self._closed_count += 1
+            self._available.notify()
+        self._close_raw(entry.raw)
+
+    @staticmethod
+    def _close_raw(raw: Any) -> None:
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def fill(self) -> int:
+        """Open connections until the pool holds at least min_size; returns the number opened"""
+        opened = 0
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return opened
+                self._size += 1
+            try:
+                entry = _PoolEntry(self._connect())
+            except Exception as e:
+                with self._available:
+                    self._size -= 1
+                    self._available.notify()
+                logger.warning(f"Could not pre-open connection for pool '{self.name}': {e}")
+                return opened
+            with self._available:
+                self._created += 1
+                self._idle.appendleft(entry)
+                self._available.notify()
+            opened += 1
+
+    def reap_idle(self) -> int:
+        """Close idle connections past idle_timeout (down to min_size) or max_lifetime"""
+        now = time.monotonic()
+        to_close = []
+        with self._lock:
+            self._last_reap = now
+            keep: Deque[_PoolEntry] = deque()
+            # Oldest-used connections sit at the left of the idle deque
+            while self._idle:
+                entry = self._idle.popleft()
+                expired = self.max_lifetime and now - entry.created_at > self.max_lifetime
+                idle_too_long = (
+                    self.idle_timeout
+                    and now - entry.last_used_at > self.idle_timeout
+                    and self._size - len(to_close) > self.min_size
+                )
+                if expired or idle_too_long:
+                    to_close.append(entry)
+                    if expired:
+                        self._recycled += 1
+                    else:
+                        self._reaped += 1
+                else:
+                    keep.append(entry)
+            self._idle = keep
+            self._size -= len(to_close)
+            self._closed_count += len(to_close)
+            if to_close:
+                self._available.notify(len(to_close))
+
+        for entry in to_close:
+            self._close_raw(entry.raw)
+        if to_close:
+            logger.debug(f"Reaped {len(to_close)} idle connections from pool '{self.name}'")
+        return len(to_close)
+
+    def close(self) -> None:
+        """Close all idle connections; in-use connections are closed when released"""
+        with self._available:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._closed_count += len(idle)
+            self._available.notify_all()
+        for entry in idle:
+            self._close_raw(entry.raw)
+        logger.info(f"Closed connection pool '{self.name}' ({len(idle)} idle connections)")
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of pool utilisation for monitoring"""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                "name": self.name,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": checkouts,
+                "connections_created": self._created,
+                "connections_closed": self._closed_count,
+                "checkout_timeouts": self._timeouts,
+                "health_check_failures": self._health_check_failures,
+                "recycled_connections": self._recycled,
+                "reaped_idle_connections": self._reaped,
+                "total_wait_ms": round(self._total_wait * 1000, 3),
+                "avg_wait_ms": round(self._total_wait * 1000 / checkouts, 3) if checkouts else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "closed": self._closed,
+            }
@@ -4,9 +4,13 @@ Database service for managing database operations with PostgreSQL and SQLite sup
 import sqlite3
 import logging
 import json
+import threading
+import time
 import traceback
+import uuid
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Union, NamedTuple
+from typing import Optional, Dict, Any, Iterator, List, Union, NamedTuple
 from datetime import datetime
 from passlib.context import CryptContext
 from config import settings
@@ -15,6 +19,11 @@ from enum import Enum
 from urllib.parse import urlparse, parse_qs
 import re
 
+from services.connection_pool import ConnectionPool, PoolTimeoutError
+from services.db_executor import get_db_executor, run_db_call, shutdown_db_executor
+from services.metrics_registry import metrics_registry
+from services.request_profiler import fingerprint_sql, profiling_active, record_span
+
 # PostgreSQL imports (will only be used if DATABASE_URL is set)
 try:
     import psycopg2
@@ -25,6 +34,171 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+QUERY_SECONDS = metrics_registry.histogram(
+    "db_query_duration_seconds", "DatabaseService._execute_query time by statement type", ("operation",)
+)
+QUERY_ROWS = metrics_registry.counter(
+    "db_query_rows_total", "Rows returned or affected by DatabaseService._execute_query", ("operation",)
+)
+QUERY_ERRORS = metrics_registry.counter(
+    "db_query_errors_total", "Failed DatabaseService._execute_query calls by statement type and error", ("operation", "error")
+)
+
+_STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "CREATE", "ALTER", "DROP", "PRAGMA"}
+
+@lru_cache(maxsize=1024)
+def _statement_type(query: str) -> str:
+    """Leading SQL keyword, used as the metrics label (OTHER outside a fixed set)"""
+    words = query.lstrip()[:10].split(None, 1)
+    keyword = words[0].upper() if words else ""
+    return keyword if keyword in _STATEMENT_TYPES else "OTHER"
+
+class _PrefetchedCursor:
+    """
+    Read-only stand-in for a cursor whose rows were fetched before its pooled
+    connection went back to the pool (_execute_query with return_cursor=True)
+    """
+
+    def __init__(self, cursor, rows: list):
+        self.description = cursor.description
+        self.rowcount = cursor.rowcount
+        self.lastrowid = getattr(cursor, "lastrowid", None)
+        self._rows = rows
+        self._position = 0
+
+    def fetchone(self):
+        if self._position >= len(self._rows):
+            return None
+        row = self._rows[self._position]
+        self._position += 1
+        return row
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchall(self) -> list:
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+_CHALLENGE_COLUMNS = """challenge_id, creator_id, title, status, lie_statement_id,
+    view_count, guess_count, correct_guess_count, is_merged_video,
+    statements_json, merged_video_metadata_json, tags_json,
+    created_at, updated_at, published_at"""
+
+_GUESS_COLUMNS = """guess_id, challenge_id, user_id, guessed_lie_statement_id,
+    is_correct, response_time_seconds, submitted_at"""
+
+_STATEMENT_FIELDS = ('statement_id', 'statement_type', 'media_url', 'media_file_id', 'duration_seconds')
+_MERGED_METADATA_FIELDS = ('total_duration', 'segments', 'video_file_id')
+
+def _parse_db_datetime(value: Any, record_id: str) -> Optional[datetime]:
+    """PostgreSQL returns datetimes, SQLite ISO strings; anything unparseable becomes None"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError as e:
+            logger.error(f"Invalid datetime format for {record_id}: {e}, value: {value}")
+            return None
+    logger.warning(f"Unexpected datetime type for {record_id}: {type(value)}, value: {value}")
+    return None
+
+def _parse_json_column(value: Any, column: str, challenge_id: str) -> Any:
+    """JSON text columns come back as strings from SQLite and may already be decoded by PostgreSQL"""
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid JSON in {column} for challenge {challenge_id}: {e}")
+        return None
+
+def _challenge_from_row(row: Dict[str, Any]):
+    """
+    Build a Challenge from a challenges row, tolerating legacy data.
+
+    Statements missing required fields are dropped and a challenge left with
+    no valid statements is skipped (None). Unparseable rows are logged and
+    also return None.
+    """
+    from models import Challenge, Statement, ChallengeStatus, MergedVideoMetadata
+
+    challenge_id = row.get("challenge_id")
+    try:
+        statements_data = _parse_json_column(row["statements_json"], "statements_json", challenge_id)
+        if not isinstance(statements_data, list):
+            if statements_data is not None:
+                logger.error(f"statements_json is not a list for challenge {challenge_id}: {type(statements_data)}")
+            statements_data = []
+
+        statements = []
+        for i, stmt_data in enumerate(statements_data):
+            if isinstance(stmt_data, str):
+                # Legacy string-based statements can't be converted to Statement objects
+                logger.warning(f"Challenge {challenge_id} has legacy string-based statement data at index {i}")
+                continue
+            if not isinstance(stmt_data, dict):
+                logger.error(f"Statement {i} for challenge {challenge_id} is not a dict or string: {type(stmt_data)}")
+                continue
+            missing_fields = [field for field in _STATEMENT_FIELDS if field not in stmt_data]
+            if missing_fields:
+                logger.error(f"Statement {i} for challenge {challenge_id} missing required fields: {missing_fields}")
+                continue
+            try:
+                statements.append(Statement(**stmt_data))
+            except Exception as e:
+                logger.error(f"Error creating Statement object {i} for challenge {challenge_id}: {e}")
+
+        if not statements:
+            logger.warning(f"Challenge {challenge_id} has no valid statements, skipping")
+            return None
+
+        merged_metadata = None
+        metadata_data = _parse_json_column(row["merged_video_metadata_json"], "merged_video_metadata_json", challenge_id)
+        if isinstance(metadata_data, dict):
+            missing_fields = [field for field in _MERGED_METADATA_FIELDS if field not in metadata_data]
+            if missing_fields:
+                logger.error(f"Metadata for challenge {challenge_id} missing required fields: {missing_fields}")
+            else:
+                try:
+                    merged_metadata = MergedVideoMetadata(**metadata_data)
+                except Exception as e:
+                    logger.error(f"Error creating MergedVideoMetadata for challenge {challenge_id}: {e}")
+        elif metadata_data:
+            logger.error(f"Metadata for challenge {challenge_id} is not a dict: {type(metadata_data)}")
+
+        tags = _parse_json_column(row["tags_json"], "tags_json", challenge_id)
+        if not isinstance(tags, list):
+            tags = []
+
+        return Challenge(
+            challenge_id=challenge_id,
+            creator_id=row["creator_id"],
+            title=row["title"],
+            status=ChallengeStatus(row["status"]) if row["status"] else ChallengeStatus.DRAFT,
+            lie_statement_id=row["lie_statement_id"],
+            statements=statements,
+            view_count=row["view_count"] or 0,
+            guess_count=row["guess_count"] or 0,
+            correct_guess_count=row["correct_guess_count"] or 0,
+            is_merged_video=bool(row["is_merged_video"]),
+            merged_video_metadata=merged_metadata,
+            tags=tags,
+            created_at=_parse_db_datetime(row["created_at"], challenge_id),
+            updated_at=_parse_db_datetime(row["updated_at"], challenge_id),
+            published_at=_parse_db_datetime(row["published_at"], challenge_id)
+        )
+    except Exception as e:
+        logger.error(f"Error parsing challenge row (challenge_id: {challenge_id}): {e}")
+        return None
+
 class DatabaseEnvironment(Enum):
     """Database environment types"""
     PRODUCTION = "production"
@@ -326,6 +500,10 @@ def determine_database_mode(env: DatabaseEnvironment, url_info: Optional[Databas
         else:
             return DatabaseMode.SQLITE_ONLY
 
+class _SQLiteConnection(sqlite3.Connection):
+    """sqlite3 connection that remembers which database file it was opened against"""
+    db_inode: Optional[int] = None
+
 class DatabaseService:
     """Service for managing database operations with environment-aware PostgreSQL/SQLite support"""
     
@@ -391,9 +569,17 @@ class DatabaseService:
             else:
                 self.db_path = Path(__file__).parent.parent / "app.db"
             logger.info(f"Using SQLite database at {self.db_path} in {self.environment.value} environment")
+        
+        # Unique guess indexes confirmed by _ensure_unique_guess_indexes during init
+        self._unique_guess_indexes = set()
+        
+        # Connection pool shared by _execute_query, transaction() and helpers
+        self._local = threading.local()
+        self._pool = self._create_connection_pool()
             
         self._init_database()
         self._verify_database_constraints()
+        self._pool.fill()
     
     def _log_database_error(self, operation: str, error: Exception, query: str = None, params: tuple = None) -> None:
         """
@@ -453,7 +639,7 @@ class DatabaseService:
         connection_errors = []
         if PSYCOPG2_AVAILABLE:
             connection_errors.extend([psycopg2.OperationalError, psycopg2.InterfaceError, psycopg2.DatabaseError])
-        connection_errors.extend([sqlite3.OperationalError, sqlite3.DatabaseError])
+        connection_errors.extend([sqlite3.OperationalError, sqlite3.DatabaseError, PoolTimeoutError])
         
         if isinstance(error, tuple(connection_errors)) or "connection" in error_msg:
             return DatabaseConnectionError(
@@ -557,28 +743,113 @@ class DatabaseService:
         self._validate_database_operation(operation_name)
         return self.get_connection()
     
+    def _create_connection_pool(self) -> ConnectionPool:
+        """Create the connection pool for the configured database"""
+        if self.is_postgres:
+            is_alive = lambda conn: conn.closed == 0
+        else:
+            is_alive = self._sqlite_connection_alive
+        
+        return ConnectionPool(
+            connect=self._connect,
+            name="postgresql" if self.is_postgres else "sqlite",
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            max_lifetime=settings.DB_POOL_MAX_LIFETIME_SECONDS,
+            idle_timeout=settings.DB_POOL_IDLE_TIMEOUT_SECONDS,
+            checkout_timeout=settings.DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+            health_check_interval=settings.DB_POOL_HEALTH_CHECK_INTERVAL_SECONDS,
+            is_alive=is_alive,
+            ping=self._ping_connection,
+            reset=self._reset_connection
+        )
+    
+    def _connect(self):
+        """Open a new physical connection (used by the connection pool)"""
+        if self.is_postgres:
+            return psycopg2.connect(self.database_url)
+        
+        # Pooled connections are handed between threads, one holder at a time
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=_SQLiteConnection)
+        # Remember which file this connection was opened against so a replaced
+        # or deleted database file is detected on checkout
+        conn.db_inode = os.stat(self.db_path).st_ino
+        return conn
+    
+    def _sqlite_connection_alive(self, conn) -> bool:
+        """Cheap liveness check: the database file must still be the one we opened"""
+        try:
+            return getattr(conn, "db_inode", None) == os.stat(self.db_path).st_ino
+        except OSError:
+            return False
+    
+    def _ping_connection(self, conn) -> None:
+        """Round-trip health check for connections that have been idle a while"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        finally:
+            cursor.close()
+        if self.is_postgres:
+            conn.rollback()
+    
+    def _reset_connection(self, conn) -> None:
+        """Restore a connection to fresh-connection state before it goes back to the pool"""
+        if self.is_postgres:
+            if conn.closed:
+                raise DatabaseConnectionError("Connection closed while checked out")
+            if conn.autocommit:
+                conn.autocommit = False
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        else:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            conn.execute("PRAGMA foreign_keys = OFF")
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics (in use, waiting, wait time...)"""
+        stats = self._pool.get_stats()
+        stats["async_executor"] = get_db_executor().get_stats()
+        return stats
+    
+    def close_pool(self) -> None:
+        """Close pooled connections and the async executor (call on application shutdown)"""
+        shutdown_db_executor()
+        self._pool.close()
+    
+    def _get_transaction_connection(self):
+        """Return the connection bound by an enclosing transaction() on this thread, if any"""
+        return getattr(self._local, "transaction_conn", None)
+    
     def get_connection(self):
-        """Get database connection based on environment and mode"""
+        """
+        Check out a pooled database connection based on environment and mode.
+        
+        The returned connection behaves like a DB-API connection. Use it as a
+        context manager (commit/rollback on exit) or call close() to return it
+        to the pool.
+        """
         if self.database_mode == DatabaseMode.POSTGRESQL_ONLY:
             if not self.is_postgres:
                 raise EnvironmentMismatchError("PostgreSQL-only mode but no PostgreSQL URL configured")
-            return psycopg2.connect(self.database_url)
+            return self._pool.connection()
         elif self.database_mode == DatabaseMode.SQLITE_ONLY:
             self._ensure_not_production_for_sqlite("get_connection")
             logger.warning(f"Using SQLite fallback connection in {self.environment.value} environment (path: {self.db_path})")
             if not self.db_path:
                 raise EnvironmentMismatchError("SQLite mode but no database path configured")
-            return sqlite3.connect(self.db_path)
+            return self._pool.connection()
         else:
             # HYBRID mode (development only)
             if self.environment == DatabaseEnvironment.PRODUCTION:
                 raise EnvironmentMismatchError("Hybrid mode not allowed in production")
             
-            if self.is_postgres:
-                return psycopg2.connect(self.database_url)
-            else:
+            if not self.is_postgres:
                 logger.warning(f"Using SQLite fallback connection in hybrid mode ({self.environment.value} environment, path: {self.db_path})")
-                return sqlite3.connect(self.db_path)
+            return self._pool.connection()
     
     def get_cursor(self, conn):
         """Get a properly configured cursor for the database type"""
@@ -608,6 +879,11 @@ class DatabaseService:
         """
         Context manager for database transactions with proper rollback on error
         
+        The transaction's pooled connection is bound to the current thread, so
+        _execute_query and the _execute_* helpers called inside the block run
+        on that connection and are committed or rolled back together.
+        Nested transaction() blocks join the outermost transaction.
+        
         Usage:
             with db_service.transaction():
                 db_service._execute_insert("table1", data1)
@@ -619,29 +895,42 @@ class DatabaseService:
             def __init__(self, db_service):
                 self.db_service = db_service
                 self.conn = None
+                self.owns_connection = False
                 
             def __enter__(self):
+                bound = self.db_service._get_transaction_connection()
+                if bound is not None:
+                    # Join the enclosing transaction
+                    self.conn = bound
+                    return self.conn
+                
                 self.conn = self.db_service._get_validated_connection("transaction")
+                self.owns_connection = True
                 # Begin transaction (implicit in most cases, explicit for safety)
                 if self.db_service.is_postgres:
                     with self.conn.cursor() as cursor:
                         cursor.execute("BEGIN")
                 else:
                     self.conn.execute("BEGIN")
+                self.db_service._local.transaction_conn = self.conn
                 return self.conn
                 
             def __exit__(self, exc_type, exc_val, exc_tb):
-                if exc_type is None:
-                    # Success - commit transaction
-                    self.conn.commit()
-                    logger.debug("Transaction committed successfully")
-                else:
-                    # Error - rollback transaction
-                    self.conn.rollback()
-                    logger.warning(f"Transaction rolled back due to error: {exc_val}")
+                if not self.owns_connection:
+                    return False
                 
-                # Close connection
-                if self.conn:
+                self.db_service._local.transaction_conn = None
+                try:
+                    if exc_type is None:
+                        # Success - commit transaction
+                        self.conn.commit()
+                        logger.debug("Transaction committed successfully")
+                    else:
+                        # Error - rollback transaction
+                        self.conn.rollback()
+                        logger.warning(f"Transaction rolled back due to error: {exc_val}")
+                finally:
+                    # Return connection to the pool
                     self.conn.close()
                     
                 # Don't suppress exceptions
@@ -680,6 +969,72 @@ class DatabaseService:
             logger.error(f"Failed to initialize database: {e}")
             raise
     
+    # (table, unique index, row id column, condition matching all but the earliest row per user and challenge)
+    _GUESS_UNIQUE_INDEXES = (
+        ("guesses", "uq_guesses_user_challenge", "guess_id", """
+            EXISTS (
+                SELECT 1 FROM guesses earlier
+                WHERE earlier.user_id = guesses.user_id
+                  AND earlier.challenge_id = guesses.challenge_id
+                  AND (earlier.submitted_at < guesses.submitted_at
+                       OR (earlier.submitted_at = guesses.submitted_at AND earlier.guess_id < guesses.guess_id))
+            )
+        """),
+        ("guess_history", "uq_guess_history_user_challenge", "id", """
+            EXISTS (
+                SELECT 1 FROM guess_history earlier
+                WHERE earlier.user_id = guess_history.user_id
+                  AND earlier.challenge_id = guess_history.challenge_id
+                  AND earlier.id < guess_history.id
+            )
+        """),
+    )
+    
+    def _ensure_unique_guess_indexes(self, cursor, postgres: bool):
+        """
+        Add unique (user_id, challenge_id) indexes to guesses and guess_history.
+        
+        Databases created before the constraint may hold duplicate guesses from
+        concurrent submissions; those are collapsed to the earliest row once,
+        when the index is first created. The removed row ids are logged. Each
+        table is migrated in its own transaction (a savepoint on SQLite), so a
+        failure leaves its rows untouched and is raised.
+        
+        Sets self._unique_guess_indexes to the index names known to exist.
+        """
+        confirmed = set()
+        for table, index_name, id_column, duplicate_condition in self._GUESS_UNIQUE_INDEXES:
+            if postgres:
+                cursor.execute(f"SELECT 1 FROM pg_indexes WHERE indexname = '{index_name}'")
+            else:
+                cursor.execute(f"SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = '{index_name}'")
+            if cursor.fetchone():
+                confirmed.add(index_name)
+                continue
+            
+            # Postgres init runs in autocommit mode, so open an explicit transaction
+            cursor.execute("BEGIN" if postgres else f"SAVEPOINT {index_name}")
+            try:
+                cursor.execute(f"SELECT {id_column} FROM {table} WHERE {duplicate_condition}")
+                duplicate_ids = [row[0] for row in cursor.fetchall()]
+                if duplicate_ids:
+                    logger.warning(
+                        f"Removing {len(duplicate_ids)} duplicate rows from {table} before adding {index_name}: "
+                        f"{id_column} in {duplicate_ids}"
+                    )
+                    cursor.execute(f"DELETE FROM {table} WHERE {duplicate_condition}")
+                cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table}(user_id, challenge_id)")
+            except Exception as e:
+                cursor.execute("ROLLBACK" if postgres else f"ROLLBACK TO SAVEPOINT {index_name}")
+                if not postgres:
+                    cursor.execute(f"RELEASE SAVEPOINT {index_name}")
+                logger.error(f"Could not add unique index {index_name}: {e}")
+                raise
+            cursor.execute("COMMIT" if postgres else f"RELEASE SAVEPOINT {index_name}")
+            confirmed.add(index_name)
+        
+        self._unique_guess_indexes = confirmed
+    
     def _init_postgres_database(self):
         """Initialize PostgreSQL database tables"""
         if self.database_mode not in [DatabaseMode.POSTGRESQL_ONLY, DatabaseMode.HYBRID]:
@@ -806,6 +1161,9 @@ class DatabaseService:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_guess_history_challenge_id ON guess_history(challenge_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_guess_history_user_challenge ON guess_history(user_id, challenge_id)")
             
+            # One guess per user per challenge
+            self._ensure_unique_guess_indexes(cursor, postgres=True)
+            
             # Create user_reports table for content moderation
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS user_reports (
@@ -905,6 +1263,34 @@ class DatabaseService:
                 )
             """)
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_rate_limit_records_user_id ON rate_limit_records(user_id)")
+
+            # Create media_objects table mapping media IDs to storage keys
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS media_objects (
+                    media_id VARCHAR(255) PRIMARY KEY,
+                    storage_key VARCHAR(1024) NOT NULL,
+                    file_size BIGINT,
+                    content_type VARCHAR(255),
+                    uploaded_at TIMESTAMP NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_media_objects_storage_key ON media_objects(storage_key)")
+
+            # Create merge_sessions table so merge state outlives the worker that ran it
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS merge_sessions (
+                    merge_session_id VARCHAR(255) PRIMARY KEY,
+                    user_id VARCHAR(255) NOT NULL,
+                    video_file_id VARCHAR(255),
+                    status VARCHAR(20) NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    updated_at TIMESTAMP NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_merge_sessions_video_file_id ON merge_sessions(video_file_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_merge_sessions_user_id ON merge_sessions(user_id, updated_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_merge_sessions_updated_at ON merge_sessions(updated_at)")
     
     def _init_sqlite_database(self):
         """Initialize SQLite database tables (development/testing only)"""
@@ -1036,6 +1422,9 @@ class DatabaseService:
                     CREATE INDEX IF NOT EXISTS idx_guess_history_user_challenge ON guess_history(user_id, challenge_id)
                 """)
                 
+                # One guess per user per challenge
+                self._ensure_unique_guess_indexes(cursor, postgres=False)
+                
                 # Add name column to existing users table if it doesn't exist
                 try:
                     cursor.execute("ALTER TABLE users ADD COLUMN name TEXT")
@@ -1216,6 +1605,34 @@ class DatabaseService:
                     )
                 """)
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_rate_limit_records_user_id ON rate_limit_records(user_id)")
+
+                # Create media_objects table mapping media IDs to storage keys
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS media_objects (
+                        media_id TEXT PRIMARY KEY,
+                        storage_key TEXT NOT NULL,
+                        file_size INTEGER,
+                        content_type TEXT,
+                        uploaded_at TIMESTAMP NOT NULL
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_media_objects_storage_key ON media_objects(storage_key)")
+
+                # Create merge_sessions table so merge state outlives the worker that ran it
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS merge_sessions (
+                        merge_session_id TEXT PRIMARY KEY,
+                        user_id TEXT NOT NULL,
+                        video_file_id TEXT,
+                        status TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        created_at TIMESTAMP NOT NULL,
+                        updated_at TIMESTAMP NOT NULL
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_merge_sessions_video_file_id ON merge_sessions(video_file_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_merge_sessions_user_id ON merge_sessions(user_id, updated_at)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_merge_sessions_updated_at ON merge_sessions(updated_at)")
                 
                 # Enable foreign key constraints (SQLite doesn't enable them by default)
                 cursor.execute("PRAGMA foreign_keys = ON")
@@ -1252,12 +1669,13 @@ class DatabaseService:
             params: Query parameters as tuple
             fetch_one: Return single row as dict
             fetch_all: Return all rows as list of dicts
-            return_cursor: Return cursor for complex operations
+            return_cursor: Return a cursor for complex operations; its rows are
+                fetched before the connection is released
             
         Returns:
             - If fetch_one: Dict or None
             - If fetch_all: List of dicts
-            - If return_cursor: Database cursor
+            - If return_cursor: Cursor-like object over the prefetched rows
             - Otherwise: Number of affected rows
             
         Raises:
@@ -1265,48 +1683,71 @@ class DatabaseService:
         """
         operation = "_execute_query"
         self._validate_database_operation(operation)
+        statement = _statement_type(query)
+        started = time.perf_counter()
         
         try:
-            with self._get_validated_connection(operation) as conn:
-                if self.is_postgres:
-                    # Convert SQLite-style ? parameters to PostgreSQL %s
-                    converted_query = self._prepare_query(query)
-                    cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-                    cursor.execute(converted_query, params)
-                    
-                    if return_cursor:
-                        return cursor
-                    elif fetch_one:
-                        result = cursor.fetchone()
-                        return dict(result) if result else None
-                    elif fetch_all:
-                        results = cursor.fetchall()
-                        return [dict(row) for row in results]
-                    else:
-                        conn.commit()
-                        return cursor.rowcount
-                else:
-                    logger.warning(f"Using SQLite fallback query execution in {self.environment.value} environment")
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.cursor()
-                    cursor.execute(query, params)
-                    
-                    if return_cursor:
-                        return cursor
-                    elif fetch_one:
-                        result = cursor.fetchone()
-                        return dict(result) if result else None
-                    elif fetch_all:
-                        results = cursor.fetchall()
-                        return [dict(row) for row in results]
-                    else:
-                        conn.commit()
-                        return cursor.rowcount
+            # Inside transaction(): run on the transaction's connection and let
+            # the transaction decide when to commit
+            transaction_conn = self._get_transaction_connection()
+            if transaction_conn is not None:
+                result = self._run_query(transaction_conn, query, params, fetch_one, fetch_all, return_cursor, commit=False)
+            else:
+                with self._get_validated_connection(operation) as conn:
+                    result = self._run_query(conn, query, params, fetch_one, fetch_all, return_cursor, commit=True)
                         
         except Exception as e:
             # Handle and categorize the exception with detailed logging
             categorized_error = self._handle_database_exception(operation, e, query, params)
+            elapsed = time.perf_counter() - started
+            QUERY_SECONDS.observe(elapsed, statement)
+            QUERY_ERRORS.inc(statement, type(categorized_error).__name__)
+            if profiling_active():
+                record_span("db.query", started, elapsed, sql=fingerprint_sql(query), error=type(categorized_error).__name__)
             raise categorized_error
+        
+        elapsed = time.perf_counter() - started
+        QUERY_SECONDS.observe(elapsed, statement)
+        if profiling_active():
+            record_span("db.query", started, elapsed, sql=fingerprint_sql(query))
+        if isinstance(result, list):
+            QUERY_ROWS.inc(statement, amount=len(result))
+        elif isinstance(result, dict):
+            QUERY_ROWS.inc(statement)
+        elif isinstance(result, int) and result > 0:
+            QUERY_ROWS.inc(statement, amount=result)
+        return result
+    
+    def _run_query(self, conn, query: str, params: tuple, fetch_one: bool, fetch_all: bool, return_cursor: bool, commit: bool) -> Any:
+        """Execute a query on an already checked-out connection (see _execute_query)"""
+        if self.is_postgres:
+            # Convert SQLite-style ? parameters to PostgreSQL %s
+            converted_query = self._prepare_query(query)
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            cursor.execute(converted_query, params)
+        else:
+            logger.warning(f"Using SQLite fallback query execution in {self.environment.value} environment")
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+        
+        if return_cursor:
+            # The connection is reset and pooled once _execute_query returns,
+            # so read everything now rather than hand out a cursor bound to it
+            rows = cursor.fetchall() if cursor.description is not None else []
+            if commit:
+                conn.commit()
+            return _PrefetchedCursor(cursor, rows)
+        elif fetch_one:
+            result = cursor.fetchone()
+            return dict(result) if result else None
+        elif fetch_all:
+            results = cursor.fetchall()
+            return [dict(row) for row in results]
+        else:
+            if commit:
+                conn.commit()
+            return cursor.rowcount
     
     def _execute_upsert(self, table: str, data: Dict[str, Any], conflict_columns: List[str], update_columns: List[str] = None) -> int:
         """
@@ -1421,7 +1862,37 @@ class DatabaseService:
             # Handle any unexpected errors
             categorized_error = self._handle_database_exception("_execute_select", e, query, params)
             raise categorized_error
-    
+
+    # ------------------------------------------------------------------
+    # Async counterparts
+    #
+    # These run the blocking helpers above on the bounded database executor
+    # (services.db_executor) so request handlers don't block the event loop.
+    # Each call runs on a worker thread, so they do not join a transaction()
+    # opened by the caller; to group queries atomically, put them in one sync
+    # function using transaction() and await it with run_db_call().
+    # ------------------------------------------------------------------
+
+    async def _execute_query_async(self, query: str, params: tuple = (), fetch_one: bool = False, fetch_all: bool = False) -> Any:
+        """Async version of _execute_query (cursors cannot be returned across threads)"""
+        return await run_db_call(self._execute_query, query, params, fetch_one=fetch_one, fetch_all=fetch_all)
+
+    async def _execute_upsert_async(self, table: str, data: Dict[str, Any], conflict_columns: List[str], update_columns: List[str] = None) -> int:
+        """Async version of _execute_upsert"""
+        return await run_db_call(self._execute_upsert, table, data, conflict_columns, update_columns)
+
+    async def _execute_insert_async(self, table: str, data: Dict[str, Any]) -> int:
+        """Async version of _execute_insert"""
+        return await run_db_call(self._execute_insert, table, data)
+
+    async def _execute_update_async(self, table: str, data: Dict[str, Any], where_clause: str, where_params: tuple = ()) -> int:
+        """Async version of _execute_update"""
+        return await run_db_call(self._execute_update, table, data, where_clause, where_params)
+
+    async def _execute_select_async(self, query: str, params: tuple = (), fetch_one: bool = False) -> Union[Dict[str, Any], List[Dict[str, Any]], None]:
+        """Async version of _execute_select"""
+        return await run_db_call(self._execute_select, query, params, fetch_one=fetch_one)
+
     def _prepare_query(self, query: str) -> str:
         """Convert SQLite-style queries to PostgreSQL if needed"""
         if self.is_postgres:
@@ -2605,256 +3076,118 @@ class DatabaseService:
     def load_challenge(self, challenge_id: str):
         """Load a challenge from the database"""
         try:
-            import json
-            from models import Challenge, Statement, ChallengeStatus, MergedVideoMetadata
-            from datetime import datetime
-            
-            row = self._execute_query("""
-                SELECT challenge_id, creator_id, title, status, lie_statement_id,
-                       view_count, guess_count, correct_guess_count, is_merged_video,
-                       statements_json, merged_video_metadata_json, tags_json,
-                       created_at, updated_at, published_at
-                FROM challenges WHERE challenge_id = %s
-            """ if self.is_postgres else """
-                SELECT challenge_id, creator_id, title, status, lie_statement_id,
-                       view_count, guess_count, correct_guess_count, is_merged_video,
-                       statements_json, merged_video_metadata_json, tags_json,
-                       created_at, updated_at, published_at
-                FROM challenges WHERE challenge_id = ?
-            """, (challenge_id,), fetch_one=True)
-            
-            if not row:
-                return None
-                
-                # Parse the data - handle both dict and tuple row formats
-                statements_json = row["statements_json"] if isinstance(row, dict) else row[9]
-                metadata_json = row["merged_video_metadata_json"] if isinstance(row, dict) else row[10]
-                tags_json = row["tags_json"] if isinstance(row, dict) else row[11]
-                
-                statements = [Statement(**stmt_data) for stmt_data in json.loads(statements_json)]
-                merged_metadata = MergedVideoMetadata(**json.loads(metadata_json)) if metadata_json else None
-                tags = json.loads(tags_json) if tags_json else []
-                
-                # Create challenge object
-                challenge = Challenge(
-                    challenge_id=row["challenge_id"] if isinstance(row, dict) else row[0],
-                    creator_id=row["creator_id"] if isinstance(row, dict) else row[1],
-                    title=row["title"] if isinstance(row, dict) else row[2],
-                    status=ChallengeStatus(row["status"] if isinstance(row, dict) else row[3]) if (row["status"] if isinstance(row, dict) else row[3]) else ChallengeStatus.DRAFT,
-                    lie_statement_id=row["lie_statement_id"] if isinstance(row, dict) else row[4],
-                    statements=statements,
-                    view_count=(row["view_count"] if isinstance(row, dict) else row[5]) or 0,
-                    guess_count=(row["guess_count"] if isinstance(row, dict) else row[6]) or 0,
-                    correct_guess_count=(row["correct_guess_count"] if isinstance(row, dict) else row[7]) or 0,
-                    is_merged_video=bool(row["is_merged_video"] if isinstance(row, dict) else row[8]),
-                    merged_video_metadata=merged_metadata,
-                    tags=tags,
-                    created_at=datetime.fromisoformat(row["created_at"] if isinstance(row, dict) else row[12]) if (row["created_at"] if isinstance(row, dict) else row[12]) else None,
-                    updated_at=datetime.fromisoformat(row["updated_at"] if isinstance(row, dict) else row[13]) if (row["updated_at"] if isinstance(row, dict) else row[13]) else None,
-                    published_at=datetime.fromisoformat(row["published_at"] if isinstance(row, dict) else row[14]) if (row["published_at"] if isinstance(row, dict) else row[14]) else None
-                )
-                
-                return challenge
+            row = self._execute_query(
+                f"SELECT {_CHALLENGE_COLUMNS} FROM challenges WHERE challenge_id = ?",
+                (challenge_id,),
+                fetch_one=True
+            )
+            return _challenge_from_row(row) if row else None
                 
         except Exception as e:
             logger.error(f"Error loading challenge {challenge_id}: {e}")
             return None
     
+    def _stream_rows(self, query: str, params: tuple = (), batch_size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the rows of a SELECT as lists of at most batch_size dicts.
+        
+        PostgreSQL runs the query on a named (server-side) cursor, so only one
+        batch crosses the wire and sits in memory at a time; SQLite steps its
+        cursor with fetchmany. The pooled connection stays checked out until
+        the generator is exhausted or closed.
+        
+        The query duration recorded (metrics and profiling span) covers the
+        execute and every fetch, not the time the caller spends on each batch.
+        
+        Raises:
+            DatabaseError: Categorized database errors with detailed logging
+        """
+        operation = "_stream_rows"
+        batch_size = batch_size or settings.DB_STREAM_BATCH_SIZE
+        statement = _statement_type(query)
+        
+        with self._get_validated_connection(operation) as conn:
+            started = time.perf_counter()
+            try:
+                if self.is_postgres:
+                    cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex[:12]}", cursor_factory=psycopg2.extras.DictCursor)
+                    cursor.itersize = batch_size
+                    cursor.execute(self._prepare_query(query), params)
+                else:
+                    conn.row_factory = sqlite3.Row
+                    cursor = conn.cursor()
+                    cursor.execute(query, params)
+            except Exception as e:
+                categorized_error = self._handle_database_exception(operation, e, query, params)
+                elapsed = time.perf_counter() - started
+                QUERY_SECONDS.observe(elapsed, statement)
+                QUERY_ERRORS.inc(statement, type(categorized_error).__name__)
+                if profiling_active():
+                    record_span("db.query", started, elapsed, sql=fingerprint_sql(query), error=type(categorized_error).__name__)
+                raise categorized_error
+            
+            elapsed = time.perf_counter() - started
+            try:
+                while True:
+                    fetch_started = time.perf_counter()
+                    rows = cursor.fetchmany(batch_size)
+                    elapsed += time.perf_counter() - fetch_started
+                    if not rows:
+                        break
+                    QUERY_ROWS.inc(statement, amount=len(rows))
+                    yield [dict(row) for row in rows]
+            finally:
+                cursor.close()
+                QUERY_SECONDS.observe(elapsed, statement)
+                if profiling_active():
+                    record_span("db.query", started, elapsed, sql=fingerprint_sql(query))
+    
+    def iter_challenges(
+        self,
+        status: Optional[str] = None,
+        exclude_status: Optional[str] = None,
+        creator_id: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[List[Any]]:
+        """
+        Stream challenges from the database in parsed batches.
+        
+        Each yielded list holds the Challenge objects built from one fetched
+        batch of rows; rows that cannot be parsed are logged and skipped.
+        
+        Args:
+            status: Only challenges in this status
+            exclude_status: Skip challenges in this status
+            creator_id: Only challenges by this creator
+            batch_size: Rows per batch (default DB_STREAM_BATCH_SIZE)
+        """
+        conditions, params = [], []
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if exclude_status is not None:
+            conditions.append("(status IS NULL OR status != ?)")
+            params.append(exclude_status)
+        if creator_id is not None:
+            conditions.append("creator_id = ?")
+            params.append(creator_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        for rows in self._stream_rows(f"SELECT {_CHALLENGE_COLUMNS} FROM challenges{where}", tuple(params), batch_size):
+            batch = []
+            for row in rows:
+                challenge = _challenge_from_row(row)
+                if challenge is not None:
+                    batch.append(challenge)
+            yield batch
+    
     def load_all_challenges(self) -> dict:
-        """Load all challenges from the database"""
+        """Load all challenges from the database (prefer iter_challenges for large tables)"""
         try:
-            import json
-            from models import Challenge, Statement, ChallengeStatus, MergedVideoMetadata
-            from datetime import datetime
-            
             challenges = {}
-            
-            results = self._execute_query("""
-                SELECT challenge_id, creator_id, title, status, lie_statement_id,
-                       view_count, guess_count, correct_guess_count, is_merged_video,
-                       statements_json, merged_video_metadata_json, tags_json,
-                       created_at, updated_at, published_at
-                FROM challenges
-            """, fetch_all=True)
-            
-            # DIAGNOSTIC LOGGING: Inspect first 5 rows to understand PostgreSQL data types
-            logger.info("=== DIAGNOSTIC: First 5 challenge rows from PostgreSQL ===")
-            for i, row in enumerate(results[:5]):
-                logger.info(f"Row {i+1} type: {type(row)}")
-                logger.info(f"Row {i+1} keys: {list(row.keys()) if isinstance(row, dict) else 'N/A (tuple)'}")
-                logger.info(f"Row {i+1} data: {dict(row) if isinstance(row, dict) else row}")
-                
-                # Inspect specific fields that are causing issues
-                statements_json = row["statements_json"] if isinstance(row, dict) else row[9]
-                metadata_json = row["merged_video_metadata_json"] if isinstance(row, dict) else row[10]
-                created_at = row["created_at"] if isinstance(row, dict) else row[12]
-                
-                logger.info(f"  statements_json type: {type(statements_json)}, value: {statements_json}")
-                logger.info(f"  metadata_json type: {type(metadata_json)}, value: {metadata_json}")
-                logger.info(f"  created_at type: {type(created_at)}, value: {created_at}")
-                logger.info("---")
-            logger.info("=== END DIAGNOSTIC ===")
-                
-            for row in results:
-                # Robust error handling: wrap entire row processing in try-except
-                challenge_id = None
-                try:
-                    # Extract challenge_id early for error logging
-                    challenge_id = row["challenge_id"] if isinstance(row, dict) else row[0]
-                    
-                    # Parse the data - handle both dict and tuple row formats
-                    statements_json = row["statements_json"] if isinstance(row, dict) else row[9]
-                    metadata_json = row["merged_video_metadata_json"] if isinstance(row, dict) else row[10]
-                    tags_json = row["tags_json"] if isinstance(row, dict) else row[11]
-                    created_at_raw = row["created_at"] if isinstance(row, dict) else row[12]
-                    updated_at_raw = row["updated_at"] if isinstance(row, dict) else row[13]
-                    published_at_raw = row["published_at"] if isinstance(row, dict) else row[14]
-                    
-                    # ROBUST JSON PARSING: Handle PostgreSQL string fields that need JSON parsing
-                    
-                    # Parse statements_json
-                    statements_data = []
-                    if statements_json is not None and isinstance(statements_json, str):
-                        try:
-                            statements_data = json.loads(statements_json)
-                        except json.JSONDecodeError as json_e:
-                            logger.error(f"Invalid JSON in statements_json for challenge {challenge_id}: {json_e}")
-                            statements_data = []
-                    elif statements_json is not None:
-                        statements_data = statements_json  # Already parsed
-                    
-                    # Parse metadata_json
-                    metadata_data = None
-                    if metadata_json is not None and isinstance(metadata_json, str):
-                        try:
-                            metadata_data = json.loads(metadata_json)
-                        except json.JSONDecodeError as json_e:
-                            logger.error(f"Invalid JSON in metadata_json for challenge {challenge_id}: {json_e}")
-                            metadata_data = None
-                    elif metadata_json is not None:
-                        metadata_data = metadata_json  # Already parsed
-                    
-                    # Parse tags_json
-                    tags_data = []
-                    if tags_json is not None and isinstance(tags_json, str):
-                        try:
-                            tags_data = json.loads(tags_json)
-                        except json.JSONDecodeError as json_e:
-                            logger.error(f"Invalid JSON in tags_json for challenge {challenge_id}: {json_e}")
-                            tags_data = []
-                    elif tags_json is not None:
-                        tags_data = tags_json  # Already parsed
-                    
-                    # POSTGRESQL FIX: Handle datetime objects vs ISO strings
-                    def parse_datetime(dt_value):
-                        if dt_value is None:
-                            return None
-                        elif isinstance(dt_value, datetime):
-                            return dt_value  # Already a datetime object
-                        elif isinstance(dt_value, str):
-                            try:
-                                return datetime.fromisoformat(dt_value)
-                            except ValueError as dt_e:
-                                logger.error(f"Invalid datetime format for challenge {challenge_id}: {dt_e}, value: {dt_value}")
-                                return None
-                        else:
-                            logger.warning(f"Unexpected datetime type for challenge {challenge_id}: {type(dt_value)}, value: {dt_value}")
-                            return None
-                    
-                    # HANDLE INCONSISTENT DATA TYPES: Ensure statements_data is a list and contains valid data
-                    if not isinstance(statements_data, list):
-                        logger.error(f"statements_data is not a list for challenge {challenge_id}: {type(statements_data)}, value: {statements_data}")
-                        statements_data = []
-                    
-                    # Create Statement objects with robust error handling for inconsistent data formats
-                    statements = []
-                    for i, stmt_data in enumerate(statements_data):
-                        try:
-                            # Check if statement data is a dictionary (expected format)
-                            if isinstance(stmt_data, dict):
-                                # Validate required fields before creating Statement
-                                required_fields = ['statement_id', 'statement_type', 'media_url', 'media_file_id', 'duration_seconds']
-                                if all(field in stmt_data for field in required_fields):
-                                    statements.append(Statement(**stmt_data))
-                                else:
-                                    missing_fields = [field for field in required_fields if field not in stmt_data]
-                                    logger.error(f"Statement {i} for challenge {challenge_id} missing required fields: {missing_fields}")
-                                    continue
-                            
-                            # Handle inconsistent legacy data where statements might be simple strings
-                            elif isinstance(stmt_data, str):
-                                logger.warning(f"Challenge {challenge_id} has legacy string-based statement data at index {i}: {stmt_data}")
-                                # Skip legacy string-based statements as they can't be converted to Statement objects
-                                continue
-                            
-                            else:
-                                logger.error(f"Statement {i} for challenge {challenge_id} is not a dict or string: {type(stmt_data)}, value: {stmt_data}")
-                                continue
-                                
-                        except Exception as stmt_e:
-                            logger.error(f"Error creating Statement object {i} for challenge {challenge_id}: {stmt_e}, data: {stmt_data}")
-                            continue
-                    
-                    # Skip challenges with no valid statements
-                    if not statements:
-                        logger.warning(f"Challenge {challenge_id} has no valid statements, skipping")
-                        continue
-                    
-                    # Create MergedVideoMetadata with robust error handling
-                    merged_metadata = None
-                    if metadata_data:
-                        try:
-                            if isinstance(metadata_data, dict):
-                                # Validate required fields for MergedVideoMetadata
-                                required_meta_fields = ['total_duration', 'segments', 'video_file_id']
-                                if all(field in metadata_data for field in required_meta_fields):
-                                    merged_metadata = MergedVideoMetadata(**metadata_data)
-                                else:
-                                    missing_fields = [field for field in required_meta_fields if field not in metadata_data]
-                                    logger.error(f"Metadata for challenge {challenge_id} missing required fields: {missing_fields}")
-                            else:
-                                logger.error(f"Metadata for challenge {challenge_id} is not a dict: {type(metadata_data)}, value: {metadata_data}")
-                        except Exception as meta_e:
-                            logger.error(f"Error creating MergedVideoMetadata for challenge {challenge_id}: {meta_e}, data: {metadata_data}")
-                    
-                    # Ensure tags_data is a list
-                    if not isinstance(tags_data, list):
-                        logger.warning(f"tags_data for challenge {challenge_id} is not a list: {type(tags_data)}, converting to empty list")
-                        tags_data = []
-                    
-                    # Create challenge object with additional validation
-                    challenge = Challenge(
-                        challenge_id=challenge_id,
-                        creator_id=row["creator_id"] if isinstance(row, dict) else row[1],
-                        title=row["title"] if isinstance(row, dict) else row[2],
-                        status=ChallengeStatus(row["status"] if isinstance(row, dict) else row[3]) if (row["status"] if isinstance(row, dict) else row[3]) else ChallengeStatus.DRAFT,
-                        lie_statement_id=row["lie_statement_id"] if isinstance(row, dict) else row[4],
-                        statements=statements,
-                        view_count=(row["view_count"] if isinstance(row, dict) else row[5]) or 0,
-                        guess_count=(row["guess_count"] if isinstance(row, dict) else row[6]) or 0,
-                        correct_guess_count=(row["correct_guess_count"] if isinstance(row, dict) else row[7]) or 0,
-                        is_merged_video=bool(row["is_merged_video"] if isinstance(row, dict) else row[8]),
-                        merged_video_metadata=merged_metadata,
-                        tags=tags_data,
-                        created_at=parse_datetime(created_at_raw),
-                        updated_at=parse_datetime(updated_at_raw),
-                        published_at=parse_datetime(published_at_raw)
-                    )
-                    
+            for batch in self.iter_challenges():
+                for challenge in batch:
                     challenges[challenge.challenge_id] = challenge
-                    
-                except Exception as e:
-                    # Comprehensive error logging with challenge_id context
-                    challenge_context = f" (challenge_id: {challenge_id})" if challenge_id else ""
-                    logger.error(f"Error parsing challenge row{challenge_context}: {e}")
-                    logger.error(f"Row data: {dict(row) if isinstance(row, dict) else row}")
-                    
-                    # Log additional context for debugging
-                    if isinstance(row, dict) and 'statements_json' in row:
-                        logger.error(f"statements_json type: {type(row['statements_json'])}, value: {str(row['statements_json'])[:200]}...")
-                    
-                    continue  # Skip this row and continue with the next one
-                
             return challenges
             
         except Exception as e:
@@ -2923,48 +3256,50 @@ class DatabaseService:
             logger.error(f"Error saving guess {guess.guess_id}: {e}")
             return False
     
-    def load_all_guesses(self) -> dict:
-        """Load all guesses from the database"""
-        try:
-            from models import GuessSubmission
-            from datetime import datetime
-
-            guesses = {}
+    def load_guesses(self, user_id: Optional[str] = None, challenge_id: Optional[str] = None) -> dict:
+        """
+        Load the guesses made by a user and/or on a challenge (all guesses when neither is given).
+        
+        Rows that cannot be parsed are logged and skipped.
+        
+        Raises:
+            DatabaseError: If the query fails, so callers can tell "no guesses" from "not loaded"
+        """
+        from models import GuessSubmission
 
-            results = self._execute_query("""
-                SELECT guess_id, challenge_id, user_id, guessed_lie_statement_id,
-                       is_correct, response_time_seconds, submitted_at
-                FROM guesses
-            """, fetch_all=True)
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if challenge_id is not None:
+            conditions.append("challenge_id = ?")
+            params.append(challenge_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
 
-            for row in results:
+        guesses = {}
+        for rows in self._stream_rows(f"SELECT {_GUESS_COLUMNS} FROM guesses{where}", tuple(params)):
+            for row in rows:
                 try:
-                    submitted_at_raw = row["submitted_at"] if isinstance(row, dict) else row[6]
-                    submitted_at = None
-                    if submitted_at_raw:
-                        if isinstance(submitted_at_raw, str):
-                            submitted_at = datetime.fromisoformat(submitted_at_raw)
-                        elif isinstance(submitted_at_raw, datetime):
-                            submitted_at = submitted_at_raw
-
                     guess = GuessSubmission(
-                        guess_id=row["guess_id"] if isinstance(row, dict) else row[0],
-                        challenge_id=row["challenge_id"] if isinstance(row, dict) else row[1],
-                        user_id=row["user_id"] if isinstance(row, dict) else row[2],
-                        guessed_lie_statement_id=row["guessed_lie_statement_id"] if isinstance(row, dict) else row[3],
-                        is_correct=bool(row["is_correct"] if isinstance(row, dict) else row[4]),
-                        response_time_seconds=row["response_time_seconds"] if isinstance(row, dict) else row[5],
-                        submitted_at=submitted_at
+                        guess_id=row["guess_id"],
+                        challenge_id=row["challenge_id"],
+                        user_id=row["user_id"],
+                        guessed_lie_statement_id=row["guessed_lie_statement_id"],
+                        is_correct=bool(row["is_correct"]),
+                        response_time_seconds=row["response_time_seconds"],
+                        submitted_at=_parse_db_datetime(row["submitted_at"], row["guess_id"])
                     )
-
                     guesses[guess.guess_id] = guess
-
                 except Exception as e:
                     logger.error(f"Error parsing guess row: {e}")
                     continue
 
-            return guesses
+        return guesses
 
+    def load_all_guesses(self) -> dict:
+        """Load all guesses from the database"""
+        try:
+            return self.load_guesses()
         except Exception as e:
             logger.error(f"Error loading all guesses: {e}")
             return {}
@@ -3124,7 +3459,59 @@ class DatabaseService:
             # Handle any unexpected errors
             categorized_error = self._handle_database_exception(operation, e)
             raise categorized_error
-    
+
+    # Sessions per UPDATE statement in touch_sessions. Each binds 5 parameters
+    # (the CASE pair twice plus its IN entry); stay within SQLite's 999-parameter
+    # limit on builds older than 3.32.
+    SQLITE_MAX_BOUND_PARAMETERS = 999
+    SESSION_TOUCH_BATCH_SIZE = SQLITE_MAX_BOUND_PARAMETERS // 5
+
+    def touch_sessions(self, touches: Dict[str, datetime]) -> int:
+        """
+        Update last accessed timestamps for many sessions at once
+
+        Each batch of SESSION_TOUCH_BATCH_SIZE sessions is a single UPDATE with a
+        CASE over token_hash. A timestamp never moves last_accessed backwards.
+
+        Args:
+            touches: token_hash -> last accessed time
+
+        Returns:
+            Number of sessions updated
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "touch_sessions"
+        try:
+            items = list(touches.items())
+            updated = 0
+            for start in range(0, len(items), self.SESSION_TOUCH_BATCH_SIZE):
+                batch = items[start:start + self.SESSION_TOUCH_BATCH_SIZE]
+                cases = " ".join("WHEN ? THEN ?" for _ in batch)
+                placeholders = ", ".join("?" for _ in batch)
+                query = f"""
+                    UPDATE user_sessions
+                    SET last_accessed = CASE token_hash {cases} END
+                    WHERE token_hash IN ({placeholders})
+                      AND is_active = TRUE
+                      AND (last_accessed IS NULL OR last_accessed < CASE token_hash {cases} END)
+                """
+                case_params = tuple(value for item in batch for value in item)
+                params = case_params + tuple(token_hash for token_hash, _ in batch) + case_params
+                updated += self._execute_query(query, params)
+
+            logger.debug(f"Touched {updated} of {len(items)} sessions")
+            return updated
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
     def invalidate_session(self, token_hash: str) -> bool:
         """
         Invalidate a session (mark as inactive)
@@ -3227,6 +3614,315 @@ class DatabaseService:
             categorized_error = self._handle_database_exception(operation, e)
             raise categorized_error
 
+    def save_media_object(self, media_id: str, storage_key: str, file_size: Optional[int] = None,
+                          content_type: Optional[str] = None, uploaded_at: Optional[datetime] = None) -> bool:
+        """
+        Record (or replace) the storage location of an uploaded media object
+
+        Args:
+            media_id: Public media identifier
+            storage_key: Object key in cloud storage
+            file_size: Object size in bytes
+            content_type: MIME type of the object
+            uploaded_at: Upload time (defaults to now)
+
+        Returns:
+            True if the record was written
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "save_media_object"
+        try:
+            rows_affected = self._execute_upsert(
+                "media_objects",
+                {
+                    "media_id": media_id,
+                    "storage_key": storage_key,
+                    "file_size": file_size,
+                    "content_type": content_type,
+                    "uploaded_at": uploaded_at or datetime.utcnow()
+                },
+                ["media_id"]
+            )
+            return rows_affected > 0
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
+    def get_media_object(self, media_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the storage record for a media object
+
+        Args:
+            media_id: Public media identifier
+
+        Returns:
+            Dict with media_id, storage_key, file_size, content_type and uploaded_at, or None
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "get_media_object"
+        try:
+            return self._execute_select("""
+                SELECT media_id, storage_key, file_size, content_type, uploaded_at
+                FROM media_objects
+                WHERE media_id = ?
+            """, (media_id,), fetch_one=True)
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
+    def delete_media_object(self, media_id: str) -> bool:
+        """
+        Remove the storage record for a media object
+
+        Args:
+            media_id: Public media identifier
+
+        Returns:
+            True if a record was removed
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "delete_media_object"
+        try:
+            rows_affected = self._execute_query(
+                "DELETE FROM media_objects WHERE media_id = ?", (media_id,)
+            )
+            return rows_affected > 0
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
+    def get_indexed_storage_keys(self, prefix: str = "") -> set:
+        """
+        Get the storage keys already recorded in media_objects
+
+        Args:
+            prefix: Only return keys starting with this prefix
+
+        Returns:
+            Set of storage keys
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "get_indexed_storage_keys"
+        try:
+            rows = self._execute_select(
+                "SELECT storage_key FROM media_objects WHERE storage_key LIKE ?",
+                (f"{prefix}%",)
+            )
+            return {row["storage_key"] for row in rows}
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
+    def save_merge_session(self, merge_session_id: str, user_id: str, status: str, data: str,
+                           video_file_id: Optional[str] = None, created_at: Optional[datetime] = None,
+                           updated_at: Optional[datetime] = None) -> bool:
+        """
+        Record (or replace) the persisted state of a video merge session
+
+        A cancelled session is never overwritten by a later snapshot of the
+        same run (same created_at), so a worker still saving progress for a
+        merge another worker cancelled cannot resurrect it. A new run of the
+        session (initiated again, with a new created_at) replaces it.
+
+        Args:
+            merge_session_id: Merge session identifier
+            user_id: Owner of the merge
+            status: Merge status
+            data: JSON-encoded session state
+            video_file_id: ID of the merged video, once known
+            created_at: When the merge was created (defaults to now)
+            updated_at: When the merge last changed (defaults to now)
+
+        Returns:
+            True if the record was written, False if the run was already cancelled
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "save_merge_session"
+        try:
+            now = datetime.utcnow()
+            # Both backends support ON CONFLICT ... DO UPDATE ... WHERE (SQLite 3.24+)
+            rows_affected = self._execute_query("""
+                INSERT INTO merge_sessions
+                    (merge_session_id, user_id, video_file_id, status, data, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (merge_session_id) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    video_file_id = excluded.video_file_id,
+                    status = excluded.status,
+                    data = excluded.data,
+                    created_at = excluded.created_at,
+                    updated_at = excluded.updated_at
+                WHERE merge_sessions.status <> 'cancelled'
+                    OR merge_sessions.created_at <> excluded.created_at
+            """, (
+                merge_session_id, str(user_id), video_file_id, status, data,
+                created_at or now, updated_at or now
+            ))
+            return rows_affected > 0
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
+    def get_merge_session(self, merge_session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the persisted state of a merge session
+
+        Args:
+            merge_session_id: Merge session identifier
+
+        Returns:
+            Dict with merge_session_id, user_id, video_file_id, status, data,
+            created_at and updated_at, or None
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "get_merge_session"
+        try:
+            return self._execute_select("""
+                SELECT merge_session_id, user_id, video_file_id, status, data, created_at, updated_at
+                FROM merge_sessions
+                WHERE merge_session_id = ?
+            """, (merge_session_id,), fetch_one=True)
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
+    def find_merge_session_by_video_file_id(self, video_file_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the merge session that produced a merged video
+
+        Args:
+            video_file_id: ID of the merged video
+            user_id: Owner of the merge
+
+        Returns:
+            Same shape as get_merge_session, or None
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "find_merge_session_by_video_file_id"
+        try:
+            return self._execute_select("""
+                SELECT merge_session_id, user_id, video_file_id, status, data, created_at, updated_at
+                FROM merge_sessions
+                WHERE video_file_id = ? AND user_id = ?
+                ORDER BY updated_at DESC
+                LIMIT 1
+            """, (video_file_id, str(user_id)), fetch_one=True)
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
+    def get_stale_merge_sessions(self, updated_before: datetime, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Get merge sessions that have not changed since a cutoff
+
+        Args:
+            updated_before: Cutoff time
+            limit: Maximum number of sessions to return
+
+        Returns:
+            List of dicts with merge_session_id, user_id and status
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "get_stale_merge_sessions"
+        try:
+            return self._execute_select("""
+                SELECT merge_session_id, user_id, status
+                FROM merge_sessions
+                WHERE updated_at < ?
+                ORDER BY updated_at
+                LIMIT ?
+            """, (updated_before, limit))
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
+    def delete_merge_sessions(self, merge_session_ids: List[str]) -> int:
+        """
+        Remove persisted merge sessions
+
+        Args:
+            merge_session_ids: Merge session identifiers
+
+        Returns:
+            Number of sessions removed
+
+        Raises:
+            DatabaseError: For database operation errors
+        """
+        operation = "delete_merge_sessions"
+        try:
+            if not merge_session_ids:
+                return 0
+            placeholders = ", ".join("?" for _ in merge_session_ids)
+            return self._execute_query(
+                f"DELETE FROM merge_sessions WHERE merge_session_id IN ({placeholders})",
+                tuple(merge_session_ids)
+            )
+
+        except DatabaseError:
+            # Re-raise database errors (already logged and categorized)
+            raise
+        except Exception as e:
+            # Handle any unexpected errors
+            categorized_error = self._handle_database_exception(operation, e)
+            raise categorized_error
+
     def get_environment_info(self) -> Dict[str, Any]:
         """
         Get comprehensive information about the current database environment
@@ -3296,14 +3992,25 @@ class DatabaseService:
         operation = "add_guess_history_record"
         self._validate_database_operation(operation)
         try:
-            self._execute_insert(
-                "guess_history",
-                {
-                    "user_id": user_id,
-                    "challenge_id": challenge_id,
-                    "was_correct": was_correct,
-                },
-            )
+            # The first guess is the one that counts; repeats are ignored
+            if "uq_guess_history_user_challenge" in self._unique_guess_indexes:
+                self._execute_query(
+                    """
+                    INSERT INTO guess_history (user_id, challenge_id, was_correct)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (user_id, challenge_id) DO NOTHING
+                    """,
+                    (user_id, challenge_id, was_correct),
+                )
+            else:
+                self._execute_query(
+                    """
+                    INSERT INTO guess_history (user_id, challenge_id, was_correct)
+                    SELECT ?, ?, ?
+                    WHERE NOT EXISTS (SELECT 1 FROM guess_history WHERE user_id = ? AND challenge_id = ?)
+                    """,
+                    (user_id, challenge_id, was_correct, user_id, challenge_id),
+                )
         except Exception as e:
             categorized_error = self._handle_database_exception(operation, e)
             raise categorized_error
@@ -0,0 +1,183 @@
+"""
+Bounded thread-pool executor for running blocking database calls from async code
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseBusyError(Exception):
+    """Raised when too many database calls are already queued for the executor"""
+    pass
+
+
+class DatabaseExecutor:
+    """
+    Runs blocking DB-API calls on a dedicated thread pool.
+
+    ``max_workers`` matches the connection pool size so each worker thread can
+    hold a connection without queueing on the pool. ``max_pending`` bounds how
+    many calls may be submitted or running at once per event loop; further
+    callers wait (backpressure) for up to ``queue_timeout`` seconds and then
+    fail with DatabaseBusyError instead of piling up unbounded work.
+    """
+
+    def __init__(self, max_workers: int = 10, max_pending: int = 100, queue_timeout: float = 30.0):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_pending < max_workers:
+            raise ValueError("max_pending must be at least max_workers")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        # asyncio primitives belong to one event loop; tests and tools may run several
+        self._limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+        # Counters exposed through get_stats()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+
+    def _get_limit(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        limit = self._limits.get(loop)
+        if limit is None:
+            with self._lock:
+                limit = self._limits.get(loop)
+                if limit is None:
+                    limit = asyncio.Semaphore(self.max_pending)
+                    self._limits[loop] = limit
+        return limit
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``func(*args, **kwargs)`` on the executor and await its result"""
+        if self._shutdown:
+            raise RuntimeError("Database executor has been shut down")
+
+        loop = asyncio.get_running_loop()
+        limit = self._get_limit(loop)
+        started = time.monotonic()
+
+        with self._lock:
+            self._pending += 1
+        try:
+            try:
+                if limit.locked():
+                    await asyncio.wait_for(limit.acquire(), timeout=self.queue_timeout)
+                else:
+                    await limit.acquire()
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._rejected += 1
+                raise DatabaseBusyError(
+                    f"Timed out after {self.queue_timeout:.1f}s waiting to run a database call "
+                    f"({self.max_pending} calls already pending)"
+                )
+
+            try:
+                # Carry context variables (request ids, profiling spans) into the worker thread
+                context = contextvars.copy_context()
+                call = functools.partial(context.run, self._invoke, started, func, args, kwargs)
+                return await loop.run_in_executor(self._executor, call)
+            finally:
+                limit.release()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _invoke(self, submitted_at: float, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        waited = time.monotonic() - submitted_at
+        with self._lock:
+            self._running += 1
+            self._total_queue_wait += waited
+            if waited > self._max_queue_wait:
+                self._max_queue_wait = waited
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting calls and release worker threads"""
+        self._shutdown = True
+        self._executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of executor utilisation for monitoring"""
+        with self._lock:
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "running": self._running,
+                "completed": completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": round(self._total_queue_wait * 1000 / completed, 3) if completed else 0.0,
+                "max_queue_wait_ms": round(self._max_queue_wait * 1000, 3),
+            }
+
+
+# Global instance - will be initialized when first accessed
+_db_executor: Optional[DatabaseExecutor] = None
+_db_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> DatabaseExecutor:
+    """Get or create the shared database executor"""
+    global _db_executor
+    if _db_executor is None:
+        with _db_executor_lock:
+            if _db_executor is None:
+                _db_executor = DatabaseExecutor(
+                    max_workers=settings.DB_POOL_MAX_SIZE,
+                    max_pending=max(settings.DB_ASYNC_MAX_PENDING, settings.DB_POOL_MAX_SIZE),
+                    queue_timeout=settings.DB_POOL_CHECKOUT_TIMEOUT_SECONDS
+                )
+    return _db_executor
+
+
+async def run_db_call(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Await a blocking database call without blocking the event loop.
+
+    Works with any callable, so services can wrap DatabaseService methods
+    (``await run_db_call(db.save_challenge, challenge)``) as well as
+    functions that group several queries in one ``transaction()``.
+    """
+    return await get_db_executor().run(func, *args, **kwargs)
+
+
+def shutdown_db_executor() -> None:
+    """Shut down the shared executor (call on application shutdown)"""
+    global _db_executor
+    with _db_executor_lock:
+        executor, _db_executor = _db_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
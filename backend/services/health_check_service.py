@@ -14,6 +14,7 @@ from enum import Enum
 
 from config import settings
 from services.monitoring_service import media_monitor
+from services.request_profiler import traced_subprocess_exec
 
 logger = logging.getLogger(__name__)
 
@@ -194,7 +195,7 @@ class HealthCheckService:
         
         try:
             # Check FFmpeg version
-            result = await asyncio.create_subprocess_exec(
+            result = await traced_subprocess_exec(
                 "ffmpeg", "-version",
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
@@ -0,0 +1,223 @@
+"""
+Media Index Service - Persistent media ID -> storage key lookup with an in-process LRU
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from botocore.exceptions import ClientError
+
+from config import settings
+from services.db_executor import run_db_call
+
+logger = logging.getLogger(__name__)
+
+# Returned by _get_cached when a media ID has no cache entry either way
+_NOT_CACHED = object()
+
+
+class MediaIndexService:
+    """
+    Resolves media IDs to storage keys from the media_objects table.
+
+    Uploads record their key, size, content type and upload time here so lookups
+    never have to list or HEAD the bucket. Resolved records are kept in a bounded
+    LRU. Callers that have finished looking for a media ID without finding it
+    report it through remember_missing, so repeated lookups for unknown IDs are
+    answered from memory for a short TTL. The table stays the source of truth.
+    """
+
+    def __init__(self, db_service=None, cache_size: Optional[int] = None, negative_ttl: Optional[float] = None):
+        self._db_service = db_service
+        self.cache_size = cache_size if cache_size is not None else settings.MEDIA_INDEX_CACHE_SIZE
+        self.negative_ttl = negative_ttl if negative_ttl is not None else settings.MEDIA_INDEX_NEGATIVE_TTL_SECONDS
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._missing: "OrderedDict[str, float]" = OrderedDict()  # media_id -> expiry (monotonic)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+
+    @property
+    def db(self):
+        if self._db_service is None:
+            from services.database_service import get_db_service
+            self._db_service = get_db_service()
+        return self._db_service
+
+    def _get_cached(self, media_id: str):
+        """Cached record, None for a remembered miss, or _NOT_CACHED"""
+        with self._lock:
+            record = self._cache.get(media_id)
+            if record is not None:
+                self._cache.move_to_end(media_id)
+                self._hits += 1
+                return record
+
+            expires_at = self._missing.get(media_id)
+            if expires_at is not None:
+                if expires_at > time.monotonic():
+                    self._negative_hits += 1
+                    return None
+                del self._missing[media_id]
+
+            self._misses += 1
+            return _NOT_CACHED
+
+    def _remember(self, media_id: str, record: Optional[Dict[str, Any]]) -> None:
+        if record is None or self.cache_size <= 0:
+            return
+        with self._lock:
+            self._missing.pop(media_id, None)
+            self._cache[media_id] = record
+            self._cache.move_to_end(media_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def remember_missing(self, media_id: str) -> None:
+        """Answer lookups for this media ID with None for negative_ttl seconds"""
+        if self.cache_size <= 0 or self.negative_ttl <= 0:
+            return
+        with self._lock:
+            self._missing[media_id] = time.monotonic() + self.negative_ttl
+            self._missing.move_to_end(media_id)
+            while len(self._missing) > self.cache_size:
+                self._missing.popitem(last=False)
+
+    def record_media(
+        self,
+        media_id: str,
+        storage_key: str,
+        file_size: Optional[int] = None,
+        content_type: Optional[str] = None,
+        uploaded_at: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Persist the storage location of an uploaded object and cache it"""
+        record = {
+            "media_id": media_id,
+            "storage_key": storage_key,
+            "file_size": file_size,
+            "content_type": content_type,
+            "uploaded_at": uploaded_at or datetime.utcnow()
+        }
+        self.db.save_media_object(**record)
+        self._remember(media_id, record)
+        return record
+
+    def get_media(self, media_id: str) -> Optional[Dict[str, Any]]:
+        """Get the storage record for a media ID, or None if it was never indexed"""
+        record = self._get_cached(media_id)
+        if record is not _NOT_CACHED:
+            return record
+
+        record = self.db.get_media_object(media_id)
+        self._remember(media_id, record)
+        return record
+
+    async def get_media_async(self, media_id: str) -> Optional[Dict[str, Any]]:
+        """get_media for request handlers; a cache miss reads the table off the event loop"""
+        record = self._get_cached(media_id)
+        if record is not _NOT_CACHED:
+            return record
+
+        record = await run_db_call(self.db.get_media_object, media_id)
+        self._remember(media_id, record)
+        return record
+
+    def is_known_missing(self, media_id: str) -> bool:
+        """True if this media ID was reported missing within the negative TTL"""
+        with self._lock:
+            expires_at = self._missing.get(media_id)
+            return expires_at is not None and expires_at > time.monotonic()
+
+    def get_storage_key(self, media_id: str) -> Optional[str]:
+        """Resolve a media ID to its storage key"""
+        record = self.get_media(media_id)
+        return record["storage_key"] if record else None
+
+    def remove_media(self, media_id: str) -> bool:
+        """Drop a media ID from the index (after the object is deleted)"""
+        with self._lock:
+            self._cache.pop(media_id, None)
+        return self.db.delete_media_object(media_id)
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._missing.clear()
+
+    def backfill_from_bucket(self, s3_client, bucket_name: str, prefix: str = "media/") -> Dict[str, int]:
+        """
+        Index objects already in the bucket that carry media_id metadata.
+
+        Objects whose key is already indexed are skipped, so the backfill can be
+        re-run after an interruption. Each new object costs one HEAD to read its
+        media_id; size and upload time come from the listing.
+
+        Returns:
+            Counts of scanned, indexed, skipped (already indexed or no media_id) and failed objects
+        """
+        counts = {"scanned": 0, "indexed": 0, "skipped": 0, "failed": 0}
+        indexed_keys = self.db.get_indexed_storage_keys(prefix)
+
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                counts["scanned"] += 1
+                key = obj['Key']
+                if key in indexed_keys:
+                    counts["skipped"] += 1
+                    continue
+
+                try:
+                    head = s3_client.head_object(Bucket=bucket_name, Key=key)
+                except ClientError as e:
+                    logger.warning(f"Backfill could not read {key}: {e}")
+                    counts["failed"] += 1
+                    continue
+
+                media_id = head.get('Metadata', {}).get('media_id')
+                if not media_id:
+                    counts["skipped"] += 1
+                    continue
+
+                self.record_media(
+                    media_id=media_id,
+                    storage_key=key,
+                    file_size=obj.get('Size'),
+                    content_type=head.get('ContentType'),
+                    uploaded_at=obj.get('LastModified')
+                )
+                indexed_keys.add(key)
+                counts["indexed"] += 1
+
+        logger.info(f"Media index backfill for s3://{bucket_name}/{prefix}: {counts}")
+        return counts
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._negative_hits + self._misses
+            return {
+                "cached_entries": len(self._cache),
+                "cached_misses": len(self._missing),
+                "cache_size": self.cache_size,
+                "negative_ttl_seconds": self.negative_ttl,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "hit_rate": (self._hits + self._negative_hits) / lookups if lookups else 0.0
+            }
+
+
+# Global service instance
+media_index_service = None
+
+def get_media_index_service() -> MediaIndexService:
+    """Get the process-wide media index"""
+    global media_index_service
+    if media_index_service is None:
+        media_index_service = MediaIndexService()
+    return media_index_service
@@ -17,6 +17,7 @@ from services.upload_service import ChunkedUploadService, UploadServiceError, Up
 from services.auth_service import get_current_user
 from services.cloud_storage_service import create_cloud_storage_service, CloudStorageError
 from services.cdn_service import create_cdn_service, CDNService
+from services.media_index_service import get_media_index_service
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -28,6 +29,7 @@ class MediaUploadService:
         self.upload_service = ChunkedUploadService()
         self.media_storage_path = settings.UPLOAD_DIR / "media"
         self.media_storage_path.mkdir(exist_ok=True)
+        self.media_index = get_media_index_service()
         
         # Initialize cloud storage if enabled
         self.use_cloud_storage = settings.USE_CLOUD_STORAGE
@@ -171,6 +173,17 @@ class MediaUploadService:
                         metadata=cloud_metadata
                     )
                 
+                # Index the key so streaming can resolve it without probing the bucket
+                try:
+                    self.media_index.record_media(
+                        media_id=media_id,
+                        storage_key=cloud_key,
+                        file_size=session.file_size,
+                        content_type=session.mime_type
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to index media {media_id} -> {cloud_key}: {e}")
+                
                 # Clean up local file after successful cloud upload
                 final_path.unlink()
                 
@@ -187,9 +200,7 @@ class MediaUploadService:
                 
                 # Clean up upload session after successful cloud upload
                 await self.upload_service._cleanup_session_chunks(session_id)
-                if session_id in self.upload_service.sessions:
-                    del self.upload_service.sessions[session_id]
-                    await self.upload_service._save_sessions()
+                await self.upload_service.remove_session(session_id)
                 
                 return {
                     "media_id": media_id,
@@ -215,9 +226,7 @@ class MediaUploadService:
                 
                 # Clean up upload session after local storage
                 await self.upload_service._cleanup_session_chunks(session_id)
-                if session_id in self.upload_service.sessions:
-                    del self.upload_service.sessions[session_id]
-                    await self.upload_service._save_sessions()
+                await self.upload_service.remove_session(session_id)
                 
                 logger.info(f"Media {media_id} stored locally: {media_path}")
                 
@@ -242,9 +251,7 @@ class MediaUploadService:
             
             # Clean up upload session even on fallback
             await self.upload_service._cleanup_session_chunks(session_id)
-            if session_id in self.upload_service.sessions:
-                del self.upload_service.sessions[session_id]
-                await self.upload_service._save_sessions()
+            await self.upload_service.remove_session(session_id)
             
             return {
                 "media_id": media_id,
@@ -309,48 +316,37 @@ class MediaUploadService:
         """Stream media with range support for video playback from cloud or local storage"""
         
         if self.use_cloud_storage and self.cloud_storage:
-            # Try cloud storage first - generate signed URL for direct streaming
-            # Use the S3 media service key pattern: media/videos/{timestamp}/{media_id}
-            from datetime import datetime, timedelta
-            import boto3
-            
-            # Try different date patterns (current and recent dates)
-            current_date = datetime.utcnow()
-            potential_keys = []
+            # Resolve the key from the media index: no HEADs on a cache hit, one
+            # metadata read on a miss
+            recently_missing = self.media_index.is_known_missing(media_id)
+            try:
+                record = await self.media_index.get_media_async(media_id)
+            except Exception as e:
+                logger.error(f"Media index lookup failed for {media_id}: {e}")
+                record = None
             
-            # Try multiple date formats in case upload was on different day
-            for days_back in range(7):  # Check last 7 days
-                test_date = current_date - timedelta(days=days_back)
-                timestamp = test_date.strftime('%Y%m%d')
-                potential_keys.append(f"media/videos/{timestamp}/{media_id}")
+            if record is None and not recently_missing:
+                if settings.MEDIA_INDEX_SCAN_ON_MISS:
+                    record = await self._find_unindexed_cloud_media(media_id, user_id)
+                if record is None:
+                    self.media_index.remember_missing(media_id)
             
-            # Also try legacy patterns for backward compatibility
-            if user_id:
-                potential_keys.extend([
-                    f"media/{user_id}/{media_id}/video.mp4",
-                    f"media/{user_id}/{media_id}/video.webm", 
-                    f"media/{user_id}/{media_id}/video.mov"
-                ])
-            
-            for key in potential_keys:
-                if await self.cloud_storage.file_exists(key):
-                    # For cloud storage, return signed URL for direct streaming
-                    signed_url = await self.cloud_storage.get_file_url(
-                        key, 
-                        expires_in=settings.SIGNED_URL_EXPIRY
-                    )
-                    
-                    metadata = await self.cloud_storage.get_file_metadata(key)
-                    
-                    return {
-                        "streaming_type": "redirect",
-                        "signed_url": signed_url,
-                        "cloud_key": key,
-                        "mime_type": metadata.get("content_type") if metadata else "video/mp4",
-                        "file_size": metadata.get("content_length") if metadata else 0,
-                        "supports_range": True,
-                        "storage_type": "cloud"
-                    }
+            if record:
+                # For cloud storage, return signed URL for direct streaming
+                signed_url = await self.cloud_storage.get_file_url(
+                    record["storage_key"],
+                    expires_in=settings.SIGNED_URL_EXPIRY
+                )
+                
+                return {
+                    "streaming_type": "redirect",
+                    "signed_url": signed_url,
+                    "cloud_key": record["storage_key"],
+                    "mime_type": record.get("content_type") or "video/mp4",
+                    "file_size": record.get("file_size") or 0,
+                    "supports_range": True,
+                    "storage_type": "cloud"
+                }
         
         # Fallback to local storage streaming
         media_files = list(self.media_storage_path.glob(f"{media_id}_*"))
@@ -390,6 +386,45 @@ class MediaUploadService:
             "storage_type": "local"
         }
     
+    async def _find_unindexed_cloud_media(self, media_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Probe the key layouts used before the media index existed and index the match.
+        
+        Only runs while MEDIA_INDEX_SCAN_ON_MISS is enabled; the backfill in
+        tools/migration/backfill_media_index.py makes it unnecessary.
+        """
+        current_date = datetime.utcnow()
+        potential_keys = [
+            f"media/videos/{(current_date - timedelta(days=days_back)).strftime('%Y%m%d')}/{media_id}"
+            for days_back in range(7)
+        ]
+        if user_id:
+            potential_keys.extend([
+                f"media/{user_id}/{media_id}/video.mp4",
+                f"media/{user_id}/{media_id}/video.webm",
+                f"media/{user_id}/{media_id}/video.mov"
+            ])
+        
+        for key in potential_keys:
+            if not await self.cloud_storage.file_exists(key):
+                continue
+            metadata = await self.cloud_storage.get_file_metadata(key) or {}
+            
+            logger.warning(f"Media {media_id} was not indexed; run the media index backfill")
+            record = {
+                "media_id": media_id,
+                "storage_key": key,
+                "file_size": metadata.get("content_length"),
+                "content_type": metadata.get("content_type")
+            }
+            try:
+                self.media_index.record_media(**record)
+            except Exception as e:
+                logger.error(f"Failed to index media {media_id} -> {key}: {e}")
+            return record
+        
+        return None
+    
     async def delete_media(self, media_id: str, user_id: str) -> bool:
         """Delete media file from cloud or local storage (with authorization check)"""
         
@@ -403,6 +438,15 @@ class MediaUploadService:
                 f"media/{user_id}/{media_id}/video.mov"
             ]
             
+            # Indexed keys keep the original filename; only the owner's prefix may be deleted
+            try:
+                record = await self.media_index.get_media_async(media_id)
+            except Exception as e:
+                logger.error(f"Media index lookup failed for {media_id}: {e}")
+                record = None
+            if record and record["storage_key"].startswith(f"media/{user_id}/"):
+                potential_keys.insert(0, record["storage_key"])
+            
             for key in potential_keys:
                 if await self.cloud_storage.file_exists(key):
                     success = await self.cloud_storage.delete_file(key)
@@ -410,6 +454,12 @@ class MediaUploadService:
                         logger.info(f"Media {media_id} deleted from cloud storage: {key}")
                         deleted = True
                         break
+            
+            if deleted:
+                try:
+                    self.media_index.remove_media(media_id)
+                except Exception as e:
+                    logger.error(f"Failed to remove media {media_id} from media index: {e}")
         
         # Also check and delete from local storage (for migration scenarios)
         media_files = list(self.media_storage_path.glob(f"{media_id}_*"))
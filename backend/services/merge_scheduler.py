@@ -0,0 +1,174 @@
+"""
+Merge Scheduler - Bounds how many video merges (FFmpeg jobs) run at once
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_PREMIUM = 0
+PRIORITY_STANDARD = 1
+
+
+class MergeQueueFull(Exception):
+    """Raised when a merge is submitted while the queue is at capacity"""
+
+    def __init__(self, message: str, retry_after_seconds: int):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+class _MergeJob:
+    __slots__ = ("job_id", "priority", "sequence", "granted", "cancelled", "queued_at")
+
+    def __init__(self, job_id: str, priority: int, sequence: int):
+        self.job_id = job_id
+        self.priority = priority
+        self.sequence = sequence
+        self.granted = asyncio.get_running_loop().create_future()
+        self.cancelled = False
+        self.queued_at = time.monotonic()
+
+    def __lt__(self, other: "_MergeJob") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+def default_max_concurrent_merges() -> int:
+    """One merge per MERGE_FFMPEG_THREADS CPU cores, at least one"""
+    return max(1, (os.cpu_count() or 1) // max(1, settings.MERGE_FFMPEG_THREADS))
+
+
+class MergeScheduler:
+    """
+    Admission control for merges: at most max_concurrent run at a time and at
+    most max_queued wait. Waiting jobs start in priority order, FIFO within a
+    priority, so premium users' merges go first.
+
+    submit() starts a job in the background (queued merge sessions); run()
+    waits for a slot and returns the job's result (synchronous merge
+    endpoints). Both raise MergeQueueFull, with a retry-after estimate based
+    on recent job durations, when the queue is full.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, max_queued: Optional[int] = None):
+        self.max_concurrent = max_concurrent or settings.MERGE_MAX_CONCURRENT or default_max_concurrent_merges()
+        self.max_queued = max_queued if max_queued is not None else settings.MERGE_MAX_QUEUED
+        self._queue: List[_MergeJob] = []
+        self._queued: Dict[str, _MergeJob] = {}
+        self._running: Dict[str, float] = {}  # job_id -> start time
+        self._sequence = itertools.count()
+        self._avg_duration = float(settings.MERGE_ESTIMATED_DURATION_SECONDS)
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+
+    def _enqueue(self, job_id: str, priority: int) -> _MergeJob:
+        if len(self._queued) >= self.max_queued:
+            self._rejected += 1
+            retry_after = self.estimate_wait_seconds(len(self._queued) + 1)
+            raise MergeQueueFull(
+                f"Merge queue is full ({self.max_queued} waiting), retry in about {retry_after}s",
+                retry_after
+            )
+        job = _MergeJob(job_id, priority, next(self._sequence))
+        self._queued[job_id] = job
+        heapq.heappush(self._queue, job)
+        self._dispatch()
+        return job
+
+    def _dispatch(self) -> None:
+        while self._queue and len(self._running) < self.max_concurrent:
+            job = heapq.heappop(self._queue)
+            if job.cancelled:
+                continue
+            del self._queued[job.job_id]
+            self._running[job.job_id] = time.monotonic()
+            self._total_wait += self._running[job.job_id] - job.queued_at
+            job.granted.set_result(None)
+
+    def _release(self, job_id: str) -> None:
+        started = self._running.pop(job_id, None)
+        if started is not None:
+            # Exponential moving average of job duration for retry-after estimates
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.monotonic() - started)
+            self._completed += 1
+        self._dispatch()
+
+    async def _execute(self, job: _MergeJob, factory: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            await job.granted
+        except asyncio.CancelledError:
+            # Cancelled while waiting, or just after being granted a slot
+            if not self.cancel(job.job_id) and job.job_id in self._running:
+                self._release(job.job_id)
+            raise
+        try:
+            return await factory()
+        finally:
+            self._release(job.job_id)
+
+    def submit(self, job_id: str, factory: Callable[[], Awaitable[Any]], priority: int = PRIORITY_STANDARD) -> "asyncio.Task":
+        """Queue a job to run in the background; raises MergeQueueFull"""
+        job = self._enqueue(job_id, priority)
+        return asyncio.create_task(self._execute(job, factory))
+
+    async def run(self, job_id: str, factory: Callable[[], Awaitable[Any]], priority: int = PRIORITY_STANDARD) -> Any:
+        """Wait for a slot, run the job and return its result; raises MergeQueueFull"""
+        job = self._enqueue(job_id, priority)
+        return await self._execute(job, factory)
+
+    def cancel(self, job_id: str) -> bool:
+        """Drop a job that has not started yet"""
+        job = self._queued.pop(job_id, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        if not job.granted.done():
+            job.granted.cancel()
+        return True
+
+    def position(self, job_id: str) -> Optional[int]:
+        """0 while running, 1-based place in line while queued, None if unknown"""
+        if job_id in self._running:
+            return 0
+        job = self._queued.get(job_id)
+        if job is None:
+            return None
+        return 1 + sum(1 for other in self._queued.values() if other < job)
+
+    def estimate_wait_seconds(self, position: int) -> int:
+        """Rough time until the job at this queue position starts"""
+        rounds = -(-position // self.max_concurrent)  # ceil
+        return max(1, int(rounds * self._avg_duration))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "running": len(self._running),
+            "queued": len(self._queued),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_duration_seconds": round(self._avg_duration, 2),
+            "avg_wait_seconds": round(self._total_wait / (self._completed + len(self._running)), 2)
+            if self._completed + len(self._running) else 0.0
+        }
+
+
+# Global scheduler shared by every VideoMergeService in the process
+merge_scheduler = None
+
+def get_merge_scheduler() -> MergeScheduler:
+    """Get the process-wide merge scheduler"""
+    global merge_scheduler
+    if merge_scheduler is None:
+        merge_scheduler = MergeScheduler()
+    return merge_scheduler
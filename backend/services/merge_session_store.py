@@ -0,0 +1,234 @@
+"""
+Merge Session Store - Persists video merge sessions beyond the worker that ran them
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.db_executor import run_db_call
+
+logger = logging.getLogger(__name__)
+
+_DATETIME_FIELDS = ("created_at", "updated_at", "completed_at", "failed_at", "cancelled_at")
+
+# Live objects (upload sessions, probe output) only the worker running the merge needs
+_TRANSIENT_FIELDS = ("video_files", "video_analysis")
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, "dict"):
+        return value.dict()
+    return str(value)
+
+
+def serialize_merge_session(session: Dict[str, Any]) -> str:
+    """JSON for a merge session, without the fields that only matter while it runs"""
+    data = {key: value for key, value in session.items() if key not in _TRANSIENT_FIELDS}
+    if "video_files" in session:
+        data["video_count"] = len(session["video_files"] or [])
+    return json.dumps(data, default=_encode)
+
+
+def deserialize_merge_session(data: str) -> Dict[str, Any]:
+    session = json.loads(data)
+    for field in _DATETIME_FIELDS:
+        if isinstance(session.get(field), str):
+            try:
+                session[field] = datetime.fromisoformat(session[field])
+            except ValueError:
+                pass
+    return session
+
+
+def merged_video_file_id(session: Dict[str, Any]) -> Optional[str]:
+    """ID of the video a merge produced (queued merges and temp merges name it differently)"""
+    metadata = session.get("merged_video_metadata")
+    if hasattr(metadata, "dict"):
+        metadata = metadata.dict()
+    if not isinstance(metadata, dict):
+        return None
+    return metadata.get("video_file_id") or metadata.get("file_id")
+
+
+class MergeSessionStore:
+    """
+    Write-through persistence for merge sessions in the merge_sessions table.
+
+    The worker running a merge keeps the live session dict in
+    VideoMergeService.merge_sessions and saves a snapshot here whenever the
+    status changes. Any worker, including one started after a restart, can
+    then load the session by ID or by the merged video's file ID through an
+    index instead of scanning memory. Rows are pruned MERGE_SESSION_TTL_HOURS
+    after their last update.
+
+    Saves never raise: a database outage degrades to in-memory sessions.
+    Snapshots of a session are written in the order they were taken, so a
+    slow write can never overwrite a newer status; only writes of the same
+    session wait for each other. A cancelled run is never overwritten (the
+    database refuses the write), and the store remembers which runs it saw
+    cancelled so the worker running one can stop it.
+    """
+
+    def __init__(self, db_service=None, ttl_hours: Optional[float] = None):
+        self._db_service = db_service
+        self.ttl_hours = ttl_hours if ttl_hours is not None else settings.MERGE_SESSION_TTL_HOURS
+        self._lock = threading.Lock()  # Guards the bookkeeping below, never held across a DB call
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._versions: Dict[str, int] = {}
+        self._written: Dict[str, int] = {}
+        self._cancelled: Dict[str, Any] = {}  # merge_session_id -> created_at of the cancelled run
+        self._saves = 0
+        self._stale_skipped = 0
+        self._cancelled_skipped = 0
+        self._loads = 0
+        self._load_misses = 0
+        self._pruned = 0
+        self._errors = 0
+
+    @property
+    def db(self):
+        if self._db_service is None:
+            from services.database_service import get_db_service
+            self._db_service = get_db_service()
+        return self._db_service
+
+    def _write(self, merge_session_id: str, version: int, row: Dict[str, Any]) -> bool:
+        with self._lock:
+            session_lock = self._session_locks.setdefault(merge_session_id, threading.Lock())
+        with session_lock:
+            with self._lock:
+                if version < self._written.get(merge_session_id, -1):
+                    self._stale_skipped += 1
+                    return False
+            written = self.db.save_merge_session(**row)
+            with self._lock:
+                self._written[merge_session_id] = version
+                if written:
+                    self._saves += 1
+                else:
+                    self._cancelled_skipped += 1
+                if not written or row["status"] == "cancelled":
+                    self._cancelled[merge_session_id] = row["created_at"]
+            return written
+
+    async def save(self, session: Dict[str, Any]) -> bool:
+        """
+        Persist a snapshot of a merge session; returns False if it could not
+        be written or the run was cancelled (see is_cancelled)
+        """
+        merge_session_id = session["merge_session_id"]
+        try:
+            row = {
+                "merge_session_id": merge_session_id,
+                "user_id": session["user_id"],
+                "video_file_id": merged_video_file_id(session),
+                "status": session["status"],
+                "data": serialize_merge_session(session),
+                "created_at": session.get("created_at"),
+                "updated_at": session.get("updated_at")
+            }
+            with self._lock:
+                version = self._versions.get(merge_session_id, 0) + 1
+                self._versions[merge_session_id] = version
+            return await run_db_call(self._write, merge_session_id, version, row)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"Could not persist merge session {merge_session_id}: {e}")
+            return False
+
+    def is_cancelled(self, session: Dict[str, Any]) -> bool:
+        """Whether this run of the session was cancelled, as far as this store has seen"""
+        with self._lock:
+            merge_session_id = session["merge_session_id"]
+            return (
+                merge_session_id in self._cancelled
+                and self._cancelled[merge_session_id] == session.get("created_at")
+            )
+
+    def _row_to_session(self, row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        self._loads += 1
+        if row is None:
+            self._load_misses += 1
+            return None
+        return deserialize_merge_session(row["data"])
+
+    async def load(self, merge_session_id: str) -> Optional[Dict[str, Any]]:
+        """Persisted state of a merge session, or None"""
+        try:
+            return self._row_to_session(await run_db_call(self.db.get_merge_session, merge_session_id))
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"Could not load merge session {merge_session_id}: {e}")
+            return None
+
+    async def find_by_video_file_id(self, video_file_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """The user's merge session that produced video_file_id, or None"""
+        try:
+            return self._row_to_session(
+                await run_db_call(self.db.find_merge_session_by_video_file_id, video_file_id, user_id)
+            )
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"Could not look up merge session for video {video_file_id}: {e}")
+            return None
+
+    async def get_expired(self, max_age_hours: Optional[float] = None) -> List[Dict[str, Any]]:
+        """merge_session_id, user_id and status of sessions past the TTL"""
+        max_age_hours = max_age_hours if max_age_hours is not None else self.ttl_hours
+        cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+        try:
+            return await run_db_call(self.db.get_stale_merge_sessions, cutoff)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"Could not list expired merge sessions: {e}")
+            return []
+
+    async def delete(self, merge_session_ids: List[str]) -> int:
+        """Remove persisted sessions; returns how many rows went"""
+        if not merge_session_ids:
+            return 0
+        try:
+            removed = await run_db_call(self.db.delete_merge_sessions, list(merge_session_ids))
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"Could not delete merge sessions: {e}")
+            return 0
+        with self._lock:
+            for merge_session_id in merge_session_ids:
+                self._versions.pop(merge_session_id, None)
+                self._written.pop(merge_session_id, None)
+                self._session_locks.pop(merge_session_id, None)
+                self._cancelled.pop(merge_session_id, None)
+        self._pruned += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_hours": self.ttl_hours,
+            "saves": self._saves,
+            "stale_saves_skipped": self._stale_skipped,
+            "cancelled_saves_skipped": self._cancelled_skipped,
+            "loads": self._loads,
+            "load_misses": self._load_misses,
+            "pruned": self._pruned,
+            "errors": self._errors
+        }
+
+
+# Global store shared by every VideoMergeService in the process
+merge_session_store = None
+
+def get_merge_session_store() -> MergeSessionStore:
+    """Get the process-wide merge session store"""
+    global merge_session_store
+    if merge_session_store is None:
+        merge_session_store = MergeSessionStore()
+    return merge_session_store
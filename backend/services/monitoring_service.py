@@ -5,16 +5,21 @@ Tracks metrics, failures, and provides alerting for video processing operations
 import logging
 import json
 import asyncio
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, List, Optional, Any, Tuple
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field, replace
 from enum import Enum
 import traceback
 import psutil
 import os
+from collections import deque
 
 from config import settings
+from services.metrics_registry import STAGE_DURATION_BUCKETS, metrics_registry
+from services.rolling_stats import RollingAggregates
 
 # Configure structured logging
 logging.basicConfig(
@@ -28,6 +33,13 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+STAGE_SECONDS = metrics_registry.histogram(
+    "media_processing_stage_duration_seconds",
+    "Media processing stage (FFmpeg analysis, merge, compression, upload) duration by outcome",
+    ("stage", "outcome"),
+    buckets=STAGE_DURATION_BUCKETS
+)
+
 class AlertLevel(Enum):
     """Alert severity levels"""
     INFO = "info"
@@ -85,15 +97,170 @@ class Alert:
     stage: Optional[ProcessingStage] = None
     metadata: Optional[Dict[str, Any]] = None
 
+@dataclass
+class _DirUsage:
+    """Cached listing of one directory for TempDirUsage"""
+    mtime_ns: int
+    files: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # name -> (size, mtime_ns)
+    subdirs: List[str] = field(default_factory=list)
+
+class TempDirUsage:
+    """
+    Bytes under a directory, maintained incrementally between refreshes.
+    
+    A directory is only re-listed when its own mtime changes (an entry was
+    added, removed or renamed). Within an unchanged directory only files
+    written in the last active_window_seconds are re-stat'ed, since those may
+    still be growing (uploads, FFmpeg output, logs). Every full_scan_every
+    refreshes everything is re-stat'ed to catch a quiet file that grew again.
+    """
+    
+    def __init__(self, root: Path, full_scan_every: int = 60, active_window_seconds: float = 300):
+        self.root = str(root)
+        self.full_scan_every = max(1, full_scan_every)
+        self.active_window_ns = int(active_window_seconds * 1e9)
+        self.total_bytes = 0
+        self._dirs: Dict[str, _DirUsage] = {}
+        self._refreshes = 0
+    
+    def _list(self, path: str, mtime_ns: int) -> _DirUsage:
+        usage = _DirUsage(mtime_ns=mtime_ns)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        usage.subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        usage.files[entry.name] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue  # Removed while listing
+        return usage
+    
+    def _restat_active(self, path: str, usage: _DirUsage, now_ns: int) -> None:
+        for name, (size, mtime_ns) in list(usage.files.items()):
+            if now_ns - mtime_ns > self.active_window_ns:
+                continue
+            try:
+                st = os.stat(os.path.join(path, name))
+                usage.files[name] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                usage.files.pop(name, None)
+    
+    def refresh(self) -> int:
+        """Update and return total_bytes"""
+        full = self._refreshes % self.full_scan_every == 0
+        self._refreshes += 1
+        now_ns = time.time_ns()
+        seen = {}
+        total = 0
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+                usage = self._dirs.get(path)
+                if full or usage is None or usage.mtime_ns != mtime_ns:
+                    usage = self._list(path, mtime_ns)
+                else:
+                    self._restat_active(path, usage, now_ns)
+            except OSError:
+                continue  # Directory removed since it was listed
+            seen[path] = usage
+            total += sum(size for size, _ in usage.files.values())
+            stack.extend(usage.subdirs)
+        self._dirs = seen
+        self.total_bytes = total
+        return total
+
+class SystemSampler:
+    """
+    Samples CPU, memory, disk and temp dir usage on a daemon thread.
+    
+    psutil.cpu_percent(interval=None) reports usage since the previous
+    sample, so nothing sleeps; readers get the latest SystemMetrics with a
+    plain attribute read and never touch psutil or the filesystem.
+    """
+    
+    def __init__(self, temp_dir: Path, interval_seconds: Optional[float] = None, full_scan_every: Optional[int] = None):
+        self.temp_dir = Path(temp_dir)
+        self.interval_seconds = interval_seconds if interval_seconds is not None else settings.MONITORING_SAMPLE_INTERVAL_SECONDS
+        self.temp_usage = TempDirUsage(
+            self.temp_dir,
+            full_scan_every=full_scan_every if full_scan_every is not None else settings.MONITORING_TEMP_FULL_SCAN_EVERY
+        )
+        self.samples = 0
+        self.last_sample_seconds = 0.0
+        self._latest: Optional[SystemMetrics] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+    
+    def latest(self) -> Optional[SystemMetrics]:
+        return self._latest
+    
+    def start(self) -> None:
+        """Start the sampling thread if it is not already running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+    
+    def sample(self) -> SystemMetrics:
+        """Take one sample (sampler thread, or directly in tests and tools)"""
+        started = time.perf_counter()
+        disk_usage = psutil.disk_usage(str(self.temp_dir))
+        metrics = SystemMetrics(
+            timestamp=datetime.utcnow(),
+            cpu_usage_percent=psutil.cpu_percent(interval=None),
+            memory_usage_percent=psutil.virtual_memory().percent,
+            disk_usage_percent=(disk_usage.used / disk_usage.total) * 100,
+            active_sessions=0,
+            temp_dir_size_mb=self.temp_usage.refresh() / (1024 * 1024)
+        )
+        self._latest = metrics
+        self.samples += 1
+        self.last_sample_seconds = time.perf_counter() - started
+        return metrics
+    
+    def _run(self) -> None:
+        # The first cpu_percent(interval=None) call only sets the baseline
+        psutil.cpu_percent(interval=None)
+        self._stop.wait(min(self.interval_seconds, 1.0))
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"System metrics sampling failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
 class MediaProcessingMonitor:
     """Monitor for media processing operations with metrics and alerting"""
     
+    # Longest window /api/v1/monitoring/stats can ask for
+    STATS_RETENTION_HOURS = 168
+    
     def __init__(self):
-        self.processing_metrics: List[ProcessingMetrics] = []
+        # Most recent completed operations, for inspection; stats come from stage_stats
+        self.processing_metrics: Deque[ProcessingMetrics] = deque(maxlen=settings.MONITORING_RECENT_METRICS)
+        self.stage_stats = RollingAggregates(
+            bucket_seconds=settings.MONITORING_STATS_BUCKET_SECONDS,
+            retention_seconds=self.STATS_RETENTION_HOURS * 3600
+        )
         self.system_metrics: List[SystemMetrics] = []
         self.alerts: List[Alert] = []
         self.active_sessions: Dict[str, ProcessingMetrics] = {}
         self._background_task = None
+        self.sampler = SystemSampler(settings.TEMP_DIR)
         
         # Thresholds for alerting
         self.error_rate_threshold = 0.1  # 10% error rate
@@ -128,7 +295,7 @@ class MediaProcessingMonitor:
             start_time=datetime.utcnow()
         )
         
-        # Capture system metrics at start
+        # Capture system metrics at start (latest background sample)
         system_info = self._get_system_metrics()
         metrics.memory_usage_mb = system_info.memory_usage_percent
         metrics.cpu_usage_percent = system_info.cpu_usage_percent
@@ -180,6 +347,8 @@ class MediaProcessingMonitor:
         
         # Add to historical metrics
         self.processing_metrics.append(metrics)
+        self.stage_stats.record(stage.value, success, metrics.duration_seconds, error_code)
+        STAGE_SECONDS.observe(metrics.duration_seconds, stage.value, "ok" if success else "error")
         
         # Log completion
         if success:
@@ -223,10 +392,6 @@ class MediaProcessingMonitor:
         
         # Check for performance issues
         await self._check_performance_alerts(metrics)
-        
-        # Cleanup old metrics (keep last 1000 entries)
-        if len(self.processing_metrics) > 1000:
-            self.processing_metrics = self.processing_metrics[-1000:]
     
     async def log_processing_error(
         self,
@@ -264,16 +429,18 @@ class MediaProcessingMonitor:
             metadata=error_details
         )
     
-    def get_processing_stats(self, hours: int = 24) -> Dict[str, Any]:
-        """Get processing statistics for the last N hours"""
+    def get_processing_stats(self, hours: int = 24, include_histograms: bool = False) -> Dict[str, Any]:
+        """
+        Get processing statistics for the last N hours.
+        
+        Merges the rolling per-stage buckets that cover the window, so the
+        window edge is rounded out to the bucket width. Each stage reports
+        p50/p95/p99 durations; include_histograms adds its latency buckets.
+        """
         
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        recent_metrics = [
-            m for m in self.processing_metrics 
-            if m.start_time >= cutoff_time
-        ]
+        by_stage = self.stage_stats.window(hours * 3600)
         
-        if not recent_metrics:
+        if not by_stage:
             return {
                 "total_operations": 0,
                 "success_rate": 0.0,
@@ -284,34 +451,38 @@ class MediaProcessingMonitor:
             }
         
         # Calculate statistics
-        total_ops = len(recent_metrics)
-        successful_ops = len([m for m in recent_metrics if m.success])
+        total_ops = sum(s.count for s in by_stage.values())
+        successful_ops = sum(s.success_count for s in by_stage.values())
         failed_ops = total_ops - successful_ops
+        duration_count = sum(s.duration_count for s in by_stage.values())
         
         success_rate = successful_ops / total_ops if total_ops > 0 else 0.0
         error_rate = failed_ops / total_ops if total_ops > 0 else 0.0
         
-        # Average duration by stage
+        # Duration statistics by stage
         stage_stats = {}
         for stage in ProcessingStage:
-            stage_metrics = [m for m in recent_metrics if m.stage == stage and m.duration_seconds]
-            if stage_metrics:
+            aggregate = by_stage.get(stage.value)
+            if aggregate and aggregate.duration_count:
+                percentiles = aggregate.histogram.percentiles()
                 stage_stats[stage.value] = {
-                    "count": len(stage_metrics),
-                    "success_count": len([m for m in stage_metrics if m.success]),
-                    "average_duration": sum(m.duration_seconds for m in stage_metrics) / len(stage_metrics),
-                    "max_duration": max(m.duration_seconds for m in stage_metrics),
-                    "min_duration": min(m.duration_seconds for m in stage_metrics)
+                    "count": aggregate.duration_count,
+                    "success_count": aggregate.success_count,
+                    "average_duration": aggregate.average_duration,
+                    "max_duration": aggregate.duration_max,
+                    "min_duration": aggregate.duration_min,
+                    "p50_duration": percentiles["p50"],
+                    "p95_duration": percentiles["p95"],
+                    "p99_duration": percentiles["p99"]
                 }
+                if include_histograms:
+                    stage_stats[stage.value]["duration_histogram"] = aggregate.histogram.buckets()
         
         # Error breakdown
         error_breakdown = {}
-        failed_metrics = [m for m in recent_metrics if not m.success and m.error_code]
-        for metric in failed_metrics:
-            error_code = metric.error_code
-            if error_code not in error_breakdown:
-                error_breakdown[error_code] = 0
-            error_breakdown[error_code] += 1
+        for aggregate in by_stage.values():
+            for error_code, count in aggregate.errors.items():
+                error_breakdown[error_code] = error_breakdown.get(error_code, 0) + count
         
         return {
             "total_operations": total_ops,
@@ -319,15 +490,28 @@ class MediaProcessingMonitor:
             "failed_operations": failed_ops,
             "success_rate": success_rate,
             "error_rate": error_rate,
-            "average_duration": sum(m.duration_seconds for m in recent_metrics if m.duration_seconds) / len([m for m in recent_metrics if m.duration_seconds]) if recent_metrics else 0.0,
+            "average_duration": sum(s.duration_sum for s in by_stage.values()) / duration_count if duration_count else 0.0,
             "stage_breakdown": stage_stats,
             "error_breakdown": error_breakdown,
             "active_sessions": len(self.active_sessions)
         }
     
+    def prune_processing_metrics(self, cutoff_time: datetime) -> int:
+        """Drop recent operations and stats buckets older than cutoff_time; returns operations dropped"""
+        
+        original_count = len(self.processing_metrics)
+        self.processing_metrics = deque(
+            (m for m in self.processing_metrics if m.start_time >= cutoff_time),
+            maxlen=self.processing_metrics.maxlen
+        )
+        age_seconds = (datetime.utcnow() - cutoff_time).total_seconds()
+        self.stage_stats.clear_before(time.time() - age_seconds)
+        return original_count - len(self.processing_metrics)
+    
     def get_system_health(self) -> Dict[str, Any]:
         """Get current system health status"""
         
+        self.sampler.start()
         current_metrics = self._get_system_metrics()
         
         # Determine health status
@@ -356,6 +540,11 @@ class MediaProcessingMonitor:
             "status": health_status,
             "timestamp": current_metrics.timestamp.isoformat(),
             "system_metrics": asdict(current_metrics),
+            "sampler": {
+                "interval_seconds": self.sampler.interval_seconds,
+                "samples": self.sampler.samples,
+                "last_sample_seconds": self.sampler.last_sample_seconds
+            },
             "issues": issues,
             "recent_stats": recent_stats
         }
@@ -431,36 +620,25 @@ class MediaProcessingMonitor:
             )
     
     def _get_system_metrics(self) -> SystemMetrics:
-        """Get current system resource metrics"""
-        
-        # CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
-        
-        # Memory usage
-        memory = psutil.virtual_memory()
-        memory_percent = memory.percent
-        
-        # Disk usage for temp directory
-        disk_usage = psutil.disk_usage(str(settings.TEMP_DIR))
-        disk_percent = (disk_usage.used / disk_usage.total) * 100
-        
-        # Temp directory size
-        temp_size_bytes = sum(
-            f.stat().st_size for f in settings.TEMP_DIR.rglob('*') if f.is_file()
-        )
-        temp_size_mb = temp_size_bytes / (1024 * 1024)
-        
-        return SystemMetrics(
-            timestamp=datetime.utcnow(),
-            cpu_usage_percent=cpu_percent,
-            memory_usage_percent=memory_percent,
-            disk_usage_percent=disk_percent,
-            active_sessions=len(self.active_sessions),
-            temp_dir_size_mb=temp_size_mb
-        )
+        """Get the latest system resource metrics sampled by the background sampler"""
+        
+        snapshot = self.sampler.latest()
+        if snapshot is None:
+            # No sample yet; report zeros rather than sampling on the event loop
+            self.sampler.start()
+            snapshot = SystemMetrics(
+                timestamp=datetime.utcnow(),
+                cpu_usage_percent=0.0,
+                memory_usage_percent=0.0,
+                disk_usage_percent=0.0,
+                active_sessions=0,
+                temp_dir_size_mb=0.0
+            )
+        return replace(snapshot, active_sessions=len(self.active_sessions))
     
     def _ensure_background_monitoring(self):
-        """Ensure background monitoring task is running"""
+        """Ensure background monitoring task and system sampler are running"""
+        self.sampler.start()
         if self._background_task is None or self._background_task.done():
             try:
                 loop = asyncio.get_running_loop()
@@ -476,10 +654,12 @@ class MediaProcessingMonitor:
             try:
                 # Collect system metrics every 5 minutes
                 metrics = self._get_system_metrics()
-                self.system_metrics.append(metrics)
+                sampled = self.sampler.latest() is not None
+                if sampled:
+                    self.system_metrics.append(metrics)
                 
                 # Check for system alerts
-                if metrics.memory_usage_percent > self.memory_threshold:
+                if sampled and metrics.memory_usage_percent > self.memory_threshold:
                     await self._create_alert(
                         level=AlertLevel.WARNING if metrics.memory_usage_percent < 95 else AlertLevel.CRITICAL,
                         title="High Memory Usage",
@@ -487,7 +667,7 @@ class MediaProcessingMonitor:
                         metadata={"memory_usage_percent": metrics.memory_usage_percent}
                     )
                 
-                if metrics.disk_usage_percent > self.disk_threshold:
+                if sampled and metrics.disk_usage_percent > self.disk_threshold:
                     await self._create_alert(
                         level=AlertLevel.CRITICAL,
                         title="High Disk Usage",
@@ -0,0 +1,294 @@
+"""
+Rate limit backends - where RateLimiter keeps per-user request history
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import settings
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (requests in the window, timestamp of the oldest one)
+WindowUsage = Tuple[int, Optional[float]]
+
+
+class RateLimitBackend(ABC):
+    """Interface RateLimiter uses to count and record requests"""
+
+    @abstractmethod
+    async def get_usage(self, user_id: str, window_seconds: float) -> WindowUsage:
+        """Requests in the last window_seconds and the oldest one's timestamp"""
+        pass
+
+    @abstractmethod
+    async def record(self, user_id: str, timestamp: float) -> None:
+        """Count a request made at timestamp"""
+        pass
+
+    @abstractmethod
+    async def reset(self, user_id: str) -> None:
+        """Forget a user's request history"""
+        pass
+
+    @abstractmethod
+    async def cleanup(self, window_seconds: float) -> int:
+        """Drop expired history; returns how many users were cleared"""
+        pass
+
+
+class SlidingWindowRateLimitBackend(RateLimitBackend):
+    """
+    In-process sliding-window log: one deque of request timestamps per user.
+
+    Timestamps older than the longest window asked about are popped from the
+    left on every access, so each deque holds at most one window of requests
+    and checks cost O(1) amortized. Limits are per process; use the shared
+    backend when several workers must enforce one limit.
+    """
+
+    # Sweep idle users after this many recorded requests
+    SWEEP_EVERY = 1000
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._requests: Dict[str, Deque[float]] = {}
+        self._retention = 3600.0
+        self._lock = threading.Lock()
+        self._records_since_sweep = 0
+
+    def _prune(self, user_id: str, now: float) -> Optional[Deque[float]]:
+        timestamps = self._requests.get(user_id)
+        if timestamps is None:
+            return None
+        cutoff = now - self._retention
+        while timestamps and timestamps[0] < cutoff:
+            timestamps.popleft()
+        if not timestamps:
+            del self._requests[user_id]
+            return None
+        return timestamps
+
+    async def get_usage(self, user_id: str, window_seconds: float) -> WindowUsage:
+        now = self._clock()
+        with self._lock:
+            self._retention = max(self._retention, window_seconds)
+            timestamps = self._prune(user_id, now)
+            if not timestamps:
+                return 0, None
+            first = 0
+            if timestamps[0] < now - window_seconds:
+                first = bisect_left(timestamps, now - window_seconds)
+            if first == len(timestamps):
+                return 0, None
+            return len(timestamps) - first, timestamps[first]
+
+    async def record(self, user_id: str, timestamp: float) -> None:
+        with self._lock:
+            self._requests.setdefault(user_id, deque()).append(timestamp)
+            self._records_since_sweep += 1
+            if self._records_since_sweep >= self.SWEEP_EVERY:
+                self._records_since_sweep = 0
+                now = self._clock()
+                for idle_user in list(self._requests):
+                    self._prune(idle_user, now)
+
+    async def reset(self, user_id: str) -> None:
+        with self._lock:
+            self._requests.pop(user_id, None)
+
+    async def cleanup(self, window_seconds: float) -> int:
+        cutoff = self._clock() - window_seconds
+        cleared = 0
+        with self._lock:
+            for user_id in list(self._requests):
+                timestamps = self._requests[user_id]
+                while timestamps and timestamps[0] < cutoff:
+                    timestamps.popleft()
+                if not timestamps:
+                    del self._requests[user_id]
+                    cleared += 1
+        return cleared
+
+
+class LocalCounterStore:
+    """
+    In-process stand-in for the shared counter store (tests, single worker).
+
+    Implements the same three operations as RedisCounterStore: atomic
+    increment with expiry, multi-get and delete.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._counters: Dict[str, Tuple[int, float]] = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    async def incr(self, key: str, ttl_seconds: int) -> int:
+        now = self._clock()
+        with self._lock:
+            value, expires_at = self._counters.get(key, (0, 0.0))
+            if expires_at <= now:
+                value = 0
+            value += 1
+            self._counters[key] = (value, now + ttl_seconds)
+            return value
+
+    async def get_many(self, keys: List[str]) -> List[int]:
+        now = self._clock()
+        with self._lock:
+            values = []
+            for key in keys:
+                value, expires_at = self._counters.get(key, (0, 0.0))
+                values.append(value if expires_at > now else 0)
+            return values
+
+    async def delete(self, keys: List[str]) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._counters.pop(key, None) is not None)
+
+
+class RedisCounterStore:
+    """Counter store shared by every worker, backed by Redis"""
+
+    def __init__(self, url: str):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package. Install with: pip install redis")
+        self._client = redis_asyncio.from_url(url)
+
+    async def incr(self, key: str, ttl_seconds: int) -> int:
+        async with self._client.pipeline(transaction=True) as pipe:
+            value, _ = await pipe.incr(key).expire(key, ttl_seconds).execute()
+        return int(value)
+
+    async def get_many(self, keys: List[str]) -> List[int]:
+        values = await self._client.mget(keys)
+        return [int(value) if value is not None else 0 for value in values]
+
+    async def delete(self, keys: List[str]) -> int:
+        return await self._client.delete(*keys) if keys else 0
+
+
+class CounterRateLimitBackend(RateLimitBackend):
+    """
+    Sliding window over fixed time buckets in a shared counter store.
+
+    Each request is one atomic increment of its bucket's counter; a check is
+    one multi-get of the buckets covering the window. Whole buckets are
+    counted, so a request can count for up to bucket_seconds longer than the
+    window, never shorter.
+    """
+
+    def __init__(self, store, bucket_seconds: Optional[int] = None, clock=time.time):
+        self.store = store
+        self.bucket_seconds = bucket_seconds or settings.RATE_LIMIT_BUCKET_SECONDS
+        self._clock = clock
+        self._retention = 3600.0
+
+    def _key(self, user_id: str, bucket: int) -> str:
+        return f"ratelimit:{user_id}:{bucket}"
+
+    def _buckets(self, now: float, window_seconds: float) -> range:
+        current = int(now // self.bucket_seconds)
+        first = int((now - window_seconds) // self.bucket_seconds)
+        return range(first, current + 1)
+
+    async def get_usage(self, user_id: str, window_seconds: float) -> WindowUsage:
+        self._retention = max(self._retention, window_seconds)
+        buckets = self._buckets(self._clock(), window_seconds)
+        counts = await self.store.get_many([self._key(user_id, bucket) for bucket in buckets])
+        total = sum(counts)
+        if not total:
+            return 0, None
+        oldest_bucket = next(bucket for bucket, count in zip(buckets, counts) if count)
+        # The oldest bucket leaves the window one window after it ends
+        return total, float((oldest_bucket + 1) * self.bucket_seconds)
+
+    async def record(self, user_id: str, timestamp: float) -> None:
+        bucket = int(timestamp // self.bucket_seconds)
+        ttl = int(self._retention) + 2 * self.bucket_seconds
+        await self.store.incr(self._key(user_id, bucket), ttl)
+
+    async def reset(self, user_id: str) -> None:
+        buckets = self._buckets(self._clock(), self._retention)
+        await self.store.delete([self._key(user_id, bucket) for bucket in buckets])
+
+    async def cleanup(self, window_seconds: float) -> int:
+        # Bucket counters expire on their own
+        return 0
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """Request history in the rate_limit_records table (pre-backend behavior)"""
+
+    def __init__(self, db_service=None):
+        self._db_service = db_service
+
+    @property
+    def db(self):
+        if self._db_service is None:
+            from services.database_service import get_db_service
+            self._db_service = get_db_service()
+        return self._db_service
+
+    async def get_usage(self, user_id: str, window_seconds: float) -> WindowUsage:
+        cutoff = time.time() - window_seconds
+        await self.db._execute_query_async(
+            "DELETE FROM rate_limit_records WHERE user_id = ? AND timestamp < ?", (user_id, cutoff)
+        )
+        results = await self.db._execute_select_async(
+            "SELECT timestamp FROM rate_limit_records WHERE user_id = ?", (user_id,)
+        )
+        timestamps = [row['timestamp'] for row in results] if results else []
+        return len(timestamps), (min(timestamps) if timestamps else None)
+
+    async def record(self, user_id: str, timestamp: float) -> None:
+        await self.db._execute_insert_async(
+            "rate_limit_records", {"user_id": user_id, "timestamp": timestamp}
+        )
+
+    async def reset(self, user_id: str) -> None:
+        await self.db._execute_query_async(
+            "DELETE FROM rate_limit_records WHERE user_id = ?", (user_id,)
+        )
+
+    async def cleanup(self, window_seconds: float) -> int:
+        cutoff = time.time() - window_seconds
+        return await self.db._execute_query_async(
+            "DELETE FROM rate_limit_records WHERE timestamp < ?", (cutoff,)
+        )
+
+
+def create_rate_limit_backend(backend: Optional[str] = None) -> RateLimitBackend:
+    """Build the backend named by RATE_LIMIT_BACKEND (memory, redis or database)"""
+    backend = (backend or settings.RATE_LIMIT_BACKEND).lower()
+    if backend == "memory":
+        return SlidingWindowRateLimitBackend()
+    if backend == "redis":
+        if not settings.RATE_LIMIT_REDIS_URL:
+            raise ValueError("RATE_LIMIT_BACKEND=redis requires RATE_LIMIT_REDIS_URL")
+        return CounterRateLimitBackend(RedisCounterStore(settings.RATE_LIMIT_REDIS_URL))
+    if backend == "database":
+        return DatabaseRateLimitBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+
+# Global backend shared by every RateLimiter in the process
+rate_limit_backend = None
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Get the process-wide rate limit backend"""
+    global rate_limit_backend
+    if rate_limit_backend is None:
+        rate_limit_backend = create_rate_limit_backend()
+    return rate_limit_backend
@@ -1,12 +1,12 @@
 """
-Rate limiting service for preventing spam and abuse, backed by a persistent database.
+Rate limiting service for preventing spam and abuse, backed by a pluggable store.
 """
 import time
 from datetime import datetime
 import logging
 
 from config import settings
-from services.database_service import get_db_service
+from services.rate_limit_backends import RateLimitBackend, get_rate_limit_backend
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +15,15 @@ class RateLimitExceeded(Exception):
     pass
 
 class RateLimiter:
-    """Rate limiter for API endpoints, backed by the database."""
+    """
+    Rate limiter for API endpoints.
+    
+    Request history lives in a RateLimitBackend (see RATE_LIMIT_BACKEND); every
+    RateLimiter in the process shares the same backend unless one is passed in.
+    """
 
-    def __init__(self):
-        self.db_service = get_db_service()
-
-    async def _cleanup_old_requests(self, user_id: str, window_hours: int = 1):
-        """Remove requests older than the time window from the database."""
-        cutoff_time = time.time() - (window_hours * 3600)
-        query = "DELETE FROM rate_limit_records WHERE user_id = ? AND timestamp < ?"
-        try:
-            self.db_service._execute_query(query, (user_id, cutoff_time))
-        except Exception as e:
-            logger.error(f"Error cleaning up old rate limit requests for user {user_id}: {e}")
+    def __init__(self, backend: RateLimitBackend = None):
+        self.backend = backend or get_rate_limit_backend()
 
     async def check_rate_limit(
         self,
@@ -36,7 +32,7 @@ class RateLimiter:
         window_hours: int = 1
     ) -> bool:
         """
-        Check if user has exceeded rate limit using the database.
+        Check if user has exceeded rate limit.
         
         Args:
             user_id: User identifier
@@ -52,22 +48,15 @@ class RateLimiter:
         if limit is None:
             limit = settings.UPLOAD_RATE_LIMIT
 
-        await self._cleanup_old_requests(user_id, window_hours)
-
-        query = "SELECT timestamp FROM rate_limit_records WHERE user_id = ?"
         try:
-            results = self.db_service._execute_select(query, (user_id,))
-            request_timestamps = [row['timestamp'] for row in results] if results else []
+            current_requests, oldest_request = await self.backend.get_usage(user_id, window_hours * 3600)
         except Exception as e:
             logger.error(f"Error checking rate limit for user {user_id}: {e}")
             # Fail open - don't block user if rate limiter fails
             return True
 
-        current_requests = len(request_timestamps)
-
         if current_requests >= limit:
-            if request_timestamps:
-                oldest_request = min(request_timestamps)
+            if oldest_request is not None:
                 reset_time = oldest_request + (window_hours * 3600)
                 wait_seconds = max(0, reset_time - time.time())
 
@@ -83,20 +72,17 @@ class RateLimiter:
         return True
 
     async def record_request(self, user_id: str):
-        """Record a new request for the user in the database."""
+        """Record a new request for the user."""
         current_time = time.time()
         try:
-            self.db_service._execute_insert(
-                "rate_limit_records",
-                {"user_id": user_id, "timestamp": current_time}
-            )
-            logger.info(f"Recorded request for user {user_id} at {datetime.fromtimestamp(current_time)}")
+            await self.backend.record(user_id, current_time)
+            logger.debug(f"Recorded request for user {user_id} at {datetime.fromtimestamp(current_time)}")
         except Exception as e:
             logger.error(f"Error recording request for user {user_id}: {e}")
 
     async def get_rate_limit_status(self, user_id: str, limit: int = None, window_hours: int = 1) -> dict:
         """
-        Get current rate limit status for a user from the database.
+        Get current rate limit status for a user.
         
         Returns:
             Dictionary with rate limit information
@@ -104,23 +90,16 @@ class RateLimiter:
         if limit is None:
             limit = settings.UPLOAD_RATE_LIMIT
 
-        await self._cleanup_old_requests(user_id, window_hours)
-        
-        query = "SELECT timestamp FROM rate_limit_records WHERE user_id = ?"
         try:
-            results = self.db_service._execute_select(query, (user_id,))
-            request_timestamps = [row['timestamp'] for row in results] if results else []
+            current_requests, oldest_request = await self.backend.get_usage(user_id, window_hours * 3600)
         except Exception as e:
             logger.error(f"Error getting rate limit status for user {user_id}: {e}")
-            request_timestamps = []
-
+            current_requests, oldest_request = 0, None
 
-        current_requests = len(request_timestamps)
         remaining_requests = max(0, limit - current_requests)
 
         reset_time = None
-        if request_timestamps:
-            oldest_request = min(request_timestamps)
+        if oldest_request is not None:
             reset_time = datetime.fromtimestamp(oldest_request + (window_hours * 3600))
 
         return {
@@ -133,22 +112,19 @@ class RateLimiter:
 
     async def reset_user_limit(self, user_id: str):
         """Reset rate limit for a specific user (admin function)."""
-        query = "DELETE FROM rate_limit_records WHERE user_id = ?"
         try:
-            self.db_service._execute_query(query, (user_id,))
+            await self.backend.reset(user_id)
             logger.info(f"Rate limit reset for user {user_id}")
         except Exception as e:
             logger.error(f"Error resetting rate limit for user {user_id}: {e}")
 
     async def cleanup_expired_limits(self, window_hours: int = 1):
-        """Clean up expired rate limit data for all users from the database."""
-        cutoff_time = time.time() - (window_hours * 3600)
-        query = "DELETE FROM rate_limit_records WHERE timestamp < ?"
+        """Clean up expired rate limit data for all users."""
         try:
-            rows_affected = self.db_service._execute_query(query, (cutoff_time,))
-            if rows_affected > 0:
-                logger.info(f"Cleaned up {rows_affected} expired rate limit records.")
-            return rows_affected
+            cleaned = await self.backend.cleanup(window_hours * 3600)
+            if cleaned > 0:
+                logger.info(f"Cleaned up {cleaned} expired rate limit entries.")
+            return cleaned
         except Exception as e:
             logger.error(f"Error cleaning up expired rate limits: {e}")
-            return 0
\ No newline at end of file
+            return 0
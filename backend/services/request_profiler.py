@@ -0,0 +1,356 @@
+"""
+Request Profiler - Opt-in per-request span trees for explaining slow endpoints
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+
+from config import settings
+
+PROFILE_HEADER = b"x-profile-request"
+TRACE_ID_HEADER = b"x-profile-trace-id"
+
+# Innermost open span of the profiled request running in this context, if any
+_active_span: ContextVar[Optional["Span"]] = ContextVar("profiler_active_span", default=None)
+
+
+class Span:
+    """A timed operation inside a profiled request; children are the operations it contained"""
+
+    __slots__ = ("trace", "name", "attrs", "start", "duration", "children")
+
+    def __init__(self, trace: "Trace", name: str, attrs: Dict[str, Any], start: float):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.start = start
+        self.duration: Optional[float] = None
+        self.children: List["Span"] = []
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.start
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            **({"attrs": self.attrs} if self.attrs else {}),
+            **({"children": [child.to_dict(origin) for child in self.children]} if self.children else {})
+        }
+
+
+class Trace:
+    """Span tree for one request, capped at max_spans"""
+
+    def __init__(self, method: str, path: str, trigger: str, max_spans: int):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = datetime.utcnow()
+        self.max_spans = max_spans
+        self.span_count = 0
+        self.dropped_spans = 0
+        self.finished = False
+        self.root = Span(self, "request", {}, time.perf_counter())
+
+    def add(self, parent: Span, name: str, attrs: Dict[str, Any], start: float) -> Optional[Span]:
+        # Background work started by the request can outlive it; stop recording then
+        if self.finished:
+            return None
+        if self.span_count >= self.max_spans:
+            self.dropped_spans += 1
+            return None
+        self.span_count += 1
+        span = Span(self, name, attrs, start)
+        parent.children.append(span)
+        return span
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration or 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": self.span_count,
+            "dropped_spans": self.dropped_spans
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.summary(), "tree": self.root.to_dict(self.root.start)}
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _SpanScope:
+    __slots__ = ("parent", "name", "attrs", "span", "token")
+
+    def __init__(self, parent: Span, name: str, attrs: Dict[str, Any]):
+        self.parent = parent
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> Optional[Span]:
+        self.span = self.parent.trace.add(self.parent, self.name, self.attrs, time.perf_counter())
+        self.token = _active_span.set(self.span) if self.span is not None else None
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.span.finish()
+            if exc_type is not None:
+                self.span.attrs["error"] = exc_type.__name__
+            _active_span.reset(self.token)
+        return False
+
+
+def span(name: str, **attrs):
+    """
+    Time a block as a child of the current span (sync or async code alike).
+
+    Outside a profiled request this is one context variable lookup and
+    returns a shared no-op context manager.
+    """
+    parent = _active_span.get()
+    if parent is None:
+        return _NOOP_SPAN
+    return _SpanScope(parent, name, attrs)
+
+
+def profiling_active() -> bool:
+    """True inside a profiled request; use to skip building span attributes otherwise"""
+    return _active_span.get() is not None
+
+
+def record_span(name: str, started: float, duration: float, **attrs) -> None:
+    """Add an already-timed leaf span (perf_counter start, seconds) to the current span"""
+    parent = _active_span.get()
+    if parent is not None:
+        child = parent.trace.add(parent, name, attrs, started)
+        if child is not None:
+            child.duration = duration
+
+
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint_sql(query: str) -> str:
+    """Query shape with literals and IN lists collapsed, so repeated queries group together"""
+    shape = _SQL_LITERALS.sub("?", query)
+    shape = _SQL_IN_LISTS.sub("(...)", shape)
+    return _SQL_WHITESPACE.sub(" ", shape).strip()
+
+
+_pending_process_spans = set()
+
+
+async def _finish_on_exit(process, child: Span) -> None:
+    returncode = await process.wait()
+    child.finish()
+    child.attrs["returncode"] = returncode
+
+
+async def traced_subprocess_exec(*cmd, **kwargs):
+    """asyncio.create_subprocess_exec that records a span from spawn until the process exits"""
+    parent = _active_span.get()
+    if parent is None:
+        return await asyncio.create_subprocess_exec(*cmd, **kwargs)
+
+    child = parent.trace.add(parent, "subprocess", {"command": os.path.basename(str(cmd[0]))}, time.perf_counter())
+    try:
+        process = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+    except Exception as e:
+        if child is not None:
+            child.finish()
+            child.attrs["error"] = type(e).__name__
+        raise
+    if child is not None:
+        task = asyncio.get_running_loop().create_task(_finish_on_exit(process, child))
+        _pending_process_spans.add(task)
+        task.add_done_callback(_pending_process_spans.discard)
+    return process
+
+
+class ProfiledJSONResponse(JSONResponse):
+    """JSONResponse whose rendering shows up as a "serialize" span in profiled requests"""
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return super().render(content)
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and keeps the slowest traces.
+
+    A request is profiled when sampling is enabled and it falls in the
+    sampled percentage, or when it carries X-Profile-Request: 1 and the
+    header is allowed. The slowest `slowest` traces are kept in a min-heap
+    keyed by duration, so the buffer never grows past that.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        sample_percent: Optional[float] = None,
+        header_enabled: Optional[bool] = None,
+        slowest: Optional[int] = None,
+        max_spans: Optional[int] = None
+    ):
+        self.enabled = enabled if enabled is not None else settings.PROFILING_ENABLED
+        self.sample_percent = sample_percent if sample_percent is not None else settings.PROFILING_SAMPLE_PERCENT
+        self.header_enabled = header_enabled if header_enabled is not None else settings.PROFILING_HEADER_ENABLED
+        self.slowest = slowest if slowest is not None else settings.PROFILING_SLOWEST_TRACES
+        self.max_spans = max_spans if max_spans is not None else settings.PROFILING_MAX_SPANS
+        self._traces: List[Any] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._profiled = {"sampled": 0, "header": 0}
+
+    def configure(self, enabled: Optional[bool] = None, sample_percent: Optional[float] = None) -> None:
+        if sample_percent is not None:
+            if not 0 <= sample_percent <= 100:
+                raise ValueError("sample_percent must be between 0 and 100")
+            self.sample_percent = sample_percent
+        if enabled is not None:
+            self.enabled = enabled
+
+    def trigger_for(self, scope) -> Optional[str]:
+        """Why this request should be profiled ("header" or "sampled"), or None"""
+        if self.header_enabled:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and value in (b"1", b"true"):
+                    return "header"
+        if self.enabled and random.random() * 100 < self.sample_percent:
+            return "sampled"
+        return None
+
+    def start(self, scope, trigger: str) -> Trace:
+        return Trace(scope["method"], scope["path"], trigger, self.max_spans)
+
+    def finish(self, trace: Trace) -> None:
+        trace.root.finish()
+        trace.finished = True
+        entry = (trace.duration, next(self._sequence), trace)
+        with self._lock:
+            self._profiled[trace.trigger] += 1
+            if len(self._traces) < self.slowest:
+                heapq.heappush(self._traces, entry)
+            elif entry[0] > self._traces[0][0]:
+                heapq.heapreplace(self._traces, entry)
+
+    def get_traces(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Kept trace summaries, slowest first"""
+        with self._lock:
+            traces = [trace for _, _, trace in sorted(self._traces, reverse=True)]
+        return [trace.summary() for trace in traces[:limit]]
+
+    def get_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for _, _, trace in self._traces:
+                if trace.id == trace_id:
+                    return trace.to_dict()
+        return None
+
+    def clear(self) -> int:
+        with self._lock:
+            cleared = len(self._traces)
+            self._traces = []
+            return cleared
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_percent": self.sample_percent,
+                "header_enabled": self.header_enabled,
+                "kept_traces": len(self._traces),
+                "max_kept_traces": self.slowest,
+                "max_spans_per_trace": self.max_spans,
+                "profiled_sampled": self._profiled["sampled"],
+                "profiled_by_header": self._profiled["header"]
+            }
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs selected requests under a Trace.
+
+    Unprofiled requests pass straight through: with sampling and the header
+    both off that is one attribute check per request.
+    """
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler or request_profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if scope["type"] != "http" or not (profiler.enabled or profiler.header_enabled):
+            await self.app(scope, receive, send)
+            return
+        trigger = profiler.trigger_for(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace = profiler.start(scope, trigger)
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (TRACE_ID_HEADER, trace.id.encode())]}
+            await send(message)
+
+        token = _active_span.set(trace.root)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _active_span.reset(token)
+            trace.route = getattr(scope.get("route"), "path", None)
+            profiler.finish(trace)
+
+
+# Global profiler instance
+request_profiler = RequestProfiler()
+
+def get_request_profiler() -> RequestProfiler:
+    """Get the process-wide request profiler"""
+    return request_profiler
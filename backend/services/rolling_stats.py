@@ -0,0 +1,204 @@
+"""
+Rolling Stats - Fixed-memory, time-bucketed aggregates and latency histograms
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram.
+
+    Values are recorded in microseconds. Below 2^SUB_BUCKET_BITS they are
+    counted exactly; above, each power of two is split into
+    2^(SUB_BUCKET_BITS - 1) equal sub-buckets, so any reported quantile is
+    within 1/2^(SUB_BUCKET_BITS - 1) (about 1.6%) of the true value. Counts
+    are kept sparsely, and there are at most a few thousand possible
+    buckets, so memory is bounded whatever is recorded.
+    """
+
+    SUB_BUCKET_BITS = 7
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+
+    @classmethod
+    def _index(cls, value_us: int) -> int:
+        if value_us < (1 << cls.SUB_BUCKET_BITS):
+            return value_us
+        shift = value_us.bit_length() - cls.SUB_BUCKET_BITS
+        half = 1 << (cls.SUB_BUCKET_BITS - 1)
+        return (1 << cls.SUB_BUCKET_BITS) + (shift - 1) * half + ((value_us >> shift) - half)
+
+    @classmethod
+    def _bounds(cls, index: int) -> Tuple[int, int]:
+        """[lower, upper) microsecond range counted by a bucket"""
+        if index < (1 << cls.SUB_BUCKET_BITS):
+            return index, index + 1
+        half = 1 << (cls.SUB_BUCKET_BITS - 1)
+        offset = index - (1 << cls.SUB_BUCKET_BITS)
+        shift = offset // half + 1
+        lower = (half + offset % half) << shift
+        return lower, lower + (1 << shift)
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        index = self._index(max(0, int(seconds * 1_000_000)))
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0-1) in seconds, or None when empty"""
+        if not self.total:
+            return None
+        rank = max(1, int(q * self.total + 0.999999))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                lower, upper = self._bounds(index)
+                return (lower + upper - 1) / 2 / 1_000_000
+        return None
+
+    def percentiles(self) -> Dict[str, Optional[float]]:
+        return {"p50": self.quantile(0.50), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+    def buckets(self) -> List[Dict[str, float]]:
+        """Non-empty buckets as {"le": upper bound in seconds, "count": n}, ascending"""
+        return [
+            {"le": self._bounds(index)[1] / 1_000_000, "count": self.counts[index]}
+            for index in sorted(self.counts)
+        ]
+
+
+class AggregateStats:
+    """Counts, success counts, duration sum/min/max, error codes and a latency histogram"""
+
+    __slots__ = (
+        "count", "success_count", "duration_count", "duration_sum",
+        "duration_min", "duration_max", "errors", "histogram"
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.success_count = 0
+        self.duration_count = 0
+        self.duration_sum = 0.0
+        self.duration_min: Optional[float] = None
+        self.duration_max: Optional[float] = None
+        self.errors: Dict[str, int] = {}
+        self.histogram = LatencyHistogram()
+
+    def record(self, success: bool, duration_seconds: Optional[float] = None, error_code: Optional[str] = None) -> None:
+        self.count += 1
+        if success:
+            self.success_count += 1
+        elif error_code:
+            self.errors[error_code] = self.errors.get(error_code, 0) + 1
+        if duration_seconds:
+            self.duration_count += 1
+            self.duration_sum += duration_seconds
+            self.duration_min = duration_seconds if self.duration_min is None else min(self.duration_min, duration_seconds)
+            self.duration_max = duration_seconds if self.duration_max is None else max(self.duration_max, duration_seconds)
+            self.histogram.record(duration_seconds)
+
+    def merge(self, other: "AggregateStats") -> None:
+        self.count += other.count
+        self.success_count += other.success_count
+        self.duration_count += other.duration_count
+        self.duration_sum += other.duration_sum
+        for bound, pick in (("duration_min", min), ("duration_max", max)):
+            theirs = getattr(other, bound)
+            if theirs is not None:
+                mine = getattr(self, bound)
+                setattr(self, bound, theirs if mine is None else pick(mine, theirs))
+        for code, count in other.errors.items():
+            self.errors[code] = self.errors.get(code, 0) + count
+        self.histogram.merge(other.histogram)
+
+    @property
+    def average_duration(self) -> float:
+        return self.duration_sum / self.duration_count if self.duration_count else 0.0
+
+
+class RollingAggregates:
+    """
+    AggregateStats per key in fixed-width time buckets.
+
+    Recording touches only the newest bucket; buckets older than retention
+    are dropped as new ones open, so memory is bounded by
+    retention / bucket width. A window query merges the buckets it covers,
+    O(buckets) regardless of how many operations were recorded.
+    """
+
+    def __init__(self, bucket_seconds: int = 300, retention_seconds: int = 168 * 3600):
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+        self._buckets: Deque[Tuple[int, Dict[str, AggregateStats]]] = deque()
+        self._lock = threading.Lock()
+
+    def _bucket(self, now: float) -> Dict[str, AggregateStats]:
+        start = int(now // self.bucket_seconds) * self.bucket_seconds
+        if self._buckets and self._buckets[-1][0] >= start:
+            # Current bucket (or the clock stepped back; count it there)
+            return self._buckets[-1][1]
+        self._buckets.append((start, {}))
+        while self._buckets and self._buckets[0][0] <= start - self.retention_seconds:
+            self._buckets.popleft()
+        return self._buckets[-1][1]
+
+    def record(
+        self,
+        key: str,
+        success: bool,
+        duration_seconds: Optional[float] = None,
+        error_code: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> None:
+        with self._lock:
+            stats = self._bucket(time.time() if now is None else now)
+            aggregate = stats.get(key)
+            if aggregate is None:
+                aggregate = stats[key] = AggregateStats()
+            aggregate.record(success, duration_seconds, error_code)
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Dict[str, AggregateStats]:
+        """Merged AggregateStats per key over buckets that overlap the last `seconds`"""
+        now = time.time() if now is None else now
+        cutoff = now - seconds
+        merged: Dict[str, AggregateStats] = {}
+        with self._lock:
+            for start, stats in reversed(self._buckets):
+                if start + self.bucket_seconds <= cutoff:
+                    break
+                for key, aggregate in stats.items():
+                    total = merged.get(key)
+                    if total is None:
+                        total = merged[key] = AggregateStats()
+                    total.merge(aggregate)
+        return merged
+
+    def clear_before(self, cutoff: float) -> int:
+        """Drop buckets that ended before cutoff; returns how many"""
+        with self._lock:
+            dropped = 0
+            while self._buckets and self._buckets[0][0] + self.bucket_seconds <= cutoff:
+                self._buckets.popleft()
+                dropped += 1
+            return dropped
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "buckets": len(self._buckets),
+            "bucket_seconds": self.bucket_seconds,
+            "retention_seconds": self.retention_seconds
+        }
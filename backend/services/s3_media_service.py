@@ -1,10 +1,11 @@
 """
 S3 Media API Service - Simplified FastAPI endpoints for direct S3 media operations
 """
+import io
 import os
 import uuid
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 
 import boto3
@@ -12,8 +13,30 @@ from botocore.exceptions import ClientError, NoCredentialsError
 from botocore.config import Config
 from fastapi import HTTPException
 
+from config import settings
+from services.cloud_storage_service import S3MultipartUploader, instrument_s3_client
+from services.media_index_service import get_media_index_service
+from services.request_profiler import span
+
 logger = logging.getLogger(__name__)
 
+class _SizeLimitedStream:
+    """Passes reads through; fails on an empty body or once the total passes the video size limit"""
+    
+    def __init__(self, stream, service: "S3MediaService", content_type: str):
+        self.stream = stream
+        self.service = service
+        self.content_type = content_type
+        self.size = 0
+    
+    async def read(self, size: int) -> bytes:
+        block = await self.stream.read(size)
+        if not block and self.size == 0:
+            raise HTTPException(status_code=400, detail="Request body is empty")
+        self.size += len(block)
+        self.service.validate_video_file(self.content_type, self.size)
+        return block
+
 class S3MediaService:
     """Direct S3 media service for upload, streaming, and deletion"""
     
@@ -23,6 +46,7 @@ class S3MediaService:
         self.aws_secret_access_key = os.getenv('AWS_SECRET_ACCESS_KEY')
         self.aws_region = os.getenv('AWS_S3_REGION', 'us-east-1')
         self.bucket_name = os.getenv('AWS_S3_BUCKET_NAME')
+        self.media_index = get_media_index_service()
         
         if not all([self.aws_access_key_id, self.aws_secret_access_key, self.bucket_name]):
             raise ValueError(
@@ -32,7 +56,7 @@ class S3MediaService:
         
         # Configure S3 client with proper authentication
         try:
-            self.s3_client = boto3.client(
+            self.s3_client = instrument_s3_client(boto3.client(
                 's3',
                 aws_access_key_id=self.aws_access_key_id,
                 aws_secret_access_key=self.aws_secret_access_key,
@@ -41,7 +65,9 @@ class S3MediaService:
                     retries={'max_attempts': 3, 'mode': 'adaptive'},
                     max_pool_connections=50
                 )
-            )
+            ))
+            
+            self.transfer = S3MultipartUploader(self.s3_client, self.bucket_name)
             
             # Test credentials by listing bucket
             self.s3_client.head_bucket(Bucket=self.bucket_name)
@@ -75,6 +101,45 @@ class S3MediaService:
                 detail=f"File size {file_size} bytes exceeds maximum {max_size} bytes"
             )
     
+    def _new_media_key(self):
+        """Generate a unique media ID and its S3 key"""
+        media_id = str(uuid.uuid4())
+        timestamp = datetime.utcnow().strftime('%Y%m%d')
+        return media_id, f"media/videos/{timestamp}/{media_id}"
+    
+    def _build_s3_metadata(self, media_id: str, content_type: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """S3 object metadata for an uploaded video (S3 metadata must be strings)"""
+        s3_metadata = {
+            'media_id': media_id,
+            'upload_timestamp': datetime.utcnow().isoformat(),
+            'content_type': content_type
+        }
+        
+        # Add custom metadata if provided (for merged videos)
+        if metadata:
+            import json
+            if metadata.get('is_merged_video'):
+                s3_metadata['is_merged_video'] = 'true'
+                s3_metadata['segment_count'] = str(metadata.get('segment_count', 0))
+                if metadata.get('segments'):
+                    s3_metadata['segments_data'] = json.dumps(metadata['segments'])
+                s3_metadata['total_duration_ms'] = str(metadata.get('total_duration_ms', 0))
+            
+            logger.info(f"Adding merged video metadata to S3: {s3_metadata}")
+        return s3_metadata
+    
+    def _index_upload(self, media_id: str, s3_key: str, file_size: int, content_type: str) -> None:
+        """Index the key so lookups never have to scan the bucket"""
+        try:
+            self.media_index.record_media(
+                media_id=media_id,
+                storage_key=s3_key,
+                file_size=file_size,
+                content_type=content_type
+            )
+        except Exception as e:
+            logger.error(f"Failed to index media_id {media_id} -> {s3_key}: {e}")
+    
     async def upload_video_to_s3(self, file_content: bytes, content_type: str, metadata: Optional[Dict[str, Any]] = None) -> str:
         """
         Upload video file directly to S3 and return media ID
@@ -86,79 +151,108 @@ class S3MediaService:
         Returns:
             str: Unique media ID for the uploaded file
         """
+        # Validate file
+        self.validate_video_file(content_type, len(file_content))
+        media_id, _ = await self._upload_video(io.BytesIO(file_content), content_type, metadata)
+        return media_id
+    
+    async def upload_video_stream_to_s3(
+        self,
+        stream,
+        content_type: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, int]:
+        """
+        Upload a video read from stream (anything with an async read(size)) to S3
+        
+        The stream goes through the multipart transfer engine part by part, so
+        memory stays bounded however large the video. A video over the size
+        limit aborts the upload as soon as it overruns.
+        
+        Returns:
+            Tuple of (media ID, size in bytes)
+        """
+        self.validate_video_file(content_type, 0)
+        return await self._upload_video(_SizeLimitedStream(stream, self, content_type), content_type, metadata)
+    
+    async def _upload_video(self, source, content_type: str, metadata: Optional[Dict[str, Any]]) -> Tuple[str, int]:
+        """Upload through the transfer engine under a new media ID, then index it"""
+        media_id, s3_key = self._new_media_key()
+        extra_args = {
+            'ContentType': content_type,
+            'Metadata': self._build_s3_metadata(media_id, content_type, metadata),
+            # Set cache control for efficient streaming
+            'CacheControl': 'public, max-age=31536000'  # 1 year
+        }
         try:
-            # Validate file
-            self.validate_video_file(content_type, len(file_content))
-            
-            # Generate unique media ID and S3 key
-            media_id = str(uuid.uuid4())
-            timestamp = datetime.utcnow().strftime('%Y%m%d')
-            s3_key = f"media/videos/{timestamp}/{media_id}"
-            
-            # Prepare S3 metadata
-            s3_metadata = {
-                'media_id': media_id,
-                'upload_timestamp': datetime.utcnow().isoformat(),
-                'content_type': content_type
-            }
-            
-            # Add custom metadata if provided (for merged videos)
-            if metadata:
-                # Convert metadata to string format for S3 (S3 metadata must be strings)
-                import json
-                if metadata.get('is_merged_video'):
-                    s3_metadata['is_merged_video'] = 'true'
-                    s3_metadata['segment_count'] = str(metadata.get('segment_count', 0))
-                    if metadata.get('segments'):
-                        s3_metadata['segments_data'] = json.dumps(metadata['segments'])
-                    s3_metadata['total_duration_ms'] = str(metadata.get('total_duration_ms', 0))
-                
-                logger.info(f"Adding merged video metadata to S3: {s3_metadata}")
-            
-            # Upload to S3 with metadata
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_content,
-                ContentType=content_type,
-                Metadata=s3_metadata,
-                # Set cache control for efficient streaming
-                CacheControl='public, max-age=31536000'  # 1 year
-            )
-            
-            logger.info(f"Successfully uploaded video to S3: {s3_key}")
-            return media_id
-            
+            size = await self.transfer.upload(source, s3_key, extra_args)
         except ClientError as e:
             logger.error(f"S3 upload failed: {e}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to upload video to S3: {e.response['Error']['Message']}"
             )
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Upload error: {e}")
             raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+        
+        logger.info(f"Successfully uploaded video to S3: {s3_key} ({size} bytes)")
+        self._index_upload(media_id, s3_key, size, content_type)
+        return media_id, size
     
     def get_s3_key_from_media_id(self, media_id: str) -> Optional[str]:
-        """Find S3 key for given media ID by searching bucket"""
+        """Resolve S3 key for given media ID from the media index"""
+        recently_missing = self.media_index.is_known_missing(media_id)
+        try:
+            s3_key = self.media_index.get_storage_key(media_id)
+        except Exception as e:
+            logger.error(f"Media index lookup failed for media_id {media_id}: {e}")
+            s3_key = None
+        
+        if s3_key or recently_missing:
+            return s3_key
+        
+        if settings.MEDIA_INDEX_SCAN_ON_MISS:
+            s3_key = self._find_unindexed_s3_key(media_id)
+        if s3_key is None:
+            self.media_index.remember_missing(media_id)
+        return s3_key
+    
+    def _find_unindexed_s3_key(self, media_id: str) -> Optional[str]:
+        """
+        Find an object uploaded before the media index existed and index it.
+        
+        upload_video_to_s3 names objects media/videos/{date}/{media_id}, so the key is
+        matched from the listing alone; only the match is HEADed.
+        """
+        suffix = f"/{media_id}"
         try:
-            # Search for object with this media_id in metadata
             paginator = self.s3_client.get_paginator('list_objects_v2')
             pages = paginator.paginate(Bucket=self.bucket_name, Prefix='media/videos/')
             
             for page in pages:
-                if 'Contents' in page:
-                    for obj in page['Contents']:
-                        # Check object metadata
-                        try:
-                            response = self.s3_client.head_object(
-                                Bucket=self.bucket_name,
-                                Key=obj['Key']
-                            )
-                            if response.get('Metadata', {}).get('media_id') == media_id:
-                                return obj['Key']
-                        except ClientError:
-                            continue
+                for obj in page.get('Contents', []):
+                    if not obj['Key'].endswith(suffix):
+                        continue
+                    
+                    response = self.s3_client.head_object(Bucket=self.bucket_name, Key=obj['Key'])
+                    if response.get('Metadata', {}).get('media_id') != media_id:
+                        continue
+                    
+                    logger.warning(f"media_id {media_id} was not indexed; run the media index backfill")
+                    try:
+                        self.media_index.record_media(
+                            media_id=media_id,
+                            storage_key=obj['Key'],
+                            file_size=obj.get('Size'),
+                            content_type=response.get('ContentType'),
+                            uploaded_at=obj.get('LastModified')
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to index media_id {media_id} -> {obj['Key']}: {e}")
+                    return obj['Key']
             
             return None
             
@@ -166,6 +260,10 @@ class S3MediaService:
             logger.error(f"Error searching for media_id {media_id}: {e}")
             return None
     
+    def backfill_media_index(self, prefix: str = 'media/') -> Dict[str, int]:
+        """Index every object under prefix that carries media_id metadata"""
+        return self.media_index.backfill_from_bucket(self.s3_client, self.bucket_name, prefix=prefix)
+    
     async def generate_signed_url(self, media_id_or_key: str, expires_in: int = 3600) -> str:
         """
         Generate signed URL for secure video streaming.
@@ -193,11 +291,12 @@ class S3MediaService:
                     raise HTTPException(status_code=404, detail="Media not found")
 
             # Generate pre-signed URL
-            signed_url = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': self.bucket_name, 'Key': s3_key},
-                ExpiresIn=expires_in
-            )
+            with span("signed_url.sign", keys=1):
+                signed_url = self.s3_client.generate_presigned_url(
+                    'get_object',
+                    Params={'Bucket': self.bucket_name, 'Key': s3_key},
+                    ExpiresIn=expires_in
+                )
 
             logger.info(f"Generated signed URL for key/media: {media_id_or_key} -> {s3_key}")
             return signed_url
@@ -240,6 +339,11 @@ class S3MediaService:
             )
             
             logger.info(f"Successfully deleted video from S3: {s3_key}")
+            
+            try:
+                self.media_index.remove_media(media_id)
+            except Exception as e:
+                logger.error(f"Failed to remove media_id {media_id} from media index: {e}")
             return True
             
         except ClientError as e:
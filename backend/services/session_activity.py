@@ -0,0 +1,138 @@
+"""
+Session Activity Writer - Batches user_sessions.last_accessed updates
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionActivityWriter:
+    """
+    Collects session touches in memory and writes them in batches.
+
+    Only the latest timestamp per token hash is kept, so every session touched
+    during an interval costs one row in one UPDATE no matter how many requests
+    it made. A daemon thread flushes every flush_interval seconds once the
+    first touch arrives; close() stops it and writes whatever is pending.
+    last_accessed therefore lags real activity by up to one interval.
+    """
+
+    def __init__(self, db_service=None, flush_interval: Optional[float] = None, clock=time.monotonic):
+        self._db_service = db_service
+        self.flush_interval = flush_interval if flush_interval is not None else settings.SESSION_ACTIVITY_FLUSH_SECONDS
+        self._clock = clock
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._touches = 0
+        self._flushes = 0
+        self._rows_written = 0
+        self._batched = 0
+        self._errors = 0
+        self._last_batch_size = 0
+        self._max_batch_size = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def db(self):
+        if self._db_service is None:
+            from services.database_service import get_db_service
+            self._db_service = get_db_service()
+        return self._db_service
+
+    def touch(self, token_hash: str, accessed_at: Optional[datetime] = None) -> None:
+        """Record that a session was used; written on the next flush"""
+        accessed_at = accessed_at or datetime.utcnow()
+        with self._lock:
+            previous = self._pending.get(token_hash)
+            if previous is None or accessed_at > previous:
+                self._pending[token_hash] = accessed_at
+            self._touches += 1
+            if self._thread is None and self.flush_interval > 0 and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name="session-activity-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all pending touches as one batch; returns the number of sessions updated"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            start = self._clock()
+            try:
+                updated = self.db.touch_sessions(batch)
+            except Exception as e:
+                # Put the batch back unless newer touches arrived meanwhile
+                with self._lock:
+                    for token_hash, accessed_at in batch.items():
+                        current = self._pending.get(token_hash)
+                        if current is None or accessed_at > current:
+                            self._pending[token_hash] = accessed_at
+                    self._errors += 1
+                logger.error(f"Failed to flush {len(batch)} session touches: {e}")
+                return 0
+            elapsed_ms = (self._clock() - start) * 1000
+
+            with self._lock:
+                self._flushes += 1
+                self._rows_written += updated
+                self._batched += len(batch)
+                self._last_batch_size = len(batch)
+                self._max_batch_size = max(self._max_batch_size, len(batch))
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+            logger.debug(f"Flushed {len(batch)} session touches in {elapsed_ms:.1f} ms")
+            return updated
+
+    def close(self) -> None:
+        """Stop the flush thread and write pending touches (call on shutdown)"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "touches": self._touches,
+                "flushes": self._flushes,
+                "rows_written": self._rows_written,
+                "errors": self._errors,
+                "flush_interval_seconds": self.flush_interval,
+                "last_batch_size": self._last_batch_size,
+                "max_batch_size": self._max_batch_size,
+                "avg_batch_size": self._batched / self._flushes if self._flushes else 0.0,
+                "last_flush_ms": self._last_flush_ms,
+                "max_flush_ms": self._max_flush_ms,
+                "avg_flush_ms": self._total_flush_ms / self._flushes if self._flushes else 0.0
+            }
+
+
+# Global writer shared by every AuthService in the process
+session_activity_writer = None
+
+def get_session_activity_writer() -> SessionActivityWriter:
+    """Get the process-wide session activity writer"""
+    global session_activity_writer
+    if session_activity_writer is None:
+        session_activity_writer = SessionActivityWriter()
+    return session_activity_writer
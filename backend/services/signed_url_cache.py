@@ -0,0 +1,166 @@
+"""
+Signed URL Cache - Reuses presigned storage URLs while they still have enough validity left
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from config import settings
+from services.request_profiler import span
+
+logger = logging.getLogger(__name__)
+
+
+class SignedUrlCache:
+    """
+    Caches presigned URLs keyed by (storage key, expiry bucket).
+
+    Time is split into buckets of (expires_in - min_remaining) seconds. Every URL
+    signed during a bucket expires min_remaining seconds after the bucket ends, so
+    a cached URL always has between min_remaining and expires_in seconds of
+    validity left when it is handed out, and one signature per key per bucket is
+    enough for every request in that bucket.
+    """
+
+    def __init__(
+        self,
+        expires_in: Optional[int] = None,
+        min_remaining: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        clock=time.time
+    ):
+        self.expires_in = expires_in if expires_in is not None else settings.SIGNED_URL_EXPIRY
+        self.min_remaining = min_remaining if min_remaining is not None else settings.SIGNED_URL_MIN_REMAINING_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.SIGNED_URL_CACHE_SIZE
+        if self.min_remaining >= self.expires_in:
+            raise ValueError("min_remaining must be shorter than expires_in")
+        self.bucket_seconds = self.expires_in - self.min_remaining
+        self._clock = clock
+        self._urls: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pruned_bucket = -1
+        self._hits = 0
+        self._misses = 0
+        self._batches = 0
+
+    def _current_bucket(self) -> Tuple[int, int]:
+        """Current bucket index and the expiry (epoch seconds) of URLs signed in it"""
+        bucket = math.floor(self._clock() / self.bucket_seconds)
+        return bucket, (bucket + 1) * self.bucket_seconds + self.min_remaining
+
+    def _lookup(self, keys: Iterable[str], bucket: int) -> Tuple[Dict[str, str], list]:
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                url = self._urls.get((key, bucket))
+                if url is None:
+                    missing.append(key)
+                else:
+                    self._urls.move_to_end((key, bucket))
+                    found[key] = url
+            self._hits += len(found)
+            self._misses += len(missing)
+        return found, missing
+
+    def _store(self, signed: Dict[str, str], bucket: int) -> None:
+        with self._lock:
+            for key, url in signed.items():
+                self._urls[(key, bucket)] = url
+            # Drop URLs from earlier buckets once per bucket, then the least recently used
+            if bucket > self._pruned_bucket:
+                stale = [entry for entry in self._urls if entry[1] < bucket]
+                for entry in stale:
+                    del self._urls[entry]
+                self._pruned_bucket = bucket
+            while len(self._urls) > self.max_entries:
+                self._urls.popitem(last=False)
+
+    async def get_urls(self, storage, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Get signed URLs for keys, signing every cache miss in a single batch.
+
+        Args:
+            storage: CloudStorageService used to sign misses
+            keys: Storage keys to sign
+
+        Returns:
+            Mapping of key -> signed URL for every key that could be signed
+        """
+        unique_keys = list(dict.fromkeys(key for key in keys if key))
+        bucket, expires_at = self._current_bucket()
+        found, missing = self._lookup(unique_keys, bucket)
+        if not missing:
+            return found
+
+        expires_in = max(1, int(expires_at - self._clock()))
+        with span("signed_url.sign", keys=len(missing), cached=len(found)):
+            signed = await self._sign_batch(storage, missing, expires_in)
+        self._store(signed, bucket)
+        found.update(signed)
+        return found
+
+    async def get_url(self, storage, key: str) -> Optional[str]:
+        return (await self.get_urls(storage, [key])).get(key)
+
+    async def _sign_batch(self, storage, keys: list, expires_in: int) -> Dict[str, str]:
+        with self._lock:
+            self._batches += 1
+
+        if hasattr(storage, "generate_presigned_url"):
+            # Presigning is local HMAC work: one executor hop for the whole batch
+            # beats one hop per URL
+            def sign_all() -> Dict[str, str]:
+                signed = {}
+                for key in keys:
+                    try:
+                        signed[key] = storage.generate_presigned_url(key, expiration=expires_in)
+                    except Exception as e:
+                        logger.error(f"Failed to sign storage key {key}: {e}")
+                return signed
+
+            return await asyncio.get_running_loop().run_in_executor(None, sign_all)
+
+        results = await asyncio.gather(
+            *(storage.get_file_url(key, expires_in=expires_in) for key in keys),
+            return_exceptions=True
+        )
+        signed = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to sign storage key {key}: {result}")
+            else:
+                signed[key] = result
+        return signed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._urls.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._urls),
+                "max_entries": self.max_entries,
+                "expires_in_seconds": self.expires_in,
+                "min_remaining_seconds": self.min_remaining,
+                "hits": self._hits,
+                "misses": self._misses,
+                "sign_batches": self._batches,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+
+# Global cache instance
+signed_url_cache = None
+
+def get_signed_url_cache() -> SignedUrlCache:
+    """Get the process-wide signed URL cache"""
+    global signed_url_cache
+    if signed_url_cache is None:
+        signed_url_cache = SignedUrlCache()
+    return signed_url_cache
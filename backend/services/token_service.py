@@ -1,5 +1,8 @@
 """
-Token Service - Secure backend token management (Fixed for synchronous database)
+Token Service - Secure backend token management
+
+Database work runs on the bounded database executor so token endpoints do not
+block the event loop.
 """
 import logging
 import uuid
@@ -7,6 +10,7 @@ import json
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from .database_service import DatabaseService
+from .db_executor import run_db_call
 
 # Import token models (adjust path based on your project structure)
 import sys
@@ -26,7 +30,7 @@ class TokenService:
     def __init__(self, db_service: DatabaseService):
         self.db = db_service
     
-    def get_user_balance(self, user_id: str) -> TokenBalanceResponse:
+    async def get_user_balance(self, user_id: str) -> TokenBalanceResponse:
         """
         Get current token balance for a user
         
@@ -40,7 +44,7 @@ class TokenService:
             Exception: For database or service errors
         """
         try:
-            result = self.db._execute_select(
+            result = await self.db._execute_select_async(
                 "SELECT balance, last_updated FROM token_balances WHERE user_id = ?",
                 (user_id,),
                 fetch_one=True
@@ -55,7 +59,7 @@ class TokenService:
             else:
                 # Initialize user with 0 balance if not exists
                 logger.info(f"Initializing new user balance for user {user_id}")
-                self._initialize_user_balance(user_id)
+                await self._initialize_user_balance(user_id)
                 from datetime import datetime
                 return TokenBalanceResponse(
                     balance=0,
@@ -66,7 +70,7 @@ class TokenService:
             logger.error(f"Failed to get balance for user {user_id}: {e}")
             raise
     
-    def spend_tokens(self, user_id: str, spend_request: TokenSpendRequest) -> TokenSpendResponse:
+    async def spend_tokens(self, user_id: str, spend_request: TokenSpendRequest) -> TokenSpendResponse:
         """
         Spend tokens with validation and transaction logging
         
@@ -82,7 +86,7 @@ class TokenService:
         """
         try:
             # Get current balance
-            balance_response = self.get_user_balance(user_id)
+            balance_response = await self.get_user_balance(user_id)
             current_balance = balance_response.balance
             
             # Validate sufficient balance
@@ -100,7 +104,8 @@ class TokenService:
             transaction_id = str(uuid.uuid4())
             
             # Execute transaction
-            self._execute_token_transaction(
+            await run_db_call(
+                self._execute_token_transaction,
                 user_id=user_id,
                 transaction_id=transaction_id,
                 transaction_type=TokenTransactionType.SPEND,
@@ -124,7 +129,7 @@ class TokenService:
             logger.error(f"Failed to spend tokens for user {user_id}: {e}")
             raise
 
-    def add_tokens_for_purchase(
+    async def add_tokens_for_purchase(
         self,
         user_id: str,
         product_id: str,
@@ -147,7 +152,7 @@ class TokenService:
         """
         try:
             # Get current balance
-            balance_response = self.get_user_balance(user_id)
+            balance_response = await self.get_user_balance(user_id)
             current_balance = balance_response.balance
             new_balance = current_balance + tokens_to_add
             
@@ -155,7 +160,8 @@ class TokenService:
             internal_transaction_id = str(uuid.uuid4())
             
             # Execute the transaction
-            self._execute_token_transaction(
+            await run_db_call(
+                self._execute_token_transaction,
                 user_id=user_id,
                 transaction_id=internal_transaction_id,
                 transaction_type=TokenTransactionType.PURCHASE,
@@ -179,7 +185,7 @@ class TokenService:
             logger.error(f"Failed to add tokens from purchase for user {user_id}: {e}")
             return False
 
-    def add_tokens_for_testing(self, user_id: str, amount: int, description: str = "Test token addition") -> bool:
+    async def add_tokens_for_testing(self, user_id: str, amount: int, description: str = "Test token addition") -> bool:
         """
         Add tokens for testing purposes
         
@@ -193,14 +199,15 @@ class TokenService:
         """
         try:
             # Get current balance
-            balance_response = self.get_user_balance(user_id)
+            balance_response = await self.get_user_balance(user_id)
             current_balance = balance_response.balance
             new_balance = current_balance + amount
             
             transaction_id = str(uuid.uuid4())
             
             # Execute transaction
-            self._execute_token_transaction(
+            await run_db_call(
+                self._execute_token_transaction,
                 user_id=user_id,
                 transaction_id=transaction_id,
                 transaction_type=TokenTransactionType.PURCHASE,
@@ -218,10 +225,10 @@ class TokenService:
             logger.error(f"Failed to add tokens for testing to user {user_id}: {e}")
             return False
 
-    def get_transaction_history(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    async def get_transaction_history(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get transaction history for a user"""
         try:
-            results = self.db._execute_select("""
+            results = await self.db._execute_select_async("""
                 SELECT transaction_id, transaction_type, amount, balance_before, 
                        balance_after, description, metadata, created_at
                 FROM token_transactions 
@@ -236,13 +243,12 @@ class TokenService:
             logger.error(f"Failed to get transaction history for user {user_id}: {e}")
             raise
 
-    def _initialize_user_balance(self, user_id: str) -> None:
+    async def _initialize_user_balance(self, user_id: str) -> None:
         """Initialize a new user with 0 token balance"""
         try:
-            # Use unified UPSERT to handle both PostgreSQL and SQLite
-            # Skip update on conflict - just insert if not exists
+            # Just insert if not exists - a concurrent request may have won the race
             try:
-                self.db._execute_insert(
+                await self.db._execute_query_async(
                     "INSERT INTO token_balances (user_id, balance) VALUES (?, ?)",
                     (user_id, 0)
                 )
@@ -273,6 +279,9 @@ class TokenService:
         
         Ensures atomicity by using database transactions and prevents token loss/duplication.
         Validates balance consistency before applying changes.
+        
+        Blocking: the transaction is bound to the calling thread, so async
+        callers run the whole method on the database executor via run_db_call.
         """
         operation = "execute_token_transaction"
         
@@ -2,18 +2,22 @@
 Chunked upload service implementation with robust error handling
 """
 import os
-import json
 import hashlib
-import aiofiles
+import shutil
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 from datetime import datetime, timedelta
 import uuid
 import asyncio
+import functools
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from enum import Enum
 
 from models import UploadSession, UploadStatus, ChunkInfo
+from services.upload_session_journal import UploadSessionJournal
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -40,46 +44,93 @@ class UploadServiceError(Exception):
         self.retryable = retryable
         self.details = kwargs
 
+class RequestBodyStream:
+    """
+    async read(size) over a raw request body (Starlette's request.stream()),
+    for upload_chunk_stream. Returns blocks of exactly size bytes until the
+    body runs out.
+    """
+    
+    def __init__(self, pieces):
+        self._pieces = pieces.__aiter__()
+        self._buffer = bytearray()
+        self._done = False
+    
+    async def read(self, size: int) -> bytes:
+        while len(self._buffer) < size and not self._done:
+            try:
+                self._buffer += await self._pieces.__anext__()
+            except StopAsyncIteration:
+                self._done = True
+        block = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return block
+
+class _StreamingFileHash:
+    """SHA-256 of an upload, advanced over the prefix of chunks received so far"""
+    
+    def __init__(self):
+        self.hasher = hashlib.sha256()
+        self.next_chunk = 0
+        self.lock = threading.Lock()
+
 class ChunkedUploadService:
-    """Service for handling chunked file uploads with resumable support"""
+    """
+    Service for handling chunked file uploads with resumable support
+    
+    Chunks are written in place into one preallocated partial file, and the
+    file's SHA-256 is advanced as chunks arrive in order, so completing an
+    upload is a rename plus a digest comparison rather than an assembly pass
+    and a second read of the whole file. Session changes are appended to an
+    UploadSessionJournal instead of rewriting every session each time.
+    """
+    
+    HASH_READ_SIZE = 1024 * 1024
+    STREAM_BLOCK_SIZE = 256 * 1024
     
     def __init__(self):
         self.sessions: Dict[str, UploadSession] = {}
-        self.session_file = settings.TEMP_DIR / "upload_sessions.json"
+        self.journal = UploadSessionJournal(
+            settings.TEMP_DIR / "upload_sessions.journal",
+            legacy_snapshot=settings.TEMP_DIR / "upload_sessions.json"
+        )
+        self._journal_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-journal")
+        self._file_hashes: Dict[str, _StreamingFileHash] = {}
+        self._chunk_locks: Dict[Tuple[str, int], list] = {}  # (session_id, chunk_number) -> [lock, waiters]
         self._load_sessions()
     
     def _load_sessions(self):
         """Load existing sessions from disk"""
         try:
-            if self.session_file.exists():
-                with open(self.session_file, 'r') as f:
-                    data = json.load(f)
-                    for session_data in data.values():
-                        session = UploadSession(**session_data)
-                        self.sessions[session.session_id] = session
+            for session_data in self.journal.load().values():
+                session = UploadSession(**session_data)
+                self.sessions[session.session_id] = session
         except Exception as e:
             print(f"Error loading sessions: {e}")
             self.sessions = {}
     
-    async def _save_sessions(self):
-        """Save sessions to disk"""
+    async def _journal(self, write, *args, **kwargs):
+        """
+        Append to the session journal off the event loop, compacting it in the
+        background when it has grown. Appends go through one writer thread so
+        records land in the order they were made.
+        """
         try:
-            data = {
-                session_id: session.dict() 
-                for session_id, session in self.sessions.items()
-            }
-            async with aiofiles.open(self.session_file, 'w') as f:
-                await f.write(json.dumps(data, default=str, indent=2))
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._journal_writer, functools.partial(write, *args, **kwargs))
+            if self.journal.needs_compaction():
+                await asyncio.to_thread(self.journal.compact)
         except Exception as e:
             print(f"Error saving sessions: {e}")
     
-    def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate SHA-256 hash of a file"""
-        hash_sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+    async def save_session(self, session: UploadSession, is_new: bool = False):
+        """Persist a session after its status or metadata changed"""
+        await self._journal(self.journal.record_session, session.dict(), is_new=is_new)
+    
+    async def remove_session(self, session_id: str):
+        """Forget a session"""
+        if self.sessions.pop(session_id, None) is not None:
+            await self._journal(self.journal.record_delete, session_id)
     
     def _calculate_chunk_hash(self, chunk_data: bytes) -> str:
         """Calculate SHA-256 hash of chunk data"""
@@ -91,10 +142,113 @@ class ChunkedUploadService:
         session_dir.mkdir(exist_ok=True)
         return session_dir
     
-    def _get_chunk_path(self, session_id: str, chunk_number: int) -> Path:
-        """Get path for a specific chunk file"""
+    def _get_partial_path(self, session_id: str) -> Path:
+        """Get path of the partial file chunks are written into"""
         session_dir = self._get_session_dir(session_id)
-        return session_dir / f"chunk_{chunk_number:06d}"
+        return session_dir / "upload.part"
+    
+    def _open_partial_file(self, session: UploadSession) -> int:
+        """
+        Open the partial file for writing
+        
+        The file is preallocated to the full upload size on first use so
+        chunks never extend it.
+        """
+        fd = os.open(self._get_partial_path(session.session_id), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < session.file_size:
+                try:
+                    os.posix_fallocate(fd, 0, session.file_size)
+                except (AttributeError, OSError):
+                    # Not supported on this platform or filesystem; a sparse file works too
+                    os.ftruncate(fd, session.file_size)
+        except OSError:
+            os.close(fd)
+            raise
+        return fd
+    
+    @staticmethod
+    def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+    
+    def _write_chunk(self, session: UploadSession, chunk_number: int, chunk_data: bytes) -> None:
+        """Write a chunk at its offset in the partial file and advance the file hash (worker thread)"""
+        fd = self._open_partial_file(session)
+        try:
+            self._pwrite_all(fd, chunk_data, chunk_number * session.chunk_size)
+            
+            state = self._file_hashes.setdefault(session.session_id, _StreamingFileHash())
+            with state.lock:
+                if chunk_number == state.next_chunk:
+                    state.hasher.update(chunk_data)
+                    state.next_chunk += 1
+                    # Chunks that arrived early are now part of the hashed prefix
+                    self._hash_received_chunks(fd, session, state, set(session.uploaded_chunks))
+        finally:
+            os.close(fd)
+    
+    def _write_block(self, fd: int, block: bytes, offset: int, hashers: List) -> None:
+        """Hash one streamed block and write it at its offset (worker thread)"""
+        for hasher in hashers:
+            hasher.update(block)
+        self._pwrite_all(fd, block, offset)
+    
+    def _commit_streamed_file_hash(self, session: UploadSession, chunk_number: int, file_hasher) -> None:
+        """
+        Adopt the file hash advanced while a chunk streamed in (worker thread)
+        
+        file_hasher started from the file hash as it stood when the chunk was
+        next in line; it only applies if no other upload of the same chunk got
+        there first.
+        """
+        state = self._file_hashes.setdefault(session.session_id, _StreamingFileHash())
+        with state.lock:
+            if file_hasher is None or state.next_chunk != chunk_number:
+                return
+            state.hasher = file_hasher
+            state.next_chunk += 1
+            received = set(session.uploaded_chunks)
+            if state.next_chunk in received:
+                fd = os.open(self._get_partial_path(session.session_id), os.O_RDONLY)
+                try:
+                    self._hash_received_chunks(fd, session, state, received)
+                finally:
+                    os.close(fd)
+    
+    def _hash_received_chunks(self, fd: int, session: UploadSession, state: _StreamingFileHash, received: set) -> None:
+        """Advance the hash over consecutive received chunks, reading them back from the partial file"""
+        while state.next_chunk < session.total_chunks and state.next_chunk in received:
+            offset = state.next_chunk * session.chunk_size
+            end = min(offset + session.chunk_size, session.file_size)
+            while offset < end:
+                data = os.pread(fd, min(self.HASH_READ_SIZE, end - offset), offset)
+                if not data:
+                    break
+                state.hasher.update(data)
+                offset += len(data)
+            state.next_chunk += 1
+    
+    def _finish_file_hash(self, session: UploadSession) -> str:
+        """
+        SHA-256 of the complete partial file
+        
+        Normally every chunk is already hashed; after a restart (or if chunks
+        arrived out of order) only the remainder is read back. Runs in a worker
+        thread.
+        """
+        state = self._file_hashes.setdefault(session.session_id, _StreamingFileHash())
+        with state.lock:
+            if state.next_chunk < session.total_chunks:
+                fd = os.open(self._get_partial_path(session.session_id), os.O_RDONLY)
+                try:
+                    self._hash_received_chunks(fd, session, state, set(range(session.total_chunks)))
+                finally:
+                    os.close(fd)
+            return state.hasher.copy().hexdigest()
     
     def _get_final_path(self, session_id: str, filename: str) -> Path:
         """Get path for the final assembled file"""
@@ -173,7 +327,7 @@ class ChunkedUploadService:
             
             # Store session
             self.sessions[session_id] = session
-            await self._save_sessions()
+            await self.save_session(session, is_new=True)
             
             logger.info(f"Upload session {session_id} initiated for user {user_id}, file {filename}")
             return session
@@ -188,6 +342,75 @@ class ChunkedUploadService:
                 retryable=True
             )
     
+    async def _get_writable_session(self, session_id: str, chunk_number: int) -> UploadSession:
+        """Session a chunk may be written to; raises UploadServiceError otherwise"""
+        session = self.sessions.get(session_id)
+        if not session:
+            raise UploadServiceError(
+                f"Upload session {session_id} not found",
+                UploadErrorType.SESSION_NOT_FOUND
+            )
+        
+        # Check if session expired
+        if hasattr(settings, 'UPLOAD_SESSION_TIMEOUT'):
+            cutoff_time = datetime.utcnow() - timedelta(seconds=settings.UPLOAD_SESSION_TIMEOUT)
+            if session.updated_at < cutoff_time:
+                session.status = UploadStatus.CANCELLED
+                await self.save_session(session)
+                raise UploadServiceError(
+                    f"Upload session {session_id} has expired",
+                    UploadErrorType.SESSION_EXPIRED
+                )
+        
+        if session.status not in [UploadStatus.PENDING, UploadStatus.IN_PROGRESS]:
+            raise UploadServiceError(
+                f"Upload session {session_id} is not active (status: {session.status})",
+                UploadErrorType.SESSION_EXPIRED
+            )
+        
+        # Validate chunk number
+        if chunk_number < 0 or chunk_number >= session.total_chunks:
+            raise UploadServiceError(
+                f"Invalid chunk number {chunk_number}. Expected 0-{session.total_chunks-1}",
+                UploadErrorType.VALIDATION_ERROR
+            )
+        
+        return session
+    
+    def _expected_chunk_size(self, session: UploadSession, chunk_number: int) -> int:
+        """Chunk size for chunk_number (last chunk can be smaller)"""
+        expected_size = session.chunk_size
+        if chunk_number == session.total_chunks - 1:
+            remaining_bytes = session.file_size - (chunk_number * session.chunk_size)
+            expected_size = min(expected_size, remaining_bytes)
+        return expected_size
+    
+    @asynccontextmanager
+    async def _chunk_lock(self, session_id: str, chunk_number: int):
+        """Serialize uploads of one chunk so its check, write and commit happen as one step"""
+        key = (session_id, chunk_number)
+        entry = self._chunk_locks.get(key)
+        if entry is None:
+            entry = self._chunk_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chunk_locks[key]
+    
+    async def _mark_chunk_uploaded(self, session: UploadSession, chunk_number: int) -> None:
+        session.uploaded_chunks.append(chunk_number)
+        session.uploaded_chunks.sort()
+        session.status = UploadStatus.IN_PROGRESS
+        session.updated_at = datetime.utcnow()
+        
+        await self._journal(
+            self.journal.record_chunk, session.session_id, chunk_number, session.status, session.updated_at
+        )
+    
     async def upload_chunk(
         self, 
         session_id: str, 
@@ -198,93 +421,142 @@ class ChunkedUploadService:
         """Upload a single chunk with enhanced error handling"""
         
         try:
-            # Get session
-            session = self.sessions.get(session_id)
-            if not session:
-                raise UploadServiceError(
-                    f"Upload session {session_id} not found",
-                    UploadErrorType.SESSION_NOT_FOUND
-                )
+            session = await self._get_writable_session(session_id, chunk_number)
             
-            # Check if session expired
-            if hasattr(settings, 'UPLOAD_SESSION_TIMEOUT'):
-                cutoff_time = datetime.utcnow() - timedelta(seconds=settings.UPLOAD_SESSION_TIMEOUT)
-                if session.updated_at < cutoff_time:
-                    session.status = UploadStatus.CANCELLED
-                    await self._save_sessions()
+            async with self._chunk_lock(session_id, chunk_number):
+                # Check if chunk already uploaded
+                if chunk_number in session.uploaded_chunks:
+                    logger.debug(f"Chunk {chunk_number} already uploaded for session {session_id}")
+                    return session, False  # Already uploaded
+                
+                # Validate chunk hash if provided
+                if chunk_hash:
+                    calculated_hash = self._calculate_chunk_hash(chunk_data)
+                    if calculated_hash != chunk_hash:
+                        raise UploadServiceError(
+                            f"Chunk hash mismatch for chunk {chunk_number}",
+                            UploadErrorType.HASH_MISMATCH
+                        )
+                
+                # Validate chunk size (last chunk can be smaller)
+                expected_size = self._expected_chunk_size(session, chunk_number)
+                if len(chunk_data) != expected_size:
                     raise UploadServiceError(
-                        f"Upload session {session_id} has expired",
-                        UploadErrorType.SESSION_EXPIRED
+                        f"Invalid chunk size for chunk {chunk_number}. Expected {expected_size}, got {len(chunk_data)}",
+                        UploadErrorType.CHUNK_MISMATCH
                     )
+                
+                # Write chunk in place in the partial file with error handling
+                try:
+                    await asyncio.to_thread(self._write_chunk, session, chunk_number, chunk_data)
+                except OSError as e:
+                    logger.error(f"Failed to write chunk {chunk_number} for session {session_id}: {e}")
+                    raise UploadServiceError(
+                        f"Failed to save chunk {chunk_number}: {str(e)}",
+                        UploadErrorType.STORAGE_ERROR,
+                        retryable=True
+                    )
+                
+                await self._mark_chunk_uploaded(session, chunk_number)
+                
+                logger.debug(f"Chunk {chunk_number} uploaded successfully for session {session_id}")
+                return session, True
             
-            if session.status not in [UploadStatus.PENDING, UploadStatus.IN_PROGRESS]:
-                raise UploadServiceError(
-                    f"Upload session {session_id} is not active (status: {session.status})",
-                    UploadErrorType.SESSION_EXPIRED
-                )
-            
-            # Validate chunk number
-            if chunk_number < 0 or chunk_number >= session.total_chunks:
-                raise UploadServiceError(
-                    f"Invalid chunk number {chunk_number}. Expected 0-{session.total_chunks-1}",
-                    UploadErrorType.VALIDATION_ERROR
-                )
-            
-            # Check if chunk already uploaded
-            if chunk_number in session.uploaded_chunks:
-                logger.debug(f"Chunk {chunk_number} already uploaded for session {session_id}")
-                return session, False  # Already uploaded
+        except UploadServiceError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error uploading chunk {chunk_number} for session {session_id}: {e}")
+            raise UploadServiceError(
+                f"Failed to upload chunk {chunk_number}: {str(e)}",
+                UploadErrorType.UNKNOWN_ERROR,
+                retryable=True
+            )
+    
+    async def upload_chunk_stream(
+        self,
+        session_id: str,
+        chunk_number: int,
+        stream,
+        chunk_hash: str = None
+    ) -> Tuple[UploadSession, bool]:
+        """
+        Upload a chunk read from stream (anything with an async read(size))
+        
+        The chunk is read in STREAM_BLOCK_SIZE blocks; each block is hashed and
+        written at its offset in the partial file before the next is read, so
+        memory per in-flight chunk is one block. A body longer than the chunk
+        is rejected as soon as it overruns. The chunk only counts as uploaded
+        once its size (and hash, if given) check out; a rejected chunk's bytes
+        are overwritten by the retry. Uploads of the same chunk take turns, so
+        a chunk that has been accepted is never written again.
+        """
+        try:
+            session = await self._get_writable_session(session_id, chunk_number)
             
-            # Validate chunk hash if provided
-            if chunk_hash:
-                calculated_hash = self._calculate_chunk_hash(chunk_data)
-                if calculated_hash != chunk_hash:
+            async with self._chunk_lock(session_id, chunk_number):
+                if chunk_number in session.uploaded_chunks:
+                    logger.debug(f"Chunk {chunk_number} already uploaded for session {session_id}")
+                    return session, False  # Already uploaded
+                
+                expected_size = self._expected_chunk_size(session, chunk_number)
+                chunk_hasher = hashlib.sha256()
+                hashers = [chunk_hasher]
+                
+                # If this chunk is next in line, the file hash advances with it
+                state = self._file_hashes.setdefault(session_id, _StreamingFileHash())
+                with state.lock:
+                    file_hasher = state.hasher.copy() if state.next_chunk == chunk_number else None
+                if file_hasher is not None:
+                    hashers.append(file_hasher)
+                
+                try:
+                    fd = await asyncio.to_thread(self._open_partial_file, session)
+                    try:
+                        received = 0
+                        offset = chunk_number * session.chunk_size
+                        while True:
+                            block = await stream.read(self.STREAM_BLOCK_SIZE)
+                            if not block:
+                                break
+                            received += len(block)
+                            if received > expected_size:
+                                raise UploadServiceError(
+                                    f"Invalid chunk size for chunk {chunk_number}. Expected {expected_size}, got more",
+                                    UploadErrorType.CHUNK_MISMATCH
+                                )
+                            await asyncio.to_thread(self._write_block, fd, block, offset, hashers)
+                            offset += len(block)
+                    finally:
+                        os.close(fd)
+                except OSError as e:
+                    logger.error(f"Failed to write chunk {chunk_number} for session {session_id}: {e}")
+                    raise UploadServiceError(
+                        f"Failed to save chunk {chunk_number}: {str(e)}",
+                        UploadErrorType.STORAGE_ERROR,
+                        retryable=True
+                    )
+                
+                if received != expected_size:
+                    raise UploadServiceError(
+                        f"Invalid chunk size for chunk {chunk_number}. Expected {expected_size}, got {received}",
+                        UploadErrorType.CHUNK_MISMATCH
+                    )
+                if chunk_hash and chunk_hasher.hexdigest() != chunk_hash:
                     raise UploadServiceError(
                         f"Chunk hash mismatch for chunk {chunk_number}",
                         UploadErrorType.HASH_MISMATCH
                     )
-            
-            # Validate chunk size (last chunk can be smaller)
-            expected_size = session.chunk_size
-            if chunk_number == session.total_chunks - 1:
-                # Last chunk might be smaller
-                remaining_bytes = session.file_size - (chunk_number * session.chunk_size)
-                expected_size = min(expected_size, remaining_bytes)
-            
-            if len(chunk_data) != expected_size:
-                raise UploadServiceError(
-                    f"Invalid chunk size for chunk {chunk_number}. Expected {expected_size}, got {len(chunk_data)}",
-                    UploadErrorType.CHUNK_MISMATCH
-                )
-            
-            # Save chunk to disk with error handling
-            chunk_path = self._get_chunk_path(session_id, chunk_number)
-            try:
-                async with aiofiles.open(chunk_path, 'wb') as f:
-                    await f.write(chunk_data)
-            except OSError as e:
-                logger.error(f"Failed to write chunk {chunk_number} for session {session_id}: {e}")
-                raise UploadServiceError(
-                    f"Failed to save chunk {chunk_number}: {str(e)}",
-                    UploadErrorType.STORAGE_ERROR,
-                    retryable=True
-                )
-            
-            # Update session
-            session.uploaded_chunks.append(chunk_number)
-            session.uploaded_chunks.sort()
-            session.status = UploadStatus.IN_PROGRESS
-            session.updated_at = datetime.utcnow()
-            
-            await self._save_sessions()
-            
-            logger.debug(f"Chunk {chunk_number} uploaded successfully for session {session_id}")
-            return session, True
+                
+                await asyncio.to_thread(self._commit_streamed_file_hash, session, chunk_number, file_hasher)
+                await self._mark_chunk_uploaded(session, chunk_number)
+                
+                logger.debug(f"Chunk {chunk_number} streamed successfully for session {session_id}")
+                return session, True
             
         except UploadServiceError:
             raise
         except Exception as e:
-            logger.error(f"Unexpected error uploading chunk {chunk_number} for session {session_id}: {e}")
+            logger.error(f"Unexpected error streaming chunk {chunk_number} for session {session_id}: {e}")
             raise UploadServiceError(
                 f"Failed to upload chunk {chunk_number}: {str(e)}",
                 UploadErrorType.UNKNOWN_ERROR,
@@ -308,31 +580,32 @@ class ChunkedUploadService:
             missing_chunks = set(expected_chunks) - set(session.uploaded_chunks)
             raise ValueError(f"Missing chunks: {sorted(missing_chunks)}")
         
-        # Assemble file
-        final_path = self._get_final_path(session_id, session.filename)
-        
-        async with aiofiles.open(final_path, 'wb') as output_file:
-            for chunk_number in range(session.total_chunks):
-                chunk_path = self._get_chunk_path(session_id, chunk_number)
-                async with aiofiles.open(chunk_path, 'rb') as chunk_file:
-                    chunk_data = await chunk_file.read()
-                    await output_file.write(chunk_data)
+        partial_path = self._get_partial_path(session_id)
+        if not partial_path.exists():
+            raise ValueError(f"Upload data for session {session_id} is missing")
         
-        # Verify file hash if provided
+        # Verify file hash if provided; the digest was built as chunks arrived
         if final_file_hash or session.file_hash:
-            calculated_hash = self._calculate_file_hash(final_path)
+            calculated_hash = await asyncio.to_thread(self._finish_file_hash, session)
             expected_hash = final_file_hash or session.file_hash
             if calculated_hash != expected_hash:
-                # Clean up and raise error
-                final_path.unlink(missing_ok=True)
                 raise ValueError("Final file hash mismatch")
         
+        # Chunks are already in place; publishing the file is a rename
+        final_path = self._get_final_path(session_id, session.filename)
+        try:
+            os.replace(partial_path, final_path)
+        except OSError:
+            # TEMP_DIR and UPLOAD_DIR on different filesystems
+            await asyncio.to_thread(shutil.move, str(partial_path), str(final_path))
+        self._file_hashes.pop(session_id, None)
+        
         # Update session
         session.status = UploadStatus.COMPLETED
         session.completed_at = datetime.utcnow()
         session.updated_at = datetime.utcnow()
         
-        await self._save_sessions()
+        await self.save_session(session)
         
         # Clean up temporary chunks
         await self._cleanup_session_chunks(session_id)
@@ -352,16 +625,18 @@ class ChunkedUploadService:
         session.status = UploadStatus.CANCELLED
         session.updated_at = datetime.utcnow()
         
-        await self._save_sessions()
+        await self.save_session(session)
         await self._cleanup_session_chunks(session_id)
         
         return True
     
     async def _cleanup_session_chunks(self, session_id: str):
-        """Clean up temporary chunk files for a session"""
+        """Clean up the partial upload file for a session"""
+        self._file_hashes.pop(session_id, None)
         session_dir = self._get_session_dir(session_id)
         try:
-            # Remove all chunk files
+            # Remove the partial file (and chunk files from older sessions)
+            self._get_partial_path(session_id).unlink(missing_ok=True)
             for chunk_file in session_dir.glob("chunk_*"):
                 chunk_file.unlink(missing_ok=True)
             # Remove session directory if empty
@@ -383,10 +658,7 @@ class ChunkedUploadService:
         
         for session_id in expired_sessions:
             await self.cancel_upload(session_id)
-            del self.sessions[session_id]
-        
-        if expired_sessions:
-            await self._save_sessions()
+            await self.remove_session(session_id)
         
         return len(expired_sessions)
     
@@ -409,4 +681,33 @@ class ChunkedUploadService:
         if session.total_chunks == 0:
             return 0.0
         
-        return (len(session.uploaded_chunks) / session.total_chunks) * 100.0
\ No newline at end of file
+        return (len(session.uploaded_chunks) / session.total_chunks) * 100.0
+
+
+async def stream_to_file(stream, path: Path, max_size: int, block_size: int = ChunkedUploadService.STREAM_BLOCK_SIZE) -> int:
+    """
+    Write stream (anything with an async read(size)) to path one block at a time
+    
+    Returns the number of bytes written. A body larger than max_size is
+    rejected as soon as it overruns, and the partial file is removed.
+    """
+    written = 0
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        while True:
+            block = await stream.read(block_size)
+            if not block:
+                break
+            written += len(block)
+            if written > max_size:
+                raise UploadServiceError(
+                    f"File exceeds maximum size of {max_size} bytes",
+                    UploadErrorType.FILE_TOO_LARGE
+                )
+            await asyncio.to_thread(f.write, block)
+    except BaseException:
+        f.close()
+        path.unlink(missing_ok=True)
+        raise
+    f.close()
+    return written
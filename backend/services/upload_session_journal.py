@@ -0,0 +1,224 @@
+"""
+Upload Session Journal - Append-only persistence for chunked upload sessions
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSessionJournal:
+    """
+    Upload sessions as a JSON-lines journal of changes.
+
+    Each record is one line: "put" carries a whole session (new sessions and
+    status changes), "chunk" only the chunk number that arrived, "delete"
+    drops a session. Replaying the file in order rebuilds every session, so
+    recording a chunk costs one short append however many sessions exist.
+
+    Once the journal holds more than UPLOAD_JOURNAL_COMPACT_RECORDS records
+    beyond one per live session, it is compacted: replayed and rewritten as
+    one "put" per live session, then swapped in with os.replace. Appends hold
+    an exclusive flock on a sidecar lock file, so workers sharing TEMP_DIR
+    never lose each other's records. Compaction replays and rewrites without
+    the lock and only takes it to copy records appended meanwhile onto the
+    rewritten file and swap it in, so appends are never held up by a rewrite.
+    """
+
+    def __init__(self, path: Path, legacy_snapshot: Optional[Path] = None, compact_records: Optional[int] = None):
+        self.path = Path(path)
+        self.legacy_snapshot = legacy_snapshot
+        self.compact_records = compact_records if compact_records is not None else settings.UPLOAD_JOURNAL_COMPACT_RECORDS
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._thread_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._records = 0
+        self._live_sessions = 0
+        self._appends = 0
+        self._compactions = 0
+        self._unreadable = 0
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if not FCNTL_AVAILABLE:
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_records(self, f, sessions: Dict[str, Dict[str, Any]], end: Optional[int] = None) -> int:
+        """Apply the records in f (up to byte offset end) to sessions; returns how many were read"""
+        records = 0
+        position = 0
+        for line in f:
+            position += len(line)
+            if end is not None and position > end:
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn final line from a crash mid-append
+                logger.warning(f"Skipping unreadable upload journal record in {self.path}")
+                self._unreadable += 1
+                continue
+            records += 1
+            self._apply(sessions, record)
+        return records
+
+    def _replay(self, end: Optional[int] = None) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        """Sessions rebuilt from the journal (its first end bytes if given), and its record count"""
+        sessions: Dict[str, Dict[str, Any]] = {}
+        records = 0
+        self._unreadable = 0
+        if not self.path.exists() and self.legacy_snapshot and self.legacy_snapshot.exists():
+            # One-time migration from the old rewrite-everything snapshot
+            with open(self.legacy_snapshot, "r") as f:
+                sessions = json.load(f)
+            records = len(sessions)
+
+        if self.path.exists():
+            with open(self.path, "rb") as f:
+                records += self._read_records(f, sessions, end)
+
+        for session in sessions.values():
+            session["uploaded_chunks"] = sorted(set(session.get("uploaded_chunks", [])))
+        return sessions, records
+
+    @staticmethod
+    def _apply(sessions: Dict[str, Dict[str, Any]], record: Dict[str, Any]) -> None:
+        op = record.get("op")
+        if op == "put":
+            session = record["session"]
+            sessions[session["session_id"]] = session
+        elif op == "chunk":
+            session = sessions.get(record["session_id"])
+            if session is not None:
+                session.setdefault("uploaded_chunks", []).append(record["chunk"])
+                session["status"] = record.get("status", session.get("status"))
+                session["updated_at"] = record["updated_at"]
+        elif op == "delete":
+            sessions.pop(record["session_id"], None)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Replay the journal; returns session_id -> session fields"""
+        with self._locked():
+            migrating = not self.path.exists() and self.legacy_snapshot and self.legacy_snapshot.exists()
+            sessions, self._records = self._replay()
+            self._live_sessions = len(sessions)
+            if migrating or self._unreadable:
+                # Also drops a torn line so the next append starts on a fresh line
+                os.replace(self._write_temp(sessions), self.path)
+                self._records = len(sessions)
+                if self.legacy_snapshot and self.legacy_snapshot.exists():
+                    # Migrated; the journal now holds everything the snapshot did
+                    self.legacy_snapshot.unlink()
+            return sessions
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str, separators=(",", ":")) + "\n"
+        with self._locked():
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line.encode())
+            finally:
+                os.close(fd)
+            self._records += 1
+            self._appends += 1
+
+    def record_session(self, session_data: Dict[str, Any], is_new: bool = False) -> None:
+        """Write a whole session (created, or its status or metadata changed)"""
+        self._append({"op": "put", "session": session_data})
+        if is_new:
+            self._live_sessions += 1
+
+    def record_chunk(self, session_id: str, chunk_number: int, status: str, updated_at) -> None:
+        """Write that one chunk arrived"""
+        self._append({
+            "op": "chunk", "session_id": session_id, "chunk": chunk_number,
+            "status": status, "updated_at": updated_at
+        })
+
+    def record_delete(self, session_id: str) -> None:
+        """Write that a session was removed"""
+        self._append({"op": "delete", "session_id": session_id})
+        self._live_sessions = max(0, self._live_sessions - 1)
+
+    def needs_compaction(self) -> bool:
+        return self._records > self._live_sessions + self.compact_records
+
+    def compact(self) -> int:
+        """
+        Rewrite the journal as one record per live session; returns the session count
+
+        Skipped while another compaction in this process is running, and
+        abandoned if another worker swapped in its own compacted file first.
+        """
+        if not self._compact_lock.acquire(blocking=False):
+            return self._live_sessions
+        try:
+            with self._locked():
+                if not self.path.exists():
+                    return self._live_sessions
+                stat = os.stat(self.path)
+            end, inode = stat.st_size, stat.st_ino
+
+            sessions, _ = self._replay(end)
+            temp_path = self._write_temp(sessions)
+
+            with self._locked():
+                if os.stat(self.path).st_ino != inode:
+                    os.unlink(temp_path)
+                    return self._live_sessions
+                with open(self.path, "rb") as journal, open(temp_path, "ab") as rewritten:
+                    journal.seek(end)
+                    tail = journal.read()
+                    rewritten.write(tail)
+                    rewritten.flush()
+                    os.fsync(rewritten.fileno())
+                os.replace(temp_path, self.path)
+                self._records = len(sessions) + tail.count(b"\n")
+                self._read_records(tail.splitlines(keepends=True), sessions)
+                self._live_sessions = len(sessions)
+                self._compactions += 1
+        finally:
+            self._compact_lock.release()
+        logger.debug(f"Compacted upload session journal to {len(sessions)} sessions")
+        return len(sessions)
+
+    def _write_temp(self, sessions: Dict[str, Dict[str, Any]]) -> Path:
+        """Write one "put" per session to a new file next to the journal and fsync it"""
+        fd, temp_name = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp")
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w") as f:
+            for session in sessions.values():
+                f.write(json.dumps({"op": "put", "session": session}, default=str, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return Path(temp_name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "records": self._records,
+            "live_sessions": self._live_sessions,
+            "appends": self._appends,
+            "compactions": self._compactions
+        }
@@ -7,9 +7,10 @@ import subprocess
 import json
 import uuid
 import logging
+import socket
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import tempfile
 import shutil
@@ -18,16 +19,30 @@ from models import VideoSegmentMetadata, MergedVideoMetadata, UploadSession, Upl
 from services.upload_service import ChunkedUploadService
 from services.cloud_storage_service import create_cloud_storage_service, CloudStorageError
 from services.monitoring_service import media_monitor, ProcessingStage
+from services.merge_scheduler import get_merge_scheduler, MergeQueueFull, PRIORITY_PREMIUM, PRIORITY_STANDARD
+from services.merge_session_store import get_merge_session_store, merged_video_file_id
+from services.db_executor import run_db_call
+from services.request_profiler import traced_subprocess_exec
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Recorded on every merge session this process queues or runs
+MERGE_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
 class VideoMergeError(Exception):
     """Custom exception for video merge operations"""
-    def __init__(self, message: str, error_code: str = "MERGE_ERROR", retryable: bool = False):
+    def __init__(self, message: str, error_code: str = "MERGE_ERROR", retryable: bool = False,
+                 retry_after_seconds: Optional[int] = None):
         super().__init__(message)
         self.error_code = error_code
         self.retryable = retryable
+        self.retry_after_seconds = retry_after_seconds
+
+class MergeCancelled(VideoMergeError):
+    """Raised inside a running merge once its session has been cancelled"""
+    def __init__(self, merge_session_id: str):
+        super().__init__(f"Merge session {merge_session_id} was cancelled", "MERGE_CANCELLED")
 
 class MergeSessionStatus:
     """Status constants for merge sessions"""
@@ -37,12 +52,108 @@ class MergeSessionStatus:
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+class MediaProbeCache:
+    """
+    FFprobe results for one merge, keyed by file path, size and mtime.
+    
+    Every stage of a merge (analysis, preparation, segment timing) asks this
+    cache instead of running its own ffprobe, so each file is probed once.
+    Copies registered with link() reuse their source's result.
+    """
+    
+    def __init__(self):
+        self._results: Dict[Tuple[str, int, int], Optional[Dict[str, Any]]] = {}
+        self._errors: Dict[Tuple[str, int, int], str] = {}
+        self.probes = 0
+    
+    @staticmethod
+    def _key(path) -> Optional[Tuple[str, int, int]]:
+        try:
+            resolved = Path(path).resolve()
+            stat = resolved.stat()
+        except OSError:
+            return None
+        return str(resolved), stat.st_size, stat.st_mtime_ns
+    
+    async def probe(self, path) -> Optional[Dict[str, Any]]:
+        """
+        Parsed ``ffprobe -show_format -show_streams`` output (with a hash of
+        each stream's codec extradata), or None if the file can't be read
+        """
+        key = self._key(path)
+        if key is None:
+            return None
+        if key in self._results:
+            return self._results[key]
+        
+        self.probes += 1
+        cmd = [
+            "ffprobe",
+            "-v", "quiet",
+            "-print_format", "json",
+            "-show_format",
+            "-show_streams",
+            "-show_data_hash", "sha256",  # extradata_hash: SPS/PPS for H.264
+            key[0]
+        ]
+        data = None
+        try:
+            process = await traced_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
+            if process.returncode == 0:
+                data = json.loads(stdout.decode())
+            else:
+                self._errors[key] = stderr.decode(errors="ignore") or f"ffprobe exited with {process.returncode}"
+        except (json.JSONDecodeError, OSError) as e:
+            self._errors[key] = str(e)
+        
+        self._results[key] = data
+        return data
+    
+    async def duration(self, path) -> Optional[float]:
+        """Container duration in seconds"""
+        data = await self.probe(path)
+        try:
+            return float(data["format"]["duration"])
+        except (TypeError, KeyError, ValueError):
+            return None
+    
+    def error(self, path) -> Optional[str]:
+        """Why the last probe of path failed"""
+        key = self._key(path)
+        return self._errors.get(key) if key else None
+    
+    def link(self, copy_path, source_path) -> None:
+        """Reuse source_path's probe result for an identical copy"""
+        source_key, copy_key = self._key(source_path), self._key(copy_path)
+        if source_key in self._results and copy_key is not None:
+            self._results[copy_key] = self._results[source_key]
+
+
 class VideoMergeService:
     """Service for merging multiple videos into a single file using FFmpeg"""
     
+    # Delivered video limits; inputs already within them can be stream-copied
+    FINAL_VIDEO_MAX_BITRATE = 1_500_000
+    FINAL_AUDIO_BITRATE = 128_000
+    FINAL_AUDIO_SAMPLE_RATE = 44100
+    FINAL_H264_PROFILES = ("Baseline", "Constrained Baseline")  # As ffprobe names them
+    FINAL_H264_MAX_LEVEL = 31  # 3.1, as ffprobe reports it
+    SINGLE_PASS_TIMEOUT_SECONDS = 600  # Covers what used to be prepare + merge + compress
+    
     def __init__(self):
         self.upload_service = ChunkedUploadService()
-        self.merge_sessions: Dict[str, Dict[str, Any]] = {}
+        self.merge_sessions: Dict[str, Dict[str, Any]] = {}  # Sessions merging in this process
+        self._unsaved_by_video: Dict[str, Dict[str, Any]] = {}  # Finished here but missing from the store
+        self._progress_saved_at: Dict[str, float] = {}
+        self._progress_saves: set = set()
+        self.session_store = get_merge_session_store()
+        self.scheduler = get_merge_scheduler()
+        self._lease_task: Optional[asyncio.Task] = None
         self.temp_dir = settings.TEMP_DIR / "video_merge"
         self.temp_dir.mkdir(exist_ok=True)
         
@@ -160,16 +271,26 @@ class VideoMergeService:
     ) -> Dict[str, Any]:
         """Initiate the video merging process"""
         
-        # Check if merge is already in progress
-        if merge_session_id in self.merge_sessions:
-            existing_status = self.merge_sessions[merge_session_id]["status"]
-            if existing_status in [MergeSessionStatus.PROCESSING, MergeSessionStatus.COMPLETED]:
+        # Check if merge is already queued, in progress or done. A queued or
+        # running merge counts while its worker keeps renewing the lease; one
+        # whose worker stopped renewing it (e.g. after a restart) is started again.
+        existing = self.merge_sessions.get(merge_session_id) or await self.session_store.load(merge_session_id)
+        if existing:
+            existing_status = existing["status"]
+            if existing_status == MergeSessionStatus.COMPLETED or self.is_merge_active(merge_session_id, existing):
                 return {
                     "merge_session_id": merge_session_id,
                     "status": existing_status,
-                    "message": f"Merge already {existing_status}"
+                    "message": f"Merge already {existing_status}",
+                    "queue_position": self.scheduler.position(merge_session_id)
                 }
         
+            if existing_status in [MergeSessionStatus.PENDING, MergeSessionStatus.PROCESSING]:
+                logger.warning(
+                    f"Merge session {merge_session_id} was {existing_status} on worker "
+                    f"{existing.get('worker_id')} whose lease expired; restarting it"
+                )
+        
         # Check readiness
         readiness = await self.check_merge_readiness(merge_session_id, user_id)
         if not readiness["ready"]:
@@ -183,6 +304,7 @@ class VideoMergeService:
             "merge_session_id": merge_session_id,
             "user_id": user_id,
             "status": MergeSessionStatus.PENDING,
+            "worker_id": MERGE_WORKER_ID,
             "video_files": readiness["video_files"],
             "quality_preset": quality_preset,
             "created_at": datetime.utcnow(),
@@ -195,19 +317,46 @@ class VideoMergeService:
         
         self.merge_sessions[merge_session_id] = merge_session
         
-        # Start merge process asynchronously
-        asyncio.create_task(self._process_merge(merge_session_id))
+        # Queue the merge; it starts once the scheduler has a free slot
+        priority = await self._get_merge_priority(user_id)
+        try:
+            self.scheduler.submit(merge_session_id, lambda: self._process_merge(merge_session_id), priority)
+        except MergeQueueFull as e:
+            del self.merge_sessions[merge_session_id]
+            raise VideoMergeError(str(e), "QUEUE_FULL", retryable=True, retry_after_seconds=e.retry_after_seconds)
+        await self.session_store.save(merge_session)
+        self._start_lease_renewal()
         
-        logger.info(f"Video merge initiated for session {merge_session_id}")
+        queue_position = self.scheduler.position(merge_session_id)
+        logger.info(f"Video merge queued for session {merge_session_id} (position {queue_position})")
         
         return {
             "merge_session_id": merge_session_id,
             "status": MergeSessionStatus.PENDING,
             "video_count": len(readiness["video_files"]),
             "estimated_duration_seconds": self._estimate_merge_duration(readiness["video_files"]),
+            "queue_position": queue_position,
             "initiated_at": merge_session["created_at"].isoformat()
         }
     
+    async def _get_merge_priority(self, user_id: str) -> int:
+        """Premium users' merges are scheduled ahead of everyone else's"""
+        try:
+            from services.database_service import get_db_service
+            user = await run_db_call(get_db_service().get_user_by_id, int(user_id))
+        except Exception as e:
+            logger.debug(f"Could not look up premium status for user {user_id}: {e}")
+            return PRIORITY_STANDARD
+        return PRIORITY_PREMIUM if user and user.get("is_premium") else PRIORITY_STANDARD
+    
+    async def _run_scheduled(self, job_id: str, user_id: Optional[str], factory) -> Any:
+        """Run a synchronous merge once the scheduler grants it a slot"""
+        priority = await self._get_merge_priority(user_id) if user_id else PRIORITY_STANDARD
+        try:
+            return await self.scheduler.run(job_id, factory, priority)
+        except MergeQueueFull as e:
+            raise VideoMergeError(str(e), "QUEUE_FULL", retryable=True, retry_after_seconds=e.retry_after_seconds)
+    
     async def _process_merge(self, merge_session_id: str):
         """Process video merge asynchronously"""
         
@@ -215,6 +364,8 @@ class VideoMergeService:
         if not merge_session:
             logger.error(f"Merge session {merge_session_id} not found")
             return
+        if merge_session["status"] == MergeSessionStatus.CANCELLED:
+            return
         
         user_id = merge_session["user_id"]
         
@@ -223,12 +374,14 @@ class VideoMergeService:
             merge_session["status"] = MergeSessionStatus.PROCESSING
             merge_session["updated_at"] = datetime.utcnow()
             merge_session["progress"] = 10.0
+            await self.session_store.save(merge_session)
             
             logger.info(f"Starting video merge for session {merge_session_id}")
             
             # Create temporary working directory
             work_dir = self.temp_dir / merge_session_id
             work_dir.mkdir(exist_ok=True)
+            probe_cache = MediaProbeCache()
             
             try:
                 # Step 1: Analyze input videos (20% progress)
@@ -236,7 +389,7 @@ class VideoMergeService:
                     merge_session_id, user_id, ProcessingStage.ANALYSIS
                 )
                 try:
-                    video_info = await self._analyze_videos(merge_session["video_files"], work_dir)
+                    video_info = await self._analyze_videos(merge_session["video_files"], work_dir, probe_cache)
                     merge_session["progress"] = 20.0
                     merge_session["video_analysis"] = video_info
                     
@@ -252,87 +405,123 @@ class VideoMergeService:
                     )
                     raise
                 
-                # Step 2: Prepare videos for merging (40% progress)
-                prep_metrics = await media_monitor.start_processing(
-                    merge_session_id, user_id, ProcessingStage.PREPARATION
-                )
-                try:
-                    prepared_videos = await self._prepare_videos_for_merge(
-                        merge_session["video_files"], 
-                        video_info, 
-                        work_dir
+                self._check_cancelled(merge_session)
+                if self._use_single_pass_merge(video_info):
+                    # Steps 2-4: normalize, merge and compress in one FFmpeg run (90% progress)
+                    merge_metrics = await media_monitor.start_processing(
+                        merge_session_id, user_id, ProcessingStage.MERGING
                     )
-                    merge_session["progress"] = 40.0
-                    
-                    await media_monitor.complete_processing(
-                        merge_session_id, ProcessingStage.PREPARATION,
-                        success=True, video_count=len(prepared_videos)
-                    )
-                except Exception as e:
-                    await media_monitor.complete_processing(
-                        merge_session_id, ProcessingStage.PREPARATION,
-                        success=False, error_message=str(e),
-                        error_code=getattr(e, 'error_code', 'PREPARATION_ERROR')
-                    )
-                    raise
-                
-                # Step 3: Merge videos (80% progress)
-                merge_metrics = await media_monitor.start_processing(
-                    merge_session_id, user_id, ProcessingStage.MERGING
-                )
-                try:
-                    merged_path, segment_metadata = await self._merge_videos(
-                        prepared_videos, 
-                        work_dir,
-                        original_video_files=merge_session["video_files"],  # Pass original session data
-                        progress_callback=lambda p: self._update_merge_progress(merge_session_id, 40.0 + (p * 0.4))
+                    try:
+                        compressed_path, segment_metadata, merge_strategy = await self._merge_single_pass(
+                            video_info,
+                            work_dir,
+                            original_video_files=merge_session["video_files"],
+                            progress_callback=lambda p: self._update_merge_progress(merge_session_id, 20.0 + (p * 0.7)),
+                            should_stop=lambda: self._is_cancelled(merge_session)
+                        )
+                        merge_session["progress"] = 90.0
+                        merge_session["merge_strategy"] = merge_strategy
+                        
+                        compressed_size = compressed_path.stat().st_size if compressed_path.exists() else None
+                        
+                        await media_monitor.complete_processing(
+                            merge_session_id, ProcessingStage.MERGING,
+                            success=True, file_size_bytes=compressed_size, video_count=len(video_info["videos"])
+                        )
+                    except Exception as e:
+                        await media_monitor.complete_processing(
+                            merge_session_id, ProcessingStage.MERGING,
+                            success=False, error_message=str(e),
+                            error_code=getattr(e, 'error_code', 'MERGE_ERROR')
+                        )
+                        raise
+                else:
+                    # Step 2: Prepare videos for merging (40% progress)
+                    prep_metrics = await media_monitor.start_processing(
+                        merge_session_id, user_id, ProcessingStage.PREPARATION
                     )
-                    merge_session["progress"] = 80.0
+                    try:
+                        prepared_videos = await self._prepare_videos_for_merge(
+                            merge_session["video_files"], 
+                            video_info, 
+                            work_dir,
+                            probe_cache
+                        )
+                        merge_session["progress"] = 40.0
                     
-                    # Get file size for metrics
-                    file_size = merged_path.stat().st_size if merged_path.exists() else None
+                        await media_monitor.complete_processing(
+                            merge_session_id, ProcessingStage.PREPARATION,
+                            success=True, video_count=len(prepared_videos)
+                        )
+                    except Exception as e:
+                        await media_monitor.complete_processing(
+                            merge_session_id, ProcessingStage.PREPARATION,
+                            success=False, error_message=str(e),
+                            error_code=getattr(e, 'error_code', 'PREPARATION_ERROR')
+                        )
+                        raise
                     
-                    await media_monitor.complete_processing(
-                        merge_session_id, ProcessingStage.MERGING,
-                        success=True, file_size_bytes=file_size, video_count=len(prepared_videos)
+                    self._check_cancelled(merge_session)
+                    # Step 3: Merge videos (80% progress)
+                    merge_metrics = await media_monitor.start_processing(
+                        merge_session_id, user_id, ProcessingStage.MERGING
                     )
-                except Exception as e:
-                    await media_monitor.complete_processing(
-                        merge_session_id, ProcessingStage.MERGING,
-                        success=False, error_message=str(e),
-                        error_code=getattr(e, 'error_code', 'MERGE_ERROR')
-                    )
-                    raise
+                    try:
+                        merged_path, segment_metadata = await self._merge_videos(
+                            prepared_videos, 
+                            work_dir,
+                            original_video_files=merge_session["video_files"],  # Pass original session data
+                            progress_callback=lambda p: self._update_merge_progress(merge_session_id, 40.0 + (p * 0.4)),
+                            probe_cache=probe_cache
+                        )
+                        merge_session["progress"] = 80.0
+                    
+                        # Get file size for metrics
+                        file_size = merged_path.stat().st_size if merged_path.exists() else None
+                    
+                        await media_monitor.complete_processing(
+                            merge_session_id, ProcessingStage.MERGING,
+                            success=True, file_size_bytes=file_size, video_count=len(prepared_videos)
+                        )
+                    except Exception as e:
+                        await media_monitor.complete_processing(
+                            merge_session_id, ProcessingStage.MERGING,
+                            success=False, error_message=str(e),
+                            error_code=getattr(e, 'error_code', 'MERGE_ERROR')
+                        )
+                        raise
                 
-                # Step 4: Apply compression (90% progress)
-                compression_metrics = await media_monitor.start_processing(
-                    merge_session_id, user_id, ProcessingStage.COMPRESSION
-                )
-                try:
-                    quality_preset = merge_session.get("quality_preset", "medium")
-                    compressed_path = await self._compress_merged_video(
-                        merged_path, 
-                        work_dir,
-                        progress_callback=lambda p: self._update_merge_progress(merge_session_id, 80.0 + (p * 0.1)),
-                        quality_preset=quality_preset
+                    self._check_cancelled(merge_session)
+                    # Step 4: Apply compression (90% progress)
+                    compression_metrics = await media_monitor.start_processing(
+                        merge_session_id, user_id, ProcessingStage.COMPRESSION
                     )
-                    merge_session["progress"] = 90.0
+                    try:
+                        quality_preset = merge_session.get("quality_preset", "medium")
+                        compressed_path = await self._compress_merged_video(
+                            merged_path, 
+                            work_dir,
+                            progress_callback=lambda p: self._update_merge_progress(merge_session_id, 80.0 + (p * 0.1)),
+                            quality_preset=quality_preset
+                        )
+                        merge_session["progress"] = 90.0
                     
-                    # Get compressed file size for metrics
-                    compressed_size = compressed_path.stat().st_size if compressed_path.exists() else None
+                        # Get compressed file size for metrics
+                        compressed_size = compressed_path.stat().st_size if compressed_path.exists() else None
                     
-                    await media_monitor.complete_processing(
-                        merge_session_id, ProcessingStage.COMPRESSION,
-                        success=True, file_size_bytes=compressed_size
-                    )
-                except Exception as e:
-                    await media_monitor.complete_processing(
-                        merge_session_id, ProcessingStage.COMPRESSION,
-                        success=False, error_message=str(e),
-                        error_code=getattr(e, 'error_code', 'COMPRESSION_ERROR')
-                    )
-                    raise
+                        await media_monitor.complete_processing(
+                            merge_session_id, ProcessingStage.COMPRESSION,
+                            success=True, file_size_bytes=compressed_size
+                        )
+                    except Exception as e:
+                        await media_monitor.complete_processing(
+                            merge_session_id, ProcessingStage.COMPRESSION,
+                            success=False, error_message=str(e),
+                            error_code=getattr(e, 'error_code', 'COMPRESSION_ERROR')
+                        )
+                        raise
                 
+                self._check_cancelled(merge_session)
                 # Step 5: Upload to storage and cleanup (100% progress)
                 storage_metrics = await media_monitor.start_processing(
                     merge_session_id, user_id, ProcessingStage.STORAGE_UPLOAD
@@ -386,6 +575,11 @@ class VideoMergeService:
                     # Don't re-raise cleanup errors
                     logger.warning(f"Cleanup failed for session {merge_session_id}: {str(e)}")
                 
+        except MergeCancelled:
+            logger.info(f"Video merge for session {merge_session_id} stopped: it was cancelled")
+            if merge_session["status"] != MergeSessionStatus.CANCELLED:
+                merge_session["status"] = MergeSessionStatus.CANCELLED
+                merge_session["cancelled_at"] = datetime.utcnow()
         except Exception as e:
             logger.error(f"Video merge failed for session {merge_session_id}: {str(e)}")
             
@@ -404,10 +598,17 @@ class VideoMergeService:
             merge_session["failed_at"] = datetime.utcnow()
         
         merge_session["updated_at"] = datetime.utcnow()
+        await self._save_finished(merge_session)
     
-    async def _analyze_videos(self, video_files: List[Dict], work_dir: Path) -> Dict[str, Any]:
+    async def _analyze_videos(
+        self,
+        video_files: List[Dict],
+        work_dir: Path,
+        probe_cache: Optional[MediaProbeCache] = None
+    ) -> Dict[str, Any]:
         """Analyze input videos to determine merge parameters"""
         
+        probe_cache = probe_cache or MediaProbeCache()
         video_info = {
             "videos": [],
             "total_duration": 0.0,
@@ -421,33 +622,17 @@ class VideoMergeService:
             
             if self.ffmpeg_available:
                 try:
-                    # Use FFprobe to get video information
-                    cmd = [
-                        "ffprobe",
-                        "-v", "quiet",
-                        "-print_format", "json",
-                        "-show_format",
-                        "-show_streams",
-                        str(file_path)
-                    ]
+                    probe_data = await probe_cache.probe(file_path)
                     
-                    result = await asyncio.create_subprocess_exec(
-                        *cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    stdout, stderr = await result.communicate()
-                    
-                    if result.returncode != 0:
-                        logger.warning(f"FFprobe failed for video {video_file['index']}: {stderr.decode()}")
+                    if probe_data is None:
+                        logger.warning(f"FFprobe failed for video {video_file['index']}: {probe_cache.error(file_path)}")
                         # Fall back to default values
                         video_data = self._get_default_video_data(video_file, file_path)
                     else:
                         # Parse FFprobe output
-                        probe_data = json.loads(stdout.decode())
                         video_data = self._parse_ffprobe_data(video_file, file_path, probe_data)
                         
-                except (json.JSONDecodeError, FileNotFoundError, Exception) as e:
+                except Exception as e:
                     logger.warning(f"Video analysis failed for video {video_file['index']}: {str(e)} - using defaults")
                     video_data = self._get_default_video_data(video_file, file_path)
             else:
@@ -498,7 +683,8 @@ class VideoMergeService:
             "framerate": 30.0,
             "has_audio": True,  # Assume audio is present
             "codec": "h264",  # Common codec
-            "bitrate": 2000000  # 2 Mbps default
+            "bitrate": 2000000,  # 2 Mbps default
+            "probed": False  # Guessed values - never stream-copy these
         }
     
     def _parse_ffprobe_data(self, video_file: Dict, file_path: Path, probe_data: Dict) -> Dict[str, Any]:
@@ -539,17 +725,30 @@ class VideoMergeService:
             "framerate": fps,
             "has_audio": audio_stream is not None,
             "codec": video_stream.get("codec_name", "h264"),
-            "bitrate": int(probe_data.get("format", {}).get("bit_rate", 2000000))
+            "bitrate": int(probe_data.get("format", {}).get("bit_rate", 2000000)),
+            "pix_fmt": video_stream.get("pix_fmt"),
+            "profile": video_stream.get("profile"),
+            "level": video_stream.get("level"),
+            "refs": video_stream.get("refs"),
+            "has_b_frames": video_stream.get("has_b_frames"),
+            "extradata_hash": video_stream.get("extradata_hash"),
+            "audio_codec": audio_stream.get("codec_name") if audio_stream else None,
+            "audio_sample_rate": audio_stream.get("sample_rate") if audio_stream else None,
+            "audio_channels": audio_stream.get("channels") if audio_stream else None,
+            "probed": True
         }
     
     async def _prepare_videos_for_merge(
         self, 
         video_files: List[Dict], 
         video_info: Dict[str, Any], 
-        work_dir: Path
+        work_dir: Path,
+        probe_cache: Optional[MediaProbeCache] = None
     ) -> List[Path]:
         """Prepare videos for merging by normalizing format and resolution"""
         
+        probe_cache = probe_cache or MediaProbeCache()
+        
         # If FFmpeg is not available, just return the original video paths
         if not self.ffmpeg_available:
             logger.warning("FFmpeg not available - returning original videos without processing")
@@ -594,6 +793,7 @@ class VideoMergeService:
             if not needs_processing:
                 # Copy file as-is
                 shutil.copy2(input_path, output_path)
+                probe_cache.link(output_path, input_path)
                 logger.debug(f"Video {video_data['index']} copied without processing")
             else:
                 # First, verify the input file exists and is readable
@@ -613,38 +813,14 @@ class VideoMergeService:
                 
                 logger.debug(f"Processing video {video_data['index']}: {input_path} ({file_size} bytes)")
                 
-                # First, verify FFmpeg can read the file by probing it
-                probe_cmd = [
-                    "ffprobe", "-v", "quiet", "-print_format", "json", 
-                    "-show_format", "-show_streams", str(input_path)
-                ]
-                
-                try:
-                    logger.debug(f"Probing video metadata: {' '.join(probe_cmd)}")
-                    probe_process = await asyncio.create_subprocess_exec(
-                        *probe_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
+                # Verify FFmpeg can read the file (probed during analysis)
+                if await probe_cache.probe(input_path) is None:
+                    probe_error = probe_cache.error(input_path) or "Unknown probe error"
+                    logger.error(f"FFprobe failed for {input_path}: {probe_error}")
+                    raise VideoMergeError(
+                        f"Cannot read video metadata for {video_data['index']}: {probe_error}",
+                        "INVALID_VIDEO_FILE"
                     )
-                    probe_stdout, probe_stderr = await probe_process.communicate()
-                    
-                    if probe_process.returncode != 0:
-                        probe_error = probe_stderr.decode() if probe_stderr else "Unknown probe error"
-                        logger.error(f"FFprobe failed for {input_path}: {probe_error}")
-                        raise VideoMergeError(
-                            f"Cannot read video metadata for {video_data['index']}: {probe_error}",
-                            "INVALID_VIDEO_FILE"
-                        )
-                    
-                    logger.debug(f"Probe successful for video {video_data['index']}")
-                    
-                except Exception as e:
-                    if not isinstance(e, VideoMergeError):
-                        logger.error(f"Exception during probe of video {video_data['index']}: {str(e)}")
-                        raise VideoMergeError(
-                            f"Failed to probe video {video_data['index']}: {str(e)}",
-                            "PROBE_ERROR"
-                        )
                 
                 # Use a simpler FFmpeg command that's more compatible
                 cmd = [
@@ -658,6 +834,7 @@ class VideoMergeService:
                     "-r", str(target_fps),
                     "-c:a", "aac" if video_info["audio_present"] else "-an",
                     "-movflags", "+faststart",
+                    "-threads", str(settings.MERGE_FFMPEG_THREADS),
                     "-y",  # Overwrite output file
                     str(output_path)
                 ]
@@ -665,7 +842,7 @@ class VideoMergeService:
                 logger.debug(f"Processing video {video_data['index']} with command: {' '.join(cmd)}")
                 
                 try:
-                    process = await asyncio.create_subprocess_exec(
+                    process = await traced_subprocess_exec(
                         *cmd,
                         stdout=asyncio.subprocess.PIPE,
                         stderr=asyncio.subprocess.PIPE
@@ -727,52 +904,13 @@ class VideoMergeService:
         prepared_videos: List[Path], 
         work_dir: Path,
         original_video_files: List[Dict] = None,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        probe_cache: Optional[MediaProbeCache] = None
     ) -> Tuple[Path, List[VideoSegmentMetadata]]:
         """Merge prepared videos into a single file"""
         
         output_path = work_dir / "merged_video.mp4"
-        
-        # DIAGNOSTIC LOGGING POINT 1: Before the Merge - Get duration of each source clip
-        logger.info("🔍 DIAGNOSTIC: Analyzing source video clips before merge...")
-        source_durations = []
-        
-        for i, video_path in enumerate(prepared_videos):
-            try:
-                if self.ffmpeg_available:
-                    # Use ffprobe to get precise duration of each source clip
-                    cmd = [
-                        "ffprobe",
-                        "-v", "quiet",
-                        "-show_entries", "format=duration",
-                        "-of", "csv=p=0",
-                        str(video_path)
-                    ]
-                    
-                    result = await asyncio.create_subprocess_exec(
-                        *cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    stdout, stderr = await result.communicate()
-                    
-                    if result.returncode == 0:
-                        duration = float(stdout.decode().strip())
-                        source_durations.append(duration)
-                        logger.info(f"🔍 DIAGNOSTIC: Source clip {i} duration: {duration:.6f} seconds")
-                    else:
-                        logger.error(f"🔍 DIAGNOSTIC: Failed to get duration for clip {i}: {stderr.decode()}")
-                        source_durations.append(0.0)
-                else:
-                    source_durations.append(0.0)
-                    logger.warning(f"🔍 DIAGNOSTIC: FFmpeg not available, cannot get duration for clip {i}")
-            except Exception as e:
-                logger.error(f"🔍 DIAGNOSTIC: Error getting duration for clip {i}: {str(e)}")
-                source_durations.append(0.0)
-        
-        total_expected_duration = sum(source_durations)
-        logger.info(f"🔍 DIAGNOSTIC: Source clip durations: {source_durations}")
-        logger.info(f"🔍 DIAGNOSTIC: Total expected merged duration: {total_expected_duration:.6f} seconds")
+        probe_cache = probe_cache or MediaProbeCache()
         
         # If FFmpeg is not available, use the first video as the output
         if not self.ffmpeg_available:
@@ -834,6 +972,7 @@ class VideoMergeService:
             "-pix_fmt", "yuv420p", # Ensure compatibility with mobile players
             "-profile:v", "baseline", # H.264 baseline profile for maximum compatibility
             "-level", "3.1",    # H.264 level for mobile compatibility
+            "-threads", str(settings.MERGE_FFMPEG_THREADS),
             "-y",
             str(output_path)
         ]
@@ -844,7 +983,7 @@ class VideoMergeService:
         logger.debug(f"Merging videos with command: {ffmpeg_command_str}")
         
         try:
-            process = await asyncio.create_subprocess_exec(
+            process = await traced_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
@@ -868,44 +1007,12 @@ class VideoMergeService:
                     "MERGE_ERROR"
                 )
             
-            # DIAGNOSTIC LOGGING POINT 3: After the Merge - Get actual duration of merged video
-            logger.info("🔍 DIAGNOSTIC: Analyzing merged video file after FFmpeg completion...")
-            try:
-                duration_cmd = [
-                    "ffprobe",
-                    "-v", "quiet",
-                    "-show_entries", "format=duration",
-                    "-of", "csv=p=0",
-                    str(output_path)
-                ]
-                
-                duration_result = await asyncio.create_subprocess_exec(
-                    *duration_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                duration_stdout, duration_stderr = await duration_result.communicate()
-                
-                if duration_result.returncode == 0:
-                    actual_merged_duration = float(duration_stdout.decode().strip())
-                    logger.info(f"🔍 DIAGNOSTIC: Actual merged video duration: {actual_merged_duration:.6f} seconds")
-                    
-                    # Compare with expected
-                    duration_difference = abs(actual_merged_duration - total_expected_duration)
-                    logger.info(f"🔍 DIAGNOSTIC: Duration difference (actual vs expected): {duration_difference:.6f} seconds")
-                    
-                    if duration_difference > 0.1:  # More than 100ms difference
-                        logger.warning(f"🔍 DIAGNOSTIC: Significant duration mismatch detected! Expected: {total_expected_duration:.6f}s, Actual: {actual_merged_duration:.6f}s")
-                else:
-                    logger.error(f"🔍 DIAGNOSTIC: Failed to get merged video duration: {duration_stderr.decode()}")
-            except Exception as e:
-                logger.error(f"🔍 DIAGNOSTIC: Error analyzing merged video duration: {str(e)}")
-            
-            # PHASE 1 FIX: Calculate segment metadata using the FINAL MERGED VIDEO
-            logger.info("🎯 Calculating segment metadata from final merged video...")
+            # The concat demuxer places each prepared clip right after the previous
+            # one, so boundaries follow from the prepared clips' durations
             segment_metadata = await self._calculate_segment_metadata(
-                original_video_files or prepared_videos, 
-                merged_video_path=output_path  # Pass the merged video for analysis
+                prepared_videos,
+                probe_cache=probe_cache,
+                fallback_video_files=original_video_files
             )
             
             logger.info(f"Videos merged successfully: {output_path}")
@@ -920,13 +1027,325 @@ class VideoMergeService:
                 f"Error merging videos: {str(e)}",
                 "MERGE_ERROR"
             )
-    
-    async def _calculate_segment_metadata_from_original_videos(self, video_files) -> List[VideoSegmentMetadata]:
-        """Calculate segment start/end times using original video files (fallback method)"""
+
+    def _use_single_pass_merge(self, video_info: Dict[str, Any]) -> bool:
+        """
+        Whether a merge should normalize, concatenate and compress in one FFmpeg run.
+        
+        The single pass takes segment boundaries from the probed input durations,
+        so a merge with any input FFprobe could not read (whose duration is only
+        a file-size estimate) falls back to the multi-step path, which measures
+        the prepared clips instead.
+        """
+        if not (self.ffmpeg_available and settings.VIDEO_MERGE_MODE == "single_pass"):
+            return False
+        unprobed = [video["index"] for video in video_info["videos"] if not video.get("probed")]
+        if unprobed:
+            logger.warning(f"Videos {unprobed} could not be probed; using the multi-step merge")
+            return False
+        return True
+
+    def _get_merge_target(self, video_info: Dict[str, Any]) -> Tuple[int, int, float]:
+        """Output width, height and framerate for a merge (even dimensions for H.264)"""
+        width = video_info["max_resolution"]["width"]
+        height = video_info["max_resolution"]["height"]
+        fps = video_info["common_framerate"] or 30.0
+        return width + width % 2, height + height % 2, round(fps, 3)
+
+    def _can_stream_copy(self, video_info: Dict[str, Any]) -> bool:
+        """
+        True when every input was probed and already matches the delivered format
+        (H.264 baseline profile at level 3.1 or lower, same yuv420p geometry and
+        framerate, same AAC audio layout, bitrate within the final limits), so the
+        clips can be concatenated without re-encoding.
+
+        The concat demuxer keeps only the first input's codec extradata, so every
+        input must also share its profile, level, reference frames, B-frame
+        delay and SPS/PPS (compared through the extradata hash).
+        """
+        videos = video_info["videos"]
+        if not videos or not all(video.get("probed") for video in videos):
+            return False
+
+        first = videos[0]
+        if first["codec"] != "h264" or first.get("pix_fmt") != "yuv420p":
+            return False
+        if first["has_audio"] and first.get("audio_codec") != "aac":
+            return False
+
+        max_bitrate = self.FINAL_VIDEO_MAX_BITRATE + self.FINAL_AUDIO_BITRATE
+        layout = lambda v: (
+            v["codec"], v.get("pix_fmt"), v["width"], v["height"], v.get("profile"), v.get("level"),
+            v.get("refs"), v.get("has_b_frames"), v.get("extradata_hash"), v["has_audio"],
+            v.get("audio_codec"), v.get("audio_sample_rate"), v.get("audio_channels")
+        )
+
+        for video in videos:
+            if layout(video) != layout(first):
+                return False
+            if not video.get("extradata_hash"):
+                return False  # Can't tell whether its SPS/PPS match the first input's
+            if video.get("profile") not in self.FINAL_H264_PROFILES:
+                return False
+            if not isinstance(video.get("level"), int) or not 0 < video["level"] <= self.FINAL_H264_MAX_LEVEL:
+                return False
+            if abs(video["framerate"] - first["framerate"]) > 0.01:
+                return False
+            if video["bitrate"] > max_bitrate:
+                return False
+        return True
+
+    def _build_stream_copy_command(self, video_info: Dict[str, Any], concat_file: Path, output_path: Path) -> List[str]:
+        """FFmpeg concat-demuxer command that copies matching inputs without re-encoding"""
+        with open(concat_file, 'w') as f:
+            for video_data in video_info["videos"]:
+                f.write(f"file '{Path(video_data['path']).absolute()}'\n")
+
+        return [
+            "ffmpeg",
+            "-hide_banner", "-loglevel", "error",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(concat_file),
+            "-c", "copy",
+            "-movflags", "+faststart",
+            "-progress", "pipe:1",
+            "-y",
+            str(output_path)
+        ]
+
+    def _build_single_pass_command(self, video_info: Dict[str, Any], output_path: Path) -> List[str]:
+        """
+        FFmpeg command that scales/pads every input to the merge target, concatenates
+        them in a filter graph and encodes once with the final delivery settings.
+        """
+        videos = video_info["videos"]
+        width, height, fps = self._get_merge_target(video_info)
+        with_audio = video_info["audio_present"]
+
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        for video_data in videos:
+            cmd += ["-i", str(video_data["path"])]
+
+        filters = []
+        concat_inputs = ""
+        for i, video_data in enumerate(videos):
+            filters.append(
+                f"[{i}:v:0]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format=yuv420p[v{i}]"
+            )
+            concat_inputs += f"[v{i}]"
+
+            if with_audio:
+                if video_data["has_audio"]:
+                    filters.append(
+                        f"[{i}:a:0]aresample={self.FINAL_AUDIO_SAMPLE_RATE},"
+                        f"aformat=sample_fmts=fltp:channel_layouts=stereo[a{i}]"
+                    )
+                else:
+                    # Silent track so clips with and without audio can be concatenated
+                    filters.append(
+                        f"anullsrc=r={self.FINAL_AUDIO_SAMPLE_RATE}:cl=stereo,"
+                        f"atrim=duration={video_data['duration']:.3f}[a{i}]"
+                    )
+                concat_inputs += f"[a{i}]"
+
+        outputs = "[v][a]" if with_audio else "[v]"
+        filters.append(f"{concat_inputs}concat=n={len(videos)}:v=1:a={1 if with_audio else 0}{outputs}")
+
+        cmd += ["-filter_complex", ";".join(filters), "-map", "[v]"]
+        if with_audio:
+            cmd += ["-map", "[a]"]
+
+        cmd += [
+            *self._get_final_encoding_args(),
+            "-force_key_frames", "expr:gte(t,n_forced*0.5)",  # Keyframe every 0.5s for fine seeking
+            "-progress", "pipe:1",
+            "-y",
+            str(output_path)
+        ]
+        return cmd
+
+    async def _run_ffmpeg_with_progress(
+        self,
+        cmd: List[str],
+        total_duration: float,
+        progress_callback: Optional[callable] = None,
+        timeout: float = 300.0,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> Tuple[int, str]:
+        """
+        Run an FFmpeg command that writes ``-progress`` lines to stdout; returns
+        (returncode, stderr). FFmpeg is killed and MergeCancelled raised as soon
+        as should_stop() returns True, which is checked on every progress line.
+        """
+        process = await traced_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stderr_task = asyncio.create_task(process.stderr.read())
+
+        async def read_progress():
+            async for raw_line in process.stdout:
+                if should_stop and should_stop():
+                    raise MergeCancelled(str(cmd[-1]))
+                key, _, value = raw_line.decode(errors="ignore").strip().partition("=")
+                if key == "out_time_us" and value.isdigit() and progress_callback and total_duration > 0:
+                    progress_callback(min(100.0, int(value) / 1_000_000 / total_duration * 100))
+
+        async def kill():
+            try:
+                process.kill()
+                await process.wait()
+            except ProcessLookupError:
+                pass
+            stderr_task.cancel()
+
+        try:
+            await asyncio.wait_for(asyncio.gather(read_progress(), process.wait()), timeout=timeout)
+        except MergeCancelled:
+            await kill()
+            raise
+        except asyncio.TimeoutError:
+            await kill()
+            raise VideoMergeError(
+                f"Video merge timed out after {timeout:.0f} seconds",
+                "MERGE_TIMEOUT",
+                retryable=True
+            )
+
+        stderr = await stderr_task
+        return process.returncode, stderr.decode(errors="ignore")
+
+    async def _merge_single_pass(
+        self,
+        video_info: Dict[str, Any],
+        work_dir: Path,
+        original_video_files: List[Dict] = None,
+        progress_callback: Optional[callable] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> Tuple[Path, List[VideoSegmentMetadata], str]:
+        """
+        Produce the final merged video with a single FFmpeg run.
+
+        Replaces _prepare_videos_for_merge + _merge_videos + _compress_merged_video:
+        inputs that already match the delivered format are stream-copied, anything
+        else is normalized and compressed in one encode. Every input must have
+        been probed, since segment boundaries come from the probed durations.
+        FFmpeg is stopped (MergeCancelled) once should_stop() returns True.
+
+        Returns:
+            (output path, segment metadata, strategy) where strategy is
+            "stream_copy" or "single_pass"
+        """
+        videos = video_info["videos"]
+        if not videos:
+            raise VideoMergeError("No videos to merge", "NO_VIDEOS")
+        if not all(video_data.get("probed") for video_data in videos):
+            # Segment boundaries would come from guessed durations
+            raise VideoMergeError("Single-pass merge requires probed durations for every video", "PROBE_MISSING")
+
+        for video_data in videos:
+            input_path = Path(video_data["path"])
+            if not input_path.exists():
+                raise VideoMergeError(f"Input video file does not exist: {input_path}", "FILE_NOT_FOUND")
+            if input_path.stat().st_size == 0:
+                raise VideoMergeError(f"Input video file is empty: {input_path}", "EMPTY_FILE")
+
+        output_path = work_dir / "compressed_merged_video.mp4"
+        if self._can_stream_copy(video_info):
+            strategy = "stream_copy"
+            cmd = self._build_stream_copy_command(video_info, work_dir / "concat_list.txt", output_path)
+        else:
+            strategy = "single_pass"
+            cmd = self._build_single_pass_command(video_info, output_path)
+
+        logger.info(f"Merging {len(videos)} videos with strategy '{strategy}'")
+        logger.debug(f"Merge command: {' '.join(cmd)}")
+
+        returncode, stderr = await self._run_ffmpeg_with_progress(
+            cmd,
+            total_duration=video_info["total_duration"],
+            progress_callback=progress_callback,
+            timeout=self.SINGLE_PASS_TIMEOUT_SECONDS,
+            should_stop=should_stop
+        )
+
+        if returncode != 0 or not output_path.exists() or output_path.stat().st_size == 0:
+            error_msg = stderr.strip() or "Unknown FFmpeg error"
+            truncated_error = error_msg[:500] + "..." if len(error_msg) > 500 else error_msg
+            raise VideoMergeError(
+                f"Failed to merge videos ({strategy}): {truncated_error}",
+                "MERGE_ERROR",
+                retryable=True
+            )
+
+        # Boundaries come from the analysed input durations; a re-encode emits
+        # whole frames at the target rate, so those durations are rounded to it
+        frame_rate = None if strategy == "stream_copy" else self._get_merge_target(video_info)[2]
+        segment_metadata = self._build_segment_metadata(
+            [video_data["duration"] for video_data in videos], frame_rate
+        )
+
+        if progress_callback:
+            progress_callback(100)
+
+        logger.info(f"Videos merged in a single pass ({strategy}): {output_path} ({output_path.stat().st_size} bytes)")
+        return output_path, segment_metadata, strategy
+
+    def _build_segment_metadata(
+        self,
+        durations: List[float],
+        frame_rate: Optional[float] = None
+    ) -> List[VideoSegmentMetadata]:
+        """
+        Segment boundaries for clips concatenated in order.
         
+        Each clip starts where the previous one ends, so boundaries are running
+        sums of the clip durations. When the merge re-encodes at a constant
+        frame_rate, each clip contributes a whole number of frames and its
+        duration is rounded to that frame grid, matching the encoder's
+        timestamps.
+        """
         segments = []
         current_time = 0.0
         
+        for i, duration in enumerate(durations):
+            if frame_rate:
+                duration = max(1, round(duration * frame_rate)) / frame_rate
+            
+            segments.append(VideoSegmentMetadata(
+                segment_index=i,
+                start_time=current_time,
+                end_time=current_time + duration,
+                duration=duration,
+                statement_index=i
+            ))
+            current_time += duration
+        
+        for segment in segments:
+            logger.debug(f"Segment {segment.statement_index}: start={segment.start_time:.3f}s, end={segment.end_time:.3f}s")
+        
+        return segments
+    
+    async def _calculate_segment_metadata(
+        self,
+        video_files,
+        probe_cache: Optional[MediaProbeCache] = None,
+        frame_rate: Optional[float] = None,
+        fallback_video_files: Optional[List[Dict]] = None
+    ) -> List[VideoSegmentMetadata]:
+        """
+        Segment metadata for merging video_files in order.
+        
+        Durations come from the probe cache (usually already filled during
+        analysis), then the upload session's recorded video_duration (taken
+        from fallback_video_files at the same position when given), then 10s.
+        """
+        probe_cache = probe_cache or MediaProbeCache()
+        durations = []
+        
         for i, video_file in enumerate(video_files):
             # Handle different input formats (Dict with session vs Path only)
             if isinstance(video_file, dict):
@@ -936,201 +1355,26 @@ class VideoMergeService:
                 # Fallback to path-only mode
                 video_path = video_file
                 session = None
+            if session is None and fallback_video_files and i < len(fallback_video_files):
+                session = fallback_video_files[i].get("session")
             
-            actual_duration_seconds = None
-            
-            # Try FFprobe first for accuracy
-            if self.ffmpeg_available:
-                try:
-                    cmd = [
-                        "ffprobe",
-                        "-v", "quiet",
-                        "-show_entries", "format=duration",
-                        "-of", "csv=p=0",
-                        str(video_path)
-                    ]
-                    
-                    result = await asyncio.create_subprocess_exec(
-                        *cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    stdout, stderr = await result.communicate()
-                    
-                    if result.returncode == 0:
-                        actual_duration_seconds = float(stdout.decode().strip())
-                        logger.info(f"Video {i}: FFprobe detected duration = {actual_duration_seconds}s")
-                        
-                except Exception as e:
-                    logger.warning(f"FFprobe failed for video {i}: {str(e)}")
+            duration = await probe_cache.duration(video_path) if self.ffmpeg_available else None
             
             # Fallback to session metadata if FFprobe failed
-            if actual_duration_seconds is None and session and hasattr(session, 'metadata') and session.metadata:
+            if duration is None and session and getattr(session, 'metadata', None):
                 video_duration_seconds = session.metadata.get("video_duration")
                 if video_duration_seconds and isinstance(video_duration_seconds, (int, float)):
-                    actual_duration_seconds = float(video_duration_seconds)
-                    logger.info(f"Video {i}: Using session duration = {actual_duration_seconds}s")
+                    duration = float(video_duration_seconds)
+                    logger.info(f"Video {i}: Using session duration = {duration}s")
             
             # Final fallback to default
-            if actual_duration_seconds is None:
-                actual_duration_seconds = 10.0
-                logger.warning(f"Video {i}: Using default duration = {actual_duration_seconds}s")
+            if duration is None:
+                duration = 10.0
+                logger.warning(f"Video {i}: Using default duration = {duration}s")
             
-            segment = VideoSegmentMetadata(
-                segment_index=i,
-                start_time=current_time,
-                end_time=current_time + actual_duration_seconds,
-                duration=actual_duration_seconds,
-                statement_index=i
-            )
-            
-            segments.append(segment)
-            current_time += actual_duration_seconds
-        
-        # DIAGNOSTIC LOGGING POINT 4: Final Metadata - Log segment timing metadata (fallback method)
-        logger.info("🔍 DIAGNOSTIC: Final segment timing metadata being returned (from fallback method):")
-        for i, segment in enumerate(segments):
-            logger.info(f"🔍 DIAGNOSTIC: Segment {i}: start={segment.start_time*1000:.3f}ms, end={segment.end_time*1000:.3f}ms, duration={segment.duration*1000:.3f}ms")
-        
-        if segments:
-            final_segment = segments[-1]
-            logger.info(f"🔍 DIAGNOSTIC: Calculated final segment endTime: {final_segment.end_time*1000:.3f} milliseconds")
+            durations.append(duration)
         
-        return segments
-
-    async def _calculate_segment_metadata(self, video_files, merged_video_path: Path = None) -> List[VideoSegmentMetadata]:
-        """
-        PHASE 1 FIX: Calculate segment metadata using FFprobe on the FINAL MERGED VIDEO
-        This ensures segment boundaries match the actual merged video structure
-        """
-        
-        # If we don't have the merged video path or FFmpeg is unavailable, use fallback
-        if not merged_video_path or not self.ffmpeg_available:
-            logger.warning("Using fallback segment calculation - merged video analysis not available")
-            return await self._calculate_segment_metadata_from_original_videos(video_files)
-        
-        # CRITICAL: Use FFprobe to analyze the FINAL MERGED VIDEO
-        logger.info(f"🎯 ANALYZING FINAL MERGED VIDEO: {merged_video_path}")
-        
-        try:
-            # Get detailed frame information from the merged video
-            cmd = [
-                "ffprobe",
-                "-v", "quiet",
-                "-show_frames",
-                "-select_streams", "v:0",  # Video stream only
-                "-show_entries", "frame=pkt_pts_time,key_frame",
-                "-of", "csv=p=0",
-                str(merged_video_path)
-            ]
-            
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await result.communicate()
-            
-            if result.returncode != 0:
-                logger.error(f"FFprobe frame analysis failed: {stderr.decode()}")
-                return await self._calculate_segment_metadata_from_original_videos(video_files)
-            
-            # Parse frame data to find keyframes (segment boundaries)
-            frame_lines = stdout.decode().strip().split('\n')
-            keyframes = []
-            
-            for line in frame_lines:
-                if line.strip():
-                    parts = line.split(',')
-                    if len(parts) >= 2:
-                        time_str, is_keyframe = parts[0], parts[1]
-                        if is_keyframe == '1':  # Keyframe
-                            try:
-                                keyframes.append(float(time_str))
-                            except ValueError:
-                                continue
-            
-            logger.info(f"🎯 Found {len(keyframes)} keyframes in merged video")
-            
-            # Now get the total duration of the merged video
-            duration_cmd = [
-                "ffprobe",
-                "-v", "quiet",
-                "-show_entries", "format=duration",
-                "-of", "csv=p=0",
-                str(merged_video_path)
-            ]
-            
-            duration_result = await asyncio.create_subprocess_exec(
-                *duration_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            duration_stdout, duration_stderr = await duration_result.communicate()
-            
-            if duration_result.returncode != 0:
-                logger.error(f"Failed to get merged video duration: {duration_stderr.decode()}")
-                return await self._calculate_segment_metadata_from_original_videos(video_files)
-            
-            total_duration = float(duration_stdout.decode().strip())
-            logger.info(f"🎯 Merged video total duration: {total_duration}s")
-            
-            # Create segments based on the expected number of videos
-            expected_segments = len(video_files)
-            segments = []
-            
-            if len(keyframes) >= expected_segments + 1:
-                # We have enough keyframes to define segment boundaries
-                for i in range(expected_segments):
-                    start_time = keyframes[i] if i < len(keyframes) else (i * total_duration / expected_segments)
-                    end_time = keyframes[i + 1] if i + 1 < len(keyframes) else total_duration
-                    
-                    segment = VideoSegmentMetadata(
-                        segment_index=i,
-                        start_time=start_time,
-                        end_time=end_time,
-                        duration=end_time - start_time,
-                        statement_index=i
-                    )
-                    
-                    logger.info(f"🎯 ACCURATE SEGMENT {i}: start={start_time:.3f}s, end={end_time:.3f}s, duration={end_time - start_time:.3f}s")
-                    segments.append(segment)
-            else:
-                # Not enough keyframes, divide duration evenly but use actual merged video duration
-                logger.warning(f"Only {len(keyframes)} keyframes found, expected {expected_segments + 1}. Using even division.")
-                segment_duration = total_duration / expected_segments
-                
-                for i in range(expected_segments):
-                    start_time = i * segment_duration
-                    end_time = (i + 1) * segment_duration if i < expected_segments - 1 else total_duration
-                    
-                    segment = VideoSegmentMetadata(
-                        segment_index=i,
-                        start_time=start_time,
-                        end_time=end_time,
-                        duration=end_time - start_time,
-                        statement_index=i
-                    )
-                    
-                    logger.info(f"🎯 CALCULATED SEGMENT {i}: start={start_time:.3f}s, end={end_time:.3f}s, duration={end_time - start_time:.3f}s")
-                    segments.append(segment)
-            
-            logger.info(f"🎯 SEGMENT METADATA CALCULATED FROM FINAL MERGED VIDEO - {len(segments)} segments")
-            
-            # DIAGNOSTIC LOGGING POINT 4: Final Metadata - Log segment timing metadata
-            logger.info("🔍 DIAGNOSTIC: Final segment timing metadata being returned:")
-            for i, segment in enumerate(segments):
-                logger.info(f"🔍 DIAGNOSTIC: Segment {i}: start={segment.start_time*1000:.3f}ms, end={segment.end_time*1000:.3f}ms, duration={segment.duration*1000:.3f}ms")
-            
-            if segments:
-                final_segment = segments[-1]
-                logger.info(f"🔍 DIAGNOSTIC: Calculated final segment endTime: {final_segment.end_time*1000:.3f} milliseconds")
-            
-            return segments
-            
-        except Exception as e:
-            logger.error(f"Error analyzing merged video for segments: {str(e)}")
-            return await self._calculate_segment_metadata_from_original_videos(video_files)
+        return self._build_segment_metadata(durations, frame_rate)
     
     async def _compress_merged_video(
         self, 
@@ -1151,18 +1395,7 @@ class VideoMergeService:
         cmd = [
             "ffmpeg",
             "-i", str(merged_path),
-            "-c:v", "libx264",
-            "-preset", "fast",  # Use faster preset for Railway environment
-            "-crf", "23",  # Fixed CRF for consistency
-            "-maxrate", "1500k",  # Conservative bitrate for Railway
-            "-bufsize", "3000k",  # Conservative buffer
-            "-c:a", "aac",
-            "-b:a", "128k",
-            "-movflags", "+faststart",  # Enable fast start for web streaming
-            "-pix_fmt", "yuv420p",  # Ensure compatibility with most players
-            "-profile:v", "baseline",  # Use baseline profile for better compatibility
-            "-level", "3.1",  # Lower H.264 level for broader compatibility
-            "-threads", "2",  # Limit threads for Railway environment
+            *self._get_final_encoding_args(),
             "-y",  # Overwrite output file
             str(compressed_path)
         ]
@@ -1178,7 +1411,7 @@ class VideoMergeService:
             # Add timeout for Railway environment
             compression_timeout = 300  # 5 minutes timeout
             
-            process = await asyncio.create_subprocess_exec(
+            process = await traced_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
@@ -1247,6 +1480,23 @@ class VideoMergeService:
                 "COMPRESSION_ERROR"
             )
     
+    def _get_final_encoding_args(self) -> List[str]:
+        """FFmpeg encoder arguments for the delivered video (legacy compression pass and single-pass merge)"""
+        return [
+            "-c:v", "libx264",
+            "-preset", "fast",  # Use faster preset for Railway environment
+            "-crf", "23",  # Fixed CRF for consistency
+            "-maxrate", f"{self.FINAL_VIDEO_MAX_BITRATE // 1000}k",  # Conservative bitrate for Railway
+            "-bufsize", f"{self.FINAL_VIDEO_MAX_BITRATE * 2 // 1000}k",  # Conservative buffer
+            "-c:a", "aac",
+            "-b:a", f"{self.FINAL_AUDIO_BITRATE // 1000}k",
+            "-movflags", "+faststart",  # Enable fast start for web streaming
+            "-pix_fmt", "yuv420p",  # Ensure compatibility with most players
+            "-profile:v", "baseline",  # Use baseline profile for better compatibility
+            "-level", "3.1",  # Lower H.264 level for broader compatibility
+            "-threads", str(settings.MERGE_FFMPEG_THREADS),  # Concurrent merges are sized by this (see MergeScheduler)
+        ]
+    
     def _get_compression_settings(self, quality_preset: str = "medium") -> Dict[str, Any]:
         """Get compression settings based on quality preset"""
         
@@ -1292,7 +1542,7 @@ class VideoMergeService:
                 str(input_path)
             ]
             
-            duration_result = await asyncio.create_subprocess_exec(
+            duration_result = await traced_subprocess_exec(
                 *duration_cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
@@ -1508,6 +1758,7 @@ class VideoMergeService:
                     # Mark session as cleaned up in metadata
                     session.metadata["cleaned_up"] = True
                     session.metadata["cleanup_timestamp"] = datetime.utcnow().isoformat()
+                    await self.upload_service.save_session(session)
                     cleanup_results["sessions_cleaned"] += 1
                     
                 except Exception as e:
@@ -1516,12 +1767,6 @@ class VideoMergeService:
                     cleanup_results["errors"].append(error_msg)
                     logger.error(error_msg)
             
-            # Save updated session metadata
-            try:
-                await self.upload_service._save_sessions()
-            except Exception as e:
-                logger.error(f"Failed to save session metadata after cleanup: {e}")
-            
             logger.info(
                 f"Individual video cleanup completed for merge session {merge_session_id}: "
                 f"{cleanup_results['files_deleted']} files deleted, "
@@ -1556,10 +1801,55 @@ class VideoMergeService:
             logger.warning(f"Failed to clean up temporary directory {work_dir}: {e}")
     
     def _update_merge_progress(self, merge_session_id: str, progress: float):
-        """Update merge progress for a session"""
-        if merge_session_id in self.merge_sessions:
-            self.merge_sessions[merge_session_id]["progress"] = progress
-            self.merge_sessions[merge_session_id]["updated_at"] = datetime.utcnow()
+        """
+        Update merge progress for a session, saving it to the session store at
+        most every MERGE_PROGRESS_SAVE_SECONDS so any worker can report it
+        """
+        merge_session = self.merge_sessions.get(merge_session_id)
+        if merge_session is None:
+            return
+        merge_session["progress"] = progress
+        merge_session["updated_at"] = datetime.utcnow()
+        
+        if merge_session.get("worker_id") != MERGE_WORKER_ID or merge_session["status"] not in [
+            MergeSessionStatus.PENDING, MergeSessionStatus.PROCESSING
+        ]:
+            return  # Finished sessions are saved by _save_finished
+        now = time.monotonic()
+        if now - self._progress_saved_at.get(merge_session_id, 0.0) < settings.MERGE_PROGRESS_SAVE_SECONDS:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._progress_saved_at[merge_session_id] = now
+        task = loop.create_task(self.session_store.save(merge_session))
+        self._progress_saves.add(task)
+        task.add_done_callback(self._progress_saves.discard)
+    
+    async def _save_finished(self, merge_session: Dict[str, Any]):
+        """
+        Persist a session that has finished and drop it from memory, so status
+        and lookups come from the store from then on. A run that was cancelled
+        meanwhile keeps its cancelled row and is reported as cancelled here too.
+        One whose snapshot could not be written stays here, indexed by its
+        merged video, until cleanup_old_sessions prunes it.
+        """
+        merge_session_id = merge_session["merge_session_id"]
+        self._progress_saved_at.pop(merge_session_id, None)
+        saved = await self.session_store.save(merge_session)
+        if not saved and self.session_store.is_cancelled(merge_session):
+            if merge_session["status"] != MergeSessionStatus.CANCELLED:
+                merge_session["status"] = MergeSessionStatus.CANCELLED
+                merge_session["cancelled_at"] = datetime.utcnow()
+            saved = True
+        if saved:
+            if self.merge_sessions.get(merge_session_id) is merge_session:
+                del self.merge_sessions[merge_session_id]
+            return
+        video_file_id = merged_video_file_id(merge_session)
+        if video_file_id:
+            self._unsaved_by_video[video_file_id] = merge_session
     
     def _estimate_merge_duration(self, video_files: List[Dict]) -> float:
         """Estimate merge duration based on video files"""
@@ -1581,34 +1871,146 @@ class VideoMergeService:
         return base_time + duration_factor + size_factor
     
     async def get_merge_status(self, merge_session_id: str) -> Optional[Dict[str, Any]]:
-        """Get the status of a merge session"""
-        return self.merge_sessions.get(merge_session_id)
-    
-    async def cancel_merge(self, merge_session_id: str) -> bool:
-        """Cancel an ongoing merge session"""
-        merge_session = self.merge_sessions.get(merge_session_id)
-        if not merge_session:
-            return False
+        """
+        Get the status of a merge session
         
-        if merge_session["status"] in [MergeSessionStatus.COMPLETED, MergeSessionStatus.FAILED]:
-            return False  # Cannot cancel completed or failed merges
+        Includes queue_position: 0 while merging, 1-based place in line while
+        waiting for a slot, None once finished or when another worker owns
+        the merge (its status comes from the session store).
+        """
+        merge_session = self.merge_sessions.get(merge_session_id) or await self.session_store.load(merge_session_id)
+        if merge_session is None:
+            return None
+        queue_position = self.scheduler.position(merge_session_id)
+        status = {**merge_session, "queue_position": queue_position}
+        if queue_position:
+            status["estimated_start_seconds"] = self.scheduler.estimate_wait_seconds(queue_position)
+        return status
+    
+    def is_merge_active(self, merge_session_id: str, merge_session: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Whether a worker is queueing or running the merge: this process, or
+        the one that persisted merge_session (a snapshot from the session
+        store) as long as its lease has not expired
+        """
+        local_session = self.merge_sessions.get(merge_session_id)
+        if local_session is not None:
+            return local_session["status"] in [MergeSessionStatus.PENDING, MergeSessionStatus.PROCESSING]
+        return (
+            merge_session is not None
+            and merge_session["status"] in [MergeSessionStatus.PENDING, MergeSessionStatus.PROCESSING]
+            and not self._lease_expired(merge_session)
+        )
+    
+    def _lease_expired(self, merge_session: Dict[str, Any]) -> bool:
+        """Whether the worker that owns an in-flight session has stopped renewing its updated_at"""
+        renewed_at = merge_session.get("updated_at") or merge_session.get("created_at")
+        if not isinstance(renewed_at, datetime):
+            return True
+        return datetime.utcnow() - renewed_at > timedelta(seconds=settings.MERGE_SESSION_LEASE_SECONDS)
+    
+    def _is_cancelled(self, merge_session: Dict[str, Any]) -> bool:
+        """
+        Whether a merge was cancelled: here, through the store by another
+        VideoMergeService, or by another worker (seen when the store refuses
+        this run's next save)
+        """
+        return (
+            merge_session["status"] == MergeSessionStatus.CANCELLED
+            or self.session_store.is_cancelled(merge_session)
+        )
+    
+    def _check_cancelled(self, merge_session: Dict[str, Any]):
+        """Stop a running merge between stages once it has been cancelled"""
+        if self._is_cancelled(merge_session):
+            raise MergeCancelled(merge_session["merge_session_id"])
+    
+    def _start_lease_renewal(self):
+        """Renew this process's in-flight sessions in the background until none are left"""
+        if self._lease_task is None or self._lease_task.done():
+            self._lease_task = asyncio.create_task(self._renew_leases())
+    
+    async def _renew_leases(self):
+        """
+        Refresh updated_at on every queued or running merge this process owns,
+        several times per lease, so other workers don't restart them. A merge
+        another worker cancelled through the store is stopped here.
+        """
+        interval = settings.MERGE_SESSION_LEASE_SECONDS / 4
+        while True:
+            await asyncio.sleep(interval)
+            owned = [
+                merge_session for merge_session in list(self.merge_sessions.values())
+                if merge_session.get("worker_id") == MERGE_WORKER_ID
+                and merge_session["status"] in [MergeSessionStatus.PENDING, MergeSessionStatus.PROCESSING]
+            ]
+            if not owned:
+                return
+            for merge_session in owned:
+                if self.session_store.is_cancelled(merge_session):
+                    await self._cancel_local(merge_session)
+                    continue
+                persisted = await self.session_store.load(merge_session["merge_session_id"])
+                if (
+                    persisted
+                    and persisted["status"] == MergeSessionStatus.CANCELLED
+                    and persisted.get("created_at") == merge_session.get("created_at")
+                ):
+                    await self._cancel_local(merge_session)
+                    continue
+                merge_session["updated_at"] = datetime.utcnow()
+                if not await self.session_store.save(merge_session) and self.session_store.is_cancelled(merge_session):
+                    await self._cancel_local(merge_session)
+    
+    async def _cancel_local(self, merge_session: Dict[str, Any]):
+        """Stop a merge this process queued or ran, and remove its temporary files"""
+        merge_session_id = merge_session["merge_session_id"]
         
+        # A queued merge never starts; a running one stops at its next progress
+        # update or stage boundary (_process_merge sees the cancelled status)
+        self.scheduler.cancel(merge_session_id)
         merge_session["status"] = MergeSessionStatus.CANCELLED
         merge_session["updated_at"] = datetime.utcnow()
         merge_session["cancelled_at"] = datetime.utcnow()
+        await self._save_finished(merge_session)
         
         # Clean up temporary files
         work_dir = self.temp_dir / merge_session_id
         await self._cleanup_temp_files(work_dir)
         
         logger.info(f"Merge session {merge_session_id} cancelled")
+    
+    async def cancel_merge(self, merge_session_id: str) -> bool:
+        """
+        Cancel an ongoing merge session. A merge another worker still holds
+        the lease on is marked cancelled in the session store, which refuses
+        that worker's later saves of the run; the worker stops the merge when
+        one is refused or at its next lease renewal. One whose worker is gone
+        is cancelled here.
+        """
+        merge_session = self.merge_sessions.get(merge_session_id) or await self.session_store.load(merge_session_id)
+        if not merge_session:
+            return False
+        
+        if merge_session["status"] in [MergeSessionStatus.COMPLETED, MergeSessionStatus.FAILED]:
+            return False  # Cannot cancel completed or failed merges
+        
+        if merge_session_id not in self.merge_sessions and self.is_merge_active(merge_session_id, merge_session):
+            # Its work_dir belongs to the owning worker, which cleans it up
+            merge_session["status"] = MergeSessionStatus.CANCELLED
+            merge_session["cancelled_at"] = datetime.utcnow()
+            await self.session_store.save(merge_session)
+            logger.info(f"Merge session {merge_session_id} cancelled; worker {merge_session.get('worker_id')} will stop it")
+            return True
+        
+        await self._cancel_local(merge_session)
         return True
     
     async def cleanup_individual_videos_for_session(self, merge_session_id: str, user_id: str) -> Dict[str, Any]:
         """Public method to manually clean up individual videos for a specific merge session"""
         try:
             # Verify the merge session exists and is completed
-            merge_session = self.merge_sessions.get(merge_session_id)
+            merge_session = self.merge_sessions.get(merge_session_id) or await self.session_store.load(merge_session_id)
             if not merge_session:
                 return {
                     "success": False,
@@ -1643,10 +2045,37 @@ class VideoMergeService:
                 "error": str(e)
             }
 
-    async def cleanup_old_sessions(self, max_age_hours: int = 24):
-        """Clean up old merge sessions and temporary files"""
+    async def find_merge_session_by_video_file_id(self, video_file_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The user's merge session that produced a merged video. A merge finished
+        here whose snapshot could not be saved is still found; every other
+        session comes from the store.
+        """
+        merge_session = self._unsaved_by_video.get(video_file_id)
+        if merge_session is not None and merge_session["user_id"] == user_id:
+            return merge_session
+        return await self.session_store.find_by_video_file_id(video_file_id, user_id)
+
+    async def cleanup_old_sessions(self, max_age_hours: Optional[float] = None):
+        """
+        Clean up merge sessions not updated within max_age_hours (default:
+        MERGE_SESSION_TTL_HOURS), in memory and in the session store, along
+        with their temporary files
+        """
+        max_age_hours = max_age_hours if max_age_hours is not None else self.session_store.ttl_hours
         cutoff_time = datetime.utcnow() - timedelta(hours=max_age_hours)
         
+        expired = {
+            session_id: (session["user_id"], session["status"])
+            for session_id, session in self.merge_sessions.items()
+            if session.get("updated_at", session.get("created_at")) < cutoff_time
+        }
+        for session in self._unsaved_by_video.values():
+            if session["updated_at"] < cutoff_time:
+                expired.setdefault(session["merge_session_id"], (session["user_id"], session["status"]))
+        for row in await self.session_store.get_expired(max_age_hours):
+            expired.setdefault(row["merge_session_id"], (row["user_id"], row["status"]))
+        
         sessions_to_remove = []
         cleanup_stats = {
             "sessions_removed": 0,
@@ -1654,27 +2083,31 @@ class VideoMergeService:
             "errors": []
         }
         
-        for session_id, session in self.merge_sessions.items():
-            if session["updated_at"] < cutoff_time:
-                try:
-                    # Clean up temporary files
-                    work_dir = self.temp_dir / session_id
-                    await self._cleanup_temp_files(work_dir)
-                    
-                    # If session was completed, also clean up individual videos
-                    if session["status"] == MergeSessionStatus.COMPLETED:
-                        cleanup_result = await self._cleanup_individual_videos(session_id, session["user_id"])
-                        cleanup_stats["individual_videos_cleaned"] += cleanup_result.get("files_deleted", 0)
-                    
-                    sessions_to_remove.append(session_id)
-                    
-                except Exception as e:
-                    error_msg = f"Error cleaning up session {session_id}: {str(e)}"
-                    cleanup_stats["errors"].append(error_msg)
-                    logger.error(error_msg)
+        for session_id, (user_id, session_status) in expired.items():
+            try:
+                # Clean up temporary files
+                work_dir = self.temp_dir / session_id
+                await self._cleanup_temp_files(work_dir)
+                
+                # If session was completed, also clean up individual videos
+                if session_status == MergeSessionStatus.COMPLETED:
+                    cleanup_result = await self._cleanup_individual_videos(session_id, user_id)
+                    cleanup_stats["individual_videos_cleaned"] += cleanup_result.get("files_deleted", 0)
+                
+                sessions_to_remove.append(session_id)
+                
+            except Exception as e:
+                error_msg = f"Error cleaning up session {session_id}: {str(e)}"
+                cleanup_stats["errors"].append(error_msg)
+                logger.error(error_msg)
         
         for session_id in sessions_to_remove:
-            del self.merge_sessions[session_id]
+            self.merge_sessions.pop(session_id, None)
+        self._unsaved_by_video = {
+            video_file_id: session for video_file_id, session in self._unsaved_by_video.items()
+            if session["merge_session_id"] not in sessions_to_remove
+        }
+        await self.session_store.delete(sessions_to_remove)
         
         cleanup_stats["sessions_removed"] = len(sessions_to_remove)
         
@@ -1688,18 +2121,36 @@ class VideoMergeService:
         
         return cleanup_stats
     
+    async def run_scheduled_cleanup(self, interval_seconds: float):
+        """Run cleanup_old_sessions every interval_seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.cleanup_old_sessions()
+            except Exception as e:
+                logger.error(f"Scheduled merge session cleanup failed: {e}")
+    
     async def _process_merge_sync(
         self, 
         merge_session_id: str, 
         video_paths: List[Path], 
-        quality: str = "medium"
+        quality: str = "medium",
+        user_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Synchronous merge processing for direct upload endpoint
         
         This is a simplified version of _process_merge that processes videos
-        directly without the full session management overhead.
+        directly without the full session management overhead. The caller waits
+        for a scheduler slot; VideoMergeError(QUEUE_FULL) if none is coming.
         """
+        return await self._run_scheduled(
+            merge_session_id, user_id,
+            lambda: self._run_merge_sync(merge_session_id, video_paths, quality)
+        )
+    
+    async def _run_merge_sync(self, merge_session_id: str, video_paths: List[Path], quality: str) -> Dict[str, Any]:
+        """Body of _process_merge_sync, run inside a scheduler slot"""
         try:
             logger.info(f"Starting synchronous merge for session {merge_session_id}")
             
@@ -1710,22 +2161,29 @@ class VideoMergeService:
             try:
                 # Step 1: Analyze videos
                 video_files = [{"path": path, "index": i} for i, path in enumerate(video_paths)]
-                video_info = await self._analyze_videos(video_files, work_dir)
-                
-                # Step 2: Prepare videos for merging
-                prepared_videos = await self._prepare_videos_for_merge(
-                    video_files, video_info, work_dir
-                )
-                
-                # Step 3: Merge videos
-                merged_path, segment_metadata = await self._merge_videos(
-                    prepared_videos, work_dir, original_video_files=video_files
-                )
+                probe_cache = MediaProbeCache()
+                video_info = await self._analyze_videos(video_files, work_dir, probe_cache)
                 
-                # Step 4: Apply compression
-                compressed_path = await self._compress_merged_video(
-                    merged_path, work_dir, quality_preset=quality
-                )
+                if self._use_single_pass_merge(video_info):
+                    # Steps 2-4 in one FFmpeg run
+                    compressed_path, segment_metadata, _ = await self._merge_single_pass(
+                        video_info, work_dir, original_video_files=video_files
+                    )
+                else:
+                    # Step 2: Prepare videos for merging
+                    prepared_videos = await self._prepare_videos_for_merge(
+                        video_files, video_info, work_dir, probe_cache
+                    )
+                    
+                    # Step 3: Merge videos
+                    merged_path, segment_metadata = await self._merge_videos(
+                        prepared_videos, work_dir, original_video_files=video_files, probe_cache=probe_cache
+                    )
+                    
+                    # Step 4: Apply compression
+                    compressed_path = await self._compress_merged_video(
+                        merged_path, work_dir, quality_preset=quality
+                    )
                 
                 # Step 5: Upload to storage
                 final_result = await self._finalize_merge(
@@ -1768,6 +2226,22 @@ class VideoMergeService:
         temp_video_files: List[str], 
         user_id: str, 
         quality_preset: str = "medium"
+    ) -> Dict[str, Any]:
+        """
+        Merge videos from temporary files once the scheduler grants a slot.
+        
+        Raises VideoMergeError(QUEUE_FULL) when the merge queue is full.
+        """
+        return await self._run_scheduled(
+            f"temp_merge_{user_id}_{uuid.uuid4().hex[:8]}", user_id,
+            lambda: self._merge_temp_videos(temp_video_files, user_id, quality_preset)
+        )
+    
+    async def _merge_temp_videos(
+        self, 
+        temp_video_files: List[str], 
+        user_id: str, 
+        quality_preset: str = "medium"
     ) -> Dict[str, Any]:
         """
         Merge videos from temporary files directly without using upload sessions.
@@ -1827,44 +2301,23 @@ class VideoMergeService:
             
             logger.info(f"Processed {len(video_files)} temp video files for merge")
             
-            # DIAGNOSTIC LOGGING POINT 1: Before the Merge - Get duration of each source clip
-            logger.info("🔍 DIAGNOSTIC: Analyzing source video clips before temp merge...")
+            # Source clip durations give the segment boundaries after the merge
+            probe_cache = MediaProbeCache()
             source_durations = []
-            
             for i, video_file in enumerate(video_files):
-                temp_file_path = video_file['file_path']
-                
-                # Use ffprobe to get accurate duration
-                try:
-                    result = await asyncio.create_subprocess_exec(
-                        'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                        '-of', 'csv=p=0', str(temp_file_path),
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    stdout, stderr = await result.communicate()
-                    
-                    if result.returncode == 0:
-                        duration = float(stdout.decode().strip())
-                        source_durations.append(duration)
-                        logger.info(f"🔍 DIAGNOSTIC: Source clip {i} duration: {duration:.6f} seconds")
-                    else:
-                        logger.warning(f"🔍 DIAGNOSTIC: Could not get duration for source clip {i}")
-                        source_durations.append(0.0)
-                        
-                except Exception as e:
-                    logger.warning(f"🔍 DIAGNOSTIC: Error getting duration for source clip {i}: {e}")
-                    source_durations.append(0.0)
+                duration = await probe_cache.duration(video_file['file_path'])
+                if duration is None:
+                    logger.warning(f"Could not get duration for source clip {i}: {probe_cache.error(video_file['file_path'])}")
+                source_durations.append(duration or 0.0)
             
-            total_expected_duration = sum(source_durations)
-            logger.info(f"🔍 DIAGNOSTIC: Source clip durations: {source_durations}")
-            logger.info(f"🔍 DIAGNOSTIC: Total expected merged duration: {total_expected_duration:.6f} seconds")
+            logger.info(f"Source clip durations: {source_durations}")
             
             # Create merge session
             merge_session = {
                 "merge_session_id": merge_session_id,
                 "user_id": user_id,
                 "status": MergeSessionStatus.PROCESSING,
+                "worker_id": MERGE_WORKER_ID,
                 "video_files": video_files,
                 "quality_preset": quality_preset,
                 "created_at": datetime.utcnow(),
@@ -1876,6 +2329,7 @@ class VideoMergeService:
             }
             
             self.merge_sessions[merge_session_id] = merge_session
+            self._start_lease_renewal()
             
             # Process merge synchronously since we're in temp mode
             self._update_merge_progress(merge_session_id, 10.0)
@@ -1935,7 +2389,7 @@ class VideoMergeService:
                 '-profile:v', 'baseline',  # H.264 baseline profile for maximum compatibility
                 '-level', '3.1',  # H.264 level for mobile compatibility
                 '-max_muxing_queue_size', '2048',  # Larger queue for async processing
-                '-threads', '4',  # Limit threads to prevent resource issues
+                '-threads', str(settings.MERGE_FFMPEG_THREADS),  # Limit threads to prevent resource issues
                 '-y',  # Overwrite output file
                 str(output_path)
             ]
@@ -1947,7 +2401,7 @@ class VideoMergeService:
             self._update_merge_progress(merge_session_id, 30.0)
             
             # Execute FFmpeg
-            process = await asyncio.create_subprocess_exec(
+            process = await traced_subprocess_exec(
                 *ffmpeg_cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
@@ -1974,37 +2428,6 @@ class VideoMergeService:
             
             logger.info(f"Merge completed, file size: {file_size} bytes")
             
-            # DIAGNOSTIC LOGGING POINT 3: After the Merge - Check actual merged video duration
-            logger.info("🔍 DIAGNOSTIC: Analyzing merged video file after FFmpeg completion...")
-            try:
-                result = await asyncio.create_subprocess_exec(
-                    'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                    '-of', 'csv=p=0', str(output_path),
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await result.communicate()
-                
-                if result.returncode == 0:
-                    actual_merged_duration = float(stdout.decode().strip())
-                    logger.info(f"🔍 DIAGNOSTIC: Actual merged video duration: {actual_merged_duration:.6f} seconds")
-                    
-                    # Compare with expected duration
-                    if 'total_expected_duration' in locals():
-                        duration_difference = actual_merged_duration - total_expected_duration
-                        logger.info(f"🔍 DIAGNOSTIC: Duration difference (actual vs expected): {duration_difference:.6f} seconds")
-                        
-                        if abs(duration_difference) > 0.1:  # More than 100ms difference
-                            logger.warning(f"🔍 DIAGNOSTIC: Significant duration mismatch detected!")
-                            logger.warning(f"🔍 DIAGNOSTIC: Expected: {total_expected_duration:.6f}s, Got: {actual_merged_duration:.6f}s")
-                    else:
-                        logger.warning("🔍 DIAGNOSTIC: total_expected_duration not available for comparison")
-                else:
-                    logger.warning("🔍 DIAGNOSTIC: Could not get merged video duration via ffprobe")
-                    
-            except Exception as e:
-                logger.warning(f"🔍 DIAGNOSTIC: Error analyzing merged video duration: {e}")
-            
             # CRITICAL FIX: Calculate segment metadata based on actual video durations
             logger.info("🔍 DIAGNOSTIC: Calculating segment metadata from actual video durations...")
             
@@ -2042,23 +2465,22 @@ class VideoMergeService:
             
             # Upload to S3
             try:
-                with open(output_path, 'rb') as f:
-                    video_content = f.read()
-                
                 # Upload merged video to S3
-                s3_url = await self.cloud_storage.upload_file(
-                    file_data=video_content,
-                    key=output_filename,
-                    content_type="video/mp4",
-                    metadata={
-                        "merge_session_id": merge_session_id,
-                        "video_count": str(len(video_files)),
-                        "quality_preset": quality_preset,
-                        "file_size": str(file_size),
-                        "user_id": str(user_id),
-                        "created_at": datetime.utcnow().isoformat()
-                    }
-                )
+                with open(output_path, 'rb') as f:
+                    s3_url = await self.cloud_storage.upload_file_stream(
+                        file_stream=f,
+                        key=output_filename,
+                        content_type="video/mp4",
+                        file_size=file_size,
+                        metadata={
+                            "merge_session_id": merge_session_id,
+                            "video_count": str(len(video_files)),
+                            "quality_preset": quality_preset,
+                            "file_size": str(file_size),
+                            "user_id": str(user_id),
+                            "created_at": datetime.utcnow().isoformat()
+                        }
+                    )
                 
                 # Generate a file ID from the filename
                 file_id = output_filename.replace('.mp4', '')
@@ -2077,6 +2499,8 @@ class VideoMergeService:
                 }
                 
                 self._update_merge_progress(merge_session_id, 100.0)
+                merge_session["completed_at"] = datetime.utcnow()
+                await self._save_finished(merge_session)
                 
                 logger.info(f"Temp video merge completed successfully: {s3_url}")
                 
@@ -2094,6 +2518,8 @@ class VideoMergeService:
                 logger.error(f"S3 upload failed for temp merge {merge_session_id}: {str(e)}")
                 merge_session["status"] = MergeSessionStatus.FAILED
                 merge_session["error_message"] = f"Upload failed: {str(e)}"
+                merge_session["failed_at"] = datetime.utcnow()
+                await self._save_finished(merge_session)
                 raise VideoMergeError(f"Failed to upload merged video: {str(e)}")
                 
         except VideoMergeError:
@@ -2101,8 +2527,11 @@ class VideoMergeService:
         except Exception as e:
             logger.error(f"Temp video merge failed for session {merge_session_id}: {str(e)}")
             if merge_session_id in self.merge_sessions:
-                self.merge_sessions[merge_session_id]["status"] = MergeSessionStatus.FAILED
-                self.merge_sessions[merge_session_id]["error_message"] = str(e)
+                merge_session = self.merge_sessions[merge_session_id]
+                merge_session["status"] = MergeSessionStatus.FAILED
+                merge_session["error_message"] = str(e)
+                merge_session["failed_at"] = datetime.utcnow()
+                await self._save_finished(merge_session)
             raise VideoMergeError(f"Merge processing failed: {str(e)}")
             
         finally:
@@ -267,7 +267,7 @@ class TestChallengeVideoAPI:
         updated_session.uploaded_chunks = [0]
         updated_session.updated_at = datetime.utcnow()
         
-        mock_upload_service_patch.upload_chunk = AsyncMock(return_value=(updated_session, True))
+        mock_upload_service_patch.upload_chunk_stream = AsyncMock(return_value=(updated_session, True))
         mock_upload_service_patch.get_remaining_chunks = Mock(return_value=[1, 2, 3, 4])
         mock_upload_service_patch.get_progress_percent = Mock(return_value=20.0)
         
@@ -606,7 +606,7 @@ class TestChallengeVideoAPIErrorHandling:
     def test_upload_chunk_upload_service_error(self, mock_upload_service_patch, mock_auth, mock_upload_session):
         """Test chunk upload with upload service error"""
         mock_upload_service_patch.get_upload_status = AsyncMock(return_value=mock_upload_session)
-        mock_upload_service_patch.upload_chunk = AsyncMock(
+        mock_upload_service_patch.upload_chunk_stream = AsyncMock(
             side_effect=UploadServiceError("Chunk validation failed", UploadErrorType.VALIDATION_ERROR)
         )
         
@@ -0,0 +1,29 @@
+"""
+Tests that request profiling controls and kept traces are limited to admins
+"""
+from fastapi.testclient import TestClient
+
+from main import app
+from services.auth_service import create_access_token
+
+client = TestClient(app)
+
+USER = {"Authorization": f"Bearer {create_access_token({'sub': '7', 'permissions': ['media:read']})}"}
+ADMIN = {"Authorization": f"Bearer {create_access_token({'sub': '1', 'permissions': ['admin']})}"}
+
+
+def test_profiling_controls_and_traces_require_admin():
+    assert client.get("/api/v1/monitoring/profiling", headers=USER).status_code == 200
+    for method, path in [("put", "/profiling"), ("get", "/profiling/traces"),
+                         ("get", "/profiling/traces/missing"), ("delete", "/profiling/traces")]:
+        response = getattr(client, method)(f"/api/v1/monitoring{path}", headers=USER)
+        assert response.status_code == 403
+
+    assert client.get("/api/v1/monitoring/profiling/traces", headers=ADMIN).status_code == 200
+    assert client.get("/api/v1/monitoring/profiling/traces/missing", headers=ADMIN).status_code == 404
+
+
+def test_profile_request_header_is_ignored_by_default():
+    response = client.get("/api/v1/monitoring/profiling", headers={**USER, "X-Profile-Request": "1"})
+    assert "x-profile-trace-id" not in response.headers
+    assert response.json()["profiling"]["header_enabled"] is False
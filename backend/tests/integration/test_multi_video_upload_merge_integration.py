@@ -172,7 +172,7 @@ class TestMultiVideoUploadMergeIntegration:
             updated_session = Mock(spec=UploadSession)
             updated_session.uploaded_chunks = [0]
             updated_session.updated_at = datetime.utcnow()
-            upload_service.upload_chunk = AsyncMock(return_value=(updated_session, True))
+            upload_service.upload_chunk_stream = AsyncMock(return_value=(updated_session, True))
             upload_service.get_remaining_chunks = Mock(return_value=[])
             upload_service.get_progress_percent = Mock(return_value=100.0)
             
@@ -328,7 +328,7 @@ class TestMultiVideoUploadMergeIntegration:
         # Simulate chunk upload failure
         session = mock_sessions[0]
         upload_service.get_upload_status = AsyncMock(return_value=session)
-        upload_service.upload_chunk = AsyncMock(
+        upload_service.upload_chunk_stream = AsyncMock(
             side_effect=UploadServiceError("Chunk validation failed", UploadErrorType.VALIDATION_ERROR)
         )
         
@@ -344,7 +344,7 @@ class TestMultiVideoUploadMergeIntegration:
         updated_session = Mock(spec=UploadSession)
         updated_session.uploaded_chunks = [0]
         updated_session.updated_at = datetime.utcnow()
-        upload_service.upload_chunk = AsyncMock(return_value=(updated_session, True))
+        upload_service.upload_chunk_stream = AsyncMock(return_value=(updated_session, True))
         upload_service.get_remaining_chunks = Mock(return_value=[])
         upload_service.get_progress_percent = Mock(return_value=100.0)
         
@@ -477,7 +477,7 @@ class TestMultiVideoUploadMergeIntegration:
             updated.updated_at = datetime.utcnow()
             updated_sessions.append(updated)
         
-        upload_service.upload_chunk = AsyncMock(side_effect=[(s, True) for s in updated_sessions])
+        upload_service.upload_chunk_stream = AsyncMock(side_effect=[(s, True) for s in updated_sessions])
         upload_service.get_remaining_chunks = Mock(return_value=[])
         upload_service.get_progress_percent = Mock(return_value=100.0)
         
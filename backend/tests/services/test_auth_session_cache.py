@@ -0,0 +1,113 @@
+"""
+Tests for the verified session cache in AuthService
+"""
+import logging
+from unittest.mock import Mock
+
+import pytest
+
+from config import settings
+from services.auth_service import AuthService, VerifiedSessionCache
+from services.session_activity import SessionActivityWriter
+
+
+@pytest.fixture
+def db():
+    db = Mock()
+    db.get_session_by_token_hash = Mock(return_value={"session_id": "session-1", "session_type": "user"})
+    db.touch_sessions = Mock(return_value=1)
+    db.invalidate_session = Mock(return_value=True)
+    db.invalidate_user_sessions = Mock(return_value=1)
+    return db
+
+
+@pytest.fixture
+def auth(db, clock):
+    service = AuthService()
+    service.set_database_service(db)
+    service.session_cache = VerifiedSessionCache(ttl=60, max_entries=100, clock=clock)
+    service.session_activity = SessionActivityWriter(db_service=db, flush_interval=0)
+    return service
+
+
+def test_repeat_verification_skips_the_database(auth, db):
+    token = auth.create_access_token({"sub": "42"})
+
+    for _ in range(10):
+        payload = auth.verify_token(token)
+        assert payload["sub"] == "42"
+        assert payload["session_id"] == "session-1"
+
+    assert db.get_session_by_token_hash.call_count == 1
+    assert auth.session_cache.get_stats()["hits"] == 9
+
+
+@pytest.mark.asyncio
+async def test_async_verification_shares_the_cache(auth, db):
+    token = auth.create_access_token({"sub": "42"})
+
+    first = await auth.verify_token_async(token)
+    second = await auth.verify_token_async(token)
+
+    assert first["session_type"] == second["session_type"] == "user"
+    assert db.get_session_by_token_hash.call_count == 1
+
+
+def test_entries_expire_after_ttl(auth, db, clock):
+    token = auth.create_access_token({"sub": "42"})
+    auth.verify_token(token)
+
+    clock.now += 59
+    auth.verify_token(token)
+    assert db.get_session_by_token_hash.call_count == 1
+
+    clock.now += 2
+    auth.verify_token(token)
+    assert db.get_session_by_token_hash.call_count == 2
+
+
+def test_revocation_evicts_cached_sessions(auth, db):
+    first = auth.create_access_token({"sub": "42"})
+    second = auth.create_access_token({"sub": "42", "nonce": "b"})
+    other = auth.create_access_token({"sub": "7"})
+    for token in (first, second, other):
+        auth.verify_token(token)
+
+    assert auth.revoke_token(first)
+    auth.verify_token(first)
+    assert db.get_session_by_token_hash.call_count == 4
+
+    assert auth.revoke_user_sessions("42") == 1
+    auth.verify_token(second)
+    auth.verify_token(other)
+    assert db.get_session_by_token_hash.call_count == 5
+
+
+def test_missing_session_is_cached_and_size_is_bounded(db, clock):
+    db.get_session_by_token_hash.return_value = None
+    auth = AuthService()
+    auth.set_database_service(db)
+    auth.session_cache = VerifiedSessionCache(ttl=60, max_entries=2, clock=clock)
+    auth.session_activity = SessionActivityWriter(db_service=db, flush_interval=0)
+
+    tokens = [auth.create_access_token({"sub": str(i)}) for i in range(3)]
+    for token in tokens:
+        assert "session_id" not in auth.verify_token(token)
+    auth.verify_token(tokens[2])
+
+    assert db.get_session_by_token_hash.call_count == 3
+    assert auth.session_cache.get_stats()["entries"] == 2
+    auth.verify_token(tokens[0])
+    assert db.get_session_by_token_hash.call_count == 4
+
+
+def test_secret_and_token_are_not_logged(auth, caplog):
+    token = auth.create_access_token({"sub": "42"})
+
+    with caplog.at_level(logging.DEBUG, logger="services.auth_service"):
+        auth.verify_token(token)
+        with pytest.raises(Exception):
+            auth.verify_token(token[:-4] + "abcd")
+
+    assert settings.SECRET_KEY not in caplog.text
+    assert token[:50] not in caplog.text
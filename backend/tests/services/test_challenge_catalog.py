@@ -0,0 +1,263 @@
+"""
+Tests for the indexed challenge catalog and guess index behind ChallengeService
+"""
+import random
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from services.challenge_catalog import ChallengeCatalog, GuessIndex
+from services.challenge_service import ChallengeService, ChallengeServiceError
+from services.database_service import DatabaseService
+from models import (
+    Challenge, Statement, ChallengeStatus, StatementType, GuessSubmission, SubmitGuessRequest
+)
+
+BASE_TIME = datetime(2024, 1, 1)
+TAGS = ["funny", "travel", "food", "sports"]
+CREATORS = ["alice", "bob", "carol"]
+STATUSES = [ChallengeStatus.PUBLISHED, ChallengeStatus.DRAFT, ChallengeStatus.FLAGGED]
+
+
+def make_challenge(index: int, rng: random.Random) -> Challenge:
+    statements = [
+        Statement(
+            statement_id=str(uuid.uuid4()),
+            statement_type=StatementType.LIE if i == 1 else StatementType.TRUTH,
+            media_url=f"/api/v1/media/stream/media-{i}",
+            media_file_id=f"media-{i}",
+            duration_seconds=5.0
+        )
+        for i in range(3)
+    ]
+    return Challenge(
+        challenge_id=f"challenge-{index:04d}",
+        creator_id=rng.choice(CREATORS),
+        statements=statements,
+        lie_statement_id=statements[1].statement_id,
+        status=rng.choice(STATUSES),
+        tags=rng.sample(TAGS, rng.randint(0, 2)),
+        # Some challenges share a timestamp so ties are exercised
+        created_at=BASE_TIME + timedelta(minutes=index // 3)
+    )
+
+
+def make_guess(user_id: str, challenge_id: str) -> GuessSubmission:
+    return GuessSubmission(
+        guess_id=str(uuid.uuid4()),
+        challenge_id=challenge_id,
+        user_id=user_id,
+        guessed_lie_statement_id="statement",
+        is_correct=False
+    )
+
+
+def reference_listing(challenges, status=None, creator_id=None, tags=None, exclude=()):
+    """The filter-then-sort listing the catalog replaces"""
+    matches = [
+        c for c in challenges.values()
+        if c.challenge_id not in exclude
+        and (creator_id is None or c.creator_id == creator_id)
+        and (status is None or c.status == status)
+        and (not tags or any(tag in c.tags for tag in tags))
+    ]
+    return sorted(matches, key=lambda c: (c.created_at, c.challenge_id), reverse=True)
+
+
+@pytest.fixture
+def challenges():
+    rng = random.Random(7)
+    return {c.challenge_id: c for c in (make_challenge(i, rng) for i in range(300))}
+
+
+@pytest.fixture
+def service(monkeypatch, challenges):
+    db = Mock()
+    db.iter_challenges = Mock(side_effect=lambda status=None, **_: iter([
+        [c for c in challenges.values() if status is None or c.status.value == status]
+    ]))
+    db.load_guesses = Mock(return_value={})
+    db.save_challenge = Mock(return_value=True)
+    db.save_guess = Mock(return_value=True)
+    monkeypatch.setattr("services.database_service.get_db_service", lambda: db)
+    service = ChallengeService()
+    service.db = db
+    return service
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"status": ChallengeStatus.PUBLISHED},
+    {"creator_id": "bob"},
+    {"creator_id": "bob", "status": ChallengeStatus.DRAFT},
+    {"tags": ["food"]},
+    {"tags": ["food", "travel"], "status": ChallengeStatus.PUBLISHED},
+])
+def test_pages_match_filter_then_sort(challenges, filters):
+    catalog = ChallengeCatalog(challenges)
+    exclude = {f"challenge-{i:04d}" for i in range(0, 300, 7)}
+    expected = reference_listing(challenges, exclude=exclude, **filters)
+
+    for offset in (0, 20, 280):
+        result = catalog.query(exclude_ids=exclude, offset=offset, limit=20, **filters)
+        assert result.challenges == expected[offset:offset + 20]
+        assert result.total_count == len(expected)
+
+
+def test_cursor_walks_every_match_once(challenges):
+    catalog = ChallengeCatalog(challenges)
+    expected = reference_listing(challenges, status=ChallengeStatus.PUBLISHED)
+
+    seen, cursor = [], None
+    while True:
+        result = catalog.query(status=ChallengeStatus.PUBLISHED, cursor=cursor, limit=15)
+        seen.extend(result.challenges)
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_writes_and_in_place_changes_keep_indexes_current(challenges):
+    catalog = ChallengeCatalog()
+    catalog.update(challenges)
+    target = next(c for c in challenges.values() if c.status == ChallengeStatus.DRAFT)
+
+    target.status = ChallengeStatus.PUBLISHED
+    catalog.reindex(target.challenge_id)
+    del catalog["challenge-0000"]
+    catalog.pop("challenge-0001")
+
+    remaining = {k: v for k, v in challenges.items() if k not in ("challenge-0000", "challenge-0001")}
+    for status in STATUSES:
+        result = catalog.query(status=status, limit=500)
+        assert result.challenges == reference_listing(remaining, status=status)
+
+
+@pytest.mark.asyncio
+async def test_list_challenges_excludes_attempted_and_follows_status_changes(service, challenges):
+    published = reference_listing(challenges, status=ChallengeStatus.PUBLISHED)
+    for challenge in published[:5]:
+        guess = make_guess("42", challenge.challenge_id)
+        service.guesses[guess.guess_id] = guess
+
+    page, total = await service.list_challenges(page=1, page_size=10, user_id="42")
+    assert page == published[5:15]
+    assert total == len(published) - 5
+
+    flagged = published[5]
+    await service.flag_challenge(flagged.challenge_id, "99", "spam")
+    page, total = await service.list_challenges(page=1, page_size=10, user_id="42")
+    assert flagged not in page
+    assert total == len(published) - 6
+
+
+@pytest.mark.asyncio
+async def test_list_challenges_page_rejects_bad_cursor(service):
+    with pytest.raises(ChallengeServiceError):
+        await service.list_challenges_page(cursor="not-a-cursor")
+
+    first = await service.list_challenges_page(page_size=5)
+    second = await service.list_challenges_page(page_size=5, cursor=first.next_cursor)
+    assert not {c.challenge_id for c in first.challenges} & {c.challenge_id for c in second.challenges}
+
+
+def test_guess_index_tracks_attempted_challenges():
+    guesses = GuessIndex()
+    first = make_guess("7", "challenge-a")
+    guesses[first.guess_id] = first
+    guesses.update({g.guess_id: g for g in (make_guess("7", "challenge-b"), make_guess("8", "challenge-a"))})
+
+    assert guesses.has_guessed("7", "challenge-a")
+    assert not guesses.has_guessed("8", "challenge-b")
+    assert set(guesses.attempted("7")) == {"challenge-a", "challenge-b"}
+
+    del guesses[first.guess_id]
+    assert not guesses.has_guessed("7", "challenge-a")
+    assert set(guesses.attempted("nobody")) == set()
+
+
+@pytest.mark.asyncio
+async def test_submit_guess_rejects_repeat_and_skips_attempted_lookup(service, challenges):
+    target = reference_listing(challenges, status=ChallengeStatus.PUBLISHED)[0]
+    request = SubmitGuessRequest(
+        challenge_id=target.challenge_id,
+        guessed_lie_statement_id=target.statements[0].statement_id
+    )
+
+    await service.submit_guess("42", request)
+    with pytest.raises(ChallengeServiceError, match="already guessed"):
+        await service.submit_guess("42", request)
+
+    page, _ = await service.list_challenges(page=1, page_size=500, user_id="42")
+    assert target not in page
+    service.db.get_attempted_challenge_ids.assert_not_called()
+
+
+def test_unique_guess_indexes_collapse_existing_duplicates():
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE guesses (
+            guess_id TEXT PRIMARY KEY, challenge_id TEXT, user_id TEXT, submitted_at TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE guess_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, challenge_id TEXT, was_correct BOOLEAN
+        )
+    """)
+    cursor.executemany("INSERT INTO guesses VALUES (?, ?, ?, ?)", [
+        ("g1", "c1", "7", "2024-01-01T00:00:02"),
+        ("g2", "c1", "7", "2024-01-01T00:00:01"),
+        ("g3", "c2", "7", "2024-01-01T00:00:01"),
+    ])
+    cursor.executemany("INSERT INTO guess_history (user_id, challenge_id, was_correct) VALUES (?, ?, ?)", [
+        (7, "c1", True), (7, "c1", False), (7, "c2", False),
+    ])
+
+    db = DatabaseService.__new__(DatabaseService)
+    db._ensure_unique_guess_indexes(cursor, postgres=False)
+
+    assert db._unique_guess_indexes == {"uq_guesses_user_challenge", "uq_guess_history_user_challenge"}
+    assert cursor.execute("SELECT guess_id FROM guesses ORDER BY guess_id").fetchall() == [("g2",), ("g3",)]
+    assert cursor.execute("SELECT id, was_correct FROM guess_history ORDER BY id").fetchall() == [(1, 1), (3, 0)]
+    with pytest.raises(sqlite3.IntegrityError):
+        cursor.execute("INSERT INTO guesses VALUES ('g4', 'c2', '7', NULL)")
+    cursor.execute(
+        "INSERT INTO guess_history (user_id, challenge_id, was_correct) VALUES (7, 'c2', 1) "
+        "ON CONFLICT (user_id, challenge_id) DO NOTHING"
+    )
+    assert cursor.execute("SELECT COUNT(*) FROM guess_history").fetchone() == (2,)
+
+
+def test_unique_guess_index_failure_keeps_duplicates_and_raises():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE guesses (guess_id TEXT PRIMARY KEY, challenge_id TEXT, user_id TEXT, submitted_at TIMESTAMP)")
+    conn.executemany("INSERT INTO guesses VALUES (?, ?, ?, ?)", [
+        ("g1", "c1", "7", "2024-01-01T00:00:02"),
+        ("g2", "c1", "7", "2024-01-01T00:00:01"),
+    ])
+    conn.commit()
+
+    class FailingIndexCursor:
+        """Cursor whose CREATE UNIQUE INDEX fails after the duplicates were deleted"""
+        def __init__(self, cursor):
+            self.cursor = cursor
+
+        def execute(self, query, *args):
+            if "CREATE UNIQUE INDEX" in query:
+                raise sqlite3.OperationalError("disk I/O error")
+            return self.cursor.execute(query, *args)
+
+        def __getattr__(self, name):
+            return getattr(self.cursor, name)
+
+    with pytest.raises(sqlite3.OperationalError):
+        DatabaseService.__new__(DatabaseService)._ensure_unique_guess_indexes(FailingIndexCursor(conn.cursor()), postgres=False)
+
+    assert conn.execute("SELECT guess_id FROM guesses ORDER BY guess_id").fetchall() == [("g1",), ("g2",)]
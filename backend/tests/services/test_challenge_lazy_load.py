@@ -0,0 +1,166 @@
+"""
+Tests for streamed, published-first challenge loading and on-demand hydration
+"""
+import uuid
+from unittest.mock import Mock
+
+import pytest
+
+from services.challenge_service import ChallengeService
+from services.database_service import DatabaseError, get_db_service
+from models import Challenge, ChallengeStatus, GuessSubmission, Statement, StatementType
+
+
+def make_challenge(creator_id: str, status: ChallengeStatus) -> Challenge:
+    statements = [
+        Statement(
+            statement_id=str(uuid.uuid4()),
+            statement_type=StatementType.LIE if i == 1 else StatementType.TRUTH,
+            media_url=f"/api/v1/media/stream/media-{i}",
+            media_file_id=f"media-{i}",
+            duration_seconds=5.0
+        )
+        for i in range(3)
+    ]
+    return Challenge(
+        challenge_id=str(uuid.uuid4()),
+        creator_id=creator_id,
+        statements=statements,
+        lie_statement_id=statements[1].statement_id,
+        status=status,
+        tags=["lazy-load"]
+    )
+
+
+@pytest.fixture
+def seeded():
+    """One creator with published and unpublished challenges saved to the test database"""
+    db = get_db_service()
+    creator_id = f"creator-{uuid.uuid4().hex[:8]}"
+    challenges = [
+        make_challenge(creator_id, status)
+        for status in (ChallengeStatus.PUBLISHED, ChallengeStatus.PUBLISHED, ChallengeStatus.DRAFT, ChallengeStatus.FLAGGED)
+    ]
+    for challenge in challenges:
+        assert db.save_challenge(challenge)
+    yield creator_id, challenges
+    for challenge in challenges:
+        db.delete_challenge(challenge.challenge_id)
+
+
+def test_iter_challenges_streams_filtered_batches(seeded):
+    creator_id, challenges = seeded
+    db = get_db_service()
+
+    batches = list(db.iter_challenges(creator_id=creator_id, batch_size=3))
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert {c.challenge_id for batch in batches for c in batch} == {c.challenge_id for c in challenges}
+
+    unpublished = [c for batch in db.iter_challenges(creator_id=creator_id, exclude_status="published") for c in batch]
+    assert sorted(c.status.value for c in unpublished) == ["draft", "flagged"]
+
+    loaded = db.load_challenge(challenges[0].challenge_id)
+    assert loaded.statements == challenges[0].statements
+    assert loaded.tags == ["lazy-load"]
+
+
+@pytest.mark.asyncio
+async def test_startup_loads_published_and_hydrates_the_rest_on_demand(seeded):
+    creator_id, challenges = seeded
+    published, draft, flagged = challenges[0], challenges[2], challenges[3]
+
+    service = ChallengeService()
+    assert published.challenge_id in service.challenges
+    assert draft.challenge_id not in service.challenges
+
+    assert (await service._get_challenge(draft.challenge_id)).status == ChallengeStatus.DRAFT
+    assert draft.challenge_id in service.challenges
+
+    mine = await service.get_user_challenges(creator_id, page_size=10)
+    assert {c.challenge_id for c in mine} == {c.challenge_id for c in challenges}
+
+    queue, _ = await service.get_challenges_for_moderation(status="flagged", page_size=1000)
+    assert flagged.challenge_id in {c.challenge_id for c in queue}
+
+
+@pytest.mark.asyncio
+async def test_guesses_are_loaded_per_user_when_first_needed(seeded):
+    _, challenges = seeded
+    published = challenges[0]
+    user_id = f"user-{uuid.uuid4().hex[:8]}"
+    guess = GuessSubmission(
+        guess_id=str(uuid.uuid4()),
+        challenge_id=published.challenge_id,
+        user_id=user_id,
+        guessed_lie_statement_id=published.lie_statement_id,
+        is_correct=True
+    )
+    assert get_db_service().save_guess(guess)
+
+    service = ChallengeService()
+    assert guess.guess_id not in service.guesses
+
+    page = await service.list_challenges_page(page_size=1000, user_id=user_id, tags=["lazy-load"])
+    assert published.challenge_id not in {c.challenge_id for c in page.challenges}
+    assert challenges[1].challenge_id in {c.challenge_id for c in page.challenges}
+    assert [g.guess_id for g in await service.get_user_guesses(user_id)] == [guess.guess_id]
+
+
+@pytest.mark.asyncio
+async def test_failed_guess_load_is_retried(seeded, monkeypatch):
+    _, challenges = seeded
+    published = challenges[0]
+    user_id = f"user-{uuid.uuid4().hex[:8]}"
+    guess = GuessSubmission(
+        guess_id=str(uuid.uuid4()),
+        challenge_id=published.challenge_id,
+        user_id=user_id,
+        guessed_lie_statement_id=published.lie_statement_id,
+        is_correct=True
+    )
+    db = get_db_service()
+    assert db.save_guess(guess)
+    service = ChallengeService()
+
+    real_stream_rows = db._stream_rows
+    monkeypatch.setattr(db, "_stream_rows", Mock(side_effect=DatabaseError("connection lost")))
+    with pytest.raises(DatabaseError):
+        await service.get_user_guesses(user_id)
+
+    monkeypatch.setattr(db, "_stream_rows", real_stream_rows)
+    assert [g.guess_id for g in await service.get_user_guesses(user_id)] == [guess.guess_id]
+
+
+@pytest.mark.asyncio
+async def test_full_load_after_a_failed_startup_includes_published_challenges(seeded, monkeypatch):
+    creator_id, challenges = seeded
+    db = get_db_service()
+    real_iter_challenges = db.iter_challenges
+    monkeypatch.setattr(db, "iter_challenges", Mock(side_effect=DatabaseError("connection lost")))
+    service = ChallengeService()
+    assert not service.challenges
+    monkeypatch.setattr(db, "iter_challenges", real_iter_challenges)
+
+    everything = {c.challenge_id for c in await service.get_all_challenges()}
+    assert {c.challenge_id for c in challenges} <= everything
+
+    page, _ = await service.list_challenges(page=1, page_size=1000, status=ChallengeStatus.PUBLISHED)
+    assert challenges[0].challenge_id in {c.challenge_id for c in page}
+
+
+@pytest.mark.asyncio
+async def test_unknown_challenge_ids_are_remembered_briefly(seeded, monkeypatch):
+    service = ChallengeService()
+    db = get_db_service()
+    load_challenge = Mock(wraps=db.load_challenge)
+    monkeypatch.setattr(db, "load_challenge", load_challenge)
+    missing_id = str(uuid.uuid4())
+
+    for _ in range(3):
+        assert await service._get_challenge(missing_id) is None
+    assert load_challenge.call_count == 1
+
+    # Once the entry expires the database is asked again
+    service._missing_challenges[missing_id] = 0.0
+    assert await service._get_challenge(missing_id) is None
+    assert load_challenge.call_count == 2
@@ -0,0 +1,163 @@
+"""
+Tests for incremental (write-through) challenge and guess persistence
+"""
+import pytest
+import uuid
+from unittest.mock import Mock
+
+from services.challenge_service import ChallengeService, ChallengeServiceError
+from models import (
+    Challenge, Statement, GuessSubmission, SubmitGuessRequest,
+    ChallengeStatus, StatementType
+)
+
+
+def make_challenge(creator_id: str = "creator-user") -> Challenge:
+    """Build a published challenge with three statements"""
+    statements = [
+        Statement(
+            statement_id=str(uuid.uuid4()),
+            statement_type=StatementType.LIE if i == 1 else StatementType.TRUTH,
+            media_url=f"/api/v1/media/stream/media-{i}",
+            media_file_id=f"media-{i}",
+            duration_seconds=5.0
+        )
+        for i in range(3)
+    ]
+    return Challenge(
+        challenge_id=str(uuid.uuid4()),
+        creator_id=creator_id,
+        statements=statements,
+        lie_statement_id=statements[1].statement_id,
+        status=ChallengeStatus.PUBLISHED
+    )
+
+
+@pytest.fixture
+def mock_db_service():
+    db = Mock()
+    db.load_all_challenges = Mock(return_value={})
+    db.load_all_guesses = Mock(return_value={})
+    db.save_challenge = Mock(return_value=True)
+    db.save_guess = Mock(return_value=True)
+    return db
+
+
+@pytest.fixture
+def challenge_service_with_mocks(monkeypatch, mock_db_service):
+    monkeypatch.setattr(
+        "services.database_service.get_db_service", lambda: mock_db_service
+    )
+    service = ChallengeService()
+    service.challenges = {}
+    service.guesses = {}
+    return service
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("table_size", [1, 50, 500])
+async def test_submit_guess_persists_only_changed_rows(
+    challenge_service_with_mocks, mock_db_service, table_size
+):
+    """A guess writes one guess row and one challenge row regardless of table size."""
+    service = challenge_service_with_mocks
+
+    for _ in range(table_size):
+        challenge = make_challenge()
+        service.challenges[challenge.challenge_id] = challenge
+        guess = GuessSubmission(
+            guess_id=str(uuid.uuid4()),
+            challenge_id=challenge.challenge_id,
+            user_id="99",
+            guessed_lie_statement_id=challenge.lie_statement_id,
+            is_correct=True
+        )
+        service.guesses[guess.guess_id] = guess
+
+    target = make_challenge()
+    service.challenges[target.challenge_id] = target
+
+    guess, points = await service.submit_guess(
+        "42",
+        SubmitGuessRequest(
+            challenge_id=target.challenge_id,
+            guessed_lie_statement_id=target.lie_statement_id
+        )
+    )
+
+    assert points == 10
+    mock_db_service.save_guess.assert_called_once_with(guess)
+    mock_db_service.save_challenge.assert_called_once_with(target)
+    assert target.guess_count == 1
+    assert target.correct_guess_count == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_guess_keeps_in_memory_counters_when_challenge_save_fails(
+    challenge_service_with_mocks, mock_db_service
+):
+    """A failed challenge save is logged and does not fail the guess."""
+    service = challenge_service_with_mocks
+    mock_db_service.save_challenge.side_effect = RuntimeError("db down")
+
+    target = make_challenge()
+    service.challenges[target.challenge_id] = target
+
+    guess, points = await service.submit_guess(
+        "42",
+        SubmitGuessRequest(
+            challenge_id=target.challenge_id,
+            guessed_lie_statement_id=target.statements[0].statement_id
+        )
+    )
+
+    assert points == 0
+    assert service.guesses[guess.guess_id] is guess
+    assert target.guess_count == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_guess_changes_nothing_when_guess_save_fails(
+    challenge_service_with_mocks, mock_db_service
+):
+    """A guess that cannot be persisted leaves counters, score and the guess index untouched."""
+    service = challenge_service_with_mocks
+    mock_db_service.save_guess.return_value = False
+
+    target = make_challenge()
+    service.challenges[target.challenge_id] = target
+
+    with pytest.raises(ChallengeServiceError):
+        await service.submit_guess(
+            "42",
+            SubmitGuessRequest(
+                challenge_id=target.challenge_id,
+                guessed_lie_statement_id=target.lie_statement_id
+            )
+        )
+
+    assert not service.guesses
+    assert target.guess_count == 0
+    assert target.correct_guess_count == 0
+    mock_db_service.increment_user_score.assert_not_called()
+    mock_db_service.save_challenge.assert_not_called()
+    mock_db_service.add_guess_history_record.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_challenge_persists_single_challenge(
+    challenge_service_with_mocks, mock_db_service
+):
+    """Incrementing the view count writes only the viewed challenge."""
+    service = challenge_service_with_mocks
+    others = [make_challenge() for _ in range(10)]
+    for challenge in others:
+        service.challenges[challenge.challenge_id] = challenge
+
+    target = make_challenge()
+    service.challenges[target.challenge_id] = target
+
+    await service.get_challenge(target.challenge_id)
+
+    mock_db_service.save_challenge.assert_called_once_with(target)
+    assert target.view_count == 1
@@ -0,0 +1,219 @@
+"""
+Tests for the database connection pool
+"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from services.connection_pool import ConnectionPool, PoolTimeoutError, PoolClosedError
+from services.database_service import get_db_service
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return tmp_path / "pool.db"
+
+
+@pytest.fixture
+def connect_counter(db_file):
+    """Connection factory that counts how many physical connections were opened"""
+    opened = []
+
+    def connect():
+        conn = sqlite3.connect(db_file, check_same_thread=False)
+        opened.append(conn)
+        return conn
+
+    connect.opened = opened
+    return connect
+
+
+class TestConnectionPool:
+    """Unit tests for ConnectionPool"""
+
+    def test_connections_are_reused(self, connect_counter):
+        pool = ConnectionPool(connect_counter, min_size=0, max_size=2)
+
+        for _ in range(20):
+            with pool.connection() as conn:
+                conn.execute("SELECT 1")
+
+        assert len(connect_counter.opened) == 1
+        stats = pool.get_stats()
+        assert stats["checkouts"] == 20
+        assert stats["in_use"] == 0
+        assert stats["idle"] == 1
+
+    def test_fill_opens_min_size(self, connect_counter):
+        pool = ConnectionPool(connect_counter, min_size=3, max_size=5)
+        assert pool.fill() == 3
+        assert pool.get_stats()["idle"] == 3
+
+    def test_checkout_times_out_when_exhausted(self, connect_counter):
+        pool = ConnectionPool(connect_counter, min_size=0, max_size=1, checkout_timeout=0.05)
+        held = pool.connection()
+
+        with pytest.raises(PoolTimeoutError):
+            pool.connection()
+
+        held.close()
+        assert pool.get_stats()["checkout_timeouts"] == 1
+        with pool.connection():
+            pass
+
+    def test_waiter_is_woken_on_release(self, connect_counter):
+        pool = ConnectionPool(connect_counter, min_size=0, max_size=1, checkout_timeout=5)
+        held = pool.connection()
+        acquired = threading.Event()
+
+        def waiter():
+            with pool.connection():
+                acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.05)
+        assert pool.get_stats()["waiting"] == 1
+
+        held.close()
+        thread.join(timeout=2)
+        assert acquired.is_set()
+        stats = pool.get_stats()
+        assert stats["waiting"] == 0
+        assert stats["max_wait_ms"] > 0
+
+    def test_failed_health_check_replaces_connection(self, connect_counter):
+        healthy = {"value": True}
+        pool = ConnectionPool(
+            connect_counter, min_size=0, max_size=2,
+            is_alive=lambda conn: healthy["value"]
+        )
+        with pool.connection():
+            pass
+
+        healthy["value"] = False
+        with pool.connection():
+            healthy["value"] = True
+
+        assert len(connect_counter.opened) == 2
+        assert pool.get_stats()["health_check_failures"] == 1
+
+    def test_ping_only_after_health_check_interval(self, connect_counter):
+        pings = []
+        pool = ConnectionPool(
+            connect_counter, min_size=0, max_size=1,
+            health_check_interval=60, ping=lambda conn: pings.append(conn)
+        )
+        with pool.connection():
+            pass
+        with pool.connection():
+            pass
+        assert pings == []
+
+        pool.health_check_interval = 0
+        time.sleep(0.01)
+        with pool.connection():
+            pass
+        assert len(pings) == 1
+
+    def test_max_lifetime_recycles_connection(self, connect_counter):
+        pool = ConnectionPool(connect_counter, min_size=0, max_size=1, max_lifetime=0.01)
+        with pool.connection():
+            pass
+        time.sleep(0.02)
+        with pool.connection():
+            pass
+
+        assert len(connect_counter.opened) == 2
+        assert pool.get_stats()["recycled_connections"] >= 1
+
+    def test_idle_connections_reaped_down_to_min_size(self, connect_counter):
+        pool = ConnectionPool(connect_counter, min_size=1, max_size=3, idle_timeout=0.01)
+        held = [pool.connection() for _ in range(3)]
+        for conn in held:
+            conn.close()
+
+        time.sleep(0.02)
+        assert pool.reap_idle() == 2
+        stats = pool.get_stats()
+        assert stats["size"] == 1
+        assert stats["reaped_idle_connections"] == 2
+
+    def test_context_manager_rolls_back_on_error(self, connect_counter):
+        pool = ConnectionPool(connect_counter, min_size=0, max_size=1)
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER)")
+
+        with pytest.raises(RuntimeError):
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO items VALUES (1)")
+                raise RuntimeError("boom")
+
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+
+    def test_closed_pool_rejects_checkout(self, connect_counter):
+        pool = ConnectionPool(connect_counter, min_size=1, max_size=1)
+        pool.fill()
+        pool.close()
+
+        with pytest.raises(PoolClosedError):
+            pool.connection()
+        assert pool.get_stats()["size"] == 0
+
+
+class TestDatabaseServicePooling:
+    """DatabaseService routes queries and transactions through the pool"""
+
+    @pytest.fixture
+    def db(self):
+        db = get_db_service()
+        db._execute_query("CREATE TABLE IF NOT EXISTS pool_tx_test (id INTEGER PRIMARY KEY, value TEXT)")
+        db._execute_query("DELETE FROM pool_tx_test")
+        yield db
+        db._execute_query("DROP TABLE IF EXISTS pool_tx_test")
+
+    def test_queries_reuse_pooled_connections(self, db):
+        before = db.get_pool_stats()
+        for i in range(10):
+            db._execute_insert("pool_tx_test", {"value": f"row-{i}"})
+        after = db.get_pool_stats()
+
+        assert after["checkouts"] - before["checkouts"] == 10
+        assert after["connections_created"] - before["connections_created"] <= 1
+        assert after["in_use"] == 0
+
+    def test_transaction_shares_connection_and_rolls_back(self, db):
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db._execute_insert("pool_tx_test", {"value": "inside"})
+                rows = db._execute_select("SELECT value FROM pool_tx_test")
+                assert [row["value"] for row in rows] == ["inside"]
+                raise RuntimeError("abort")
+
+        assert db._execute_select("SELECT value FROM pool_tx_test") == []
+        assert db.get_pool_stats()["in_use"] == 0
+
+    def test_transaction_commits(self, db):
+        with db.transaction():
+            db._execute_insert("pool_tx_test", {"value": "a"})
+            with db.transaction():
+                db._execute_insert("pool_tx_test", {"value": "b"})
+
+        rows = db._execute_select("SELECT value FROM pool_tx_test ORDER BY id")
+        assert [row["value"] for row in rows] == ["a", "b"]
+
+    def test_returned_cursor_is_read_before_the_connection_is_released(self, db):
+        for value in ("a", "b", "c"):
+            db._execute_insert("pool_tx_test", {"value": value})
+
+        cursor = db._execute_query("SELECT value FROM pool_tx_test ORDER BY id", return_cursor=True)
+        assert db.get_pool_stats()["in_use"] == 0
+
+        # Another caller reuses the pooled connection before the rows are read
+        db._execute_query("DELETE FROM pool_tx_test")
+        assert cursor.fetchone()["value"] == "a"
+        assert [row["value"] for row in cursor.fetchall()] == ["b", "c"]
+        assert cursor.fetchone() is None
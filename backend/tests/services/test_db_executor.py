@@ -0,0 +1,141 @@
+"""
+Tests for the async database path (bounded executor and _execute_*_async helpers)
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from services.auth_service import AuthService, create_test_token, hash_token
+from services.database_service import get_db_service
+from services.db_executor import DatabaseExecutor, DatabaseBusyError
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class TestDatabaseExecutor:
+    """Unit tests for DatabaseExecutor"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_does_not_block_event_loop(self):
+        executor = DatabaseExecutor(max_workers=2, max_pending=4)
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(heartbeat())
+        result = await executor.run(lambda: time.sleep(0.2) or "done")
+        task.cancel()
+
+        assert result == "done"
+        assert ticks >= 5
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded_by_workers(self):
+        executor = DatabaseExecutor(max_workers=2, max_pending=10)
+        lock = threading.Lock()
+        running = {"now": 0, "peak": 0}
+
+        def query():
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            time.sleep(0.02)
+            with lock:
+                running["now"] -= 1
+
+        await asyncio.gather(*(executor.run(query) for _ in range(8)))
+
+        assert running["peak"] == 2
+        stats = executor.get_stats()
+        assert stats["completed"] == 8
+        assert stats["pending"] == 0
+        assert stats["running"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_stays_full(self):
+        executor = DatabaseExecutor(max_workers=1, max_pending=1, queue_timeout=0.05)
+        release = threading.Event()
+
+        blocked = asyncio.create_task(executor.run(release.wait, 2))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(DatabaseBusyError):
+            await executor.run(lambda: None)
+
+        release.set()
+        assert await blocked is True
+        assert executor.get_stats()["rejected"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_errors_and_context_propagate(self):
+        executor = DatabaseExecutor(max_workers=1, max_pending=1)
+        request_id.set("req-1")
+
+        assert await executor.run(request_id.get) == "req-1"
+        with pytest.raises(ValueError):
+            await executor.run(int, "not a number")
+        assert executor.get_stats()["failed"] == 1
+        executor.shutdown()
+
+
+class TestAsyncDatabaseHelpers:
+    """DatabaseService _execute_*_async helpers"""
+
+    @pytest.fixture
+    def db(self):
+        db = get_db_service()
+        db._execute_query("CREATE TABLE IF NOT EXISTS async_db_test (id INTEGER PRIMARY KEY, value TEXT)")
+        db._execute_query("DELETE FROM async_db_test")
+        yield db
+        db._execute_query("DROP TABLE IF EXISTS async_db_test")
+
+    @pytest.mark.asyncio
+    async def test_async_helpers_round_trip(self, db):
+        await asyncio.gather(*(
+            db._execute_insert_async("async_db_test", {"id": i, "value": f"row-{i}"})
+            for i in range(5)
+        ))
+        updated = await db._execute_update_async("async_db_test", {"value": "changed"}, "id = ?", (3,))
+        await db._execute_upsert_async("async_db_test", {"id": 4, "value": "upserted"}, ["id"])
+        deleted = await db._execute_query_async("DELETE FROM async_db_test WHERE id = ?", (0,))
+
+        rows = await db._execute_select_async("SELECT id, value FROM async_db_test ORDER BY id")
+        row = await db._execute_select_async("SELECT value FROM async_db_test WHERE id = ?", (3,), fetch_one=True)
+
+        assert updated == 1
+        assert deleted == 1
+        assert [r["value"] for r in rows] == ["row-1", "row-2", "changed", "upserted"]
+        assert row == {"value": "changed"}
+        assert "async_executor" in db.get_pool_stats()
+
+
+@pytest.mark.asyncio
+async def test_verify_token_async_runs_session_lookup_off_loop():
+    db = Mock()
+    callers = []
+    db.get_session_by_token_hash = Mock(
+        side_effect=lambda token_hash: callers.append(threading.current_thread()) or {"session_id": "s-1", "session_type": "user"}
+    )
+    service = AuthService()
+    service.set_database_service(db)
+    service.session_activity = Mock()
+    token = create_test_token("user-42")
+
+    payload = await service.verify_token_async(token)
+
+    assert payload["sub"] == "user-42"
+    assert payload["session_id"] == "s-1"
+    assert callers and callers[0] is not threading.current_thread()
+    service.session_activity.touch.assert_called_once_with(hash_token(token))
+    db.update_session_access.assert_not_called()
@@ -0,0 +1,177 @@
+"""
+Tests for the persistent media ID -> S3 key index, against a moto S3 stand-in
+"""
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+moto = pytest.importorskip("moto")
+import boto3
+
+from services.database_service import get_db_service
+from services.media_index_service import MediaIndexService
+from services.media_upload_service import MediaUploadService
+from services.s3_media_service import S3MediaService
+
+BUCKET = "media-index-test"
+
+
+@pytest.fixture
+def db():
+    db = get_db_service()
+    db._execute_query("DELETE FROM media_objects")
+    yield db
+    db._execute_query("DELETE FROM media_objects")
+
+
+@pytest.fixture
+def s3_service(db, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_S3_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_S3_BUCKET_NAME", BUCKET)
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        service = S3MediaService()
+        service.media_index = MediaIndexService(db_service=db, cache_size=100)
+        yield service
+
+
+def put_legacy_object(service, media_id, key=None, body=b"video"):
+    """Upload an object the way upload_video_to_s3 did before the index existed"""
+    key = key or f"media/videos/20240101/{media_id}"
+    service.s3_client.put_object(
+        Bucket=BUCKET, Key=key, Body=body, ContentType="video/mp4",
+        Metadata={"media_id": media_id}
+    )
+    return key
+
+
+@pytest.mark.asyncio
+async def test_upload_is_resolved_without_touching_the_bucket(s3_service, db):
+    media_id = await s3_service.upload_video_to_s3(b"0" * 2048, "video/mp4")
+
+    record = db.get_media_object(media_id)
+    assert record["storage_key"].endswith(f"/{media_id}")
+    assert record["file_size"] == 2048
+    assert record["content_type"] == "video/mp4"
+
+    with patch.object(s3_service.s3_client, "head_object") as head, \
+            patch.object(s3_service.s3_client, "get_paginator") as paginator:
+        assert s3_service.get_s3_key_from_media_id(media_id) == record["storage_key"]
+        assert await s3_service.check_media_exists(media_id) is True
+    head.assert_not_called()
+    paginator.assert_not_called()
+
+
+def test_lru_serves_repeat_lookups_and_evicts_oldest(db):
+    index = MediaIndexService(db_service=db, cache_size=2)
+    for i in range(3):
+        index.record_media(f"m{i}", f"media/videos/20240101/m{i}", 10, "video/mp4")
+
+    assert index.get_stats()["cached_entries"] == 2
+    with patch.object(db, "get_media_object", wraps=db.get_media_object) as lookup:
+        assert index.get_storage_key("m2") == "media/videos/20240101/m2"
+        lookup.assert_not_called()
+        assert index.get_storage_key("m0") == "media/videos/20240101/m0"
+        lookup.assert_called_once_with("m0")
+
+
+def test_backfill_indexes_existing_objects_once(s3_service, db):
+    keys = {f"old-{i}": put_legacy_object(s3_service, f"old-{i}") for i in range(3)}
+    chunked_key = put_legacy_object(s3_service, "chunked-1", key="media/user-1/chunked-1/clip.mp4")
+    s3_service.s3_client.put_object(Bucket=BUCKET, Key="media/videos/20240101/orphan", Body=b"x")
+
+    counts = s3_service.backfill_media_index()
+
+    assert counts == {"scanned": 5, "indexed": 4, "skipped": 1, "failed": 0}
+    assert s3_service.get_s3_key_from_media_id("old-1") == keys["old-1"]
+    assert s3_service.get_s3_key_from_media_id("chunked-1") == chunked_key
+    assert db.get_media_object("old-2")["file_size"] == len(b"video")
+
+    rerun = s3_service.backfill_media_index()
+    assert rerun["indexed"] == 0
+    assert rerun["skipped"] == 5
+
+
+def test_unindexed_media_is_found_once_then_indexed(s3_service, db, monkeypatch):
+    key = put_legacy_object(s3_service, "legacy-1")
+    put_legacy_object(s3_service, "legacy-2")
+
+    assert s3_service.get_s3_key_from_media_id("legacy-1") == key
+    assert db.get_media_object("legacy-1")["storage_key"] == key
+
+    monkeypatch.setattr("config.settings.MEDIA_INDEX_SCAN_ON_MISS", False)
+    assert s3_service.get_s3_key_from_media_id("legacy-1") == key
+    assert s3_service.get_s3_key_from_media_id("legacy-2") is None
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_index_entry(s3_service, db, monkeypatch):
+    monkeypatch.setattr("config.settings.MEDIA_INDEX_SCAN_ON_MISS", False)
+    media_id = await s3_service.upload_video_to_s3(b"0" * 16, "video/mp4")
+
+    assert await s3_service.delete_video_from_s3(media_id) is True
+    assert db.get_media_object(media_id) is None
+    assert s3_service.get_s3_key_from_media_id(media_id) is None
+
+
+def test_unknown_media_ids_are_remembered_for_a_short_ttl(db):
+    index = MediaIndexService(db_service=db, cache_size=10, negative_ttl=60)
+
+    with patch.object(db, "get_media_object", wraps=db.get_media_object) as lookup:
+        assert index.get_media("missing") is None
+        index.remember_missing("missing")
+        assert index.get_media("missing") is None
+        assert lookup.call_count == 1
+
+    assert index.is_known_missing("missing")
+    index.record_media("missing", "media/videos/20240101/missing")
+    assert not index.is_known_missing("missing")
+    assert index.get_storage_key("missing") == "media/videos/20240101/missing"
+
+    stats = index.get_stats()
+    assert (stats["hits"], stats["negative_hits"], stats["misses"]) == (1, 1, 1)
+
+
+class TestStreamMediaResolution:
+    """MediaUploadService.stream_media resolves cloud keys through the index"""
+
+    @pytest.fixture
+    def media_service(self, db, monkeypatch):
+        monkeypatch.setattr("config.settings.USE_CLOUD_STORAGE", False)
+        service = MediaUploadService()
+        service.use_cloud_storage = True
+        service.cloud_storage = Mock()
+        service.cloud_storage.get_file_url = AsyncMock(return_value="https://s3.example.com/signed")
+        service.cloud_storage.get_file_metadata = AsyncMock(return_value=None)
+        service.cloud_storage.file_exists = AsyncMock(return_value=False)
+        service.media_index = MediaIndexService(db_service=db, cache_size=10, negative_ttl=60)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_indexed_media_streams_without_head_requests(self, media_service, db):
+        key = "media/videos/20200101/old-media"
+        db.save_media_object("old-media", key, 4096, "video/mp4")
+
+        for _ in range(3):
+            result = await media_service.stream_media("old-media")
+
+        assert result["cloud_key"] == key
+        assert result["file_size"] == 4096
+        assert result["mime_type"] == "video/mp4"
+        media_service.cloud_storage.get_file_metadata.assert_not_called()
+        media_service.cloud_storage.file_exists.assert_not_called()
+        stats = media_service.media_index.get_stats()
+        assert (stats["hits"], stats["misses"]) == (2, 1)
+
+    @pytest.mark.asyncio
+    async def test_repeated_misses_probe_storage_once(self, media_service, monkeypatch):
+        monkeypatch.setattr("config.settings.MEDIA_INDEX_SCAN_ON_MISS", True)
+
+        for _ in range(3):
+            with pytest.raises(FileNotFoundError):
+                await media_service.stream_media("no-such-media", user_id="user-1")
+
+        assert media_service.cloud_storage.file_exists.call_count == 10
+        assert media_service.media_index.get_stats()["negative_hits"] == 2
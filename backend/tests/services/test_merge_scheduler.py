@@ -0,0 +1,152 @@
+"""
+Tests for the merge scheduler (concurrency cap, priorities, backpressure)
+"""
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.merge_scheduler import MergeScheduler, MergeQueueFull, PRIORITY_PREMIUM, PRIORITY_STANDARD
+from services.merge_session_store import MergeSessionStore
+from services.video_merge_service import VideoMergeService, VideoMergeError, MergeSessionStatus
+
+
+class Gate:
+    """Jobs that block until released, recording start order and peak concurrency"""
+
+    def __init__(self):
+        self.started = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    def job(self, name):
+        async def run():
+            self.started.append(name)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await self.release.wait()
+            self.running -= 1
+            return name
+        return run
+
+
+class InMemoryMergeSessions:
+    """The merge_sessions table methods MergeSessionStore uses, kept in a dict"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def save_merge_session(self, merge_session_id, user_id, status, data, video_file_id=None,
+                           created_at=None, updated_at=None):
+        existing = self.rows.get(merge_session_id)
+        if existing and existing["status"] == "cancelled" and existing["created_at"] == created_at:
+            return False
+        self.rows[merge_session_id] = {
+            "merge_session_id": merge_session_id, "user_id": user_id, "video_file_id": video_file_id,
+            "status": status, "data": data, "created_at": created_at, "updated_at": updated_at
+        }
+        return True
+
+    def get_merge_session(self, merge_session_id):
+        return self.rows.get(merge_session_id)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_and_premium_jumps_the_queue():
+    scheduler = MergeScheduler(max_concurrent=2, max_queued=10)
+    gate = Gate()
+
+    tasks = [scheduler.submit(f"standard-{i}", gate.job(f"standard-{i}")) for i in range(4)]
+    tasks.append(scheduler.submit("premium", gate.job("premium"), PRIORITY_PREMIUM))
+    await settle()
+
+    assert gate.started == ["standard-0", "standard-1"]
+    assert [scheduler.position(name) for name in ("standard-0", "premium", "standard-2", "standard-3")] == [0, 1, 2, 3]
+
+    gate.release.set()
+    await asyncio.gather(*tasks)
+
+    assert gate.started[2] == "premium"
+    assert gate.peak == 2
+    assert scheduler.position("premium") is None
+    assert scheduler.get_stats()["completed"] == 5
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after():
+    scheduler = MergeScheduler(max_concurrent=1, max_queued=1)
+    gate = Gate()
+    running = scheduler.submit("a", gate.job("a"))
+    waiting = scheduler.submit("b", gate.job("b"))
+    await settle()
+
+    with pytest.raises(MergeQueueFull) as exc_info:
+        await scheduler.run("c", gate.job("c"))
+
+    assert exc_info.value.retry_after_seconds >= 1
+    assert scheduler.get_stats()["rejected"] == 1
+    gate.release.set()
+    await asyncio.gather(running, waiting)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_jobs_never_start_and_failures_free_the_slot():
+    scheduler = MergeScheduler(max_concurrent=1, max_queued=5)
+    gate = Gate()
+
+    async def failing():
+        raise RuntimeError("ffmpeg crashed")
+
+    with pytest.raises(RuntimeError):
+        await scheduler.run("broken", failing)
+
+    blocker = scheduler.submit("blocker", gate.job("blocker"))
+    doomed = scheduler.submit("doomed", gate.job("doomed"))
+    survivor = scheduler.submit("survivor", gate.job("survivor"))
+    await settle()
+    assert scheduler.cancel("doomed") is True
+
+    gate.release.set()
+    await asyncio.gather(blocker, survivor)
+    with pytest.raises(asyncio.CancelledError):
+        await doomed
+    assert gate.started == ["blocker", "survivor"]
+
+
+@pytest.mark.asyncio
+async def test_merge_status_reports_queue_position(monkeypatch):
+    monkeypatch.setattr("config.settings.USE_CLOUD_STORAGE", False)
+    service = VideoMergeService()
+    service.session_store = MergeSessionStore(db_service=InMemoryMergeSessions())
+    service.scheduler = MergeScheduler(max_concurrent=1, max_queued=1)
+    service._get_merge_priority = AsyncMock(return_value=PRIORITY_STANDARD)
+    service.check_merge_readiness = AsyncMock(return_value={"ready": True, "video_files": []})
+    gate = Gate()
+    service._process_merge = lambda merge_session_id: gate.job(merge_session_id)()
+
+    first = await service.initiate_merge("merge-1", "7")
+    second = await service.initiate_merge("merge-2", "7")
+    await settle()
+
+    assert (first["queue_position"], second["queue_position"]) == (0, 1)
+    status = await service.get_merge_status("merge-2")
+    assert status["queue_position"] == 1
+    assert status["estimated_start_seconds"] >= 1
+
+    with pytest.raises(VideoMergeError) as exc_info:
+        await service.initiate_merge("merge-3", "7")
+    assert exc_info.value.error_code == "QUEUE_FULL"
+    assert exc_info.value.retry_after_seconds >= 1
+    assert "merge-3" not in service.merge_sessions
+
+    assert await service.cancel_merge("merge-2") is True
+    assert (await service.get_merge_status("merge-2"))["status"] == MergeSessionStatus.CANCELLED
+    gate.release.set()
+    await settle()
+    assert gate.started == ["merge-1"]
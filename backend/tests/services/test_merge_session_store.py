@@ -0,0 +1,341 @@
+"""
+Tests for the durable merge session store
+"""
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from config import settings
+from services.database_service import get_db_service
+from services.merge_session_store import MergeSessionStore
+from services.video_merge_service import (
+    MERGE_WORKER_ID, MergeCancelled, VideoMergeService, VideoMergeError, MergeSessionStatus
+)
+
+
+@pytest.fixture
+def store():
+    return MergeSessionStore(db_service=get_db_service(), ttl_hours=24)
+
+
+@pytest.fixture
+def service(store, monkeypatch):
+    monkeypatch.setattr("config.settings.USE_CLOUD_STORAGE", False)
+
+    def make():
+        merge_service = VideoMergeService()
+        merge_service.session_store = store
+        return merge_service
+    return make
+
+
+def completed_session(user_id="7", updated_at=None):
+    now = datetime.utcnow()
+    return {
+        "merge_session_id": f"merge-{uuid.uuid4()}",
+        "user_id": user_id,
+        "status": MergeSessionStatus.COMPLETED,
+        "video_files": [{"index": 0, "path": Path("/tmp/a.mp4"), "session": object()}],
+        "quality_preset": "medium",
+        "created_at": now,
+        "updated_at": updated_at or now,
+        "completed_at": now,
+        "progress": 100.0,
+        "merged_video_path": Path("/tmp/merged.mp4"),
+        "merged_video_metadata": {"video_file_id": f"video-{uuid.uuid4()}", "duration": 12.5}
+    }
+
+
+@pytest.mark.asyncio
+async def test_completed_merge_survives_a_restart(store, service):
+    session = completed_session()
+    assert await store.save(session) is True
+
+    # A fresh service (another worker, or after a restart) has nothing in memory
+    status = await service().get_merge_status(session["merge_session_id"])
+
+    assert status["status"] == MergeSessionStatus.COMPLETED
+    assert status["completed_at"] == session["completed_at"]
+    assert status["merged_video_path"] == "/tmp/merged.mp4"
+    assert status["video_count"] == 1
+    assert "video_files" not in status
+    assert status["queue_position"] is None
+
+
+@pytest.mark.asyncio
+async def test_merged_video_lookup_is_scoped_to_the_owner(store, service):
+    session = completed_session(user_id="7")
+    await store.save(session)
+    video_file_id = session["merged_video_metadata"]["video_file_id"]
+
+    found = await service().find_merge_session_by_video_file_id(video_file_id, "7")
+
+    assert found["merge_session_id"] == session["merge_session_id"]
+    assert await store.find_by_video_file_id(video_file_id, "8") is None
+    assert await store.find_by_video_file_id("no-such-video", "7") is None
+
+
+@pytest.mark.asyncio
+async def test_merged_video_lookup_finds_a_local_session_the_store_missed(store, service, monkeypatch):
+    session = completed_session(user_id="7")
+    merge_service = service()
+    merge_service.merge_sessions[session["merge_session_id"]] = session
+
+    async def save_fails(merge_session):
+        return False
+    monkeypatch.setattr(store, "save", save_fails)
+    await merge_service._save_finished(session)
+    video_file_id = session["merged_video_metadata"]["video_file_id"]
+
+    assert await merge_service.find_merge_session_by_video_file_id(video_file_id, "7") is session
+    assert await merge_service.find_merge_session_by_video_file_id(video_file_id, "8") is None
+
+    session["updated_at"] = datetime.utcnow() - timedelta(hours=30)
+    await merge_service.cleanup_old_sessions()
+    assert await merge_service.find_merge_session_by_video_file_id(video_file_id, "7") is None
+
+
+@pytest.mark.asyncio
+async def test_finished_merge_is_dropped_from_memory_once_persisted(store, service):
+    session = completed_session(user_id="7")
+    merge_service = service()
+    merge_service.merge_sessions[session["merge_session_id"]] = session
+
+    await merge_service._save_finished(session)
+
+    assert session["merge_session_id"] not in merge_service.merge_sessions
+    status = await merge_service.get_merge_status(session["merge_session_id"])
+    assert status["status"] == MergeSessionStatus.COMPLETED
+    video_file_id = session["merged_video_metadata"]["video_file_id"]
+    found = await merge_service.find_merge_session_by_video_file_id(video_file_id, "7")
+    assert found["merge_session_id"] == session["merge_session_id"]
+
+
+@pytest.mark.asyncio
+async def test_progress_is_persisted_at_most_once_per_interval(store, service, monkeypatch):
+    monkeypatch.setattr("config.settings.MERGE_PROGRESS_SAVE_SECONDS", 60)
+    session = {
+        **completed_session(), "status": MergeSessionStatus.PROCESSING, "worker_id": MERGE_WORKER_ID,
+        "progress": 10.0, "merged_video_metadata": None
+    }
+    merge_service = service()
+    merge_service.merge_sessions[session["merge_session_id"]] = session
+    saves_before = store.get_stats()["saves"]
+
+    for progress in (25.0, 30.0, 35.0):
+        merge_service._update_merge_progress(session["merge_session_id"], progress)
+    await asyncio.gather(*merge_service._progress_saves)
+
+    assert store.get_stats()["saves"] == saves_before + 1
+    # Another worker, with nothing in memory, reports the latest progress
+    assert (await service().get_merge_status(session["merge_session_id"]))["progress"] == 35.0
+
+
+def test_older_snapshot_never_overwrites_a_newer_status(store):
+    session = completed_session()
+    processing = {**session, "status": MergeSessionStatus.PROCESSING, "merged_video_metadata": None}
+
+    def row(snapshot):
+        return {
+            "merge_session_id": snapshot["merge_session_id"], "user_id": snapshot["user_id"], "video_file_id": None,
+            "status": snapshot["status"], "data": "{}", "created_at": None, "updated_at": None
+        }
+
+    # Snapshot 2 (completed) reaches the database before snapshot 1 (processing)
+    assert store._write(session["merge_session_id"], 2, row(session)) is True
+    assert store._write(session["merge_session_id"], 1, row(processing)) is False
+
+    persisted = get_db_service().get_merge_session(session["merge_session_id"])
+    assert persisted["status"] == MergeSessionStatus.COMPLETED
+    assert store.get_stats()["stale_saves_skipped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cleanup_prunes_sessions_past_the_ttl(store, service):
+    stale = completed_session(updated_at=datetime.utcnow() - timedelta(hours=30))
+    fresh = completed_session()
+    await store.save(stale)
+    await store.save(fresh)
+    merge_service = service()
+    merge_service.merge_sessions[stale["merge_session_id"]] = stale
+
+    stats = await merge_service.cleanup_old_sessions()
+
+    assert stats["sessions_removed"] >= 1
+    assert stale["merge_session_id"] not in merge_service.merge_sessions
+    assert await store.load(stale["merge_session_id"]) is None
+    assert (await store.load(fresh["merge_session_id"]))["status"] == MergeSessionStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_in_flight_session_left_by_a_restart_can_be_retried_or_cancelled(store, service):
+    expired = datetime.utcnow() - timedelta(seconds=settings.MERGE_SESSION_LEASE_SECONDS + 1)
+    session = {
+        **completed_session(updated_at=expired), "status": MergeSessionStatus.PROCESSING,
+        "worker_id": "gone:1:dead", "merged_video_metadata": None
+    }
+    await store.save(session)
+    merge_service = service()
+
+    async def not_ready(merge_session_id, user_id):
+        return {"ready": False, "error": "checked"}
+    merge_service.check_merge_readiness = not_ready
+
+    # Its worker stopped renewing the lease, so it is not reported as running
+    assert not merge_service.is_merge_active(session["merge_session_id"], await store.load(session["merge_session_id"]))
+    with pytest.raises(VideoMergeError) as exc_info:
+        await merge_service.initiate_merge(session["merge_session_id"], "7")
+    assert exc_info.value.error_code == "NOT_READY"
+
+    assert await merge_service.cancel_merge(session["merge_session_id"]) is True
+    assert (await store.load(session["merge_session_id"]))["status"] == MergeSessionStatus.CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_merge_leased_by_another_worker_is_left_to_it(store, service, monkeypatch):
+    monkeypatch.setattr("config.settings.MERGE_SESSION_LEASE_SECONDS", 0.2)
+    owner, other = service(), service()
+    session = {
+        **completed_session(), "status": MergeSessionStatus.PROCESSING, "worker_id": MERGE_WORKER_ID,
+        "merged_video_metadata": None
+    }
+    owner.merge_sessions[session["merge_session_id"]] = session
+    await store.save(session)
+    owner._start_lease_renewal()
+
+    async def must_not_restart(merge_session_id, user_id):
+        raise AssertionError("restarted a merge whose lease is still held")
+    other.check_merge_readiness = must_not_restart
+
+    # The owner keeps renewing the lease past its length, so other workers leave the merge alone
+    await asyncio.sleep(0.3)
+    persisted = await store.load(session["merge_session_id"])
+    assert other.is_merge_active(session["merge_session_id"], persisted)
+    assert (await other.initiate_merge(session["merge_session_id"], "7"))["status"] == MergeSessionStatus.PROCESSING
+
+    # A cancel from another worker is picked up by the owner at its next renewal
+    assert await other.cancel_merge(session["merge_session_id"]) is True
+    await asyncio.wait_for(owner._lease_task, timeout=1)
+    assert session["status"] == MergeSessionStatus.CANCELLED
+    assert (await store.load(session["merge_session_id"]))["status"] == MergeSessionStatus.CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_scheduled_cleanup_prunes_without_the_admin_endpoint(store, service):
+    stale = completed_session(updated_at=datetime.utcnow() - timedelta(hours=30))
+    await store.save(stale)
+
+    task = asyncio.create_task(service().run_scheduled_cleanup(0.01))
+    try:
+        for _ in range(100):
+            if await store.load(stale["merge_session_id"]) is None:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+    assert await store.load(stale["merge_session_id"]) is None
+
+
+@pytest.mark.asyncio
+async def test_progress_snapshot_never_overwrites_a_cancel(store):
+    session = {
+        **completed_session(), "status": MergeSessionStatus.PROCESSING, "worker_id": MERGE_WORKER_ID,
+        "merged_video_metadata": None
+    }
+    await store.save(session)
+    # Another worker, with its own store, cancels the run
+    await MergeSessionStore(db_service=get_db_service()).save({**session, "status": MergeSessionStatus.CANCELLED})
+
+    assert await store.save({**session, "progress": 50.0}) is False
+    assert await store.save({**session, "status": MergeSessionStatus.COMPLETED}) is False
+    assert store.is_cancelled(session)
+    assert (await store.load(session["merge_session_id"]))["status"] == MergeSessionStatus.CANCELLED
+
+    # Initiating the session again starts a new run, which may be saved
+    rerun = {**session, "created_at": datetime.utcnow()}
+    assert await store.save(rerun) is True
+    assert not store.is_cancelled(rerun)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shared_store", [True, False])
+async def test_cancel_from_another_worker_stops_a_running_merge(store, service, monkeypatch, shared_store):
+    monkeypatch.setattr("config.settings.MERGE_PROGRESS_SAVE_SECONDS", 0)
+    owner = service()
+    other = service()
+    if not shared_store:
+        # As if the other worker were another process
+        other.session_store = MergeSessionStore(db_service=get_db_service())
+    merge_session_id = f"merge-{uuid.uuid4()}"
+
+    async def ready(merge_session_id, user_id):
+        return {"ready": True, "video_files": []}
+
+    async def priority(user_id):
+        return 1
+
+    async def analyze(video_files, work_dir, probe_cache=None):
+        return {"videos": [], "total_duration": 10.0}
+
+    merging = asyncio.Event()
+    stopped = []
+
+    async def merge_single_pass(video_info, work_dir, original_video_files=None, progress_callback=None,
+                                should_stop=None):
+        merging.set()
+        # Stands in for FFmpeg's progress lines, which check should_stop the same way
+        for step in range(200):
+            if should_stop():
+                stopped.append(step)
+                raise MergeCancelled(merge_session_id)
+            progress_callback(step / 2)
+            await asyncio.sleep(0.01)
+        raise AssertionError("merge was never stopped")
+
+    owner.check_merge_readiness = ready
+    owner._get_merge_priority = priority
+    owner._analyze_videos = analyze
+    owner._use_single_pass_merge = lambda video_info: True
+    owner._merge_single_pass = merge_single_pass
+
+    await owner.initiate_merge(merge_session_id, "7")
+    await asyncio.wait_for(merging.wait(), timeout=2)
+    session = owner.merge_sessions[merge_session_id]
+    await asyncio.sleep(0.05)  # Some progress has been saved
+
+    assert await other.cancel_merge(merge_session_id) is True
+    for _ in range(200):
+        if stopped and merge_session_id not in owner.merge_sessions:
+            break
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*owner._progress_saves)
+
+    assert stopped
+    assert session["status"] == MergeSessionStatus.CANCELLED
+    assert merge_session_id not in owner.merge_sessions
+    assert (await store.load(merge_session_id))["status"] == MergeSessionStatus.CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_cancelled_merge_kills_ffmpeg(service, tmp_path):
+    # Writes -progress style lines until killed
+    script = "import time\nwhile True:\n    print('out_time_us=1000000', flush=True)\n    time.sleep(0.01)\n"
+    calls = []
+
+    def should_stop():
+        calls.append(1)
+        return len(calls) > 3
+
+    with pytest.raises(MergeCancelled):
+        await service()._run_ffmpeg_with_progress(
+            [sys.executable, "-c", script, str(tmp_path / "out.mp4")],
+            total_duration=10.0,
+            timeout=5,
+            should_stop=should_stop
+        )
+    assert len(calls) == 4
@@ -0,0 +1,112 @@
+"""
+Tests for the in-process metrics registry, request middleware and hot-path instrumentation
+"""
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from services.metrics_registry import MetricsMiddleware, MetricsRegistry, metrics_registry
+
+
+def test_render_uses_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    uploads = registry.counter("uploads_total", "Uploads", ("kind",))
+    latency = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0))
+    uploads.inc("raw", amount=2)
+    uploads.inc('we"ird')
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value, "merge")
+    registry.register_collector("caches", lambda: [("cache_hit_ratio", "gauge", "Hit ratio", [({"cache": "session"}, 0.75)])])
+
+    assert registry.histogram("op_seconds", "Op latency", ("op",)) is latency
+    with pytest.raises(ValueError):
+        registry.counter("op_seconds", "Not a counter")
+
+    assert registry.render().splitlines() == [
+        "# HELP uploads_total Uploads",
+        "# TYPE uploads_total counter",
+        'uploads_total{kind="raw"} 2',
+        'uploads_total{kind="we\\"ird"} 1',
+        "# HELP op_seconds Op latency",
+        "# TYPE op_seconds histogram",
+        'op_seconds_bucket{op="merge",le="0.1"} 1',
+        'op_seconds_bucket{op="merge",le="1"} 2',
+        'op_seconds_bucket{op="merge",le="+Inf"} 3',
+        'op_seconds_sum{op="merge"} 3.55',
+        'op_seconds_count{op="merge"} 3',
+        "# HELP cache_hit_ratio Hit ratio",
+        "# TYPE cache_hit_ratio gauge",
+        'cache_hit_ratio{cache="session"} 0.75',
+    ]
+
+
+def test_middleware_labels_requests_by_route_template():
+    registry = MetricsRegistry()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="missing")
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    client = TestClient(app)
+    for path in ("/items/1", "/items/2", "/items/0", "/nowhere"):
+        client.get(path)
+
+    requests = registry.histogram("http_request_duration_seconds", "")
+    assert requests.count("GET", "/items/{item_id}", "200") == 2
+    assert requests.count("GET", "/items/{item_id}", "404") == 1
+    assert requests.count("GET", "unmatched", "404") == 1
+
+
+def test_execute_query_records_timing_rows_and_errors():
+    from services.database_service import QUERY_ERRORS, QUERY_ROWS, QUERY_SECONDS, get_db_service
+
+    db = get_db_service()
+    selects, rows = QUERY_SECONDS.count("SELECT"), QUERY_ROWS.value("SELECT")
+
+    db._execute_query("SELECT 1 AS one UNION ALL SELECT 2", fetch_all=True)
+    with pytest.raises(Exception) as failure:
+        db._execute_query("SELECT * FROM no_such_table", fetch_all=True)
+    errors = QUERY_ERRORS.value("SELECT", type(failure.value).__name__)
+
+    assert QUERY_SECONDS.count("SELECT") == selects + 2
+    assert QUERY_ROWS.value("SELECT") == rows + 2
+    assert errors >= 1
+
+
+def test_stream_rows_records_timing_and_rows():
+    from services.database_service import QUERY_ROWS, QUERY_SECONDS, get_db_service
+
+    db = get_db_service()
+    selects, rows = QUERY_SECONDS.count("SELECT"), QUERY_ROWS.value("SELECT")
+
+    batches = list(db._stream_rows("SELECT 1 AS one UNION ALL SELECT 2 UNION ALL SELECT 3", batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert QUERY_SECONDS.count("SELECT") == selects + 1
+    assert QUERY_ROWS.value("SELECT") == rows + 3
+
+
+def test_s3_calls_are_timed_per_operation(monkeypatch):
+    moto = pytest.importorskip("moto")
+    import boto3
+    from botocore.exceptions import ClientError
+    from services.cloud_storage_service import S3_REQUEST_SECONDS, instrument_s3_client
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with moto.mock_aws():
+        client = instrument_s3_client(boto3.client("s3", region_name="us-east-1"))
+        puts = S3_REQUEST_SECONDS.count("PutObject", "ok")
+        missing = S3_REQUEST_SECONDS.count("HeadObject", "error")
+        client.create_bucket(Bucket="metrics-test")
+        client.put_object(Bucket="metrics-test", Key="a.mp4", Body=b"video")
+        with pytest.raises(ClientError):
+            client.head_object(Bucket="metrics-test", Key="missing.mp4")
+
+    assert S3_REQUEST_SECONDS.count("PutObject", "ok") == puts + 1
+    assert S3_REQUEST_SECONDS.count("HeadObject", "error") == missing + 1
+    assert "s3_request_duration_seconds_bucket" in metrics_registry.render()
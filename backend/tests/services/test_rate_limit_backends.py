@@ -0,0 +1,125 @@
+"""
+Tests for the pluggable rate limit backends
+"""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from services.rate_limit_backends import (
+    RateLimitBackend, SlidingWindowRateLimitBackend, CounterRateLimitBackend, LocalCounterStore,
+    create_rate_limit_backend
+)
+from services.rate_limiter import RateLimiter, RateLimitExceeded
+
+HOUR = 3600
+
+
+@pytest.fixture(params=["sliding_window", "counter"])
+def backend(request, clock):
+    if request.param == "sliding_window":
+        return SlidingWindowRateLimitBackend(clock=clock)
+    return CounterRateLimitBackend(LocalCounterStore(clock=clock), bucket_seconds=60, clock=clock)
+
+
+@pytest.mark.asyncio
+async def test_requests_leave_the_window(backend, clock):
+    for _ in range(3):
+        await backend.record("user-1", clock())
+        clock.now += 600
+
+    assert (await backend.get_usage("user-1", HOUR))[0] == 3
+    assert (await backend.get_usage("user-2", HOUR)) == (0, None)
+
+    # The first request was 30 minutes before the window edge; allow one bucket of slack
+    clock.now += HOUR - 1800 + 60
+    count, oldest = await backend.get_usage("user-1", HOUR)
+    assert count == 2
+    assert oldest is not None
+
+    clock.now += HOUR
+    assert await backend.get_usage("user-1", HOUR) == (0, None)
+
+
+@pytest.mark.asyncio
+async def test_reset_clears_one_user(backend, clock):
+    await backend.record("user-1", clock())
+    await backend.record("user-2", clock())
+
+    await backend.reset("user-1")
+
+    assert (await backend.get_usage("user-1", HOUR))[0] == 0
+    assert (await backend.get_usage("user-2", HOUR))[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_cleanup_drops_idle_users(clock):
+    backend = SlidingWindowRateLimitBackend(clock=clock)
+    await backend.record("old", clock() - 2 * HOUR)
+    await backend.record("mixed", clock() - 2 * HOUR)
+    await backend.record("mixed", clock() - 60)
+
+    assert await backend.cleanup(HOUR) == 1
+    assert (await backend.get_usage("mixed", HOUR))[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_hot_path_stays_off_the_database(clock):
+    limiter = RateLimiter(backend=SlidingWindowRateLimitBackend())
+
+    with patch("services.database_service.DatabaseService._execute_query_async") as query, \
+            patch("services.database_service.DatabaseService._execute_select_async") as select, \
+            patch("services.database_service.DatabaseService._execute_insert_async") as insert:
+        for _ in range(2):
+            assert await limiter.check_rate_limit("user-1", limit=2) is True
+            await limiter.record_request("user-1")
+        with pytest.raises(RateLimitExceeded, match="Maximum 2 requests per 1 hour"):
+            await limiter.check_rate_limit("user-1", limit=2)
+        status = await limiter.get_rate_limit_status("user-1", limit=2)
+
+    assert (status["used"], status["remaining"]) == (2, 0)
+    assert status["reset_time"] is not None
+    query.assert_not_called()
+    select.assert_not_called()
+    insert.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_store_share_the_limit():
+    store = LocalCounterStore()
+    workers = [RateLimiter(backend=CounterRateLimitBackend(store)) for _ in range(3)]
+
+    async def attempt(limiter):
+        try:
+            await limiter.check_rate_limit("user-1", limit=4)
+        except RateLimitExceeded:
+            return False
+        await limiter.record_request("user-1")
+        return True
+
+    results = await asyncio.gather(*(attempt(workers[i % 3]) for i in range(9)))
+    assert sum(results) == 4
+
+
+def test_backend_selection(monkeypatch):
+    assert isinstance(create_rate_limit_backend("memory"), SlidingWindowRateLimitBackend)
+    monkeypatch.setattr("config.settings.RATE_LIMIT_REDIS_URL", None)
+    with pytest.raises(ValueError):
+        create_rate_limit_backend("redis")
+    with pytest.raises(ValueError):
+        create_rate_limit_backend("carrier-pigeon")
+
+
+def test_incomplete_backend_cannot_be_constructed():
+    class NoCleanup(RateLimitBackend):
+        async def get_usage(self, user_id, window_seconds):
+            return 0, None
+
+        async def record(self, user_id, timestamp):
+            pass
+
+        async def reset(self, user_id):
+            pass
+
+    with pytest.raises(TypeError):
+        NoCleanup()
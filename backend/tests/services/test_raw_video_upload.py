@@ -0,0 +1,108 @@
+"""
+Tests for raw-body video uploads: streamed to temp storage or to S3 multipart
+"""
+import os
+from unittest.mock import patch
+
+import pytest
+
+moto = pytest.importorskip("moto")
+import boto3
+from botocore.exceptions import ClientError
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from config import settings
+from services.auth_service import get_current_user
+from services.cloud_storage_service import S3MultipartUploader
+from services.database_service import get_db_service
+from services.media_index_service import MediaIndexService
+from services.s3_media_service import S3MediaService
+from services.upload_service import UploadServiceError, UploadErrorType, stream_to_file
+from tests.conftest import PieceStream
+
+BUCKET = "raw-upload-test"
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3_service(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_S3_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_S3_BUCKET_NAME", BUCKET)
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        service = S3MediaService()
+        service.media_index = MediaIndexService(db_service=get_db_service(), cache_size=100)
+        service.transfer = S3MultipartUploader(service.s3_client, BUCKET, threshold=PART_SIZE, part_size=PART_SIZE)
+        service.transfer.RETRY_BACKOFF_SECONDS = 0
+        yield service
+
+
+@pytest.mark.asyncio
+async def test_large_stream_is_sent_as_multipart_parts(s3_service):
+    data = os.urandom(PART_SIZE * 2 + 12345)
+
+    with patch.object(s3_service.s3_client, "upload_part", wraps=s3_service.s3_client.upload_part) as upload_part:
+        media_id, size = await s3_service.upload_video_stream_to_s3(PieceStream(data), "video/mp4")
+
+    assert (size, upload_part.call_count) == (len(data), 3)
+    key = s3_service.get_s3_key_from_media_id(media_id)
+    body = s3_service.s3_client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+    assert body == data
+
+
+@pytest.mark.asyncio
+async def test_small_stream_is_a_single_put(s3_service):
+    with patch.object(s3_service.s3_client, "create_multipart_upload") as create:
+        media_id, size = await s3_service.upload_video_stream_to_s3(PieceStream(b"v" * 4096), "video/mp4")
+
+    create.assert_not_called()
+    assert size == 4096
+    assert get_db_service().get_media_object(media_id)["file_size"] == 4096
+
+
+@pytest.mark.asyncio
+async def test_failed_part_aborts_the_multipart_upload(s3_service):
+    error = ClientError({"Error": {"Code": "500", "Message": "boom"}}, "UploadPart")
+
+    with patch.object(s3_service.s3_client, "upload_part", side_effect=error):
+        with pytest.raises(HTTPException):
+            await s3_service.upload_video_stream_to_s3(PieceStream(b"v" * (PART_SIZE * 2)), "video/mp4")
+
+    assert "Uploads" not in s3_service.s3_client.list_multipart_uploads(Bucket=BUCKET)
+
+
+@pytest.mark.asyncio
+async def test_stream_to_file_stops_at_the_size_limit(tmp_path):
+    path = tmp_path / "video.mp4"
+
+    assert await stream_to_file(PieceStream(b"v" * 5000), path, max_size=5000, block_size=1024) == 5000
+    assert path.read_bytes() == b"v" * 5000
+
+    with pytest.raises(UploadServiceError) as error:
+        await stream_to_file(PieceStream(b"v" * 5001), path, max_size=5000, block_size=1024)
+    assert error.value.error_type == UploadErrorType.FILE_TOO_LARGE
+    assert not path.exists()
+
+
+def test_temp_video_endpoint_writes_the_raw_body(tmp_path, monkeypatch, load_endpoint_module):
+    router = load_endpoint_module("challenge_video_endpoints").router
+
+    monkeypatch.setattr(settings, "TEMP_DIR", tmp_path)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: "7"
+    data = os.urandom(300000)
+
+    response = TestClient(app).post(
+        "/api/v1/challenge-videos/upload-temp-video?filename=../clip.mp4",
+        content=iter([data[:100000], data[100000:]]),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+
+    assert response.status_code == 200
+    info = response.json()["file_info"]
+    assert (info["filename"], info["size"]) == ("clip.mp4", len(data))
+    assert list(tmp_path.glob(f"temp_video_{response.json()['temp_id']}_clip.mp4"))[0].read_bytes() == data
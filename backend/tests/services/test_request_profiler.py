@@ -0,0 +1,95 @@
+"""
+Tests for opt-in request profiling: sampling, span trees and the slowest-trace buffer
+"""
+import os
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.database_service import get_db_service
+from services.db_executor import run_db_call
+from services.request_profiler import (
+    ProfiledJSONResponse, ProfilingMiddleware, RequestProfiler,
+    fingerprint_sql, span, traced_subprocess_exec
+)
+
+
+def build_app(profiler: RequestProfiler) -> FastAPI:
+    app = FastAPI(default_response_class=ProfiledJSONResponse)
+
+    @app.get("/challenges/{challenge_id}")
+    async def get_challenge(challenge_id: str):
+        db = get_db_service()
+        for value in (1, 2):
+            await run_db_call(db._execute_query, f"SELECT {value} AS one WHERE 'a' IN ('a', 'b')", fetch_one=True)
+        await run_db_call(lambda: list(db._stream_rows("SELECT 3 AS three")))
+        with span("signed_url.sign", keys=3):
+            pass
+        process = await traced_subprocess_exec(sys.executable, "-c", "pass")
+        await process.wait()
+        return {"challenge_id": challenge_id}
+
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    return app
+
+
+def test_header_profiles_a_request_into_a_span_tree():
+    profiler = RequestProfiler(enabled=False, header_enabled=True, slowest=5, max_spans=100)
+    client = TestClient(build_app(profiler))
+
+    assert "x-profile-trace-id" not in client.get("/challenges/c1").headers
+    response = client.get("/challenges/c1", headers={"X-Profile-Request": "1"})
+
+    assert response.status_code == 200
+    trace = profiler.get_trace(response.headers["x-profile-trace-id"])
+    assert (trace["route"], trace["status"], trace["trigger"]) == ("/challenges/{challenge_id}", 200, "header")
+    children = trace["tree"]["children"]
+    assert [child["name"] for child in children] == [
+        "db.query", "db.query", "db.query", "signed_url.sign", "subprocess", "serialize"
+    ]
+    assert {child["attrs"]["sql"] for child in children[:2]} == {"SELECT ? AS one WHERE ? IN (...)"}
+    assert children[2]["attrs"]["sql"] == "SELECT ? AS three"
+    assert children[4]["attrs"]["command"] == os.path.basename(sys.executable)
+    assert all(child["duration_ms"] is not None for child in children[:4])
+    assert profiler.get_stats()["profiled_by_header"] == 1
+
+
+def test_sampling_rate_and_disabled_fast_path():
+    profiler = RequestProfiler(enabled=False, header_enabled=False, slowest=50)
+    client = TestClient(build_app(profiler))
+    client.get("/challenges/c1", headers={"X-Profile-Request": "1"})
+    assert profiler.get_traces() == []
+    assert span("outside a request").__enter__() is None
+
+    profiler.configure(enabled=True, sample_percent=100)
+    for i in range(3):
+        client.get(f"/challenges/c{i}")
+    assert profiler.get_stats()["profiled_sampled"] == 3
+
+    profiler.configure(sample_percent=0)
+    client.get("/challenges/c9")
+    assert profiler.get_stats()["profiled_sampled"] == 3
+
+
+def test_only_the_slowest_traces_are_kept():
+    profiler = RequestProfiler(enabled=True, slowest=2, max_spans=2)
+    scope = {"method": "GET", "path": "/api/v1/challenges/"}
+    for seconds in (0.3, 0.1, 0.5, 0.2):
+        trace = profiler.start(scope, "sampled")
+        trace.root.start = time.perf_counter() - seconds
+        for _ in range(3):
+            trace.add(trace.root, "db.query", {}, time.perf_counter())
+        profiler.finish(trace)
+
+    kept = profiler.get_traces()
+    assert [round(t["duration_ms"], -2) for t in kept] == [500, 300]
+    assert (kept[0]["spans"], kept[0]["dropped_spans"]) == (2, 1)
+    assert profiler.clear() == 2
+
+
+def test_sql_fingerprints_group_queries_by_shape():
+    assert fingerprint_sql("SELECT *\n  FROM challenges WHERE id = 'abc' AND  score > 10.5") == \
+        "SELECT * FROM challenges WHERE id = ? AND score > ?"
+    assert fingerprint_sql("DELETE FROM t WHERE id IN (?, ?,?)") == "DELETE FROM t WHERE id IN (...)"
@@ -0,0 +1,71 @@
+"""
+Tests for rolling processing stats aggregates and latency histograms
+"""
+import random
+from unittest.mock import patch
+
+import pytest
+
+from services.monitoring_service import MediaProcessingMonitor, ProcessingStage
+from services.rolling_stats import LatencyHistogram, RollingAggregates
+
+
+def test_histogram_quantiles_stay_within_bucket_precision():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(0, 1.5) for _ in range(20000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    for q in (0.50, 0.95, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        assert histogram.quantile(q) == pytest.approx(exact, rel=0.02)
+    buckets = histogram.buckets()
+    assert sum(b["count"] for b in buckets) == len(values)
+    assert [b["le"] for b in buckets] == sorted(b["le"] for b in buckets)
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_window_merges_covering_buckets_and_drops_expired_ones():
+    stats = RollingAggregates(bucket_seconds=60, retention_seconds=600)
+    stats.record("merging", True, 1.0, now=1000)
+    stats.record("merging", False, 3.0, "FFMPEG_ERROR", now=1030)
+    stats.record("merging", True, 2.0, now=1300)
+
+    recent = stats.window(60, now=1310)["merging"]
+    assert (recent.count, recent.success_count, recent.average_duration) == (1, 1, 2.0)
+
+    everything = stats.window(600, now=1310)["merging"]
+    assert (everything.count, everything.success_count) == (3, 2)
+    assert (everything.duration_min, everything.duration_max) == (1.0, 3.0)
+    assert everything.errors == {"FFMPEG_ERROR": 1}
+
+    # Opening a bucket past retention drops the oldest ones
+    stats.record("merging", True, 4.0, now=1700)
+    assert stats.window(3600, now=1700)["merging"].count == 2
+    assert stats.get_stats()["buckets"] == 2
+
+
+@pytest.mark.asyncio
+async def test_processing_stats_come_from_the_rolling_buckets():
+    monitor = MediaProcessingMonitor()
+    with patch.object(monitor.sampler, "start"):
+        for i in range(1500):
+            stage = ProcessingStage.MERGING if i % 3 else ProcessingStage.UPLOAD
+            await monitor.start_processing(f"s{i}", "7", stage)
+            await monitor.complete_processing(
+                f"s{i}", stage, success=i % 10 != 0, error_code=None if i % 10 else "MERGE_FAILED"
+            )
+    monitor._background_task.cancel()
+
+    # Raw operations are capped; the aggregates still count all of them
+    assert len(monitor.processing_metrics) == 1000
+    stats = monitor.get_processing_stats(hours=1, include_histograms=True)
+    assert stats["total_operations"] == 1500
+    assert stats["failed_operations"] == 150
+    assert stats["error_breakdown"] == {"MERGE_FAILED": 150}
+    merging = stats["stage_breakdown"]["merging"]
+    assert merging["count"] == 1000
+    assert merging["min_duration"] <= merging["p50_duration"] <= merging["p99_duration"] <= merging["max_duration"] * 1.02
+    assert sum(b["count"] for b in merging["duration_histogram"]) == 1000
+    assert "duration_histogram" not in monitor.get_processing_stats(hours=1)["stage_breakdown"]["merging"]
@@ -0,0 +1,158 @@
+"""
+Tests for the concurrent S3 multipart transfer engine, against a moto S3 stand-in
+"""
+import io
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+moto = pytest.importorskip("moto")
+import boto3
+from botocore.exceptions import ClientError
+
+from services.cloud_storage_service import S3CloudStorageService, S3MultipartUploader
+
+BUCKET = "multipart-test"
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def uploader(client, **kwargs):
+    options = {"threshold": PART_SIZE, "part_size": PART_SIZE, "concurrency": 3, "max_attempts": 3, "checksum": True}
+    options.update(kwargs)
+    transfer = S3MultipartUploader(client, BUCKET, **options)
+    transfer.RETRY_BACKOFF_SECONDS = 0
+    return transfer
+
+
+def stored(client, key):
+    return client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+class TrackingSource(io.BytesIO):
+    """Records the most bytes read ahead of the parts S3 has acknowledged"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.acknowledged = 0
+        self.max_ahead = 0
+
+    def read(self, size=-1):
+        block = super().read(size)
+        self.max_ahead = max(self.max_ahead, self.tell() - self.acknowledged)
+        return block
+
+
+@pytest.mark.asyncio
+async def test_parts_go_up_concurrently_within_the_buffer_bound(s3_client):
+    data = os.urandom(PART_SIZE * 6 + 777)
+    source = TrackingSource(data)
+    transfer = uploader(s3_client)
+    in_flight = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    real_upload_part = s3_client.upload_part
+
+    def slow_upload_part(**kwargs):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        time.sleep(0.05)
+        try:
+            return real_upload_part(**kwargs)
+        finally:
+            with lock:
+                in_flight["now"] -= 1
+                source.acknowledged += len(kwargs["Body"])
+
+    with patch.object(s3_client, "upload_part", side_effect=slow_upload_part):
+        assert await transfer.upload(source, "big.mp4", {"ContentType": "video/mp4"}) == len(data)
+
+    assert stored(s3_client, "big.mp4") == data
+    assert in_flight["max"] == 3
+    # Never more than the parts in flight plus the one being read
+    assert source.max_ahead <= 4 * PART_SIZE
+    assert transfer.get_stats()["parts"] == 7
+
+
+@pytest.mark.asyncio
+async def test_threshold_buffering_stops_once_the_threshold_is_reached(s3_client):
+    data = os.urandom(PART_SIZE * 3)
+    source = TrackingSource(data)
+    transfer = uploader(s3_client, threshold=2 * PART_SIZE, concurrency=1)
+    real_upload_part = s3_client.upload_part
+
+    def acknowledging_upload_part(**kwargs):
+        response = real_upload_part(**kwargs)
+        source.acknowledged += len(kwargs["Body"])
+        return response
+
+    with patch.object(s3_client, "upload_part", side_effect=acknowledging_upload_part):
+        assert await transfer.upload(source, "bounded.mp4") == len(data)
+
+    assert stored(s3_client, "bounded.mp4") == data
+    assert source.max_ahead <= 2 * PART_SIZE
+
+
+@pytest.mark.asyncio
+async def test_failed_part_is_retried_with_its_checksum(s3_client):
+    data = os.urandom(PART_SIZE * 2 + 10)
+    transfer = uploader(s3_client)
+    real_upload_part = s3_client.upload_part
+    calls = []
+
+    def flaky_upload_part(**kwargs):
+        calls.append(kwargs)
+        if kwargs["PartNumber"] == 2 and len([c for c in calls if c["PartNumber"] == 2]) == 1:
+            raise ClientError({"Error": {"Code": "RequestTimeout", "Message": "slow"}}, "UploadPart")
+        return real_upload_part(**kwargs)
+
+    with patch.object(s3_client, "upload_part", side_effect=flaky_upload_part):
+        await transfer.upload(io.BytesIO(data), "retried.mp4")
+
+    assert stored(s3_client, "retried.mp4") == data
+    assert transfer.get_stats()["part_retries"] == 1
+    assert all("ContentMD5" in call for call in calls)
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_abort_the_upload(s3_client):
+    transfer = uploader(s3_client, max_attempts=2)
+    error = ClientError({"Error": {"Code": "InternalError", "Message": "down"}}, "UploadPart")
+
+    with patch.object(s3_client, "upload_part", side_effect=error):
+        with pytest.raises(ClientError):
+            await transfer.upload(io.BytesIO(os.urandom(PART_SIZE * 3)), "failed.mp4")
+
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket=BUCKET)
+    assert transfer.get_stats()["aborted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_storage_service_streams_files_through_the_engine(s3_client, tmp_path):
+    service = S3CloudStorageService(bucket_name=BUCKET)
+    service.s3_client = s3_client
+    service.transfer = uploader(s3_client)
+    small, large = os.urandom(1024), os.urandom(PART_SIZE + 1)
+    (tmp_path / "small.mp4").write_bytes(small)
+    (tmp_path / "large.mp4").write_bytes(large)
+
+    for name in ("small.mp4", "large.mp4"):
+        with open(tmp_path / name, "rb") as f:
+            await service.upload_file_stream(f, f"merged/{name}", "video/mp4", os.path.getsize(tmp_path / name))
+
+    assert stored(s3_client, "merged/small.mp4") == small
+    assert stored(s3_client, "merged/large.mp4") == large
+    stats = service.transfer.get_stats()
+    assert (stats["uploads"], stats["multipart_uploads"]) == (2, 1)
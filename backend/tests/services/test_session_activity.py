@@ -0,0 +1,127 @@
+"""
+Tests for the batched session activity writer
+"""
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from services.auth_service import AuthService, VerifiedSessionCache
+from services.database_service import get_db_service
+from services.session_activity import SessionActivityWriter
+
+
+@pytest.fixture
+def db():
+    return get_db_service()
+
+
+def create_session(db) -> str:
+    token = f"token-{uuid.uuid4()}"
+    db.create_session(f"user-{uuid.uuid4()}", token, expires_at=datetime.utcnow() + timedelta(hours=1))
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def last_accessed(db, token_hash: str):
+    row = db._execute_query(
+        "SELECT last_accessed FROM user_sessions WHERE token_hash = ?", (token_hash,), fetch_one=True
+    )
+    return str(row["last_accessed"])
+
+
+def test_n_requests_cost_one_write_per_interval(db, monkeypatch):
+    hashes = [create_session(db) for _ in range(5)]
+    writer = SessionActivityWriter(db_service=db, flush_interval=0)
+    writes = Mock(wraps=db._execute_query)
+    monkeypatch.setattr(db, "_execute_query", writes)
+
+    # 200 requests spread over 5 sessions, previously 200 UPDATE statements
+    latest = datetime.utcnow() + timedelta(minutes=5)
+    for i in range(200):
+        writer.touch(hashes[i % 5], latest - timedelta(seconds=200 - i))
+    assert writes.call_count == 0
+
+    assert writer.flush() == 5
+    assert writes.call_count == 1
+    monkeypatch.undo()
+
+    assert last_accessed(db, hashes[-1]) == str(latest - timedelta(seconds=1))
+    stats = writer.get_stats()
+    assert (stats["touches"], stats["flushes"], stats["last_batch_size"], stats["pending"]) == (200, 1, 5, 0)
+    assert stats["last_flush_ms"] >= 0
+
+
+def test_touch_batches_stay_within_the_sqlite_parameter_limit(db, monkeypatch):
+    touched = create_session(db)
+    writes = Mock(wraps=db._execute_query)
+    monkeypatch.setattr(db, "_execute_query", writes)
+    touches = {f"missing-{i}": datetime.utcnow() for i in range(450)}
+    touches[touched] = datetime.utcnow() + timedelta(hours=2)
+
+    assert db.touch_sessions(touches) == 1
+
+    assert writes.call_count == 3
+    assert max(len(call.args[1]) for call in writes.call_args_list) <= db.SQLITE_MAX_BOUND_PARAMETERS
+
+
+def test_flush_never_moves_last_accessed_backwards_or_revives_sessions(db):
+    active, revoked = create_session(db), create_session(db)
+    db.invalidate_session(revoked)
+    writer = SessionActivityWriter(db_service=db, flush_interval=0)
+    future = datetime.utcnow() + timedelta(hours=1)
+
+    writer.touch(active, future)
+    writer.touch(revoked, future)
+    assert writer.flush() == 1
+
+    writer.touch(active, future - timedelta(minutes=30))
+    assert writer.flush() == 0
+    assert last_accessed(db, active) == str(future)
+
+
+def test_failed_flush_keeps_touches_and_close_writes_them():
+    db = Mock()
+    db.touch_sessions = Mock(side_effect=[RuntimeError("database down"), 2])
+    writer = SessionActivityWriter(db_service=db, flush_interval=0)
+    writer.touch("a")
+    writer.touch("b")
+
+    assert writer.flush() == 0
+    assert writer.get_stats()["errors"] == 1
+    writer.close()
+
+    assert set(db.touch_sessions.call_args[0][0]) == {"a", "b"}
+    assert writer.get_stats()["pending"] == 0
+
+
+def test_background_thread_flushes_periodically():
+    db = Mock()
+    db.touch_sessions = Mock(return_value=1)
+    writer = SessionActivityWriter(db_service=db, flush_interval=0.05)
+
+    writer.touch("a")
+    writer._stop.wait(0.3)
+    writer.close()
+
+    assert db.touch_sessions.call_count == 1
+
+
+def test_verified_requests_touch_through_the_writer():
+    db = Mock()
+    db.get_session_by_token_hash = Mock(return_value={"session_id": "s", "session_type": "user"})
+    db.touch_sessions = Mock(return_value=1)
+    auth = AuthService()
+    auth.set_database_service(db)
+    auth.session_cache = VerifiedSessionCache(ttl=60, max_entries=10)
+    auth.session_activity = SessionActivityWriter(db_service=db, flush_interval=0)
+    token = auth.create_access_token({"sub": "42"})
+
+    for _ in range(20):
+        auth.verify_token(token)
+    auth.session_activity.flush()
+
+    db.update_session_access.assert_not_called()
+    assert db.touch_sessions.call_count == 1
+    assert list(db.touch_sessions.call_args[0][0]) == [hashlib.sha256(token.encode()).hexdigest()]
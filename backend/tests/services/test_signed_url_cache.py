@@ -0,0 +1,109 @@
+"""
+Tests for the signed URL cache and batched signing in challenge listings
+"""
+from unittest.mock import patch
+
+import pytest
+
+from services.signed_url_cache import SignedUrlCache
+
+
+class FakeStorage:
+    """Presigns URLs locally and records every signature"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.signed = []
+
+    def generate_presigned_url(self, key: str, expiration: int = 3600) -> str:
+        self.signed.append((key, expiration))
+        expires_at = int(self.clock()) + expiration
+        return f"https://bucket.s3.amazonaws.com/{key}?Expires={expires_at}"
+
+
+def expires_at(url: str) -> int:
+    return int(url.split("Expires=")[1])
+
+
+@pytest.fixture
+def cache(clock):
+    return SignedUrlCache(expires_in=3600, min_remaining=900, max_entries=100, clock=clock)
+
+
+@pytest.mark.asyncio
+async def test_urls_are_reused_with_minimum_validity_left(cache, clock):
+    storage = FakeStorage(clock)
+    first = await cache.get_url(storage, "videos/a.mp4")
+
+    for step in range(0, 2700, 300):
+        clock.now += 300 if step else 0
+        url = await cache.get_url(storage, "videos/a.mp4")
+        if url == first:
+            assert expires_at(url) - clock.now >= 900
+
+    assert len(storage.signed) == 2
+    assert expires_at(await cache.get_url(storage, "videos/a.mp4")) - clock.now >= 900
+    assert expires_at(first) - 1_700_000_000 <= 3600
+
+
+@pytest.mark.asyncio
+async def test_page_misses_are_signed_in_one_batch(cache, clock):
+    storage = FakeStorage(clock)
+    keys = [f"videos/{i}.mp4" for i in range(20)] + ["videos/0.mp4"]
+
+    urls = await cache.get_urls(storage, keys)
+    again = await cache.get_urls(storage, keys)
+
+    assert len(urls) == 20
+    assert urls == again
+    assert len(storage.signed) == 20
+    stats = cache.get_stats()
+    assert stats["sign_batches"] == 1
+    assert stats["hits"] == 20
+    assert stats["misses"] == 20
+    assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_storage_without_sync_presign_is_signed_concurrently(cache):
+    class AsyncOnlyStorage:
+        def __init__(self):
+            self.calls = []
+
+        async def get_file_url(self, key: str, expires_in: int = 3600) -> str:
+            self.calls.append(key)
+            if key == "bad":
+                raise RuntimeError("signing failed")
+            return f"https://signed/{key}"
+
+    storage = AsyncOnlyStorage()
+    urls = await cache.get_urls(storage, ["a", "bad", "b"])
+
+    assert urls == {"a": "https://signed/a", "b": "https://signed/b"}
+    assert sorted(storage.calls) == ["a", "b", "bad"]
+
+
+@pytest.mark.asyncio
+async def test_listing_helper_signs_storage_keys_once_per_page(cache, clock, load_endpoint_module):
+    challenge_endpoints = load_endpoint_module("challenge_endpoints")
+
+    storage = FakeStorage(clock)
+    references = [
+        "https://bucket.s3.amazonaws.com/videos/merged.mp4?X-Amz-Expires=1",
+        "videos/merged.mp4",
+        "https://cdn.example.com/static.mp4",
+        "/api/v1/media/stream/abc?signature=1",
+    ]
+
+    async def fake_storage():
+        return storage
+
+    with patch.object(challenge_endpoints, "get_cloud_storage_service", fake_storage), \
+            patch.object(challenge_endpoints, "get_signed_url_cache", return_value=cache):
+        resolved = await challenge_endpoints.get_signed_urls_for_videos(references + [None, ""])
+
+    assert storage.signed == [("videos/merged.mp4", storage.signed[0][1])]
+    assert resolved[references[0]] == resolved[references[1]]
+    assert resolved[references[2]] == references[2]
+    assert resolved[references[3]] == references[3]
+    assert None not in resolved
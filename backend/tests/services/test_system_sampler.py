@@ -0,0 +1,81 @@
+"""
+Tests for background system sampling in the media processing monitor
+"""
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from services.monitoring_service import MediaProcessingMonitor, ProcessingStage, SystemSampler, TempDirUsage
+
+
+def write(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+
+def age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_temp_usage_only_relists_changed_directories(tmp_path):
+    write(tmp_path / "a" / "one.bin", 1000)
+    write(tmp_path / "b" / "two.bin", 500)
+    usage = TempDirUsage(tmp_path, full_scan_every=100, active_window_seconds=60)
+    assert usage.refresh() == 1500
+
+    # Files in b are new and b itself changed; a is untouched
+    write(tmp_path / "b" / "three.bin", 250)
+    with patch("services.monitoring_service.os.scandir", wraps=os.scandir) as scandir:
+        assert usage.refresh() == 1750
+    assert [call.args[0] for call in scandir.call_args_list] == [str(tmp_path / "b")]
+
+
+def test_temp_usage_follows_growing_files_and_removals(tmp_path):
+    write(tmp_path / "merge" / "output.mp4", 100)
+    write(tmp_path / "merge" / "old.mp4", 100)
+    age(tmp_path / "merge" / "old.mp4", 3600)
+    usage = TempDirUsage(tmp_path, full_scan_every=2, active_window_seconds=60)
+    usage.refresh()
+
+    # Appending does not touch the directory mtime; the recent file is re-stat'ed anyway
+    with open(tmp_path / "merge" / "output.mp4", "ab") as f:
+        f.write(b"x" * 900)
+    assert usage.refresh() == 1100
+
+    # A quiet file that grows again is picked up by the periodic full scan
+    with open(tmp_path / "merge" / "old.mp4", "ab") as f:
+        f.write(b"x" * 50)
+    age(tmp_path / "merge" / "old.mp4", 3600)
+    assert usage.refresh() == 1150
+
+    for name in ("output.mp4", "old.mp4"):
+        (tmp_path / "merge" / name).unlink()
+    (tmp_path / "merge").rmdir()
+    assert usage.refresh() == 0
+
+
+@pytest.mark.asyncio
+async def test_start_processing_reads_the_latest_sample_without_blocking(tmp_path):
+    monitor = MediaProcessingMonitor()
+    monitor.sampler = SystemSampler(tmp_path, interval_seconds=3600)
+    write(tmp_path / "clip.mp4", 2 * 1024 * 1024)
+    monitor.sampler.sample()
+
+    # Only the sampler thread may touch psutil or the filesystem
+    with patch.object(monitor.sampler, "start"), \
+            patch("services.monitoring_service.psutil.cpu_percent") as cpu_percent, \
+            patch.object(TempDirUsage, "refresh") as refresh:
+        started = time.perf_counter()
+        metrics = await monitor.start_processing("s1", "7", ProcessingStage.MERGING)
+        health = monitor.get_system_health()
+
+    assert time.perf_counter() - started < 0.1
+    cpu_percent.assert_not_called()
+    refresh.assert_not_called()
+    assert metrics.memory_usage_mb == monitor.sampler.latest().memory_usage_percent
+    assert health["system_metrics"]["temp_dir_size_mb"] == pytest.approx(2.0)
+    assert health["system_metrics"]["active_sessions"] == 1
+    monitor._background_task.cancel()
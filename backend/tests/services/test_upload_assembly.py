@@ -0,0 +1,64 @@
+"""
+Tests for in-place chunk assembly and the streaming upload hash
+"""
+import hashlib
+import os
+import random
+
+import pytest
+
+from config import settings
+from services.upload_service import ChunkedUploadService
+from tests.conftest import initiate_upload
+
+CHUNK_SIZE = 1024
+DATA = os.urandom(CHUNK_SIZE * 9 + 300)
+DATA_HASH = hashlib.sha256(DATA).hexdigest()
+
+
+async def send(service, session, chunk_numbers):
+    for chunk_number in chunk_numbers:
+        await service.upload_chunk(
+            session.session_id, chunk_number, DATA[chunk_number * CHUNK_SIZE:(chunk_number + 1) * CHUNK_SIZE]
+        )
+
+
+@pytest.mark.asyncio
+async def test_out_of_order_chunks_are_hashed_before_completion(upload_dirs):
+    service = ChunkedUploadService()
+    session = await initiate_upload(service, len(DATA), CHUNK_SIZE)
+    order = list(range(session.total_chunks))
+    random.Random(3).shuffle(order)
+
+    await send(service, session, order)
+
+    # Every chunk is already in the digest; completion only compares it
+    assert service._file_hashes[session.session_id].next_chunk == session.total_chunks
+    final_path = await service.complete_upload(session.session_id, DATA_HASH)
+
+    assert final_path.read_bytes() == DATA
+    assert not any((settings.TEMP_DIR / session.session_id).glob("*"))
+
+
+@pytest.mark.asyncio
+async def test_completion_after_restart_reads_back_only_the_unhashed_remainder(upload_dirs):
+    service = ChunkedUploadService()
+    session = await initiate_upload(service, len(DATA), CHUNK_SIZE)
+    await send(service, session, range(session.total_chunks))
+
+    restarted = ChunkedUploadService()
+    final_path = await restarted.complete_upload(session.session_id, DATA_HASH)
+
+    assert final_path.read_bytes() == DATA
+
+
+@pytest.mark.asyncio
+async def test_hash_mismatch_leaves_no_final_file(upload_dirs):
+    service = ChunkedUploadService()
+    session = await initiate_upload(service, len(DATA), CHUNK_SIZE)
+    await send(service, session, range(session.total_chunks))
+
+    with pytest.raises(ValueError, match="Final file hash mismatch"):
+        await service.complete_upload(session.session_id, "0" * 64)
+
+    assert not service._get_final_path(session.session_id, "clip.mp4").exists()
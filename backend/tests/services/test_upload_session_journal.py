@@ -0,0 +1,128 @@
+"""
+Tests for the append-only upload session journal
+"""
+import json
+import threading
+
+import pytest
+
+from config import settings
+from models import UploadStatus
+from services.upload_service import ChunkedUploadService
+from services.upload_session_journal import UploadSessionJournal
+from tests.conftest import initiate_upload
+
+
+def journal_lines(service):
+    return service.journal.path.read_text().splitlines()
+
+
+@pytest.mark.asyncio
+async def test_each_chunk_appends_one_short_record(upload_dirs):
+    service = ChunkedUploadService()
+    sessions = [await initiate_upload(service, 1024 * 4) for _ in range(5)]
+    before = len(journal_lines(service))
+
+    await service.upload_chunk(sessions[2].session_id, 1, b"x" * 1024)
+
+    lines = journal_lines(service)
+    assert len(lines) == before + 1
+    assert json.loads(lines[-1])["op"] == "chunk"
+    assert len(lines[-1]) < 200
+
+
+@pytest.mark.asyncio
+async def test_restart_replays_sessions_chunks_and_removals(upload_dirs):
+    service = ChunkedUploadService()
+    kept, cancelled, removed = [await initiate_upload(service, 1024 * 4) for _ in range(3)]
+    await service.upload_chunk(kept.session_id, 2, b"x" * 1024)
+    await service.upload_chunk(kept.session_id, 0, b"x" * 1024)
+    await service.cancel_upload(cancelled.session_id)
+    await service.remove_session(removed.session_id)
+
+    restarted = ChunkedUploadService()
+
+    assert set(restarted.sessions) == {kept.session_id, cancelled.session_id}
+    assert restarted.sessions[kept.session_id].uploaded_chunks == [0, 2]
+    assert restarted.sessions[kept.session_id].status == UploadStatus.IN_PROGRESS
+    assert restarted.sessions[cancelled.session_id].status == UploadStatus.CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_other_workers_records(upload_dirs, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_JOURNAL_COMPACT_RECORDS", 10)
+    worker_a = ChunkedUploadService()
+    worker_b = ChunkedUploadService()
+    session_b = await initiate_upload(worker_b, 1024 * 2)
+    session_a = await initiate_upload(worker_a, 1024 * 20)
+
+    # Worker A's chunks push its journal past the threshold and trigger compaction
+    for chunk_number in range(20):
+        await worker_a.upload_chunk(session_a.session_id, chunk_number, b"x" * 1024)
+
+    assert worker_a.journal.get_stats()["compactions"] >= 1
+    assert len(journal_lines(worker_a)) < 20
+    restarted = ChunkedUploadService()
+    assert restarted.sessions[session_a.session_id].uploaded_chunks == list(range(20))
+    assert session_b.session_id in restarted.sessions
+
+
+def test_legacy_snapshot_is_migrated_and_torn_lines_skipped(tmp_path):
+    legacy = tmp_path / "upload_sessions.json"
+    legacy.write_text(json.dumps({"s1": {"session_id": "s1", "uploaded_chunks": [0], "status": "pending"}}))
+    journal = UploadSessionJournal(tmp_path / "upload_sessions.journal", legacy_snapshot=legacy)
+
+    assert journal.load()["s1"]["uploaded_chunks"] == [0]
+    assert not legacy.exists()
+
+    journal.record_chunk("s1", 1, "in_progress", "2026-01-01T00:00:00")
+    with open(journal.path, "a") as f:
+        f.write('{"op": "chunk", "session_id": "s1", "ch')
+
+    session = UploadSessionJournal(journal.path, legacy_snapshot=legacy).load()["s1"]
+    assert (session["uploaded_chunks"], session["status"]) == ([0, 1], "in_progress")
+
+
+@pytest.mark.asyncio
+async def test_journal_appends_run_off_the_event_loop(upload_dirs, monkeypatch):
+    service = ChunkedUploadService()
+    session = await initiate_upload(service, 1024 * 4)
+    append_threads = []
+    append = service.journal._append
+
+    def recording_append(record):
+        append_threads.append(threading.current_thread())
+        append(record)
+    monkeypatch.setattr(service.journal, "_append", recording_append)
+
+    await service.upload_chunk(session.session_id, 0, b"x" * 1024)
+
+    assert append_threads and threading.current_thread() not in append_threads
+
+
+def test_appends_during_compaction_are_not_blocked_or_lost(tmp_path):
+    journal = UploadSessionJournal(tmp_path / "upload_sessions.journal", compact_records=0)
+    journal.load()
+    journal.record_session({"session_id": "s1", "uploaded_chunks": [], "status": "pending"}, is_new=True)
+    for chunk_number in range(5):
+        journal.record_chunk("s1", chunk_number, "in_progress", "2026-01-01T00:00:00")
+
+    rewriting, appended = threading.Event(), threading.Event()
+    write_temp = journal._write_temp
+
+    def slow_write_temp(sessions):
+        rewriting.set()
+        assert appended.wait(5)
+        return write_temp(sessions)
+    journal._write_temp = slow_write_temp
+
+    compaction = threading.Thread(target=journal.compact)
+    compaction.start()
+    assert rewriting.wait(5)
+    journal.record_chunk("s1", 5, "in_progress", "2026-01-01T00:00:01")
+    appended.set()
+    compaction.join(5)
+
+    assert journal.get_stats()["compactions"] == 1
+    assert len(journal.path.read_text().splitlines()) == 2
+    assert UploadSessionJournal(journal.path).load()["s1"]["uploaded_chunks"] == list(range(6))
@@ -0,0 +1,107 @@
+"""
+Tests for streaming chunk ingestion
+"""
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from services.upload_service import ChunkedUploadService, RequestBodyStream, UploadServiceError, UploadErrorType
+from tests.conftest import PieceStream, initiate_upload
+
+CHUNK_SIZE = 4096
+DATA = os.urandom(CHUNK_SIZE * 3 + 500)
+
+
+async def body(pieces):
+    for piece in pieces:
+        yield piece
+
+
+@pytest.fixture
+def service(upload_dirs):
+    upload_service = ChunkedUploadService()
+    upload_service.STREAM_BLOCK_SIZE = 1024
+    return upload_service
+
+
+def chunk(chunk_number):
+    return DATA[chunk_number * CHUNK_SIZE:(chunk_number + 1) * CHUNK_SIZE]
+
+
+@pytest.mark.asyncio
+async def test_streamed_chunks_assemble_the_same_file(service):
+    session = await initiate_upload(service, len(DATA), CHUNK_SIZE)
+
+    # Mix the buffered and streamed paths, out of order
+    await service.upload_chunk(session.session_id, 1, chunk(1))
+    for chunk_number in (0, 3, 2):
+        data = chunk(chunk_number)
+        _, uploaded = await service.upload_chunk_stream(
+            session.session_id, chunk_number, PieceStream(data, piece_size=700), hashlib.sha256(data).hexdigest()
+        )
+        assert uploaded is True
+
+    assert service._file_hashes[session.session_id].next_chunk == session.total_chunks
+    final_path = await service.complete_upload(session.session_id, hashlib.sha256(DATA).hexdigest())
+    assert final_path.read_bytes() == DATA
+
+
+@pytest.mark.asyncio
+async def test_oversized_body_is_rejected_before_it_is_all_read(service):
+    session = await initiate_upload(service, len(DATA), CHUNK_SIZE)
+    stream = PieceStream(chunk(0) * 4, piece_size=1024)
+
+    with pytest.raises(UploadServiceError) as error:
+        await service.upload_chunk_stream(session.session_id, 0, stream)
+
+    assert error.value.error_type == UploadErrorType.CHUNK_MISMATCH
+    assert len(stream.reads) == CHUNK_SIZE // 1024 + 1
+    assert 0 not in service.sessions[session.session_id].uploaded_chunks
+
+
+@pytest.mark.asyncio
+async def test_hash_mismatch_leaves_chunk_for_a_retry(service):
+    session = await initiate_upload(service, len(DATA), CHUNK_SIZE)
+
+    with pytest.raises(UploadServiceError) as error:
+        await service.upload_chunk_stream(session.session_id, 0, PieceStream(chunk(0)), "0" * 64)
+
+    assert error.value.error_type == UploadErrorType.HASH_MISMATCH
+    assert service.sessions[session.session_id].uploaded_chunks == []
+    assert service._file_hashes[session.session_id].next_chunk == 0
+
+    _, uploaded = await service.upload_chunk_stream(session.session_id, 0, PieceStream(chunk(0)))
+    assert uploaded is True
+    assert service._file_hashes[session.session_id].next_chunk == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_upload_of_an_accepted_chunk_cannot_overwrite_it(service):
+    session = await initiate_upload(service, len(DATA), CHUNK_SIZE)
+
+    class YieldingStream(PieceStream):
+        async def read(self, size):
+            await asyncio.sleep(0)
+            return await super().read(size)
+
+    good, corrupt = chunk(0), bytes(CHUNK_SIZE)
+    results = await asyncio.gather(
+        service.upload_chunk_stream(session.session_id, 0, YieldingStream(good), hashlib.sha256(good).hexdigest()),
+        service.upload_chunk_stream(session.session_id, 0, YieldingStream(corrupt), hashlib.sha256(good).hexdigest())
+    )
+
+    assert [uploaded for _, uploaded in results] == [True, False]
+    assert not service._chunk_locks
+    for chunk_number in (1, 2, 3):
+        await service.upload_chunk(session.session_id, chunk_number, chunk(chunk_number))
+    final_path = await service.complete_upload(session.session_id, hashlib.sha256(DATA).hexdigest())
+    assert final_path.read_bytes() == DATA
+
+
+@pytest.mark.asyncio
+async def test_request_body_stream_regroups_pieces_into_blocks():
+    stream = RequestBodyStream(body([b"ab", b"cdefg", b"", b"hij"]))
+
+    assert [await stream.read(4) for _ in range(4)] == [b"abcd", b"efgh", b"ij", b""]
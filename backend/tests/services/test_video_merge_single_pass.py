@@ -0,0 +1,245 @@
+"""
+Tests for the single-pass video merge pipeline
+"""
+import asyncio
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from services.video_merge_service import VideoMergeService, VideoMergeError, MediaProbeCache
+
+ffmpeg_required = pytest.mark.skipif(
+    not (shutil.which("ffmpeg") and shutil.which("ffprobe")),
+    reason="ffmpeg and ffprobe are required"
+)
+
+
+def probed_video(index: int, **overrides) -> dict:
+    """Video analysis entry shaped like _parse_ffprobe_data output"""
+    video = {
+        "index": index,
+        "path": f"/tmp/clip_{index}.mp4",
+        "duration": 3.0,
+        "width": 720,
+        "height": 1280,
+        "framerate": 30.0,
+        "has_audio": True,
+        "codec": "h264",
+        "bitrate": 1_000_000,
+        "pix_fmt": "yuv420p",
+        "profile": "Constrained Baseline",
+        "level": 31,
+        "refs": 1,
+        "has_b_frames": 0,
+        "extradata_hash": "SHA256:0f2d",
+        "audio_codec": "aac",
+        "audio_sample_rate": "44100",
+        "audio_channels": 2,
+        "probed": True,
+    }
+    video.update(overrides)
+    return video
+
+
+def video_info_for(videos: list) -> dict:
+    return {
+        "videos": videos,
+        "total_duration": sum(v["duration"] for v in videos),
+        "max_resolution": {
+            "width": max(v["width"] for v in videos),
+            "height": max(v["height"] for v in videos),
+        },
+        "common_framerate": videos[0]["framerate"],
+        "audio_present": any(v["has_audio"] for v in videos),
+    }
+
+
+@pytest.fixture
+def merge_service(monkeypatch):
+    monkeypatch.setattr("config.settings.USE_CLOUD_STORAGE", False)
+    return VideoMergeService()
+
+
+class TestStreamCopyDecision:
+    """_can_stream_copy only accepts inputs already in the delivered format"""
+
+    def test_matching_inputs_are_stream_copied(self, merge_service):
+        info = video_info_for([probed_video(i) for i in range(3)])
+        assert merge_service._can_stream_copy(info) is True
+
+    @pytest.mark.parametrize("overrides", [
+        {"width": 1080, "height": 1920},
+        {"framerate": 25.0},
+        {"codec": "hevc"},
+        {"pix_fmt": "yuv420p10le"},
+        {"profile": "High"},
+        {"profile": None},
+        {"level": 40},
+        {"level": 30},
+        {"profile": "Baseline"},
+        {"refs": 3},
+        {"extradata_hash": "SHA256:9a41"},
+        {"extradata_hash": None},
+        {"audio_sample_rate": "48000"},
+        {"has_audio": False, "audio_codec": None, "audio_sample_rate": None, "audio_channels": None},
+        {"bitrate": 8_000_000},
+        {"probed": False},
+    ])
+    def test_any_mismatch_requires_encode(self, merge_service, overrides):
+        info = video_info_for([probed_video(0), probed_video(1, **overrides), probed_video(2)])
+        assert merge_service._can_stream_copy(info) is False
+
+
+class TestSinglePassCommand:
+    """_build_single_pass_command normalizes every input inside one filter graph"""
+
+    def test_filter_graph_scales_pads_and_concats(self, merge_service):
+        info = video_info_for([
+            probed_video(0),
+            probed_video(1, width=1081, height=1921),
+            probed_video(2, framerate=25.0),
+        ])
+        cmd = merge_service._build_single_pass_command(info, Path("/tmp/out.mp4"))
+        graph = cmd[cmd.index("-filter_complex") + 1]
+
+        assert cmd.count("-i") == 3
+        assert graph.count("scale=1082:1922") == 3
+        assert graph.count("pad=1082:1922") == 3
+        assert "concat=n=3:v=1:a=1[v][a]" in graph
+        assert cmd[cmd.index("-crf") + 1] == "23"
+        assert cmd[cmd.index("-maxrate") + 1] == "1500k"
+        assert cmd[-1] == "/tmp/out.mp4"
+
+    def test_silent_clip_gets_generated_audio(self, merge_service):
+        info = video_info_for([
+            probed_video(0),
+            probed_video(1, has_audio=False, duration=2.5),
+        ])
+        cmd = merge_service._build_single_pass_command(info, Path("/tmp/out.mp4"))
+        graph_index = cmd.index("-filter_complex") + 1
+
+        assert "anullsrc=r=44100:cl=stereo,atrim=duration=2.500[a1]" in cmd[graph_index]
+        assert "[1:a:0]" not in cmd[graph_index]
+
+    def test_video_only_inputs_map_no_audio(self, merge_service):
+        info = video_info_for([probed_video(i, has_audio=False) for i in range(2)])
+        cmd = merge_service._build_single_pass_command(info, Path("/tmp/out.mp4"))
+
+        assert "concat=n=2:v=1:a=0[v]" in cmd[cmd.index("-filter_complex") + 1]
+        assert "[a]" not in cmd
+
+
+class TestSegmentBoundaries:
+    """Segment boundaries are running sums of the clip durations"""
+
+    def test_stream_copy_uses_exact_durations(self, merge_service):
+        segments = merge_service._build_segment_metadata([2.5, 3.25, 1.0])
+
+        assert [(s.start_time, s.end_time) for s in segments] == [(0.0, 2.5), (2.5, 5.75), (5.75, 6.75)]
+        assert [s.statement_index for s in segments] == [0, 1, 2]
+
+    def test_reencode_rounds_to_whole_frames(self, merge_service):
+        segments = merge_service._build_segment_metadata([1.01, 0.99, 0.001], frame_rate=30.0)
+
+        assert [round(s.duration * 30) for s in segments] == [30, 30, 1]
+        assert segments[2].end_time == pytest.approx(61 / 30)
+
+
+class TestUnprobedInputs:
+    """Guessed durations never become segment boundaries"""
+
+    def test_unprobed_input_uses_the_multi_step_merge(self, merge_service, monkeypatch):
+        monkeypatch.setattr("config.settings.VIDEO_MERGE_MODE", "single_pass")
+        merge_service.ffmpeg_available = True
+
+        assert merge_service._use_single_pass_merge(video_info_for([probed_video(0), probed_video(1)])) is True
+        assert merge_service._use_single_pass_merge(
+            video_info_for([probed_video(0), probed_video(1, probed=False)])
+        ) is False
+
+    @pytest.mark.asyncio
+    async def test_single_pass_refuses_unprobed_input(self, merge_service, tmp_path):
+        info = video_info_for([probed_video(0), probed_video(1, probed=False)])
+
+        with pytest.raises(VideoMergeError) as exc_info:
+            await merge_service._merge_single_pass(info, tmp_path)
+        assert exc_info.value.error_code == "PROBE_MISSING"
+
+
+def count_ffprobe_calls(monkeypatch) -> list:
+    calls = []
+    original = asyncio.create_subprocess_exec
+
+    async def counting_exec(*cmd, **kwargs):
+        if cmd[0] == "ffprobe":
+            calls.append(cmd)
+        return await original(*cmd, **kwargs)
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", counting_exec)
+    return calls
+
+
+@ffmpeg_required
+@pytest.mark.asyncio
+async def test_each_input_is_probed_once_per_merge(merge_service, tmp_path, monkeypatch):
+    """Analysis, preparation and segment timing share one probe per file"""
+    video_files = []
+    for i, fps in enumerate([30, 25]):
+        path = tmp_path / f"clip_{i}.mp4"
+        subprocess.run([
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=320x240:rate={fps}:duration=1",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-y", str(path)
+        ], check=True)
+        video_files.append({"index": i, "path": path})
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    calls = count_ffprobe_calls(monkeypatch)
+
+    probe_cache = MediaProbeCache()
+    video_info = await merge_service._analyze_videos(video_files, work_dir, probe_cache)
+    prepared = await merge_service._prepare_videos_for_merge(video_files, video_info, work_dir, probe_cache)
+    merged_path, segments = await merge_service._merge_videos(
+        prepared, work_dir, original_video_files=video_files, probe_cache=probe_cache
+    )
+
+    # Two inputs, plus the one clip that had to be re-encoded to 30 fps
+    assert len(calls) == probe_cache.probes == 3
+    assert not any("-show_frames" in cmd for cmd in calls)
+    assert [round(s.duration, 1) for s in segments] == [1.0, 1.0]
+    assert segments[1].start_time == segments[0].end_time
+
+
+@ffmpeg_required
+@pytest.mark.asyncio
+async def test_single_pass_merge_end_to_end(merge_service, tmp_path):
+    """Mismatched clips (one silent) merge into one file with one segment per clip"""
+    layouts = [("640x360", 30, True), ("480x270", 25, False)]
+    video_files = []
+    for i, (size, fps, with_audio) in enumerate(layouts):
+        path = tmp_path / f"clip_{i}.mp4"
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error",
+               "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration=1"]
+        if with_audio:
+            cmd += ["-f", "lavfi", "-i", "sine=duration=1", "-c:a", "aac"]
+        cmd += ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-y", str(path)]
+        subprocess.run(cmd, check=True)
+        video_files.append({"index": i, "path": path})
+
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    progress = []
+    video_info = await merge_service._analyze_videos(video_files, work_dir)
+    output_path, segments, strategy = await merge_service._merge_single_pass(
+        video_info, work_dir, original_video_files=video_files, progress_callback=progress.append
+    )
+
+    assert strategy == "single_pass"
+    assert output_path.exists() and output_path.stat().st_size > 0
+    assert len(segments) == 2
+    merged_duration = await MediaProbeCache().duration(output_path)
+    assert segments[-1].end_time == pytest.approx(merged_duration, abs=0.05)
+    assert progress[-1] == 100
+    assert not (work_dir / "prepared_00.mp4").exists()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Challenge Listing Benchmark
+
+Compares the legacy list_challenges loop (scan every challenge, test membership
+in the attempted-ID list, sort all matches, slice the page) with the indexed
+ChallengeCatalog on synthetic challenges. Reports mean milliseconds per page
+request for:
+
+  first page      - newest published challenges
+  deep page       - page N by offset
+  cursor page     - the same page reached through next_cursor
+  creator + tag   - one creator's challenges carrying a tag
+
+Every request excludes the same set of attempted challenge IDs.
+
+Usage:
+    python tools/benchmarks/benchmark_challenge_catalog.py
+    python tools/benchmarks/benchmark_challenge_catalog.py --challenges 100000 --attempted 1000 --repeat 20
+"""
+import argparse
+import logging
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+logging.disable(logging.CRITICAL)
+
+from models import Challenge, ChallengeStatus
+from services.challenge_catalog import ChallengeCatalog
+
+STATUSES = [ChallengeStatus.PUBLISHED] * 8 + [ChallengeStatus.DRAFT, ChallengeStatus.FLAGGED]
+TAGS = [f"tag-{i}" for i in range(50)]
+
+
+def make_challenges(count: int, creators: int, seed: int) -> dict:
+    """Synthetic challenges; model_construct skips validation so setup stays fast"""
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    challenges = {}
+    for index in range(count):
+        challenge = Challenge.model_construct(
+            challenge_id=f"challenge-{index:07d}",
+            creator_id=f"creator-{rng.randrange(creators)}",
+            statements=[],
+            lie_statement_id="",
+            status=rng.choice(STATUSES),
+            tags=rng.sample(TAGS, rng.randint(0, 3)),
+            created_at=base + timedelta(seconds=rng.randrange(count * 10))
+        )
+        challenges[challenge.challenge_id] = challenge
+    return challenges
+
+
+def legacy_listing(challenges, page, page_size, attempted, creator_id=None, status=None, tags=None):
+    """The pre-catalog list_challenges body"""
+    filtered = []
+    for challenge in challenges.values():
+        if challenge.challenge_id in attempted:
+            continue
+        if creator_id and challenge.creator_id != creator_id:
+            continue
+        if status:
+            if challenge.status != status:
+                continue
+        elif not creator_id:
+            if challenge.status != ChallengeStatus.PUBLISHED:
+                continue
+        if tags and not any(tag in challenge.tags for tag in tags):
+            continue
+        filtered.append(challenge)
+    filtered.sort(key=lambda x: x.created_at, reverse=True)
+    start = (page - 1) * page_size
+    return filtered[start:start + page_size], len(filtered)
+
+
+def time_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark challenge listing")
+    parser.add_argument("--challenges", type=int, default=100_000, help="Synthetic challenges")
+    parser.add_argument("--creators", type=int, default=2_000, help="Distinct creators")
+    parser.add_argument("--attempted", type=int, default=500, help="Attempted IDs excluded per request")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--deep-page", type=int, default=50, help="Page number for the deep page case")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    challenges = make_challenges(args.challenges, args.creators, args.seed)
+    rng = random.Random(args.seed)
+    attempted_list = rng.sample(list(challenges), min(args.attempted, len(challenges)))
+    attempted_set = set(attempted_list)
+
+    start = time.perf_counter()
+    catalog = ChallengeCatalog(challenges)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    published = ChallengeStatus.PUBLISHED
+    size = args.page_size
+    creator = "creator-7"
+
+    # Cursor for the deep page: follow next_cursor from the first page
+    cursor = None
+    for _ in range(args.deep_page - 1):
+        cursor = catalog.query(status=published, exclude_ids=attempted_set, cursor=cursor, limit=size).next_cursor
+
+    cases = [
+        (
+            "first page",
+            lambda: legacy_listing(challenges, 1, size, attempted_list),
+            lambda: catalog.query(status=published, exclude_ids=attempted_set, limit=size),
+        ),
+        (
+            f"page {args.deep_page} (offset)",
+            lambda: legacy_listing(challenges, args.deep_page, size, attempted_list),
+            lambda: catalog.query(status=published, exclude_ids=attempted_set, offset=(args.deep_page - 1) * size, limit=size),
+        ),
+        (
+            f"page {args.deep_page} (cursor)",
+            lambda: legacy_listing(challenges, args.deep_page, size, attempted_list),
+            lambda: catalog.query(status=published, exclude_ids=attempted_set, cursor=cursor, limit=size),
+        ),
+        (
+            "creator + tag",
+            lambda: legacy_listing(challenges, 1, size, attempted_list, creator_id=creator, tags=["tag-3"]),
+            lambda: catalog.query(creator_id=creator, tags=["tag-3"], exclude_ids=attempted_set, limit=size),
+        ),
+    ]
+
+    # The catalog must return exactly what the legacy loop did (ties aside)
+    legacy_page, legacy_total = legacy_listing(challenges, 1, size, attempted_list)
+    catalog_page = catalog.query(status=published, exclude_ids=attempted_set, limit=size)
+    assert catalog_page.total_count == legacy_total
+    assert [c.created_at for c in catalog_page.challenges] == [c.created_at for c in legacy_page]
+
+    print(f"{args.challenges} challenges, {len(attempted_set)} attempted IDs excluded, page size {size}")
+    print(f"Catalog build: {build_ms:.1f} ms\n")
+    print(f"{'case':<22} | {'legacy ms':>10} | {'catalog ms':>10} | {'speedup':>8}")
+    print("-" * 60)
+    for name, legacy, indexed in cases:
+        legacy_ms = time_ms(legacy, args.repeat)
+        catalog_ms = time_ms(indexed, args.repeat)
+        print(f"{name:<22} | {legacy_ms:>10.2f} | {catalog_ms:>10.3f} | {legacy_ms / catalog_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
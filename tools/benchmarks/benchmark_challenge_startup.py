@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Challenge Startup Benchmark
+
+Measures how long ChallengeService takes to become ready, and the memory it
+holds, as the challenge and guess tables grow. The legacy startup fetched
+every challenge row at once, parsed all of them into Challenge objects and
+then loaded every guess; the current startup streams only published
+challenges in batches and loads everything else on demand.
+
+Usage:
+    python tools/benchmarks/benchmark_challenge_startup.py
+    python tools/benchmarks/benchmark_challenge_startup.py --sizes 10000,100000 --published-percent 30
+
+Each table size is seeded into a fresh SQLite database in a temporary
+directory (one guess per challenge). Each startup runs in its own process so
+its peak RSS is measured in isolation.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+os.environ.pop("TESTING", None)
+
+# Service modules log every query; keep benchmark output readable
+logging.disable(logging.CRITICAL)
+
+STATUSES = ("draft", "pending_moderation", "flagged", "rejected")
+
+
+def seed(db_path: Path, size: int, published_percent: float) -> None:
+    """Create the schema through DatabaseService, then bulk insert synthetic rows"""
+    from config import settings
+    settings.DATABASE_URL = f"sqlite:///{db_path}"
+    from services.database_service import DatabaseService
+    DatabaseService().close_pool()
+
+    rng = random.Random(size)
+    started = datetime(2024, 1, 1)
+    conn = sqlite3.connect(db_path)
+    for first in range(0, size, 10000):
+        challenges, guesses = [], []
+        for i in range(first, min(first + 10000, size)):
+            challenge_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            statement_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(3)]
+            statements = [
+                {
+                    "statement_id": statement_id,
+                    "statement_type": "lie" if n == 1 else "truth",
+                    "media_url": f"/api/v1/media/stream/{statement_id}",
+                    "media_file_id": statement_id,
+                    "duration_seconds": 5.0
+                }
+                for n, statement_id in enumerate(statement_ids)
+            ]
+            status = "published" if rng.random() * 100 < published_percent else rng.choice(STATUSES)
+            created_at = (started + timedelta(seconds=i * 30)).isoformat()
+            challenges.append((
+                challenge_id, f"creator-{i % 5000}", f"Challenge {i}", status, statement_ids[1],
+                0, 1, 0, False, json.dumps(statements), None, json.dumps(["benchmark"]),
+                created_at, created_at, created_at if status == "published" else None
+            ))
+            guesses.append((
+                str(uuid.UUID(int=rng.getrandbits(128))), challenge_id, f"user-{i % 20000}",
+                statement_ids[1], True, 4.2, created_at
+            ))
+        conn.executemany("""
+            INSERT INTO challenges (challenge_id, creator_id, title, status, lie_statement_id,
+                view_count, guess_count, correct_guess_count, is_merged_video,
+                statements_json, merged_video_metadata_json, tags_json,
+                created_at, updated_at, published_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, challenges)
+        conn.executemany("""
+            INSERT INTO guesses (guess_id, challenge_id, user_id, guessed_lie_statement_id,
+                is_correct, response_time_seconds, submitted_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, guesses)
+        conn.commit()
+    conn.close()
+
+
+def worker(mode: str, db_path: str) -> None:
+    """Run one startup in this process and print its timings as JSON"""
+    from config import settings
+    settings.DATABASE_URL = f"sqlite:///{db_path}"
+    import services.database_service as database_service
+    from services.database_service import DatabaseService, _CHALLENGE_COLUMNS, _challenge_from_row
+    from services.challenge_catalog import ChallengeCatalog, GuessIndex
+    from services.challenge_service import ChallengeService
+
+    database_service.db_service = db = DatabaseService()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+
+    if mode == "legacy":
+        # Every row fetched at once, every row parsed, then every guess
+        rows = db._execute_query(f"SELECT {_CHALLENGE_COLUMNS} FROM challenges", fetch_all=True)
+        parsed = (_challenge_from_row(row) for row in rows)
+        challenges = ChallengeCatalog({c.challenge_id: c for c in parsed if c is not None})
+        del rows
+        guesses = GuessIndex(db.load_all_guesses())
+    else:
+        service = ChallengeService()
+        challenges, guesses = service.challenges, service.guesses
+
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "seconds": elapsed,
+        "added_rss_mb": (rss_after - rss_before) / 1024,
+        "challenges": len(challenges),
+        "guesses": len(guesses)
+    }))
+
+
+def run_worker(mode: str, db_path: Path) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, "--db", str(db_path)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ChallengeService startup against large tables")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated challenge counts")
+    parser.add_argument("--published-percent", type=float, default=30.0, help="Share of challenges that are published")
+    parser.add_argument("--worker", choices=("legacy", "streamed"), help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.db)
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    work_dir = Path(tempfile.mkdtemp(prefix="startup_bench_"))
+    print(f"{'rows':>9} | {'startup':<8} | {'seconds':>8} | {'added RSS MB':>12} | {'challenges':>10} | {'guesses':>9}")
+    print("-" * 72)
+    try:
+        for size in sizes:
+            db_path = work_dir / f"challenges_{size}.db"
+            seed(db_path, size, args.published_percent)
+            for mode in ("legacy", "streamed"):
+                r = run_worker(mode, db_path)
+                print(f"{size:>9} | {mode:<8} | {r['seconds']:>8.2f} | {r['added_rss_mb']:>12.1f} | {r['challenges']:>10} | {r['guesses']:>9}")
+            db_path.unlink()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
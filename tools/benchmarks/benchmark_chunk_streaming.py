@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Chunk Ingestion Memory Benchmark
+
+Measures peak Python heap (tracemalloc) while many chunk uploads are in
+flight at once. The buffered path reads each whole chunk body into memory
+before hashing and writing it (what the endpoints did with await
+file.read()), so its peak grows with concurrency x chunk size; the streamed
+path (ChunkedUploadService.upload_chunk_stream) holds one STREAM_BLOCK_SIZE
+block per upload, so its peak should stay near concurrency x block size.
+
+Request bodies are simulated by streams yielding 64 KB pieces, the way an
+ASGI server delivers them.
+
+Usage:
+    python tools/benchmarks/benchmark_chunk_streaming.py
+    python tools/benchmarks/benchmark_chunk_streaming.py --concurrency 50 --chunk-mb 10
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+logging.disable(logging.CRITICAL)
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from config import settings
+from services.upload_service import ChunkedUploadService
+
+PIECE_SIZE = 64 * 1024
+
+
+class PieceStream:
+    """A request body arriving in PIECE_SIZE pieces, generated on demand"""
+
+    def __init__(self, size: int, fill: int):
+        self.remaining = size
+        self.piece = bytes([fill]) * PIECE_SIZE
+
+    async def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0:
+            size = self.remaining
+        parts = []
+        wanted = min(size, self.remaining)
+        while wanted > 0:
+            part = self.piece[:min(PIECE_SIZE, wanted)]
+            parts.append(part)
+            wanted -= len(part)
+            self.remaining -= len(part)
+            await asyncio.sleep(0)
+        return b"".join(parts)
+
+
+async def run_mode(mode: str, concurrency: int, chunk_size: int):
+    service = ChunkedUploadService()
+    sessions = [
+        await service.initiate_upload(
+            user_id=f"bench-{i}", filename="clip.mp4", file_size=chunk_size, mime_type="video/mp4", chunk_size=chunk_size
+        )
+        for i in range(concurrency)
+    ]
+    chunk_hash = hashlib.sha256(bytes([7]) * chunk_size).hexdigest()
+
+    async def upload(session):
+        stream = PieceStream(chunk_size, 7)
+        if mode == "buffered":
+            chunk_data = await stream.read()
+            await service.upload_chunk(session.session_id, 0, chunk_data, chunk_hash)
+        else:
+            await service.upload_chunk_stream(session.session_id, 0, stream, chunk_hash)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    await asyncio.gather(*(upload(session) for session in sessions))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of concurrent chunk uploads")
+    parser.add_argument("--concurrency", type=int, default=50, help="Chunk uploads in flight at once")
+    parser.add_argument("--chunk-mb", type=float, default=10, help="Chunk size in MB")
+    args = parser.parse_args()
+    chunk_size = int(args.chunk_mb * 1024 * 1024)
+
+    print(f"{args.concurrency} concurrent uploads of {args.chunk_mb:g} MB chunks "
+          f"(block size {ChunkedUploadService.STREAM_BLOCK_SIZE // 1024} KB)")
+    print(f"{'mode':>9} | {'peak heap MB':>12} | {'seconds':>8} | {'MB/s':>8}")
+    print("-" * 47)
+    for mode in ("buffered", "streamed"):
+        work_dir = Path(tempfile.mkdtemp(prefix="chunk_stream_bench_"))
+        settings.TEMP_DIR = work_dir / "temp"
+        settings.UPLOAD_DIR = work_dir / "uploads"
+        settings.TEMP_DIR.mkdir()
+        settings.UPLOAD_DIR.mkdir()
+        try:
+            peak, elapsed = asyncio.run(run_mode(mode, args.concurrency, chunk_size))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        throughput = args.concurrency * chunk_size / (1024 * 1024) / elapsed
+        print(f"{mode:>9} | {peak / (1024 * 1024):>12.1f} | {elapsed:>8.2f} | {throughput:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Guess Persistence Benchmark
+
+Measures the database cost of ChallengeService.submit_guess as the challenge
+and guess tables grow. The legacy path rewrote every challenge and every guess
+on each submission; the write-through path persists only the new guess and the
+challenge whose counters changed, so time per guess should stay flat.
+
+Usage:
+    python tools/benchmarks/benchmark_guess_persistence.py
+    python tools/benchmarks/benchmark_guess_persistence.py --sizes 100,1000,5000 --guesses 100
+
+Each table size runs against a fresh SQLite database in a temporary directory.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+os.environ.pop("TESTING", None)
+
+# Service modules log every query; keep benchmark output readable
+logging.disable(logging.CRITICAL)
+
+from config import settings
+
+_bootstrap_dir = Path(tempfile.mkdtemp(prefix="guess_bench_"))
+settings.DATABASE_URL = f"sqlite:///{_bootstrap_dir / 'bootstrap.db'}"
+
+import services.database_service as database_service
+from services.database_service import DatabaseService
+from services.challenge_service import ChallengeService
+from models import (
+    Challenge, Statement, GuessSubmission, SubmitGuessRequest,
+    ChallengeStatus, StatementType
+)
+
+
+def make_challenge() -> Challenge:
+    """Build a published challenge with three statements"""
+    statements = [
+        Statement(
+            statement_id=str(uuid.uuid4()),
+            statement_type=StatementType.LIE if i == 1 else StatementType.TRUTH,
+            media_url=f"/api/v1/media/stream/{uuid.uuid4()}",
+            media_file_id=str(uuid.uuid4()),
+            duration_seconds=5.0
+        )
+        for i in range(3)
+    ]
+    return Challenge(
+        challenge_id=str(uuid.uuid4()),
+        creator_id="benchmark-creator",
+        statements=statements,
+        lie_statement_id=statements[1].statement_id,
+        status=ChallengeStatus.PUBLISHED
+    )
+
+
+def fresh_service(db_path: Path) -> ChallengeService:
+    """Point the global database service at a new SQLite file and build a ChallengeService"""
+    settings.DATABASE_URL = f"sqlite:///{db_path}"
+    database_service.db_service = DatabaseService()
+    service = ChallengeService()
+    service.challenges = {}
+    service.guesses = {}
+    return service
+
+
+async def run_size(table_size: int, guess_count: int, work_dir: Path) -> dict:
+    """Seed `table_size` challenges and guesses, then time both persistence paths"""
+    service = fresh_service(work_dir / f"bench_{table_size}.db")
+
+    for _ in range(table_size):
+        challenge = make_challenge()
+        service.challenges[challenge.challenge_id] = challenge
+        guess = GuessSubmission(
+            guess_id=str(uuid.uuid4()),
+            challenge_id=challenge.challenge_id,
+            user_id="1",
+            guessed_lie_statement_id=challenge.lie_statement_id,
+            is_correct=True
+        )
+        service.guesses[guess.guess_id] = guess
+
+    # Legacy path: one full-table rewrite, which is what every guess used to cost
+    start = time.perf_counter()
+    await service._save_guesses()
+    await service._save_challenges()
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    targets = [make_challenge() for _ in range(guess_count)]
+    for challenge in targets:
+        service.challenges[challenge.challenge_id] = challenge
+        await service._save_challenge(challenge)
+
+    timings = []
+    for index, challenge in enumerate(targets):
+        request = SubmitGuessRequest(
+            challenge_id=challenge.challenge_id,
+            guessed_lie_statement_id=challenge.statements[index % 3].statement_id
+        )
+        start = time.perf_counter()
+        await service.submit_guess(str(index + 2), request)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "table_size": table_size,
+        "legacy_ms": legacy_ms,
+        "mean_ms": statistics.mean(timings),
+        "p95_ms": sorted(timings)[max(0, int(len(timings) * 0.95) - 1)]
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-guess persistence cost")
+    parser.add_argument("--sizes", default="100,1000,5000", help="Comma-separated table sizes")
+    parser.add_argument("--guesses", type=int, default=50, help="Guesses to submit per table size")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    work_dir = Path(tempfile.mkdtemp(prefix="guess_bench_"))
+
+    try:
+        print(f"{'rows':>8} | {'legacy ms/guess':>16} | {'write-through mean ms':>22} | {'p95 ms':>8}")
+        print("-" * 64)
+        for size in sizes:
+            result = await run_size(size, args.guesses, work_dir)
+            print(
+                f"{result['table_size']:>8} | {result['legacy_ms']:>16.2f} | "
+                f"{result['mean_ms']:>22.3f} | {result['p95_ms']:>8.3f}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.rmtree(_bootstrap_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
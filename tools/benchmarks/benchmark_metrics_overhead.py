@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Metrics Overhead Benchmark
+
+Measures what the in-process metrics add to the hot path:
+
+- per request: the same FastAPI route served with and without
+  MetricsMiddleware, driven straight through the ASGI app so client and
+  transport costs drop out. Rounds alternate between the two apps and the
+  median per-request time of each is compared.
+- per call: Histogram.observe, the _execute_query statement label, the
+  S3 before/after-call hooks and the request profiler's span() outside a
+  profiled request (what every hook pays while profiling is off).
+- per scrape: rendering the registry once it holds a realistic number of
+  series.
+
+Exits non-zero when the added per-request time exceeds --budget-us.
+
+Usage:
+    python tools/benchmarks/benchmark_metrics_overhead.py
+    python tools/benchmarks/benchmark_metrics_overhead.py --requests 20000 --rounds 7 --budget-us 50
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+logging.disable(logging.CRITICAL)
+warnings.filterwarnings("ignore")
+
+from fastapi import FastAPI
+
+from services.metrics_registry import MetricsMiddleware, MetricsRegistry
+from services.database_service import _statement_type
+from services.cloud_storage_service import _observe_s3_call, _start_s3_timer
+from services.request_profiler import span
+
+
+def build_app(registry=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/challenges/{challenge_id}")
+    async def get_challenge(challenge_id: str):
+        return {"challenge_id": challenge_id, "status": "published"}
+
+    if registry is not None:
+        app.add_middleware(MetricsMiddleware, registry=registry)
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    """Seconds per request for `requests` sequential GETs through the ASGI app"""
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for i in range(requests):
+        path = f"/api/v1/challenges/c{i % 100}"
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "client": ("127.0.0.1", 1), "server": ("testserver", 80), "headers": [],
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+def per_call(fn, calls: int = 200_000) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls
+
+
+class FakeResponse:
+    status_code = 200
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-request cost of the metrics middleware")
+    parser.add_argument("--requests", type=int, default=10000, help="Requests per app per round")
+    parser.add_argument("--rounds", type=int, default=5, help="Alternating rounds per app")
+    parser.add_argument("--budget-us", type=float, default=50.0, help="Allowed added time per request")
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    apps = {"plain": build_app(), "metrics": build_app(registry)}
+    timings = {name: [] for name in apps}
+
+    async def run():
+        for app in apps.values():
+            await drive(app, 500)  # warm up routing and pydantic caches
+        for _ in range(args.rounds):
+            for name, app in apps.items():
+                timings[name].append(await drive(app, args.requests))
+
+    asyncio.run(run())
+    plain = statistics.median(timings["plain"]) * 1e6
+    instrumented = statistics.median(timings["metrics"]) * 1e6
+    added = instrumented - plain
+
+    histogram = registry.histogram("bench_seconds", "Benchmark", ("operation",))
+    context = {}
+    hooks = lambda: (_start_s3_timer(context), _observe_s3_call("after-call.s3.PutObject", context, FakeResponse()))
+    query = "SELECT * FROM challenges WHERE status = ? ORDER BY created_at DESC LIMIT ?"
+
+    print(f"{'measurement':<34} | {'µs':>8}")
+    print("-" * 45)
+    print(f"{'request without middleware':<34} | {plain:>8.2f}")
+    print(f"{'request with middleware':<34} | {instrumented:>8.2f}")
+    print(f"{'added per request':<34} | {added:>8.2f}")
+    print(f"{'Histogram.observe':<34} | {per_call(lambda: histogram.observe(0.004, 'SELECT')) * 1e6:>8.2f}")
+    print(f"{'_execute_query statement label':<34} | {per_call(lambda: _statement_type(query)) * 1e6:>8.2f}")
+    print(f"{'S3 before/after-call hooks':<34} | {per_call(hooks) * 1e6:>8.2f}")
+    print(f"{'span() with profiling off':<34} | {per_call(lambda: span('db.query')) * 1e6:>8.2f}")
+
+    for route in range(60):
+        for status in ("200", "404", "500"):
+            histogram.observe(0.01, f"/route/{route}/{status}")
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"{'scrape render (' + str(text.count(chr(10))) + ' lines)':<34} | {(time.perf_counter() - started) * 1e6:>8.0f}")
+
+    verdict = "PASS" if added <= args.budget_us else "FAIL"
+    print(f"\nadded {added:.2f} µs per request against a {args.budget_us:g} µs budget: {verdict}")
+    sys.exit(0 if verdict == "PASS" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Raw vs Base64 Video Upload Benchmark
+
+Sends the same video to /api/v1/challenge-videos/upload-temp-video-json
+(base64 inside a JSON body) and to /upload-temp-video (raw request body), and
+reports bytes on the wire, server-side peak heap (tracemalloc) and latency.
+
+Requests are driven straight through the ASGI app, with the body delivered in
+64 KB http.request messages the way uvicorn does, so only the server's own
+allocations are counted: the client payload is built before tracing starts.
+The base64 path holds the body, the parsed JSON string and the decoded video
+at once; the raw path writes each block to disk as it arrives.
+
+Usage:
+    python tools/benchmarks/benchmark_raw_video_upload.py
+    python tools/benchmarks/benchmark_raw_video_upload.py --sizes-mb 5,20,45 --repeat 3
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+logging.disable(logging.CRITICAL)
+warnings.filterwarnings("ignore")
+
+from fastapi import FastAPI
+
+from config import settings
+from services.auth_service import get_current_user
+from api.challenge_video_endpoints import router
+
+PIECE_SIZE = 64 * 1024
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: "bench"
+    return app
+
+
+async def send(app, path: str, query: str, content_type: str, body: bytes):
+    """One request through the ASGI app; returns (status, peak heap bytes, seconds)"""
+    view = memoryview(body)
+    offset = 0
+    status = {}
+
+    async def receive():
+        nonlocal offset
+        piece = bytes(view[offset:offset + PIECE_SIZE])
+        offset += len(piece)
+        return {"type": "http.request", "body": piece, "more_body": offset < len(body)}
+
+    async def send_message(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+    }
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    await app(scope, receive, send_message)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return status.get("code"), peak - baseline, elapsed
+
+
+def run_size(app, size_mb: float, repeat: int):
+    video = os.urandom(int(size_mb * 1024 * 1024))
+    json_body = json.dumps({"filename": "clip.mp4", "video_data": base64.b64encode(video).decode()}).encode()
+    cases = {
+        "base64": ("/api/v1/challenge-videos/upload-temp-video-json", "", "application/json", json_body),
+        "raw": ("/api/v1/challenge-videos/upload-temp-video", "filename=clip.mp4", "application/octet-stream", video),
+    }
+    results = {}
+    for name, (path, query, content_type, body) in cases.items():
+        peaks, times = [], []
+        for _ in range(repeat):
+            code, peak, elapsed = asyncio.run(send(app, path, query, content_type, body))
+            if code != 200:
+                raise RuntimeError(f"{name} upload returned {code}")
+            peaks.append(peak)
+            times.append(elapsed)
+        results[name] = (len(body), max(peaks), statistics.median(times))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark base64 JSON vs raw body video uploads")
+    parser.add_argument("--sizes-mb", default="5,20,45", help="Comma-separated video sizes in MB (endpoint limit is 50)")
+    parser.add_argument("--repeat", type=int, default=3, help="Requests per size and path")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="raw_upload_bench_"))
+    settings.TEMP_DIR = work_dir
+    app = build_app()
+
+    print(f"{'video MB':>8} | {'path':>6} | {'wire MB':>8} | {'peak heap MB':>12} | {'p50 ms':>8}")
+    print("-" * 56)
+    try:
+        for size_mb in [float(size) for size in args.sizes_mb.split(",")]:
+            for name, (wire, peak, elapsed) in run_size(app, size_mb, args.repeat).items():
+                print(
+                    f"{size_mb:>8g} | {name:>6} | {wire / (1024 * 1024):>8.1f} | "
+                    f"{peak / (1024 * 1024):>12.1f} | {elapsed * 1000:>8.1f}"
+                )
+            for temp_file in work_dir.glob("temp_video_*"):
+                temp_file.unlink()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+S3 Multipart Upload Benchmark
+
+Uploads files of several sizes through S3MultipartUploader twice: once with
+the old S3CloudStorageService behaviour (whole file read and sent with one
+put_object up to 100 MB, 10 MB parts one after another above that) and once
+with the configured engine (S3_MULTIPART_* settings: small threshold, parts
+in flight concurrently). Reports wall time, throughput and the most file
+data held in memory at once: bytes read from the file but not yet
+acknowledged by S3. (Peak heap is not reported because the in-process moto
+stand-in keeps every uploaded object in memory itself.)
+
+By default the target is moto's in-process S3 stand-in. It has no network
+round trip, so --request-latency-ms adds a fixed delay to every PUT to stand
+in for one; set it to 0 to measure raw overhead. Pass --endpoint-url to run
+against a moto server or MinIO instead (the bucket is created if missing).
+
+Usage:
+    python tools/benchmarks/benchmark_s3_multipart_upload.py
+    python tools/benchmarks/benchmark_s3_multipart_upload.py --sizes-mb 8,32,128 --request-latency-ms 80
+    python tools/benchmarks/benchmark_s3_multipart_upload.py --endpoint-url http://localhost:9000 --request-latency-ms 0
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+logging.disable(logging.CRITICAL)
+warnings.filterwarnings("ignore")
+
+import boto3
+
+from config import settings
+from services.cloud_storage_service import S3MultipartUploader
+
+BUCKET = "multipart-benchmark"
+MB = 1024 * 1024
+
+
+def legacy_uploader(client) -> S3MultipartUploader:
+    """Settings equivalent to the old upload_file_stream/_multipart_upload"""
+    return S3MultipartUploader(client, BUCKET, threshold=100 * MB, part_size=10 * MB, concurrency=1, checksum=False)
+
+
+class BufferMeter:
+    """Tracks file bytes read but not yet acknowledged by S3"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.read = 0
+        self.acknowledged = 0
+        self.peak = 0
+
+    def on_read(self, size: int) -> None:
+        with self.lock:
+            self.read += size
+            self.peak = max(self.peak, self.read - self.acknowledged)
+
+    def on_ack(self, size: int) -> None:
+        with self.lock:
+            self.acknowledged += size
+
+
+class MeteredFile:
+    def __init__(self, f, meter: BufferMeter):
+        self.f = f
+        self.meter = meter
+
+    def read(self, size: int = -1) -> bytes:
+        block = self.f.read(size)
+        self.meter.on_read(len(block))
+        return block
+
+
+def instrument(client, latency_s: float, meter_ref: dict) -> None:
+    """Add the simulated round trip to every PUT and report acknowledged bytes"""
+    for name in ("put_object", "upload_part"):
+        call = getattr(client, name)
+
+        def wrapped(call=call, **kwargs):
+            if latency_s > 0:
+                time.sleep(latency_s)
+            response = call(**kwargs)
+            meter_ref["meter"].on_ack(len(kwargs["Body"]))
+            return response
+
+        setattr(client, name, wrapped)
+
+
+async def timed_upload(transfer: S3MultipartUploader, path: Path, key: str, meter: BufferMeter):
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        await transfer.upload(MeteredFile(f, meter), key, {"ContentType": "video/mp4"})
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs concurrent S3 multipart uploads")
+    parser.add_argument("--sizes-mb", default="8,32,96,160", help="Comma-separated file sizes in MB")
+    parser.add_argument("--request-latency-ms", type=float, default=50, help="Delay added to every PUT request")
+    parser.add_argument("--endpoint-url", default=None, help="S3-compatible endpoint (moto server, MinIO)")
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        mock = contextlib.nullcontext()
+    else:
+        os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+        os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+        from moto import mock_aws
+        mock = mock_aws()
+
+    with mock, tempfile.TemporaryDirectory(prefix="s3_multipart_bench_") as work_dir:
+        client = boto3.client("s3", region_name="us-east-1", endpoint_url=args.endpoint_url)
+        with contextlib.suppress(client.exceptions.BucketAlreadyOwnedByYou, client.exceptions.BucketAlreadyExists):
+            client.create_bucket(Bucket=BUCKET)
+        meter_ref = {}
+        instrument(client, args.request_latency_ms / 1000, meter_ref)
+
+        engines = {"legacy": legacy_uploader(client), "engine": S3MultipartUploader(client, BUCKET)}
+        print(
+            f"engine: threshold {settings.S3_MULTIPART_THRESHOLD // MB} MB, part {settings.S3_MULTIPART_PART_SIZE // MB} MB, "
+            f"concurrency {settings.S3_MULTIPART_CONCURRENCY}; request latency {args.request_latency_ms:g} ms"
+        )
+        print(f"{'size MB':>7} | {'mode':>6} | {'seconds':>8} | {'MB/s':>7} | {'max buffered MB':>15}")
+        print("-" * 56)
+        for size_mb in [int(size) for size in args.sizes_mb.split(",")]:
+            path = Path(work_dir) / f"video_{size_mb}.mp4"
+            with open(path, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(MB))
+            for mode, transfer in engines.items():
+                meter_ref["meter"] = meter = BufferMeter()
+                elapsed = asyncio.run(timed_upload(transfer, path, f"bench/{mode}/{size_mb}.mp4", meter))
+                print(f"{size_mb:>7} | {mode:>6} | {elapsed:>8.2f} | {size_mb / elapsed:>7.1f} | {meter.peak / MB:>15.1f}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Upload Session Persistence Benchmark
+
+Measures the session bookkeeping cost of one ChunkedUploadService.upload_chunk
+as the number of live upload sessions grows. The legacy path dumped every
+session to upload_sessions.json (indent=2) after each chunk, so its cost grew
+with the session count; the journal appends one short "chunk" record, so its
+cost should stay flat (compaction is amortized over
+UPLOAD_JOURNAL_COMPACT_RECORDS appends and reported separately).
+
+Only persistence is timed; chunk data is not written.
+
+Usage:
+    python tools/benchmarks/benchmark_upload_session_journal.py
+    python tools/benchmarks/benchmark_upload_session_journal.py --sessions 10,100,1000,10000 --chunks 200
+"""
+import argparse
+import json
+import logging
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+logging.disable(logging.CRITICAL)
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from models import UploadSession, UploadStatus
+from services.upload_session_journal import UploadSessionJournal
+
+
+def make_sessions(count: int):
+    sessions = {}
+    for _ in range(count):
+        session = UploadSession(
+            session_id=str(uuid.uuid4()),
+            user_id=str(uuid.uuid4()),
+            filename="statement.mp4",
+            file_size=50 * 1024 * 1024,
+            chunk_size=1024 * 1024,
+            total_chunks=50,
+            mime_type="video/mp4",
+            uploaded_chunks=list(range(25)),
+            status=UploadStatus.IN_PROGRESS,
+            metadata={"merge_session_id": str(uuid.uuid4()), "video_index": 0, "video_count": 3}
+        )
+        sessions[session.session_id] = session
+    return sessions
+
+
+def legacy_save(path: Path, sessions) -> None:
+    """The old _save_sessions: every session, every chunk"""
+    data = {session_id: session.dict() for session_id, session in sessions.items()}
+    with open(path, "w") as f:
+        f.write(json.dumps(data, default=str, indent=2))
+
+
+def time_per_chunk(chunks: int, record_one) -> list:
+    samples = []
+    for i in range(chunks):
+        start = time.perf_counter()
+        record_one(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run_size(count: int, chunks: int, work_dir: Path):
+    sessions = make_sessions(count)
+    ids = list(sessions)
+
+    legacy = time_per_chunk(chunks, lambda i: legacy_save(work_dir / "upload_sessions.json", sessions))
+
+    journal = UploadSessionJournal(work_dir / "upload_sessions.journal", compact_records=10 ** 9)
+    for session in sessions.values():
+        journal.record_session(session.dict(), is_new=True)
+    journaled = time_per_chunk(
+        chunks, lambda i: journal.record_chunk(ids[i % count], 25 + i // count, "in_progress", datetime.utcnow())
+    )
+
+    start = time.perf_counter()
+    journal.compact()
+    compact_ms = (time.perf_counter() - start) * 1000
+    return legacy, journaled, compact_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark upload session persistence per chunk")
+    parser.add_argument("--sessions", default="10,100,1000,5000", help="Comma-separated live session counts")
+    parser.add_argument("--chunks", type=int, default=100, help="Chunks recorded per size")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>9} | {'legacy p50 ms':>13} | {'legacy p95 ms':>13} | {'journal p50 ms':>14} | {'journal p95 ms':>14} | {'compact ms':>10}")
+    print("-" * 91)
+    for count in [int(size) for size in args.sessions.split(",")]:
+        work_dir = Path(tempfile.mkdtemp(prefix="upload_journal_bench_"))
+        try:
+            legacy, journaled, compact_ms = run_size(count, args.chunks, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        legacy.sort()
+        journaled.sort()
+        print(
+            f"{count:>9} | {statistics.median(legacy):>13.3f} | {legacy[int(len(legacy) * 0.95) - 1]:>13.3f} | "
+            f"{statistics.median(journaled):>14.3f} | {journaled[int(len(journaled) * 0.95) - 1]:>14.3f} | {compact_ms:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
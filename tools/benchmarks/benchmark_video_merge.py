@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Video Merge Pipeline Benchmark
+
+Compares the legacy three-encode merge (_prepare_videos_for_merge ->
+_merge_videos -> _compress_merged_video) with the single-pass merge
+(_merge_single_pass) on synthetic clips generated with FFmpeg's lavfi test
+sources. Reports wall time and CPU seconds spent in FFmpeg/FFprobe child
+processes for each path.
+
+Two scenarios are run:
+  mismatched - clips differ in resolution and framerate, so the single-pass
+               path normalizes and compresses in one encode
+  matching   - clips already match the delivered format, so the single-pass
+               path concatenates them with stream copy
+
+Usage:
+    python tools/benchmarks/benchmark_video_merge.py
+    python tools/benchmarks/benchmark_video_merge.py --clips 3 --duration 10 --repeat 3
+
+Requires ffmpeg and ffprobe on PATH.
+"""
+import argparse
+import asyncio
+import logging
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+# The merge service logs every FFmpeg step; keep benchmark output readable
+logging.disable(logging.CRITICAL)
+
+from config import settings
+
+# Benchmark local files only
+settings.USE_CLOUD_STORAGE = False
+
+from services.video_merge_service import VideoMergeService
+
+# (width, height, fps) per clip; cycled when --clips exceeds the list
+SCENARIOS = {
+    "mismatched": [(720, 1280, 30), (1080, 1920, 30), (720, 1280, 25)],
+    "matching": [(720, 1280, 30)],
+}
+
+
+def make_clip(path: Path, width: int, height: int, fps: int, duration: float, tone: int) -> None:
+    """Render a synthetic H.264/AAC clip from lavfi test sources"""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency={tone}:sample_rate=44100:duration={duration}",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-b:v", "1000k", "-maxrate", "1200k", "-bufsize", "2400k",
+        "-c:a", "aac", "-b:a", "128k", "-ac", "2",
+        "-shortest", "-y", str(path)
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def child_cpu_seconds() -> float:
+    """User + system CPU time consumed by reaped child processes so far"""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def run_legacy(service: VideoMergeService, video_files, work_dir: Path) -> Path:
+    video_info = await service._analyze_videos(video_files, work_dir)
+    prepared = await service._prepare_videos_for_merge(video_files, video_info, work_dir)
+    merged_path, _ = await service._merge_videos(prepared, work_dir, original_video_files=video_files)
+    return await service._compress_merged_video(merged_path, work_dir)
+
+
+async def run_single_pass(service: VideoMergeService, video_files, work_dir: Path) -> Path:
+    video_info = await service._analyze_videos(video_files, work_dir)
+    output_path, _, strategy = await service._merge_single_pass(
+        video_info, work_dir, original_video_files=video_files
+    )
+    run_single_pass.strategy = strategy
+    return output_path
+
+
+async def measure(runner, service, video_files, work_dir: Path) -> dict:
+    if work_dir.exists():
+        shutil.rmtree(work_dir)
+    work_dir.mkdir(parents=True)
+
+    cpu_before = child_cpu_seconds()
+    start = time.perf_counter()
+    output_path = await runner(service, video_files, work_dir)
+    wall = time.perf_counter() - start
+    return {
+        "wall_s": wall,
+        "cpu_s": child_cpu_seconds() - cpu_before,
+        "size_kb": output_path.stat().st_size / 1024
+    }
+
+
+async def run_scenario(name: str, clips: int, duration: float, repeat: int, root: Path) -> None:
+    service = VideoMergeService()
+    clip_dir = root / name
+    clip_dir.mkdir(parents=True)
+
+    video_files = []
+    layouts = SCENARIOS[name]
+    for i in range(clips):
+        width, height, fps = layouts[i % len(layouts)]
+        path = clip_dir / f"clip_{i}.mp4"
+        make_clip(path, width, height, fps, duration, tone=440 + i * 110)
+        video_files.append({"index": i, "path": path})
+
+    results = {"legacy": [], "single_pass": []}
+    for _ in range(repeat):
+        results["legacy"].append(await measure(run_legacy, service, video_files, root / "work_legacy"))
+        results["single_pass"].append(await measure(run_single_pass, service, video_files, root / "work_single"))
+
+    for path_name, runs in results.items():
+        label = path_name if path_name == "legacy" else f"single_pass ({run_single_pass.strategy})"
+        print(
+            f"{name:>10} | {label:<26} | {statistics.mean(r['wall_s'] for r in runs):>8.2f} | "
+            f"{statistics.mean(r['cpu_s'] for r in runs):>8.2f} | {statistics.mean(r['size_kb'] for r in runs):>9.0f}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark legacy vs single-pass video merge")
+    parser.add_argument("--clips", type=int, default=3, help="Clips per merge")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per clip")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per path")
+    parser.add_argument("--scenarios", default="mismatched,matching", help="Comma-separated scenarios")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+        print("ffmpeg and ffprobe must be on PATH to run this benchmark")
+        sys.exit(1)
+
+    root = Path(tempfile.mkdtemp(prefix="merge_bench_"))
+    try:
+        print(f"{'scenario':>10} | {'path':<26} | {'wall s':>8} | {'cpu s':>8} | {'output KB':>9}")
+        print("-" * 74)
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            await run_scenario(name, args.clips, args.duration, args.repeat, root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Merge Scheduler Load Test
+
+Submits a burst of synthetic merges and compares the old behaviour (every
+merge starts immediately as its own task) with MergeScheduler admission
+control. Each synthetic merge is an FFmpeg encode of a generated test clip
+with the same thread cap production merges use; pass --job sleep to test the
+queueing logic without ffmpeg.
+
+Reports, per mode:
+
+  throughput      - merges completed per second over the whole burst
+  p50 / p95       - time from submission to completion
+  rejected        - merges turned away with Retry-After (queue full)
+
+Usage:
+    python tools/benchmarks/load_test_merge_scheduler.py
+    python tools/benchmarks/load_test_merge_scheduler.py --merges 24 --premium-every 4 --max-queued 16
+    python tools/benchmarks/load_test_merge_scheduler.py --job sleep --merges 200 --max-concurrent 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+logging.disable(logging.CRITICAL)
+
+from config import settings
+from services.merge_scheduler import (
+    MergeScheduler, MergeQueueFull, PRIORITY_PREMIUM, PRIORITY_STANDARD, default_max_concurrent_merges
+)
+
+
+def make_job(kind: str, seconds: float):
+    """Coroutine factory for one synthetic merge"""
+    if kind == "sleep":
+        async def run():
+            await asyncio.sleep(seconds)
+        return run
+
+    async def run():
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=720x1280:rate=30:duration={seconds}",
+            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+            "-threads", str(settings.MERGE_FFMPEG_THREADS),
+            "-f", "null", "-",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        await process.wait()
+    return run
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_burst(args, scheduler):
+    """Submit every merge at once; returns (completion times by priority, rejected, wall seconds)"""
+    completions = {PRIORITY_PREMIUM: [], PRIORITY_STANDARD: []}
+    rejected = 0
+    start = time.perf_counter()
+
+    async def one(index: int):
+        nonlocal rejected
+        priority = PRIORITY_PREMIUM if args.premium_every and index % args.premium_every == 0 else PRIORITY_STANDARD
+        job = make_job(args.job, args.clip_seconds)
+        submitted = time.perf_counter()
+        try:
+            if scheduler is None:
+                await job()
+            else:
+                await scheduler.run(f"merge-{index}", job, priority)
+        except MergeQueueFull:
+            rejected += 1
+            return
+        completions[priority].append(time.perf_counter() - submitted)
+
+    await asyncio.gather(*(one(i) for i in range(args.merges)))
+    return completions, rejected, time.perf_counter() - start
+
+
+def report(name: str, completions, rejected: int, wall: float):
+    done = completions[PRIORITY_PREMIUM] + completions[PRIORITY_STANDARD]
+    if not done:
+        print(f"{name:<12} | nothing completed ({rejected} rejected)")
+        return
+    premium = completions[PRIORITY_PREMIUM]
+    premium_p95 = f"{percentile(premium, 0.95):>11.2f}" if premium else f"{'-':>11}"
+    print(
+        f"{name:<12} | {len(done) / wall:>10.2f} | {percentile(done, 0.5):>7.2f} | "
+        f"{percentile(done, 0.95):>7.2f} | {premium_p95} | {rejected:>8}"
+    )
+
+
+async def main_async(args):
+    max_concurrent = args.max_concurrent or default_max_concurrent_merges()
+    print(
+        f"{args.merges} merges of a {args.clip_seconds}s clip ({args.job}), {os.cpu_count()} CPUs, "
+        f"{settings.MERGE_FFMPEG_THREADS} threads per merge, scheduler: {max_concurrent} concurrent / {args.max_queued} queued\n"
+    )
+    print(f"{'mode':<12} | {'merges/s':>10} | {'p50 s':>7} | {'p95 s':>7} | {'premium p95':>11} | {'rejected':>8}")
+    print("-" * 72)
+
+    if not args.skip_unbounded:
+        report("unbounded", *await run_burst(args, None))
+    scheduler = MergeScheduler(max_concurrent=max_concurrent, max_queued=args.max_queued)
+    report("scheduled", *await run_burst(args, scheduler))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the merge scheduler")
+    parser.add_argument("--merges", type=int, default=16, help="Merges submitted in one burst")
+    parser.add_argument("--clip-seconds", type=float, default=3.0, help="Length of each synthetic merge")
+    parser.add_argument("--job", choices=["ffmpeg", "sleep"], default="ffmpeg")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="Default: CPU cores // MERGE_FFMPEG_THREADS")
+    parser.add_argument("--max-queued", type=int, default=settings.MERGE_MAX_QUEUED)
+    parser.add_argument("--premium-every", type=int, default=5, help="Every Nth merge is from a premium user (0: none)")
+    parser.add_argument("--skip-unbounded", action="store_true", help="Only run the scheduled mode")
+    args = parser.parse_args()
+
+    if args.job == "ffmpeg" and not shutil.which("ffmpeg"):
+        parser.error("ffmpeg not found; install it or use --job sleep")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Media Index Backfill Script
+
+Builds the media_objects index (media_id -> S3 key, size, content type, upload time)
+from the objects already in the media bucket. New uploads are indexed as they happen;
+this only needs to run once per environment. Already indexed keys are skipped, so it
+is safe to re-run.
+
+Usage:
+    python tools/migration/backfill_media_index.py
+    python tools/migration/backfill_media_index.py --prefix media/videos/
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'backend'))
+
+from services.s3_media_service import S3MediaService
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the media_id -> S3 key index from an existing bucket"
+    )
+    parser.add_argument(
+        "--prefix",
+        default="media/",
+        help="Only index objects under this key prefix (default: media/)"
+    )
+    args = parser.parse_args()
+
+    s3_service = S3MediaService()
+    logger.info(f"Backfilling media index from s3://{s3_service.bucket_name}/{args.prefix}")
+    counts = s3_service.backfill_media_index(prefix=args.prefix)
+
+    print("\n" + "=" * 60)
+    print("MEDIA INDEX BACKFILL RESULTS")
+    print("=" * 60)
+    print(f"Objects scanned: {counts['scanned']}")
+    print(f"Newly indexed: {counts['indexed']}")
+    print(f"Skipped (already indexed or no media_id): {counts['skipped']}")
+    print(f"Failed: {counts['failed']}")
+
+    sys.exit(1 if counts['failed'] else 0)
+
+
+if __name__ == "__main__":
+    main()